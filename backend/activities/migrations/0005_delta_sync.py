@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:45
+
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Start existing rows from their creation time rather than the time of this migration"""
+    Activity = apps.get_model('activities', 'Activity')
+    Activity.objects.using(schema_editor.connection.alias).update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0004_add_activity_fields'),
+        ('apartments', '0004_apartment_extra_data'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique UUID identifier for security', primary_key=True, serialize=False, unique=True)),
+                ('model', models.CharField(help_text="Label of the deleted row's model", max_length=100)),
+                ('object_id', models.CharField(help_text='UUID of the deleted row', max_length=100)),
+                ('scope', models.CharField(blank=True, help_text='Issue, user or apartment the row belonged to', max_length=100)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['updated_at', 'id'], name='activities__updated_28017c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['apartment', 'updated_at'], name='activities__apartme_21f144_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'scope', 'deleted_at'], name='activities__model_026a1a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'deleted_at'], name='activities__model_b8a3bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='activities__deleted_4a270c_idx'),
+        ),
+    ]
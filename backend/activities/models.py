@@ -1,6 +1,7 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from apartments.models import Apartment
 
 
@@ -79,10 +80,15 @@ class Activity(models.Model):
     type = models.CharField(max_length=20, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Activities'
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),  # Delta sync (config.delta_sync)
+            models.Index(fields=['apartment', 'updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.action}"
@@ -153,3 +159,35 @@ class ManualNote(models.Model):
     
     def __str__(self):
         return f"Manual note for {self.apartment.name}"
+
+
+class Tombstone(models.Model):
+    """
+    Row deleted from a delta-synced collection (see config.delta_sync), so
+    clients syncing with a `since` cursor can drop it. Kept for
+    DELTA_SYNC_TOMBSTONE_RETENTION days.
+    """
+    # Secure UUID Primary Key
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        unique=True,
+        help_text="Unique UUID identifier for security"
+    )
+    
+    model = models.CharField(max_length=100, help_text="Label of the deleted row's model")
+    object_id = models.CharField(max_length=100, help_text="UUID of the deleted row")
+    scope = models.CharField(max_length=100, blank=True, help_text="Issue, user or apartment the row belonged to")
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['model', 'scope', 'deleted_at']),
+            models.Index(fields=['model', 'deleted_at']),
+            models.Index(fields=['deleted_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
@@ -7,6 +7,7 @@ from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
 import threading
 
+from config.delta_sync import TRACKED_DELETIONS, record_deletion
 from .models import Activity
 
 # Thread-local storage for current user
@@ -265,3 +266,10 @@ def log_model_delete(sender, instance, **kwargs):
         return
     
     log_activity(instance, 'deleted')
+
+
+@receiver(post_delete)
+def record_tombstone(sender, instance, **kwargs):
+    """Remember deleted rows of delta-synced collections for clients syncing with a cursor"""
+    if sender._meta.label in TRACKED_DELETIONS:
+        record_deletion(instance)
@@ -1,12 +1,13 @@
 from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from config.delta_sync import DeltaSyncListMixin
 from config.swagger_utils import add_viewset_tags
 from .models import Activity, AINote, ManualNote
 from .serializers import ActivitySerializer, AINoteSerializer, ManualNoteSerializer
 
 
 @add_viewset_tags('Activities', 'Activity')
-class ActivityViewSet(viewsets.ModelViewSet):
+class ActivityViewSet(DeltaSyncListMixin, viewsets.ModelViewSet):
     queryset = Activity.objects.select_related('apartment').all()
     serializer_class = ActivitySerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -15,6 +16,10 @@ class ActivityViewSet(viewsets.ModelViewSet):
     ordering_fields = ['timestamp', 'created_at']
     ordering = ['-timestamp']
 
+    def get_delta_scope(self):
+        # Deletions are recorded per apartment
+        return self.request.query_params.get('apartment') or None
+
 
 @add_viewset_tags('Activities', 'AI Note')
 class AINoteViewSet(viewsets.ModelViewSet):
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ClientsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clients'
+    
+    def ready(self):
+        # Import signals to register them
+        import clients.signals  # noqa
@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils.functional import cached_property
 from django.core.validators import EmailValidator
 
 
@@ -53,3 +54,13 @@ class Client(models.Model):
     
     def __str__(self):
         return self.name
+    
+    @cached_property
+    def portfolio_stats(self):
+        """
+        Apartment, product, financial, order, delivery, issue and vendor
+        statistics of this client (see clients.portfolio); list serializers
+        prime it for a whole page of clients at once.
+        """
+        from .portfolio import get_portfolio_stats
+        return get_portfolio_stats([self.pk])[self.pk]
@@ -0,0 +1,192 @@
+"""
+Portfolio statistics of clients: their apartments, and the products,
+orders, deliveries, issues and vendors of those apartments.
+
+Each model is aggregated with one query grouped by client, for one or many
+clients at once, instead of listing a client's apartment ids and counting
+model by model. Results are kept per client in the
+CLIENT_STATS_CACHE_ALIAS cache for CLIENT_STATS_CACHE_TTL seconds and
+dropped when a change to one of the client's apartments, or a product,
+order, delivery or issue of them, commits (see clients.signals). The
+client list primes the statistics of a whole page with one cache read.
+"""
+import logging
+import threading
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'client-stats'
+OPEN_ISSUE_STATUSES = ['Open', 'In Progress']
+
+_pending = threading.local()
+
+
+def get_cache():
+    return caches[getattr(settings, 'CLIENT_STATS_CACHE_ALIAS', 'client_stats')]
+
+
+def _stats_key(client_id):
+    return f'{KEY_PREFIX}:{client_id}'
+
+
+def _empty_stats():
+    return {
+        'apartments': {'total': 0, 'by_status': {}, 'by_type': {}},
+        'products': {'total': 0, 'total_value': 0.0, 'by_status': {}},
+        'financial': {'total_spent': 0.0, 'total_paid': 0.0, 'outstanding': 0.0},
+        'orders': {'count': 0},
+        'deliveries': {'count': 0},
+        'issues': {'open_count': 0, 'total_count': 0},
+        'vendors': {'count': 0},
+    }
+
+
+def load_portfolio_stats(client_ids):
+    """
+    Return {client_id: statistics} for the given clients, computed with one
+    grouped query per model (seven queries however many clients).
+    """
+    from apartments.models import Apartment
+    from deliveries.models import Delivery
+    from issues.models import Issue
+    from orders.models import Order
+    from products.models import Product, ProductTag
+
+    client_ids = list({client_id for client_id in client_ids if client_id})
+    if not client_ids:
+        return {}
+    stats = {client_id: _empty_stats() for client_id in client_ids}
+
+    apartment_rows = (
+        Apartment.objects.filter(client_id__in=client_ids).order_by()
+        .values('client_id', 'status', 'type').annotate(count=Count('pk'))
+    )
+    for row in apartment_rows:
+        apartments = stats[row['client_id']]['apartments']
+        apartments['total'] += row['count']
+        apartments['by_status'][row['status']] = apartments['by_status'].get(row['status'], 0) + row['count']
+        apartments['by_type'][row['type']] = apartments['by_type'].get(row['type'], 0) + row['count']
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    product_rows = (
+        Product.objects.filter(apartment__client_id__in=client_ids).order_by()
+        .values('apartment__client_id').annotate(
+            total=Count('pk'),
+            total_value=Sum(F('unit_price') * F('qty'), output_field=money),
+            total_paid=Sum('paid_amount'),
+            total_payable=Sum('payment_amount'),
+            vendors=Count('vendor', distinct=True),
+        )
+    )
+    for row in product_rows:
+        client_stats = stats[row['apartment__client_id']]
+        total_value = float(row['total_value'] or 0)
+        total_paid = float(row['total_paid'] or 0)
+        client_stats['products'].update(total=row['total'], total_value=total_value)
+        client_stats['financial'] = {
+            'total_spent': total_value,
+            'total_paid': total_paid,
+            'outstanding': float(row['total_payable'] or 0) - total_paid,
+        }
+        client_stats['vendors']['count'] = row['vendors']
+
+    # Status tags are counted from the ProductTag index (a product counts once per tag)
+    tag_rows = (
+        ProductTag.objects.filter(apartment__client_id__in=client_ids, kind=ProductTag.STATUS).order_by()
+        .values_list('apartment__client_id', 'tag').annotate(count=Count('pk'))
+    )
+    for client_id, tag, count in tag_rows:
+        stats[client_id]['products']['by_status'][tag] = count
+
+    for model, section, key in ((Order, 'orders', 'count'), (Delivery, 'deliveries', 'count')):
+        rows = (
+            model.objects.filter(apartment__client_id__in=client_ids).order_by()
+            .values_list('apartment__client_id').annotate(count=Count('pk'))
+        )
+        for client_id, count in rows:
+            stats[client_id][section][key] = count
+
+    issue_rows = (
+        Issue.objects.filter(apartment__client_id__in=client_ids).order_by()
+        .values_list('apartment__client_id').annotate(
+            total=Count('pk'),
+            open=Count('pk', filter=Q(status__in=OPEN_ISSUE_STATUSES)),
+        )
+    )
+    for client_id, total, open_count in issue_rows:
+        stats[client_id]['issues'] = {'open_count': open_count, 'total_count': total}
+
+    return stats
+
+
+def get_portfolio_stats(client_ids):
+    """{client_id: statistics}, from the cache where possible"""
+    client_ids = {client_id for client_id in client_ids if client_id}
+    cache = get_cache()
+    keys = {_stats_key(client_id): client_id for client_id in client_ids}
+    try:
+        cached = cache.get_many(list(keys))
+    except Exception as e:
+        logger.error(f"Client statistics cache read failed: {str(e)}")
+        cached = {}
+
+    stats = {keys[key]: value for key, value in cached.items()}
+    missing = client_ids - set(stats)
+    if missing:
+        loaded = load_portfolio_stats(missing)
+        stats.update(loaded)
+        try:
+            cache.set_many(
+                {_stats_key(client_id): value for client_id, value in loaded.items()},
+                timeout=getattr(settings, 'CLIENT_STATS_CACHE_TTL', 300),
+            )
+        except Exception as e:
+            logger.error(f"Client statistics cache write failed: {str(e)}")
+    return stats
+
+
+def prime_portfolio_stats(clients):
+    """Load the statistics of all clients at once and cache them on each instance"""
+    stats = get_portfolio_stats(client.pk for client in clients)
+    for client in clients:
+        if client.pk in stats:
+            client.__dict__['portfolio_stats'] = stats[client.pk]
+
+
+def schedule_stats_invalidation(client_id=None, apartment_id=None):
+    """
+    Drop a client's statistics when the current transaction commits, once
+    per transaction. Pass the apartment of a changed row; its client is
+    looked up at commit, in one query for all pending apartments.
+    """
+    pending = getattr(_pending, 'changes', None)
+    if pending is None:
+        pending = _pending.changes = {'clients': set(), 'apartments': set()}
+    if client_id:
+        pending['clients'].add(client_id)
+    if apartment_id:
+        pending['apartments'].add(apartment_id)
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    from apartments.models import Apartment
+
+    pending = getattr(_pending, 'changes', None)
+    _pending.changes = None
+    if not pending:
+        return
+    try:
+        client_ids = set(pending['clients'])
+        if pending['apartments']:
+            client_ids.update(
+                Apartment.objects.filter(pk__in=pending['apartments']).values_list('client_id', flat=True)
+            )
+        if client_ids:
+            get_cache().delete_many([_stats_key(client_id) for client_id in client_ids])
+    except Exception as e:
+        logger.error(f"Failed to invalidate client statistics: {str(e)}")
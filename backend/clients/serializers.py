@@ -4,6 +4,7 @@ from django.db.models import Sum, Count
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
 from typing import Dict, Any
+from .portfolio import prime_portfolio_stats
 
 
 class ClientSerializer(serializers.ModelSerializer):
@@ -27,6 +28,34 @@ class ClientSerializer(serializers.ModelSerializer):
         return obj.apartments.count()
 
 
+class ClientStatsListSerializer(serializers.ListSerializer):
+    """
+    Serializes a page of clients with their portfolio statistics loaded for
+    all of them at once (see clients.portfolio), instead of client by client.
+    """
+
+    def to_representation(self, data):
+        clients = list(data.all() if hasattr(data, 'all') else data)
+        if clients:
+            prime_portfolio_stats(clients)
+        return super().to_representation(clients)
+
+
+class ClientListSerializer(ClientSerializer):
+    """Client list entry with live portfolio statistics"""
+    statistics = serializers.SerializerMethodField()
+    
+    class Meta(ClientSerializer.Meta):
+        fields = ClientSerializer.Meta.fields + ['statistics']
+        read_only_fields = ClientSerializer.Meta.read_only_fields + ['statistics']
+        list_serializer_class = ClientStatsListSerializer
+    
+    @extend_schema_field(OpenApiTypes.OBJECT)
+    def get_statistics(self, obj) -> Dict[str, Any]:
+        """Portfolio statistics of this client"""
+        return obj.portfolio_stats
+
+
 class ClientDetailSerializer(serializers.ModelSerializer):
     """
     Detailed client serializer with apartments, products, and statistics
@@ -48,9 +77,13 @@ class ClientDetailSerializer(serializers.ModelSerializer):
     def get_apartments(self, obj) -> Dict[str, Any]:
         """Get all apartments for this client"""
         from apartments.serializers import ApartmentSerializer
-        apartments = obj.apartments.all()
+        apartments = list(obj.apartments.all())
+        # The nested client details are this client; reuse it and its known apartment count
+        obj.apartments_count_annotated = len(apartments)
+        for apartment in apartments:
+            apartment.client = obj
         return {
-            'count': apartments.count(),
+            'count': len(apartments),
             'data': ApartmentSerializer(apartments, many=True).data
         }
     
@@ -59,93 +92,23 @@ class ClientDetailSerializer(serializers.ModelSerializer):
         """Get all products across all apartments for this client"""
         from products.serializers import ProductSerializer
         from products.models import Product
-        from decimal import Decimal
         
-        # Get all apartments for this client
-        apartment_ids = obj.apartments.values_list('id', flat=True)
-        
-        # Get all products for these apartments
-        products = Product.objects.filter(apartment_id__in=apartment_ids).select_related(
+        products = Product.objects.filter(apartment__client=obj).select_related(
             'apartment', 'vendor'
         )
-        
-        # Calculate total value from unit_price * qty
-        total_value = Decimal('0')
-        for product in products:
-            if product.unit_price:
-                total_value += (product.unit_price * product.qty)
-        
+        stats = obj.portfolio_stats['products']
         return {
-            'count': products.count(),
-            'total_value': float(total_value),
+            'count': stats['total'],
+            'total_value': stats['total_value'],
             'data': ProductSerializer(products, many=True, context=self.context).data
         }
     
     @extend_schema_field(OpenApiTypes.OBJECT)
     def get_statistics(self, obj) -> Dict[str, Any]:
         """Get comprehensive statistics for this client"""
-        from products.models import Product
-        from decimal import Decimal
-        
-        # Get apartments
-        apartments = obj.apartments.all()
-        
-        # Apartment statistics
-        apartment_stats = {
-            'total': apartments.count(),
-            'by_status': {},
-            'by_type': {}
-        }
-        
-        for apt in apartments:
-            status = apt.status
-            apt_type = apt.type
-            apartment_stats['by_status'][status] = apartment_stats['by_status'].get(status, 0) + 1
-            apartment_stats['by_type'][apt_type] = apartment_stats['by_type'].get(apt_type, 0) + 1
-        
-        # Get all products for this client's apartments
-        apartment_ids = apartments.values_list('id', flat=True)
-        products = Product.objects.filter(apartment_id__in=apartment_ids)
-        
-        # Calculate total value from unit_price * qty
-        total_value = Decimal('0')
-        total_paid = Decimal('0')
-        total_payable = Decimal('0')
-        
-        product_status_counts = {}
-        
-        for product in products:
-            # Calculate value
-            if product.unit_price:
-                total_value += (product.unit_price * product.qty)
-            
-            # Sum paid and payable amounts (handle None values)
-            if product.paid_amount:
-                total_paid += product.paid_amount
-            if product.payment_amount:
-                total_payable += product.payment_amount
-            
-            # Count by status (status is now an array)
-            status_array = product.status if isinstance(product.status, list) else []
-            for status in status_array:
-                product_status_counts[status] = product_status_counts.get(status, 0) + 1
-        
-        # Product statistics
-        product_stats = {
-            'total': products.count(),
-            'total_value': float(total_value),
-            'by_status': product_status_counts
-        }
-        
-        # Financial statistics
-        financial_stats = {
-            'total_spent': float(total_value),
-            'total_paid': float(total_paid),
-            'outstanding': float(total_payable - total_paid)
-        }
-        
+        stats = obj.portfolio_stats
         return {
-            'apartments': apartment_stats,
-            'products': product_stats,
-            'financial': financial_stats
+            'apartments': stats['apartments'],
+            'products': stats['products'],
+            'financial': stats['financial']
         }
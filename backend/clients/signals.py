@@ -0,0 +1,41 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from apartments.models import Apartment
+from deliveries.models import Delivery
+from issues.models import Issue
+from orders.models import Order
+from products.models import Product
+from .portfolio import schedule_stats_invalidation
+
+
+@receiver(pre_save, sender=Apartment)
+def remember_previous_client(sender, instance, **kwargs):
+    """When an existing apartment is moved to another client, the old client needs a refresh too"""
+    if instance._state.adding:
+        return
+    instance._previous_client_id = sender.objects.filter(pk=instance.pk).values_list(
+        'client_id', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Apartment)
+@receiver(post_delete, sender=Apartment)
+def invalidate_client_stats_for_apartment(sender, instance, **kwargs):
+    """An apartment changed: its client's statistics are recomputed on next read"""
+    schedule_stats_invalidation(client_id=instance.client_id)
+    previous_client_id = getattr(instance, '_previous_client_id', None)
+    if previous_client_id != instance.client_id:
+        schedule_stats_invalidation(client_id=previous_client_id)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Delivery)
+@receiver(post_delete, sender=Delivery)
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def invalidate_client_stats_for_child(sender, instance, **kwargs):
+    """A row of an apartment changed: the apartment's client is resolved when the transaction commits"""
+    schedule_stats_invalidation(apartment_id=instance.apartment_id)
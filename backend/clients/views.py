@@ -5,8 +5,9 @@ from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter, OpenApiResponse
 from drf_spectacular.openapi import OpenApiTypes
 from django.db.models import Sum, Count, Q
+from config.query_stats import QueryDebugHeadersMixin
 from .models import Client
-from .serializers import ClientSerializer, ClientDetailSerializer
+from .serializers import ClientSerializer, ClientListSerializer, ClientDetailSerializer
 
 
 @extend_schema_view(
@@ -41,7 +42,7 @@ from .serializers import ClientSerializer, ClientDetailSerializer
         description='Delete a client record'
     ),
 )
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(QueryDebugHeadersMixin, viewsets.ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -62,6 +63,8 @@ class ClientViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'retrieve' or self.action == 'details':
             return ClientDetailSerializer
+        if self.action == 'list':
+            return ClientListSerializer
         return ClientSerializer
 
     @extend_schema(
@@ -129,27 +132,16 @@ class ClientViewSet(viewsets.ModelViewSet):
         client = self.get_object()
         from products.serializers import ProductSerializer
         from products.models import Product
-        from decimal import Decimal
         
-        # Get all apartments for this client
-        apartment_ids = client.apartments.values_list('id', flat=True)
-        
-        # Get all products for these apartments
-        products = Product.objects.filter(apartment_id__in=apartment_ids).select_related(
+        products = Product.objects.filter(apartment__client=client).select_related(
             'apartment', 'vendor'
         )
-        
         serializer = ProductSerializer(products, many=True, context={'request': request})
         
-        # Calculate total value from unit_price * qty
-        total_value = Decimal('0')
-        for product in products:
-            if product.unit_price:
-                total_value += (product.unit_price * product.qty)
-        
+        stats = client.portfolio_stats['products']
         return Response({
-            'count': products.count(),
-            'total_value': float(total_value),
+            'count': stats['total'],
+            'total_value': stats['total_value'],
             'products': serializer.data
         })
 
@@ -198,68 +190,12 @@ class ClientViewSet(viewsets.ModelViewSet):
         Get comprehensive statistics for this client
         """
         client = self.get_object()
-        from products.models import Product
-        from decimal import Decimal
-        
-        # Get apartments
-        apartments = client.apartments.all()
-        
-        # Apartment statistics
-        apartment_stats = {
-            'total': apartments.count(),
-            'by_status': {},
-            'by_type': {}
-        }
-        
-        for apt in apartments:
-            status = apt.status
-            apt_type = apt.type
-            apartment_stats['by_status'][status] = apartment_stats['by_status'].get(status, 0) + 1
-            apartment_stats['by_type'][apt_type] = apartment_stats['by_type'].get(apt_type, 0) + 1
-        
-        # Get all products for this client's apartments
-        apartment_ids = apartments.values_list('id', flat=True)
-        products = Product.objects.filter(apartment_id__in=apartment_ids)
-        
-        # Calculate totals
-        total_value = Decimal('0')
-        total_paid = Decimal('0')
-        total_payable = Decimal('0')
-        product_status_counts = {}
-        
-        for product in products:
-            # Calculate value
-            if product.unit_price:
-                total_value += (product.unit_price * product.qty)
-            
-            # Sum paid and payable amounts (handle None values)
-            if product.paid_amount:
-                total_paid += product.paid_amount
-            if product.payment_amount:
-                total_payable += product.payment_amount
-            
-            # Count by status
-            status = product.status
-            product_status_counts[status] = product_status_counts.get(status, 0) + 1
-        
-        # Product statistics
-        product_stats = {
-            'total': products.count(),
-            'total_value': float(total_value),
-            'by_status': product_status_counts
-        }
-        
-        # Financial statistics
-        financial_stats = {
-            'total_spent': float(total_value),
-            'total_paid': float(total_paid),
-            'outstanding': float(total_payable - total_paid)
-        }
+        stats = client.portfolio_stats
         
         return Response({
-            'apartments': apartment_stats,
-            'products': product_stats,
-            'financial': financial_stats
+            'apartments': stats['apartments'],
+            'products': stats['products'],
+            'financial': stats['financial']
         })
 
     @extend_schema(
@@ -278,47 +214,14 @@ class ClientViewSet(viewsets.ModelViewSet):
         client = self.get_object()
         serializer = self.get_serializer(client)
         
-        # Get additional data for the client
-        from orders.models import Order
-        from deliveries.models import Delivery
-        from issues.models import Issue
-        from vendors.models import Vendor
-        from products.models import Product
-        
-        # Get apartments for this client
-        apartments = client.apartments.all()
-        apartment_ids = apartments.values_list('id', flat=True)
-        
-        # Get orders count
-        orders_count = Order.objects.filter(apartment_id__in=apartment_ids).count()
-        
-        # Get deliveries count
-        deliveries_count = Delivery.objects.filter(apartment_id__in=apartment_ids).count()
-        
-        # Get issues count (open and total)
-        issues = Issue.objects.filter(apartment_id__in=apartment_ids)
-        open_issues_count = issues.filter(status__in=['Open', 'In Progress']).count()
-        total_issues_count = issues.count()
-        
-        # Get unique vendors count
-        products = Product.objects.filter(apartment_id__in=apartment_ids)
-        vendor_ids = products.values_list('vendor_id', flat=True).distinct()
-        vendors_count = vendor_ids.count()
+        # Counts of the client's orders, deliveries, issues and vendors
+        stats = client.portfolio_stats
         
         # Add extra data to response
         response_data = serializer.data
-        response_data['orders'] = {
-            'count': orders_count
-        }
-        response_data['deliveries'] = {
-            'count': deliveries_count
-        }
-        response_data['issues'] = {
-            'open_count': open_issues_count,
-            'total_count': total_issues_count
-        }
-        response_data['vendors'] = {
-            'count': vendors_count
-        }
+        response_data['orders'] = stats['orders']
+        response_data['deliveries'] = stats['deliveries']
+        response_data['issues'] = stats['issues']
+        response_data['vendors'] = stats['vendors']
         
         return Response(response_data)
@@ -0,0 +1,245 @@
+"""
+Delta sync and conditional GET for polled collections (issue conversations,
+notifications, activities).
+
+Every response carries an ETag and Last-Modified computed from two small
+aggregate queries (latest updated_at and row count, latest deletion), so a
+poll of an unchanged collection is answered with 304 Not Modified and no
+body. It
+also carries an X-Delta-Cursor header; passing it back as `?since=<cursor>`
+returns only the rows created or updated after it, in (updated_at, id)
+keyset order, plus the ids of rows deleted since (Tombstone rows written
+by a post_delete receiver in activities.signals):
+
+    {"results": [...], "deleted": [...], "cursor": "...", "has_more": false, "reset": false}
+
+Keep requesting with the returned cursor while has_more is true. `since`
+also accepts an ISO timestamp. A row saved in a transaction that commits
+later carries an updated_at from before the commit, possibly older than a
+cursor handed out meanwhile, so the cursors ending a sync point
+COMMIT_OVERLAP back in time: the next delta repeats rows changed in that
+window, and clients merge results by id. A cursor issued longer ago than the
+tombstone retention (DELTA_SYNC_TOMBSTONE_RETENTION days) cannot account
+for every deletion: the response then restarts from the beginning with
+"reset": true, and the client should drop its copy. Filters still apply to a delta, so a row
+that stops matching a filter simply stops appearing; clients keeping a
+copy should sync the unfiltered collection.
+"""
+import base64
+import hashlib
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# Model label -> field naming the collection a deleted row belonged to
+TRACKED_DELETIONS = {
+    'issues.AICommunicationLog': 'issue_id',
+    'notifications.Notification': 'user_id',
+    'activities.Activity': 'apartment_id',
+}
+
+CURSOR_HEADER = 'X-Delta-Cursor'
+PRUNE_INTERVAL = 3600
+# How long a write may take to commit after taking its timestamp; deltas re-scan that window
+COMMIT_OVERLAP = timedelta(seconds=10)
+
+Version = namedtuple('Version', ['etag', 'last_modified', 'cursor', 'count'])
+
+_last_prune = 0.0
+
+
+def encode_cursor(timestamp, pk='', issued_at=None):
+    """
+    Opaque cursor: the (timestamp, pk) keyset position of the last row the
+    client has, and when the cursor was issued, from which on deletions count.
+    """
+    issued_at = issued_at or timezone.now()
+    raw = f"{timestamp.isoformat()}|{pk}|{issued_at.isoformat()}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """(timestamp, pk, issued_at) of a cursor; a bare timestamp has no pk and was issued at that time"""
+    try:
+        timestamp = _parse_timestamp(value)
+        return timestamp, '', timestamp
+    except ValueError:
+        pass
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        timestamp, pk, issued_at = raw.split('|')
+        return _parse_timestamp(timestamp), pk, _parse_timestamp(issued_at)
+    except ValueError:
+        raise ValidationError({'since': 'Invalid cursor.'})
+
+
+def _parse_timestamp(value):
+    timestamp = datetime.fromisoformat(value)
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp, timezone.get_current_timezone())
+    return timestamp
+
+
+def record_deletion(instance):
+    """Write the tombstone of a deleted row of a TRACKED_DELETIONS model"""
+    from activities.models import Tombstone
+
+    label = instance._meta.label
+    scope = getattr(instance, TRACKED_DELETIONS[label])
+    try:
+        Tombstone.objects.create(model=label, object_id=str(instance.pk), scope=str(scope or ''))
+        _prune_if_due()
+    except Exception as e:
+        logger.error(f"Failed to record the deletion of {label} {instance.pk}: {str(e)}")
+
+
+def _prune_if_due():
+    from activities.models import Tombstone
+
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    Tombstone.objects.filter(deleted_at__lt=_retention_start()).delete()
+
+
+def _retention_start():
+    return timezone.now() - timedelta(days=getattr(settings, 'DELTA_SYNC_TOMBSTONE_RETENTION', 30))
+
+
+def _tombstones(model, scope):
+    from activities.models import Tombstone
+
+    tombstones = Tombstone.objects.filter(model=model._meta.label)
+    if scope is not None:
+        tombstones = tombstones.filter(scope=str(scope))
+    return tombstones
+
+
+def collection_version(queryset, field='updated_at', scope=None, extra=(), since=''):
+    """
+    Version of a collection: ETag, Last-Modified and the cursor a client
+    starts delta syncing from. `scope` limits the tombstones considered to
+    one collection (e.g. an issue id); `extra` are timestamps of things
+    rendered alongside the rows, such as the issue itself. A delta response
+    depends on its `since` cursor too, so it is part of the ETag.
+    """
+    issued_at = timezone.now()
+    stats = queryset.order_by().aggregate(latest=Max(field), count=Count('pk'))
+    deleted = _tombstones(queryset.model, scope).aggregate(latest=Max('deleted_at'))['latest']
+    timestamps = [timestamp for timestamp in (stats['latest'], deleted, *extra) if timestamp]
+    last_modified = max(timestamps) if timestamps else None
+
+    state = ':'.join(timestamp.isoformat() if timestamp else '' for timestamp in (stats['latest'], deleted, *extra))
+    etag = '"%s"' % hashlib.md5(f"{state}:{stats['count']}:{since}".encode()).hexdigest()
+    cursor = encode_cursor(_overlapped(stats['latest'], issued_at), issued_at=issued_at)
+    return Version(etag, last_modified, cursor, stats['count'])
+
+
+def _overlapped(timestamp, now):
+    """Cursor timestamp at most COMMIT_OVERLAP before `now`, so rows still committing are picked up"""
+    start = now - COMMIT_OVERLAP
+    return min(timestamp, start) if timestamp else start
+
+
+def not_modified(request, version):
+    """A 304 response when the client's copy matches `version`, else None"""
+    last_modified = int(version.last_modified.timestamp()) if version.last_modified else None
+    response = get_conditional_response(request, etag=version.etag, last_modified=last_modified)
+    if response is not None:
+        response = set_version_headers(response, version)
+    return response
+
+
+def set_version_headers(response, version):
+    response['ETag'] = version.etag
+    if version.last_modified:
+        response['Last-Modified'] = http_date(version.last_modified.timestamp())
+    if version.cursor:
+        response[CURSOR_HEADER] = version.cursor
+    # Per-user data: browsers may keep it but must revalidate on every poll
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def changes_since(queryset, since, serialize, field='updated_at', scope=None, limit=None):
+    """
+    Body of a `?since=` response: rows of `queryset` changed after the
+    cursor (serialized by `serialize`) and ids of rows deleted after it.
+    """
+    limit = limit or getattr(settings, 'DELTA_SYNC_PAGE_SIZE', 200)
+    timestamp, pk, issued_at = decode_cursor(since)
+    now = timezone.now()
+    reset = issued_at < _retention_start()
+
+    rows = queryset.order_by(field, 'pk')
+    if reset:
+        timestamp, pk = None, ''
+    elif pk:
+        rows = rows.filter(Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'pk__gt': pk}))
+    else:
+        rows = rows.filter(**{f'{field}__gt': timestamp})
+    rows = list(rows[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        timestamp, pk = getattr(rows[-1], field), rows[-1].pk
+    if not has_more:
+        # The client is up to date: restart the next delta COMMIT_OVERLAP back for rows still committing
+        overlapped = _overlapped(timestamp, now)
+        if overlapped != timestamp:
+            timestamp, pk = overlapped, ''
+
+    deleted = []
+    if not reset:
+        # Overlap the previous response a little: a deletion may commit after its
+        # tombstone time. Deletions are final, so repeating one is harmless.
+        tombstones = _tombstones(queryset.model, scope).filter(deleted_at__gt=issued_at - COMMIT_OVERLAP)
+        deleted = list(tombstones.order_by('deleted_at').values_list('object_id', flat=True))
+
+    return {
+        'results': serialize(rows),
+        'deleted': deleted,
+        'cursor': encode_cursor(timestamp, pk, issued_at=now),
+        'has_more': has_more,
+        'reset': reset,
+    }
+
+
+class DeltaSyncListMixin:
+    """
+    ViewSet mixin adding conditional GET and `?since=` deltas to list().
+    Override get_delta_scope() when the filtered list is one tombstone scope.
+    """
+    delta_field = 'updated_at'
+
+    def get_delta_scope(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        scope = self.get_delta_scope()
+        since = request.query_params.get('since', '')
+        version = collection_version(queryset, self.delta_field, scope=scope, since=since)
+        response = not_modified(request, version)
+        if response is not None:
+            return response
+
+        if not since:
+            return set_version_headers(super().list(request, *args, **kwargs), version)
+        delta = changes_since(
+            queryset, since, lambda rows: self.get_serializer(rows, many=True).data,
+            field=self.delta_field, scope=scope,
+        )
+        return set_version_headers(Response(delta), version._replace(cursor=delta['cursor']))
@@ -0,0 +1,58 @@
+"""
+Helpers for reporting how many database queries a view ran and how long
+they took, as response headers (X-DB-Query-Count, X-DB-Time-Ms and a
+Server-Timing entry that browser dev tools display).
+Enabled by QUERY_DEBUG_HEADERS, which defaults to DEBUG.
+"""
+import time
+from django.conf import settings
+from django.db import connection
+
+
+class QueryStats:
+    """
+    Context manager counting queries run on the default connection and
+    their total duration. Uses an execute wrapper, so it works with DEBUG off.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    @property
+    def milliseconds(self):
+        return self.seconds * 1000
+
+    def apply_headers(self, response):
+        response['X-DB-Query-Count'] = str(self.count)
+        response['X-DB-Time-Ms'] = f'{self.milliseconds:.1f}'
+        response['Server-Timing'] = f'db;dur={self.milliseconds:.1f};desc="{self.count} queries"'
+        return response
+
+
+class QueryDebugHeadersMixin:
+    """APIView mixin adding the query count / DB time headers to every response"""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not getattr(settings, 'QUERY_DEBUG_HEADERS', settings.DEBUG):
+            return super().dispatch(request, *args, **kwargs)
+        with QueryStats() as stats:
+            response = super().dispatch(request, *args, **kwargs)
+        return stats.apply_headers(response)
@@ -110,6 +110,10 @@ if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
         'init_command': 'PRAGMA foreign_keys=ON;',
     }
 
+# The migration history does not replay on an empty database (products 0014 re-adds
+# columns of 0001), so test databases are created from the models
+DATABASES['default']['TEST'] = {'MIGRATE': False}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -400,3 +404,135 @@ SENDGRID_WEBHOOK_URL = config('SENDGRID_WEBHOOK_URL', default='')
 # AI Configuration
 AI_AUTO_MODE = config('AI_AUTO_MODE', default=False, cast=bool)  # Auto-send without approval
 AI_CONFIDENCE_THRESHOLD = config('AI_CONFIDENCE_THRESHOLD', default=0.8, cast=float)
+
+# Product Import Settings
+PRODUCT_IMPORT_BULK_MODE = config('PRODUCT_IMPORT_BULK_MODE', default=True, cast=bool)  # Write imported rows with bulk_create/bulk_update
+PRODUCT_IMPORT_BATCH_SIZE = config('PRODUCT_IMPORT_BATCH_SIZE', default=500, cast=int)  # Rows per bulk write batch
+
+# Import Job Settings (background product/order imports)
+IMPORT_JOB_BACKEND = config('IMPORT_JOB_BACKEND', default='products.import_jobs.ProcessPoolImportJobBackend')  # Or SyncImportJobBackend / ThreadImportJobBackend
+IMPORT_JOB_WORKERS = config('IMPORT_JOB_WORKERS', default=2, cast=int)  # Worker processes per web process
+IMPORT_JOBS_ASYNC_DEFAULT = config('IMPORT_JOBS_ASYNC_DEFAULT', default=False, cast=bool)  # Run uploads in the background when the request does not say
+IMPORT_PROGRESS_STREAM_TIMEOUT = config('IMPORT_PROGRESS_STREAM_TIMEOUT', default=60, cast=int)  # Max seconds an import progress stream holds a worker before the client reconnects
+IMPORT_PROGRESS_STREAM_RETRY_MS = config('IMPORT_PROGRESS_STREAM_RETRY_MS', default=2000, cast=int)  # Reconnect delay advertised to EventSource clients
+IMPORT_JOB_HEARTBEAT_INTERVAL = config('IMPORT_JOB_HEARTBEAT_INTERVAL', default=30, cast=int)  # Seconds between liveness updates of a running import job
+IMPORT_JOB_STALE_AFTER = config('IMPORT_JOB_STALE_AFTER', default=300, cast=int)  # Seconds without progress or heartbeat before an import is failed (processing) or re-queued (pending)
+
+# Import Image Settings
+IMPORT_IMAGE_FETCH_WORKERS = config('IMPORT_IMAGE_FETCH_WORKERS', default=8, cast=int)  # Concurrent image downloads per process
+IMPORT_IMAGE_FETCH_TIMEOUT = config('IMPORT_IMAGE_FETCH_TIMEOUT', default=30, cast=int)  # Seconds per image download
+IMPORT_THUMBNAIL_SIZE = config('IMPORT_THUMBNAIL_SIZE', default=300, cast=int)  # Max thumbnail edge in pixels
+
+# Query Debug Settings
+QUERY_DEBUG_HEADERS = config('QUERY_DEBUG_HEADERS', default=DEBUG, cast=bool)  # X-DB-Query-Count / X-DB-Time-Ms / Server-Timing on dashboard responses
+CORS_EXPOSE_HEADERS = ['X-DB-Query-Count', 'X-DB-Time-Ms', 'Server-Timing']
+
+# Dashboard Cache Settings
+DASHBOARD_CACHE_ENABLED = config('DASHBOARD_CACHE_ENABLED', default=True, cast=bool)
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=60, cast=int)  # Seconds a cached dashboard is served as fresh
+DASHBOARD_CACHE_STALE_TTL = config('DASHBOARD_CACHE_STALE_TTL', default=600, cast=int)  # Seconds a stale dashboard is still served while it refreshes
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared by all worker processes; use django.core.cache.backends.redis.RedisCache to share across hosts
+    DASHBOARD_CACHE_ALIAS: {
+        'BACKEND': config('DASHBOARD_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('DASHBOARD_CACHE_LOCATION', default=str(BASE_DIR / 'cache' / 'dashboard')),
+    },
+}
+
+# Report Settings
+REPORT_QUERY_CHUNK_SIZE = config('REPORT_QUERY_CHUNK_SIZE', default=2000, cast=int)  # Rows fetched per database round trip while writing a report
+REPORT_PDF_TABLE_ROWS = config('REPORT_PDF_TABLE_ROWS', default=250, cast=int)  # Rows per PDF table chunk
+REPORT_JOB_BACKEND = config('REPORT_JOB_BACKEND', default='reports.jobs.ThreadReportJobBackend')  # Or SyncReportJobBackend
+REPORT_JOB_WORKERS = config('REPORT_JOB_WORKERS', default=2, cast=int)  # Background report jobs run at once per process
+REPORT_JOB_HEARTBEAT_INTERVAL = config('REPORT_JOB_HEARTBEAT_INTERVAL', default=30, cast=int)  # Seconds between liveness updates of a rendering report job
+REPORT_JOB_STALE_AFTER = config('REPORT_JOB_STALE_AFTER', default=300, cast=int)  # Seconds without a heartbeat before a report job is failed (processing) or re-queued (pending)
+REPORT_JOB_RETENTION_DAYS = config('REPORT_JOB_RETENTION_DAYS', default=7, cast=int)  # Days finished report jobs and their files are kept
+
+# Email Monitor Sync Settings
+EMAIL_MONITOR_KEEP_CONNECTION = config('EMAIL_MONITOR_KEEP_CONNECTION', default=True, cast=bool)  # Reuse the IMAP connection between monitor cycles
+EMAIL_SYNC_BATCH_SIZE = config('EMAIL_SYNC_BATCH_SIZE', default=200, cast=int)  # Messages per batched UID FETCH
+EMAIL_SYNC_INITIAL_MESSAGES = config('EMAIL_SYNC_INITIAL_MESSAGES', default=50, cast=int)  # Latest messages checked on the first sync of a mailbox
+EMAIL_IDLE_TIMEOUT = config('EMAIL_IDLE_TIMEOUT', default=600, cast=int)  # Seconds before an IMAP IDLE is re-issued (servers drop idle clients after ~30 min)
+EMAIL_IDLE_POLL_INTERVAL = config('EMAIL_IDLE_POLL_INTERVAL', default=30, cast=int)  # NOOP poll interval for servers without IDLE
+EMAIL_IDLE_MAX_BACKOFF = config('EMAIL_IDLE_MAX_BACKOFF', default=300, cast=int)  # Max seconds between reconnect attempts
+
+# AI Reply Pipeline Settings
+AI_SERVICE_BACKEND = config('AI_SERVICE_BACKEND', default='')  # Dotted path of an AI service class, overrides USE_MOCK_AI (e.g. issues.ai_services.FakeLatencyAIService)
+AI_REPLY_CONCURRENCY = config('AI_REPLY_CONCURRENCY', default=8, cast=int)  # Vendor replies analysed / drafted at once
+AI_MAX_RETRIES = config('AI_MAX_RETRIES', default=4, cast=int)  # Retries of a rate limited or failed AI call
+AI_RETRY_BASE_DELAY = config('AI_RETRY_BASE_DELAY', default=1.0, cast=float)  # First backoff in seconds when the provider sends no Retry-After
+AI_RETRY_MAX_DELAY = config('AI_RETRY_MAX_DELAY', default=60, cast=int)  # Longest wait between retries
+AI_FAKE_LATENCY = config('AI_FAKE_LATENCY', default=1.0, cast=float)  # Seconds per call of FakeLatencyAIService
+AI_FAKE_RATE_LIMIT_RATE = config('AI_FAKE_RATE_LIMIT_RATE', default=0.0, cast=float)  # Share of FakeLatencyAIService calls that are rate limited
+
+# AI Response Cache Settings
+AI_CACHE_ENABLED = config('AI_CACHE_ENABLED', default=True, cast=bool)
+AI_CACHE_TTL = config('AI_CACHE_TTL', default=3600, cast=int)  # Seconds an identical AI request is answered from the cache
+AI_CACHE_ALIAS = 'ai'
+CACHES[AI_CACHE_ALIAS] = {
+    # Per process by default; use django.core.cache.backends.redis.RedisCache to share answers across workers
+    'BACKEND': config('AI_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+    'LOCATION': config('AI_CACHE_LOCATION', default='ai-responses'),
+    'OPTIONS': {
+        'MAX_ENTRIES': config('AI_CACHE_MAX_ENTRIES', default=1000, cast=int),  # Least recently used entries are evicted beyond this
+        'CULL_FREQUENCY': 10,  # Evict a tenth of the entries at a time
+    },
+}
+
+# AI Conversation Summary Settings
+AI_REPLY_HISTORY_MESSAGES = config('AI_REPLY_HISTORY_MESSAGES', default=5, cast=int)  # Latest emails sent with a reply draft; older ones are covered by the summary
+AI_SUMMARY_BATCH_SIZE = config('AI_SUMMARY_BATCH_SIZE', default=50, cast=int)  # New emails folded into the summary per AI call
+AI_SUMMARY_MIN_NEW_MESSAGES = config('AI_SUMMARY_MIN_NEW_MESSAGES', default=4, cast=int)  # New emails before the reply pipeline updates a summary (0 disables)
+
+# Bulk Email Settings
+EMAIL_BULK_CONNECTIONS = config('EMAIL_BULK_CONNECTIONS', default=3, cast=int)  # SMTP connections used in parallel by bulk sends (mind the provider's limit)
+EMAIL_BULK_RETRIES = config('EMAIL_BULK_RETRIES', default=2, cast=int)  # Reconnects per message when the SMTP connection drops mid-batch
+
+# Email Outbox Settings
+EMAIL_OUTBOX_BACKEND = config('EMAIL_OUTBOX_BACKEND', default='issues.outbox.WorkerOutboxBackend')  # process_email_outbox sends; ThreadOutboxBackend / SyncOutboxBackend send from the web process instead
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)  # Emails a worker claims and sends at once
+EMAIL_OUTBOX_POLL_INTERVAL = config('EMAIL_OUTBOX_POLL_INTERVAL', default=2, cast=float)  # Seconds the worker waits when nothing is due
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)  # Send attempts before an email is marked failed
+EMAIL_OUTBOX_RETRY_BASE_DELAY = config('EMAIL_OUTBOX_RETRY_BASE_DELAY', default=30, cast=int)  # Seconds before the first retry, doubled for each further attempt
+EMAIL_OUTBOX_RETRY_MAX_DELAY = config('EMAIL_OUTBOX_RETRY_MAX_DELAY', default=3600, cast=int)  # Longest wait between attempts
+EMAIL_OUTBOX_CLAIM_TIMEOUT = config('EMAIL_OUTBOX_CLAIM_TIMEOUT', default=600, cast=int)  # Seconds before emails claimed by a worker that died are claimed again
+
+# Email Rendering Settings
+EMAIL_RENDER_CACHE_SIZE = config('EMAIL_RENDER_CACHE_SIZE', default=256, cast=int)  # Formatted message bodies kept per process for re-renders
+
+# Realtime Event Stream Settings
+REALTIME_EVENT_BACKEND = config('REALTIME_EVENT_BACKEND', default='notifications.events.DatabaseEventBackend')  # LocalEventBackend when one process serves requests and streams
+REALTIME_POLL_INTERVAL = config('REALTIME_POLL_INTERVAL', default=0.5, cast=float)  # Seconds between checks for new events in each process serving streams
+REALTIME_EVENT_RETENTION = config('REALTIME_EVENT_RETENTION', default=300, cast=int)  # Seconds events are kept for clients reconnecting with Last-Event-ID
+REALTIME_HEARTBEAT_INTERVAL = config('REALTIME_HEARTBEAT_INTERVAL', default=15, cast=int)  # Seconds between keep-alive comments on an idle stream
+REALTIME_STREAM_TIMEOUT = config('REALTIME_STREAM_TIMEOUT', default=3600, cast=int)  # Seconds before a stream asks the client to reconnect
+REALTIME_RETRY_MS = config('REALTIME_RETRY_MS', default=3000, cast=int)  # Reconnect delay suggested to clients
+REALTIME_SUBSCRIBER_QUEUE_SIZE = config('REALTIME_SUBSCRIBER_QUEUE_SIZE', default=1000, cast=int)  # Undelivered events before a slow stream is closed
+REALTIME_STREAM_TICKET_TTL = config('REALTIME_STREAM_TICKET_TTL', default=30, cast=int)  # Seconds a stream ticket can open a stream; it is in the URL, so access logs see it
+
+# Delta Sync Settings
+DELTA_SYNC_PAGE_SIZE = config('DELTA_SYNC_PAGE_SIZE', default=200, cast=int)  # Changed rows per `?since=` response; clients page on with the returned cursor
+DELTA_SYNC_TOMBSTONE_RETENTION = config('DELTA_SYNC_TOMBSTONE_RETENTION', default=30, cast=int)  # Days deletions are remembered; older cursors get a full reset
+CORS_EXPOSE_HEADERS += ['ETag', 'Last-Modified', 'X-Delta-Cursor']
+
+# Product Resolver Settings
+PRODUCT_INDEX_CACHE_TTL = config('PRODUCT_INDEX_CACHE_TTL', default=600, cast=int)  # Seconds an apartment's product name / SKU index is reused (dropped earlier when its products change)
+PRODUCT_INDEX_CACHE_ALIAS = 'product_index'
+CACHES[PRODUCT_INDEX_CACHE_ALIAS] = {
+    # Shared by all worker processes, so a product change invalidates the index everywhere
+    'BACKEND': config('PRODUCT_INDEX_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+    'LOCATION': config('PRODUCT_INDEX_CACHE_LOCATION', default=str(BASE_DIR / 'cache' / 'product_index')),
+}
+
+# Client Statistics Settings
+CLIENT_STATS_CACHE_TTL = config('CLIENT_STATS_CACHE_TTL', default=300, cast=int)  # Seconds a client's portfolio statistics are reused (dropped earlier when its apartments or their rows change)
+CLIENT_STATS_CACHE_ALIAS = 'client_stats'
+CACHES[CLIENT_STATS_CACHE_ALIAS] = {
+    # Shared by all worker processes, so a change invalidates the statistics everywhere
+    'BACKEND': config('CLIENT_STATS_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+    'LOCATION': config('CLIENT_STATS_CACHE_LOCATION', default=str(BASE_DIR / 'cache' / 'client_stats')),
+}
@@ -0,0 +1,49 @@
+"""
+Helpers for server-sent event (text/event-stream) responses
+"""
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets DRF content negotiation accept `Accept: text/event-stream`.
+    Views using it return a StreamingHttpResponse, so render() only handles
+    error payloads raised before the stream starts.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return sse_event('error', data).encode(self.charset)
+
+
+def sse_event(event, data, event_id=None):
+    """Format one SSE message; `event_id` is sent back by reconnecting clients as Last-Event-ID"""
+    message = f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+    if event_id is not None:
+        message = f"id: {event_id}\n" + message
+    return message
+
+
+def sse_retry(milliseconds):
+    """Tell the client how long to wait before reconnecting"""
+    return f"retry: {int(milliseconds)}\n\n"
+
+
+def sse_comment(text):
+    """Format an SSE comment line (ignored by clients, used as a heartbeat)"""
+    return f": {text}\n\n"
+
+
+def event_stream_response(stream):
+    """Wrap an SSE generator in a non-buffered streaming response"""
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable nginx proxy buffering
+    return response
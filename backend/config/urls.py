@@ -31,8 +31,9 @@ from issues.views_web import email_conversations_view
 from activities.views import ActivityViewSet, AINoteViewSet, ManualNoteViewSet
 from accounts.user_management_views import UserManagementViewSet
 from notifications.views import NotificationViewSet, NotificationPreferenceViewSet
+from notifications.views_stream import event_stream_view, stream_ticket_view
 from .views import api_overview, global_search
-from utils.views import enhance_text
+from utils.views import enhance_text, ai_cache_metrics
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
 # Create router and register viewsets
@@ -64,7 +65,10 @@ urlpatterns = [
     path('api/dashboard/', include('dashboard.urls')),  # Dashboard endpoints
     path('api/reports/', include('reports.urls')),  # Report generation endpoints
     path('api/search/', global_search, name='global_search'),  # Global search endpoint
+    path('api/events/stream/', event_stream_view, name='event_stream'),  # Server-sent events for conversations and notifications
+    path('api/events/ticket/', stream_ticket_view, name='event_stream_ticket'),  # Short-lived ticket authenticating the event stream
     path('api/utils/enhance-text/', enhance_text, name='enhance_text'),  # AI text enhancement
+    path('api/utils/ai-cache-metrics/', ai_cache_metrics, name='ai_cache_metrics'),  # AI response cache hit / miss counts
     
     # Email conversations view
     path('email-conversations/', email_conversations_view, name='email_conversations'),
@@ -0,0 +1,234 @@
+"""
+Versioned response cache for the dashboard endpoints.
+
+Every tracked model has a generation counter in the dashboard cache,
+bumped (once per transaction) by post_save / post_delete, see
+dashboard.signals. A cached response remembers the generations of the
+models it was computed from; it is fresh while those are unchanged and it
+is younger than DASHBOARD_CACHE_TTL.
+
+Stale entries (data changed, or TTL passed) younger than
+DASHBOARD_CACHE_STALE_TTL are still served, and one background thread per
+entry recomputes them (stale-while-revalidate), so users only wait on a
+recompute when nothing usable is cached. The refresh runs on a detached
+copy of the request (same user and query parameters), never on the live
+request of the thread that served the stale entry. Dashboards users act on
+right after a write (the AI email approval queue) opt out with
+serve_stale=False: their stale entries are recomputed inline.
+
+Entries are keyed by endpoint, user scope, date and query parameters.
+Hit / stale / miss counters are kept per endpoint (see cache_metrics()).
+
+The default backend is file based so generations and entries are shared
+by all worker processes on a host without Redis; point
+DASHBOARD_CACHE_BACKEND at Redis or Memcached to share them across hosts.
+"""
+import functools
+import hashlib
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.http import HttpRequest
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'dashboard'
+OUTCOMES = ('hit', 'stale', 'miss')
+REFRESH_LOCK_TIMEOUT = 60
+
+_pending = threading.local()
+
+
+def get_cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'dashboard')]
+
+
+def _generation_key(model_name):
+    return f'{KEY_PREFIX}:gen:{model_name}'
+
+
+def bump_generations(model_names):
+    """Invalidate cached responses depending on these models (call after commit)"""
+    cache = get_cache()
+    for model_name in set(model_names):
+        key = _generation_key(model_name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Counter missing (first change, or evicted): any new value invalidates
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def schedule_generation_bump(model_name):
+    """Bump a model's generation when the current transaction commits, once per transaction"""
+    pending = getattr(_pending, 'models', None)
+    if pending is None:
+        pending = _pending.models = set()
+    pending.add(model_name)
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    pending = getattr(_pending, 'models', None)
+    _pending.models = None
+    if pending:
+        try:
+            bump_generations(pending)
+        except Exception as e:
+            logger.error(f"Failed to invalidate dashboard cache for {sorted(pending)}: {str(e)}")
+
+
+def _current_generations(cache, model_names):
+    keys = [_generation_key(name) for name in model_names]
+    values = cache.get_many(keys)
+    return tuple(values.get(key, 0) for key in keys)
+
+
+def cache_scope(request):
+    """
+    Which users share cached dashboards. The dashboards show the same data to
+    every authenticated user, so entries are shared per permission level
+    rather than duplicated per user.
+    """
+    user = request.user
+    if user.is_superuser:
+        return 'admin'
+    return 'staff' if user.is_staff else 'user'
+
+
+def _entry_key(name, request):
+    params = '&'.join(f'{key}={value}' for key, value in sorted(request.query_params.items()))
+    window = timezone.localdate().isoformat()
+    digest = hashlib.sha1(params.encode('utf-8')).hexdigest()[:16]
+    return f'{KEY_PREFIX}:entry:{name}:{cache_scope(request)}:{window}:{digest}'
+
+
+def _record(cache, name, outcome):
+    key = f'{KEY_PREFIX}:metrics:{name}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def cache_metrics(names):
+    """{endpoint: {'hit': n, 'stale': n, 'miss': n, 'hit_ratio': 0..1}}"""
+    cache = get_cache()
+    keys = {(name, outcome): f'{KEY_PREFIX}:metrics:{name}:{outcome}' for name in names for outcome in OUTCOMES}
+    values = cache.get_many(list(keys.values()))
+    metrics = {}
+    for name in names:
+        counts = {outcome: values.get(keys[(name, outcome)], 0) for outcome in OUTCOMES}
+        total = sum(counts.values())
+        counts['hit_ratio'] = round((counts['hit'] + counts['stale']) / total, 3) if total else 0
+        metrics[name] = counts
+    return metrics
+
+
+def _cacheable(response):
+    # The dashboard views report failures as a 200 with an 'error' key
+    return response.status_code == 200 and isinstance(response.data, dict) and 'error' not in response.data
+
+
+def _store(cache, key, generations, data):
+    stale_ttl = getattr(settings, 'DASHBOARD_CACHE_STALE_TTL', 600)
+    cache.set(key, {'data': data, 'generations': generations, 'created': time.time()}, timeout=stale_ttl)
+
+
+def _detached_request(request):
+    """A GET request with the user and query parameters of `request`, safe to use on another thread"""
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    http_request.path = request.path
+    http_request.GET = request.query_params.copy()
+    detached = Request(http_request)
+    detached.user = request.user
+    return detached
+
+
+def _detached_compute(get, view, request, args, kwargs):
+    """Compute a response with a fresh view and request, leaving the live ones to their thread"""
+    detached = _detached_request(request)
+    fresh_view = type(view)()
+    fresh_view.setup(detached, *args, **kwargs)
+    fresh_view.format_kwarg = None
+    return functools.partial(get, fresh_view, detached, *args, **kwargs)
+
+
+def _refresh_in_background(cache, key, model_names, compute):
+    """Recompute a stale entry on a thread; the lock keeps it to one refresh per entry"""
+    lock_key = f'{key}:refreshing'
+    if not cache.add(lock_key, 1, timeout=REFRESH_LOCK_TIMEOUT):
+        return
+
+    def refresh():
+        try:
+            # Read generations before computing: a change made meanwhile leaves the entry stale
+            generations = _current_generations(cache, model_names)
+            response = compute()
+            if _cacheable(response):
+                _store(cache, key, generations, response.data)
+        except Exception as e:
+            logger.error(f"Background dashboard refresh of {key} failed: {str(e)}")
+        finally:
+            cache.delete(lock_key)
+            connections.close_all()  # This thread's connections
+
+    threading.Thread(target=refresh, name='dashboard-cache-refresh', daemon=True).start()
+
+
+def cached_dashboard_response(name, depends_on, serve_stale=True):
+    """
+    Cache the Response.data of a dashboard APIView.get().
+
+    `depends_on` lists the model names whose changes invalidate the entry.
+    With serve_stale=False a stale entry is recomputed before responding
+    instead of in the background.
+    Responses carry an X-Dashboard-Cache header (HIT / STALE / MISS).
+    """
+    def decorator(get):
+        @functools.wraps(get)
+        def wrapper(view, request, *args, **kwargs):
+            if not getattr(settings, 'DASHBOARD_CACHE_ENABLED', True):
+                return get(view, request, *args, **kwargs)
+
+            cache = get_cache()
+            key = _entry_key(name, request)
+            generations = _current_generations(cache, depends_on)
+            entry = cache.get(key)
+            compute = functools.partial(get, view, request, *args, **kwargs)
+
+            if entry is not None:
+                age = time.time() - entry['created']
+                fresh = entry['generations'] == generations and age < getattr(settings, 'DASHBOARD_CACHE_TTL', 60)
+                if not fresh and not serve_stale:
+                    entry = None
+            if entry is not None:
+                outcome = 'hit' if fresh else 'stale'
+                if not fresh:
+                    _refresh_in_background(
+                        cache, key, depends_on, _detached_compute(get, view, request, args, kwargs)
+                    )
+                _record(cache, name, outcome)
+                response = Response(entry['data'])
+                response['X-Dashboard-Cache'] = outcome.upper()
+                return response
+
+            _record(cache, name, 'miss')
+            response = compute()
+            if _cacheable(response):
+                _store(cache, key, generations, response.data)
+            response['X-Dashboard-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import schedule_generation_bump
+
+
+# Models the dashboard endpoints are computed from (see the depends_on lists in views.py / views_ai.py)
+TRACKED_MODELS = [
+    'Order', 'Payment', 'Delivery', 'Issue', 'Product', 'Apartment', 'Client', 'Vendor',
+    'OrderItem', 'AICommunicationLog', 'Activity',
+]
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_dashboard_cache(sender, **kwargs):
+    """Bump the model's dashboard cache generation once the change commits"""
+    if sender.__name__ not in TRACKED_MODELS:
+        return
+    schedule_generation_bump(sender.__name__)
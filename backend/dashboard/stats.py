@@ -0,0 +1,170 @@
+"""
+Shared statistics engine for the dashboard views.
+
+Each model's breakdown is computed with a single aggregate() using
+conditional Count(filter=Q(...)) / Sum / Avg expressions instead of one
+count() per status. Sections are computed lazily and memoized on the
+engine, and the engine is attached to the request, so views (and helpers
+they call) that need the same numbers share one query.
+"""
+from datetime import timedelta
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from apartments.models import Apartment
+from clients.models import Client
+from vendors.models import Vendor
+from products.models import Product
+from orders.models import Order
+from deliveries.models import Delivery
+from payments.models import Payment
+from issues.models import Issue, AICommunicationLog
+from activities.models import Activity
+
+# Order statuses counted as pending by the stats view and by the KPI cards
+PENDING_ORDER_STATUSES = ['draft', 'confirmed']
+OPEN_ORDER_STATUSES = ['draft', 'confirmed', 'processing']
+# Issue statuses: 'Open', 'Pending Vendor Response', 'Resolution Agreed', 'Closed'
+UNRESOLVED_ISSUE_STATUSES = ['Open', 'Pending Vendor Response', 'Resolution Agreed']
+OVERDUE_PAYMENT_STATUSES = ['Unpaid', 'Partial']
+
+
+def _count(**lookups):
+    return Count('pk', filter=Q(**lookups))
+
+
+class DashboardStats:
+    """
+    Lazily computed dashboard aggregates, one query per model section.
+
+        stats = DashboardStats.for_request(request)
+        stats.orders['pending']
+    """
+
+    def __init__(self, today=None):
+        self.today = today or timezone.now().date()
+        self.last_7_days = self.today - timedelta(days=7)
+        self.last_30_days = self.today - timedelta(days=30)
+        self.week_start = self.today - timedelta(days=self.today.weekday())
+        self.week_end = self.week_start + timedelta(days=6)
+        self.previous_week_start = self.week_start - timedelta(days=7)
+
+    @classmethod
+    def for_request(cls, request):
+        """The engine shared by everything handling this request"""
+        http_request = getattr(request, '_request', request)
+        stats = getattr(http_request, 'dashboard_stats', None)
+        if stats is None:
+            stats = http_request.dashboard_stats = cls()
+        return stats
+
+    @cached_property
+    def apartments(self):
+        return Apartment.objects.aggregate(
+            total=Count('pk'),
+            planning=_count(status='planning'),
+            in_progress=_count(status='in_progress'),
+            completed=_count(status='completed'),
+            on_hold=_count(status='on_hold'),
+            created_before_last_month=_count(created_at__date__lt=self.last_30_days),
+        )
+
+    @cached_property
+    def clients(self):
+        return Client.objects.aggregate(
+            total=Count('pk'),
+            new_this_month=_count(created_at__date__gte=self.last_30_days),
+        )
+
+    @cached_property
+    def vendors(self):
+        return Vendor.objects.aggregate(total=Count('pk'))
+
+    @cached_property
+    def products(self):
+        return Product.objects.aggregate(
+            total=Count('pk'),
+            categories=Count('category', distinct=True),
+        )
+
+    @cached_property
+    def orders(self):
+        stats = Order.objects.aggregate(
+            total_orders=Count('pk'),  # `total` is the order amount field
+            this_month=_count(created_at__date__gte=self.last_30_days),
+            pending=_count(status__in=PENDING_ORDER_STATUSES),
+            delivered=_count(status='delivered'),
+            open=_count(status__in=OPEN_ORDER_STATUSES),
+            open_before_last_week=_count(status__in=OPEN_ORDER_STATUSES, created_at__date__lt=self.last_7_days),
+            total_value=Sum('total'),
+            avg_order_value=Avg('total'),
+        )
+        stats['total_value'] = float(stats['total_value'] or 0)
+        stats['avg_order_value'] = float(stats['avg_order_value'] or 0)
+        return stats
+
+    @cached_property
+    def deliveries(self):
+        return Delivery.objects.aggregate(
+            total=Count('pk'),
+            scheduled=_count(status='Scheduled'),
+            in_transit=_count(status='In Transit'),
+            delivered=_count(status='Delivered'),
+            delayed=_count(status='Delayed'),
+            # Deliveries with expected_date OR actual_date in the week
+            this_week=Count('pk', filter=(
+                Q(expected_date__gte=self.week_start, expected_date__lte=self.week_end) |
+                Q(actual_date__gte=self.week_start, actual_date__lte=self.week_end)
+            )),
+            last_week=Count('pk', filter=(
+                Q(expected_date__gte=self.previous_week_start, expected_date__lt=self.week_start) |
+                Q(actual_date__gte=self.previous_week_start, actual_date__lt=self.week_start)
+            )),
+        )
+
+    @cached_property
+    def payments(self):
+        stats = Payment.objects.aggregate(
+            total_payments=Count('pk'),
+            total_amount=Sum('total_amount'),
+            total_paid=Sum('amount_paid'),
+            unpaid=_count(status='Unpaid'),
+            partial=_count(status='Partial'),
+            paid=_count(status='Paid'),
+            overdue=_count(status__in=OVERDUE_PAYMENT_STATUSES, due_date__lt=self.today),
+            overdue_before_last_month=_count(status__in=OVERDUE_PAYMENT_STATUSES, due_date__lt=self.last_30_days),
+        )
+        stats['total_amount'] = stats['total_amount'] or 0
+        stats['total_paid'] = stats['total_paid'] or 0
+        return stats
+
+    @cached_property
+    def issues(self):
+        return Issue.objects.aggregate(
+            total=Count('pk'),
+            open=_count(resolution_status='Open'),
+            pending_response=_count(resolution_status='Pending Vendor Response'),
+            resolution_agreed=_count(resolution_status='Resolution Agreed'),
+            closed=_count(resolution_status='Closed'),
+            unresolved=_count(resolution_status__in=UNRESOLVED_ISSUE_STATUSES),
+            critical=_count(priority='high', resolution_status__in=['Open', 'Pending Vendor Response']),
+            ai_activated=_count(ai_activated=True),
+        )
+
+    @cached_property
+    def ai_emails(self):
+        return AICommunicationLog.objects.aggregate(
+            total_emails=_count(message_type='email'),
+            pending_approvals=_count(status='pending_approval'),
+            ai_emails_sent=_count(sender='AI', status='sent'),
+            vendor_responses=_count(sender='Vendor'),
+        )
+
+    @cached_property
+    def activities(self):
+        return Activity.objects.aggregate(
+            total=Count('pk'),
+            today=_count(created_at__date=self.today),
+            this_week=_count(created_at__date__gte=self.last_7_days),
+        )
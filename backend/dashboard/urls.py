@@ -4,7 +4,8 @@ from .views import (
     DashboardChartsView,
     DashboardRecentActivitiesView,
     DashboardQuickStatsView,
-    DashboardOverviewView
+    DashboardOverviewView,
+    DashboardCacheMetricsView
 )
 from .views_ai import (
     AIEmailDashboardView,
@@ -20,6 +21,7 @@ urlpatterns = [
     path('recent-activities/', DashboardRecentActivitiesView.as_view(), name='dashboard-recent'),
     path('quick-stats/', DashboardQuickStatsView.as_view(), name='dashboard-quick'),
     path('overview/', DashboardOverviewView.as_view(), name='dashboard-overview'),
+    path('cache-metrics/', DashboardCacheMetricsView.as_view(), name='dashboard-cache-metrics'),
     
     # AI Email Management
     path('ai-email/', AIEmailDashboardView.as_view(), name='ai-email-dashboard'),
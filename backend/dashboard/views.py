@@ -2,23 +2,35 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Q, Avg
+from django.db.models import Count, Sum
 from django.utils import timezone
-from datetime import timedelta, datetime
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
 
 from apartments.models import Apartment
-from clients.models import Client
 from vendors.models import Vendor
-from products.models import Product
 from orders.models import Order
 from deliveries.models import Delivery
 from payments.models import Payment
 from issues.models import Issue
 from activities.models import Activity
+from config.query_stats import QueryDebugHeadersMixin
+from .cache import cached_dashboard_response, cache_metrics
+from .stats import DashboardStats
+from .timeseries import last_buckets, time_series, parse_period, parse_bucket_count, period_label
 
+# Models whose changes invalidate each cached dashboard (see dashboard.cache)
+STATS_MODELS = ['Apartment', 'Client', 'Vendor', 'Product', 'Order', 'Delivery', 'Payment', 'Issue', 'AICommunicationLog', 'Activity']
+CHART_MODELS = ['Apartment', 'Vendor', 'Order', 'Payment', 'Issue']
+OVERVIEW_MODELS = ['Apartment', 'Vendor', 'Order', 'Delivery', 'Payment', 'Issue']
+QUICK_STATS_MODELS = ['Apartment', 'Client', 'Vendor', 'Order', 'Delivery', 'Payment', 'Issue']
+DASHBOARD_CACHE_NAMES = ['stats', 'charts', 'quick-stats', 'overview', 'ai-email']
 
-class DashboardStatsView(APIView):
+# Longest series the charts endpoint returns (e.g. 36 months or weeks)
+MAX_CHART_PERIODS = 366
+
+
+class DashboardStatsView(QueryDebugHeadersMixin, APIView):
     """
     Get dashboard statistics including counts, totals, and recent metrics
     """
@@ -31,25 +43,25 @@ class DashboardStatsView(APIView):
             200: OpenApiResponse(description='Dashboard statistics')
         }
     )
+    @cached_dashboard_response('stats', STATS_MODELS)
     def get(self, request):
         try:
-            # Get date ranges
-            today = timezone.now().date()
-            last_30_days = today - timedelta(days=30)
-            last_7_days = today - timedelta(days=7)
+            # One aggregate query per model (see dashboard.stats)
+            stats = DashboardStats.for_request(request)
             
             # Apartment statistics
             try:
+                apartments = stats.apartments
                 apartment_stats = {
-                    'total': Apartment.objects.count(),
+                    'total': apartments['total'],
                     'by_status': {
-                        'planning': Apartment.objects.filter(status='planning').count(),
-                        'in_progress': Apartment.objects.filter(status='in_progress').count(),
-                        'completed': Apartment.objects.filter(status='completed').count(),
-                        'on_hold': Apartment.objects.filter(status='on_hold').count(),
+                        'planning': apartments['planning'],
+                        'in_progress': apartments['in_progress'],
+                        'completed': apartments['completed'],
+                        'on_hold': apartments['on_hold'],
                     },
-                    'total_budget': float(Apartment.objects.aggregate(total=Sum('budget'))['total'] or 0),
-                    'avg_budget': float(Apartment.objects.aggregate(avg=Avg('budget'))['avg'] or 0),
+                    'total_budget': 0,  # Apartments have no budget field
+                    'avg_budget': 0,
                 }
             except Exception:
                 apartment_stats = {'total': 0, 'by_status': {'planning': 0, 'in_progress': 0, 'completed': 0, 'on_hold': 0}, 'total_budget': 0, 'avg_budget': 0}
@@ -57,9 +69,9 @@ class DashboardStatsView(APIView):
             # Client statistics
             try:
                 client_stats = {
-                    'total': Client.objects.count(),
-                    'active': Client.objects.filter(status='active').count(),
-                    'new_this_month': Client.objects.filter(created_at__date__gte=last_30_days).count(),
+                    'total': stats.clients['total'],
+                    'active': 0,  # Clients have no status field
+                    'new_this_month': stats.clients['new_this_month'],
                 }
             except Exception:
                 client_stats = {'total': 0, 'active': 0, 'new_this_month': 0}
@@ -67,14 +79,10 @@ class DashboardStatsView(APIView):
             # Vendor statistics
             try:
                 vendor_stats = {
-                    'total': Vendor.objects.count(),
-                    'active': Vendor.objects.filter(status='active').count(),
-                    'by_type': {
-                        'furniture': Vendor.objects.filter(vendor_type='furniture').count(),
-                        'appliances': Vendor.objects.filter(vendor_type='appliances').count(),
-                        'decor': Vendor.objects.filter(vendor_type='decor').count(),
-                        'other': Vendor.objects.filter(vendor_type='other').count(),
-                    }
+                    'total': stats.vendors['total'],
+                    # Vendors have no status / vendor_type fields
+                    'active': 0,
+                    'by_type': {'furniture': 0, 'appliances': 0, 'decor': 0, 'other': 0},
                 }
             except Exception:
                 vendor_stats = {'total': 0, 'active': 0, 'by_type': {'furniture': 0, 'appliances': 0, 'decor': 0, 'other': 0}}
@@ -82,70 +90,74 @@ class DashboardStatsView(APIView):
             # Product statistics
             try:
                 product_stats = {
-                    'total': Product.objects.count(),
-                    'in_stock': Product.objects.filter(availability_status='in_stock').count(),
-                    'out_of_stock': Product.objects.filter(availability_status='out_of_stock').count(),
-                    'categories': Product.objects.values('category').distinct().count(),
+                    'total': stats.products['total'],
+                    # Products have no availability_status field
+                    'in_stock': 0,
+                    'out_of_stock': 0,
+                    'categories': stats.products['categories'],
                 }
             except Exception:
                 product_stats = {'total': 0, 'in_stock': 0, 'out_of_stock': 0, 'categories': 0}
             
             # Order statistics
             try:
+                orders = stats.orders
                 order_stats = {
-                    'total': Order.objects.count(),
-                    'this_month': Order.objects.filter(created_at__date__gte=last_30_days).count(),
-                    'pending': Order.objects.filter(status__in=['draft', 'confirmed']).count(),
-                    'delivered': Order.objects.filter(status='delivered').count(),
-                    'total_value': float(Order.objects.aggregate(total=Sum('total'))['total'] or 0),
-                    'avg_order_value': float(Order.objects.aggregate(avg=Avg('total'))['avg'] or 0),
+                    'total': orders['total_orders'],
+                    'this_month': orders['this_month'],
+                    'pending': orders['pending'],
+                    'delivered': orders['delivered'],
+                    'total_value': orders['total_value'],
+                    'avg_order_value': orders['avg_order_value'],
                 }
             except Exception:
                 order_stats = {'total': 0, 'this_month': 0, 'pending': 0, 'delivered': 0, 'total_value': 0, 'avg_order_value': 0}
             
             # Delivery statistics - Status values: 'Scheduled', 'In Transit', 'Delivered', 'Delayed', 'Cancelled', 'Returned', 'Issue Reported'
             try:
+                deliveries = stats.deliveries
                 delivery_stats = {
-                    'total': Delivery.objects.count(),
-                    'scheduled': Delivery.objects.filter(status='Scheduled').count(),
-                    'in_transit': Delivery.objects.filter(status='In Transit').count(),
-                    'delivered': Delivery.objects.filter(status='Delivered').count(),
-                    'delayed': Delivery.objects.filter(status='Delayed').count(),
+                    'total': deliveries['total'],
+                    'scheduled': deliveries['scheduled'],
+                    'in_transit': deliveries['in_transit'],
+                    'delivered': deliveries['delivered'],
+                    'delayed': deliveries['delayed'],
                 }
             except Exception:
                 delivery_stats = {'total': 0, 'scheduled': 0, 'in_transit': 0, 'delivered': 0, 'delayed': 0}
             
             # Payment statistics
             try:
+                payments = stats.payments
                 payment_stats = {
-                    'total_payments': Payment.objects.count(),
-                    'total_amount': Payment.objects.aggregate(total=Sum('total_amount'))['total'] or 0,
-                    'total_paid': Payment.objects.aggregate(total=Sum('amount_paid'))['total'] or 0,
-                    'unpaid': Payment.objects.filter(status='Unpaid').count(),
-                    'partial': Payment.objects.filter(status='Partial').count(),
-                    'paid': Payment.objects.filter(status='Paid').count(),
-                    'overdue': Payment.objects.filter(status__in=['Unpaid', 'Partial'], due_date__lt=today).count(),
+                    'total_payments': payments['total_payments'],
+                    'total_amount': payments['total_amount'],
+                    'total_paid': payments['total_paid'],
+                    'unpaid': payments['unpaid'],
+                    'partial': payments['partial'],
+                    'paid': payments['paid'],
+                    'overdue': payments['overdue'],
                 }
             except Exception:
                 payment_stats = {'total_payments': 0, 'total_amount': 0, 'total_paid': 0, 'unpaid': 0, 'partial': 0, 'paid': 0, 'overdue': 0}
             
             # Issue statistics with AI email tracking
             try:
-                from issues.models import AICommunicationLog
-                # Issue statuses: 'Open', 'Pending Vendor Response', 'Resolution Agreed', 'Closed'
+                issues = stats.issues
+                ai_emails = stats.ai_emails
                 issue_stats = {
-                    'total': Issue.objects.count(),
-                    'open': Issue.objects.filter(resolution_status='Open').count(),
-                    'pending_response': Issue.objects.filter(resolution_status='Pending Vendor Response').count(),
-                    'resolution_agreed': Issue.objects.filter(resolution_status='Resolution Agreed').count(),
-                    'closed': Issue.objects.filter(resolution_status='Closed').count(),
-                    'critical': Issue.objects.filter(priority='high', resolution_status__in=['Open', 'Pending Vendor Response']).count(),
+                    'total': issues['total'],
+                    'open': issues['open'],
+                    'pending_response': issues['pending_response'],
+                    'resolution_agreed': issues['resolution_agreed'],
+                    'closed': issues['closed'],
+                    'critical': issues['critical'],
                     # AI Email Statistics
-                    'ai_activated': Issue.objects.filter(ai_activated=True).count(),
-                    'total_emails': AICommunicationLog.objects.filter(message_type='email').count(),
-                    'pending_approvals': AICommunicationLog.objects.filter(status='pending_approval').count(),
-                    'ai_emails_sent': AICommunicationLog.objects.filter(sender='AI', status='sent').count(),
-                    'vendor_responses': AICommunicationLog.objects.filter(sender='Vendor').count(),
+                    'ai_activated': issues['ai_activated'],
+                    'total_emails': ai_emails['total_emails'],
+                    'pending_approvals': ai_emails['pending_approvals'],
+                    'ai_emails_sent': ai_emails['ai_emails_sent'],
+                    'vendor_responses': ai_emails['vendor_responses'],
                 }
             except Exception:
                 issue_stats = {'total': 0, 'open': 0, 'in_progress': 0, 'resolved': 0, 'critical': 0, 
@@ -155,9 +167,9 @@ class DashboardStatsView(APIView):
             # Activity statistics
             try:
                 activity_stats = {
-                    'total': Activity.objects.count(),
-                    'today': Activity.objects.filter(created_at__date=today).count(),
-                    'this_week': Activity.objects.filter(created_at__date__gte=last_7_days).count(),
+                    'total': stats.activities['total'],
+                    'today': stats.activities['today'],
+                    'this_week': stats.activities['this_week'],
                 }
             except Exception:
                 activity_stats = {'total': 0, 'today': 0, 'this_week': 0}
@@ -195,7 +207,7 @@ class DashboardStatsView(APIView):
             })
 
 
-class DashboardChartsView(APIView):
+class DashboardChartsView(QueryDebugHeadersMixin, APIView):
     """
     Get chart data for dashboard visualizations
     """
@@ -204,35 +216,42 @@ class DashboardChartsView(APIView):
     @extend_schema(
         tags=['Dashboard'],
         summary='Get dashboard chart data',
+        parameters=[
+            OpenApiParameter(name='period', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, enum=['day', 'week', 'month'], description='Bucket size of the order and payment trends (default month)'),
+            OpenApiParameter(name='periods', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, description=f'Number of buckets, up to {MAX_CHART_PERIODS} (default 6)'),
+            OpenApiParameter(name='apartment', type=OpenApiTypes.UUID, location=OpenApiParameter.QUERY, description='Only orders and payments of this apartment'),
+            OpenApiParameter(name='vendor', type=OpenApiTypes.UUID, location=OpenApiParameter.QUERY, description='Only orders and payments of this vendor'),
+        ],
         responses={
             200: OpenApiResponse(description='Chart data for dashboard')
         }
     )
+    @cached_dashboard_response('charts', CHART_MODELS)
     def get(self, request):
         try:
             today = timezone.now().date()
-            month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            
-            # Monthly order trends
+            period = parse_period(request.query_params.get('period'))
+            buckets = last_buckets(period, parse_bucket_count(request.query_params.get('periods'), 6, MAX_CHART_PERIODS), today)
+            scope = {
+                field: request.query_params[field]
+                for field in ('apartment', 'vendor') if request.query_params.get(field)
+            }
+            
+            # Order trends (one grouped query for the whole range)
             monthly_orders = []
             try:
-                for i in range(5, -1, -1):
-                    target_month = today.month - i
-                    target_year = today.year
-                    while target_month <= 0:
-                        target_month += 12
-                        target_year -= 1
-                    
-                    orders = Order.objects.filter(
-                        created_at__year=target_year,
-                        created_at__month=target_month
+                monthly_orders = [
+                    {
+                        'month': period_label(point['period'], period),
+                        'period': point['period'].isoformat(),
+                        'orders': point['orders'],
+                        'value': float(point['value']),
+                    }
+                    for point in time_series(
+                        Order.objects.filter(**scope), 'created_at', buckets, period,
+                        orders=Count('pk'), value=Sum('total'),
                     )
-                    
-                    monthly_orders.append({
-                        'month': month_names[target_month - 1],
-                        'orders': orders.count(),
-                        'value': float(orders.aggregate(Sum('total'))['total__sum'] or 0)
-                    })
+                ]
             except Exception:
                 monthly_orders = [{'month': m, 'orders': 0, 'value': 0} for m in ['Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov']]
             
@@ -267,25 +286,20 @@ class DashboardChartsView(APIView):
             except Exception:
                 apartment_status = [{'status': s, 'count': 0} for s in ['Planning', 'In Progress', 'Completed', 'On Hold']]
             
-            # Payment/Spending trends (last 6 months)
+            # Payment/Spending trends
             payment_trends = []
             try:
-                for i in range(5, -1, -1):
-                    target_month = today.month - i
-                    target_year = today.year
-                    while target_month <= 0:
-                        target_month += 12
-                        target_year -= 1
-                    
-                    monthly_paid = Payment.objects.filter(
-                        created_at__year=target_year,
-                        created_at__month=target_month
-                    ).aggregate(total=Sum('amount_paid'))['total'] or 0
-                    
-                    payment_trends.append({
-                        'month': month_names[target_month - 1],
-                        'amount': float(monthly_paid)
-                    })
+                payment_trends = [
+                    {
+                        'month': period_label(point['period'], period),
+                        'period': point['period'].isoformat(),
+                        'amount': float(point['amount']),
+                    }
+                    for point in time_series(
+                        Payment.objects.filter(**scope), 'created_at', buckets, period,
+                        amount=Sum('amount_paid'),
+                    )
+                ]
             except Exception:
                 payment_trends = [{'month': m, 'amount': 0} for m in ['Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov']]
             
@@ -326,7 +340,7 @@ class DashboardChartsView(APIView):
             })
 
 
-class DashboardRecentActivitiesView(APIView):
+class DashboardRecentActivitiesView(QueryDebugHeadersMixin, APIView):
     """
     Get recent activities across all modules
     """
@@ -501,7 +515,7 @@ class DashboardRecentActivitiesView(APIView):
             })
 
 
-class DashboardQuickStatsView(APIView):
+class DashboardQuickStatsView(QueryDebugHeadersMixin, APIView):
     """
     Get quick stats for dashboard header
     """
@@ -514,13 +528,10 @@ class DashboardQuickStatsView(APIView):
             200: OpenApiResponse(description='Quick statistics')
         }
     )
+    @cached_dashboard_response('quick-stats', QUICK_STATS_MODELS)
     def get(self, request):
         try:
-            today = timezone.now().date()
-            last_month = today - timedelta(days=30)
-            last_week = today - timedelta(days=7)
-            week_start = today - timedelta(days=today.weekday())
-            week_end = week_start + timedelta(days=6)
+            stats = DashboardStats.for_request(request)
             
             # Safe defaults
             active_apartments = 0
@@ -536,53 +547,45 @@ class DashboardQuickStatsView(APIView):
             total_vendors = 0
             
             try:
-                active_apartments = Apartment.objects.count()
-                apartments_last_month = Apartment.objects.filter(created_at__date__lt=last_month).count()
+                active_apartments = stats.apartments['total']
+                apartments_last_month = stats.apartments['created_before_last_month']
                 apartments_trend = ((active_apartments - apartments_last_month) / max(apartments_last_month, 1)) * 100 if apartments_last_month else 0
             except Exception:
                 pass
             
             try:
-                pending_orders = Order.objects.filter(status__in=['draft', 'confirmed', 'processing']).count()
-                pending_last_week = Order.objects.filter(status__in=['draft', 'confirmed', 'processing'], created_at__date__lt=last_week).count()
+                pending_orders = stats.orders['open']
+                pending_last_week = stats.orders['open_before_last_week']
                 orders_trend = ((pending_orders - pending_last_week) / max(pending_last_week, 1)) * 100 if pending_last_week else 0
             except Exception:
                 pass
             
             try:
-                # Issue statuses: 'Open', 'Pending Vendor Response', 'Resolution Agreed', 'Closed'
-                open_issues = Issue.objects.filter(resolution_status__in=['Open', 'Pending Vendor Response', 'Resolution Agreed']).count()
+                open_issues = stats.issues['unresolved']
             except Exception:
                 pass
             
             try:
-                # Count deliveries with expected_date OR actual_date this week
-                deliveries_this_week = Delivery.objects.filter(
-                    Q(expected_date__gte=week_start, expected_date__lte=week_end) |
-                    Q(actual_date__gte=week_start, actual_date__lte=week_end)
-                ).count()
-                deliveries_last_week = Delivery.objects.filter(
-                    Q(expected_date__gte=week_start - timedelta(days=7), expected_date__lt=week_start) |
-                    Q(actual_date__gte=week_start - timedelta(days=7), actual_date__lt=week_start)
-                ).count()
+                deliveries_this_week = stats.deliveries['this_week']
+                deliveries_last_week = stats.deliveries['last_week']
                 deliveries_trend = ((deliveries_this_week - deliveries_last_week) / max(deliveries_last_week, 1)) * 100 if deliveries_last_week else 0
             except Exception:
                 pass
             
             try:
-                overdue_payments = Payment.objects.filter(status__in=['Unpaid', 'Partial'], due_date__lt=today).count()
-                overdue_last_month = Payment.objects.filter(status__in=['Unpaid', 'Partial'], due_date__lt=last_month).count()
+                overdue_payments = stats.payments['overdue']
+                overdue_last_month = stats.payments['overdue_before_last_month']
                 overdue_trend = ((overdue_payments - overdue_last_month) / max(overdue_last_month, 1)) * 100 if overdue_last_month else 0
             except Exception:
                 pass
             
             try:
-                total_clients = Client.objects.count()
+                total_clients = stats.clients['total']
             except Exception:
                 pass
             
             try:
-                total_vendors = Vendor.objects.count()
+                total_vendors = stats.vendors['total']
             except Exception:
                 pass
             
@@ -628,7 +631,7 @@ class DashboardQuickStatsView(APIView):
             })
 
 
-class DashboardOverviewView(APIView):
+class DashboardOverviewView(QueryDebugHeadersMixin, APIView):
     """
     Get complete dashboard overview data for frontend
     """
@@ -641,119 +644,71 @@ class DashboardOverviewView(APIView):
             200: OpenApiResponse(description='Complete dashboard data')
         }
     )
+    @cached_dashboard_response('overview', OVERVIEW_MODELS)
     def get(self, request):
         try:
-            today = timezone.now().date()
-            last_month = today - timedelta(days=30)
-            last_week = today - timedelta(days=7)
-            week_start = today - timedelta(days=today.weekday())
-            week_end = week_start + timedelta(days=6)
+            stats = DashboardStats.for_request(request)
+            today = stats.today
             
             # KPI Stats - with safe defaults
             try:
-                active_apartments = Apartment.objects.count()
-                apartments_last_month = Apartment.objects.filter(created_at__date__lt=last_month).count()
+                active_apartments = stats.apartments['total']
+                apartments_last_month = stats.apartments['created_before_last_month']
             except Exception:
                 active_apartments = 0
                 apartments_last_month = 0
             
             try:
-                pending_orders = Order.objects.filter(status__in=['draft', 'confirmed', 'processing']).count()
-                pending_last_week = Order.objects.filter(status__in=['draft', 'confirmed', 'processing'], created_at__date__lt=last_week).count()
+                pending_orders = stats.orders['open']
+                pending_last_week = stats.orders['open_before_last_week']
             except Exception:
                 pending_orders = 0
                 pending_last_week = 0
             
             try:
-                # Issue statuses: 'Open', 'Pending Vendor Response', 'Resolution Agreed', 'Closed'
-                open_issues = Issue.objects.filter(resolution_status__in=['Open', 'Pending Vendor Response', 'Resolution Agreed']).count()
+                open_issues = stats.issues['unresolved']
             except Exception:
                 open_issues = 0
             
             try:
-                # Count deliveries with expected_date OR actual_date this week
-                deliveries_this_week = Delivery.objects.filter(
-                    Q(expected_date__gte=week_start, expected_date__lte=week_end) |
-                    Q(actual_date__gte=week_start, actual_date__lte=week_end)
-                ).count()
-                deliveries_last_week = Delivery.objects.filter(
-                    Q(expected_date__gte=week_start - timedelta(days=7), expected_date__lt=week_start) |
-                    Q(actual_date__gte=week_start - timedelta(days=7), actual_date__lt=week_start)
-                ).count()
+                deliveries_this_week = stats.deliveries['this_week']
+                deliveries_last_week = stats.deliveries['last_week']
             except Exception:
                 deliveries_this_week = 0
                 deliveries_last_week = 0
             
             try:
-                overdue_payments = Payment.objects.filter(status__in=['Unpaid', 'Partial'], due_date__lt=today).count()
+                overdue_payments = stats.payments['overdue']
             except Exception:
                 overdue_payments = 0
             
-            # Orders vs Deliveries chart data (last 6 months)
-            orders_chart = []
-            month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            for i in range(5, -1, -1):
-                try:
-                    # Calculate month offset
-                    target_month = today.month - i
-                    target_year = today.year
-                    while target_month <= 0:
-                        target_month += 12
-                        target_year -= 1
-                    
-                    month_name = month_names[target_month - 1]
-                    
-                    # Count orders for this month
-                    ordered = Order.objects.filter(
-                        created_at__year=target_year,
-                        created_at__month=target_month
-                    ).count()
-                    
-                    # Count delivered deliveries for this month (status='Delivered')
-                    delivered = Delivery.objects.filter(
-                        status='Delivered',
-                        actual_date__year=target_year,
-                        actual_date__month=target_month
-                    ).count()
-                    
-                    orders_chart.append({
-                        'month': month_name,
-                        'ordered': ordered,
-                        'delivered': delivered
-                    })
-                except Exception:
-                    orders_chart.append({
-                        'month': f'M{6-i}',
-                        'ordered': 0,
-                        'delivered': 0
-                    })
+            # Orders vs Deliveries chart data (last 6 months), one grouped query per model
+            months = last_buckets('month', 6, today)
+            try:
+                ordered = time_series(Order.objects.all(), 'created_at', months, ordered=Count('pk'))
+                # Delivered deliveries per month of their actual delivery date
+                delivered = time_series(
+                    Delivery.objects.filter(status='Delivered'), 'actual_date', months, delivered=Count('pk')
+                )
+                orders_chart = [
+                    {
+                        'month': period_label(order_point['period'], 'month'),
+                        'ordered': order_point['ordered'],
+                        'delivered': delivery_point['delivered'],
+                    }
+                    for order_point, delivery_point in zip(ordered, delivered)
+                ]
+            except Exception:
+                orders_chart = [{'month': f'M{i + 1}', 'ordered': 0, 'delivered': 0} for i in range(6)]
             
             # Spending trend (last 6 months)
-            spending_chart = []
-            for i in range(5, -1, -1):
-                try:
-                    target_month = today.month - i
-                    target_year = today.year
-                    while target_month <= 0:
-                        target_month += 12
-                        target_year -= 1
-                    
-                    month_name = month_names[target_month - 1]
-                    
-                    monthly_spent = Payment.objects.filter(
-                        created_at__year=target_year,
-                        created_at__month=target_month
-                    ).aggregate(total=Sum('amount_paid'))['total'] or 0
-                    
-                    spending_chart.append({
-                        'month': month_name,
-                        'amount': monthly_spent
-                    })
-                except Exception:
-                    spending_chart.append({
-                        'month': f'M{6-i}',
-                        'amount': 0
-                    })
+            try:
+                spending_chart = [
+                    {'month': period_label(point['period'], 'month'), 'amount': point['amount']}
+                    for point in time_series(Payment.objects.all(), 'created_at', months, amount=Sum('amount_paid'))
+                ]
+            except Exception:
+                spending_chart = [{'month': f'M{i + 1}', 'amount': 0} for i in range(6)]
             
             # Calculate trends safely
             def safe_trend(current, previous):
@@ -806,3 +761,20 @@ class DashboardOverviewView(APIView):
                 'spending_chart': [{'month': m, 'amount': 0} for m in ['Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov']],
                 'error': str(e)
             })
+
+
+class DashboardCacheMetricsView(APIView):
+    """
+    Hit / stale / miss counts of the dashboard response cache per endpoint
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        tags=['Dashboard'],
+        summary='Get dashboard cache metrics',
+        responses={
+            200: OpenApiResponse(description='Cache hit / stale / miss counts and hit ratio per endpoint')
+        }
+    )
+    def get(self, request):
+        return Response(cache_metrics(DASHBOARD_CACHE_NAMES))
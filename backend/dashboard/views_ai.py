@@ -13,6 +13,7 @@ from datetime import timedelta
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from issues.models import Issue, AICommunicationLog
 from issues.email_service import EmailService
+from .cache import cached_dashboard_response
 import asyncio
 import logging
 
@@ -30,6 +31,7 @@ class AIEmailDashboardView(APIView):
             200: OpenApiResponse(description='AI email dashboard data')
         }
     )
+    @cached_dashboard_response('ai-email', ['Issue', 'Vendor', 'AICommunicationLog'], serve_stale=False)
     def get(self, request):
         try:
             today = timezone.now().date()
@@ -193,7 +195,7 @@ class AIEmailApprovalView(APIView):
                     # Use proper EmailService with HTML templates and tracking
                     email_service.send_approved_draft(msg, request.user)
                     approved_count += 1
-                    logger.info(f"Approved and sent email {msg.id} for issue {msg.issue.id}")
+                    logger.info(f"Approved and queued email {msg.id} for issue {msg.issue.id}")
                 except Exception as e:
                     failed_count += 1
                     error_msg = f"Failed to send message {msg.id}: {str(e)}"
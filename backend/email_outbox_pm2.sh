@@ -0,0 +1,5 @@
+#!/bin/bash
+cd /root/buy2rent/backend
+source myenv/bin/activate
+
+python manage.py process_email_outbox
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Issue, IssuePhoto, AICommunicationLog
+from django.utils import timezone
+from .models import Issue, IssuePhoto, AICommunicationLog, MailboxSyncState, OutboundEmail
 
 
 class IssuePhotoInline(admin.TabularInline):
@@ -39,3 +40,24 @@ class AICommunicationLogAdmin(admin.ModelAdmin):
     search_fields = ['message', 'issue__type']
     readonly_fields = ['timestamp']
     raw_id_fields = ['issue']
+
+
+@admin.register(MailboxSyncState)
+class MailboxSyncStateAdmin(admin.ModelAdmin):
+    list_display = ['account', 'mailbox', 'uidvalidity', 'last_uid', 'highest_modseq', 'last_synced_at']
+    readonly_fields = ['last_synced_at']
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to_email', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['subject', 'to_email', 'message_id']
+    readonly_fields = ['created_at', 'sent_at', 'claimed_by', 'claimed_at']
+    raw_id_fields = ['issue', 'communication_log']
+    actions = ['retry_now']
+    
+    @admin.action(description='Send again now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{updated} emails queued again")
@@ -3,16 +3,84 @@ AI Email Services for Issue Management
 Integrates with existing Issue model to provide AI-powered vendor communication
 """
 import asyncio
+import logging
+import random
+import threading
+import time
 from typing import Dict, Any, List
 from abc import ABC, abstractmethod
 from django.conf import settings
 import json
+import openai
 from openai import OpenAI
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.module_loading import import_string
 import re
 
+from utils.ai_cache import cached_completion
+
+logger = logging.getLogger(__name__)
+
+
+class AIRateLimitError(Exception):
+    """Raised by AI backends when the provider asks the client to slow down"""
+
+    def __init__(self, message='Rate limited', retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Errors worth another attempt: rate limits, timeouts, dropped connections and 5xx
+RETRYABLE_ERRORS = (
+    AIRateLimitError,
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def _retry_after(error):
+    """Seconds the provider asked us to wait, if it said so"""
+    if isinstance(error, AIRateLimitError):
+        return error.retry_after
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        if response.headers.get('retry-after-ms'):
+            return float(response.headers['retry-after-ms']) / 1000
+        if response.headers.get('retry-after'):
+            return float(response.headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+async def call_with_retry(func, *args, **kwargs):
+    """
+    Run a blocking AI client call in a worker thread, retrying rate limits and
+    transient errors up to AI_MAX_RETRIES times. Waits for Retry-After when the
+    provider sends it, otherwise backs off exponentially from
+    AI_RETRY_BASE_DELAY; jitter keeps concurrent callers from retrying in step.
+    """
+    max_retries = getattr(settings, 'AI_MAX_RETRIES', 4)
+    base_delay = getattr(settings, 'AI_RETRY_BASE_DELAY', 1.0)
+    max_delay = getattr(settings, 'AI_RETRY_MAX_DELAY', 60)
+    attempt = 0
+    while True:
+        try:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt >= max_retries:
+                raise
+            delay = _retry_after(e) or base_delay * (2 ** attempt)
+            delay = min(delay, max_delay) + random.uniform(0, base_delay)
+            attempt += 1
+            logger.warning(f"AI call failed ({e.__class__.__name__}), retry {attempt}/{max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
 
 class AIServiceInterface(ABC):
     """Abstract base class for AI services"""
@@ -33,8 +101,8 @@ class AIServiceInterface(ABC):
         pass
     
     @abstractmethod
-    async def generate_conversation_summary(self, conversation_history: List[Dict]) -> Dict[str, Any]:
-        """Generate conversation summary and next action"""
+    async def generate_conversation_summary(self, conversation_history: List[Dict], previous_summary: str = '') -> Dict[str, Any]:
+        """Generate conversation summary and next action, folding new messages into previous_summary"""
         pass
 
 
@@ -42,7 +110,8 @@ class OpenAIService(AIServiceInterface):
     """OpenAI implementation of AI service"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        # Retries are handled by call_with_retry, so they share one backoff policy
+        self.client = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
         self.model = getattr(settings, 'OPENAI_MODEL', 'gpt-4.1')
     
     async def generate_issue_email(self, issue_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -85,8 +154,10 @@ class OpenAIService(AIServiceInterface):
         """
         
         try:
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
+            content = await call_with_retry(
+                cached_completion,
+                'issue_email',
+                self.client,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a professional procurement specialist writing to vendors about issues. Always return valid JSON with 'subject', 'opening_message', and 'closing_message' fields."},
@@ -96,7 +167,6 @@ class OpenAIService(AIServiceInterface):
             )
             
             # Try to parse JSON response
-            content = response.choices[0].message.content
             try:
                 result = json.loads(content)
             except json.JSONDecodeError:
@@ -207,7 +277,7 @@ We request an immediate resolution to this matter. Please confirm the next steps
         ]
         
         # Add conversation history
-        for msg in conversation_history[-5:]:  # Last 5 messages for context
+        for msg in conversation_history[-getattr(settings, 'AI_REPLY_HISTORY_MESSAGES', 5):]:  # Last messages for context
             role = "assistant" if msg.get('sender') == 'AI' else "user"
             messages.append({"role": role, "content": msg.get('message', '')})
         
@@ -215,15 +285,15 @@ We request an immediate resolution to this matter. Please confirm the next steps
         messages.append({"role": "user", "content": vendor_message})
         
         try:
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
+            reply = await call_with_retry(
+                cached_completion,
+                'draft_reply',
+                self.client,
                 model=self.model,
                 messages=messages,
                 temperature=0.7
             )
             
-            reply = response.choices[0].message.content
-            
             return {
                 'success': True,
                 'reply': reply,
@@ -257,8 +327,10 @@ We request an immediate resolution to this matter. Please confirm the next steps
         message = vendor_email_text  # Use the parameter name
         
         try:
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
+            content = await call_with_retry(
+                cached_completion,
+                'analyze_reply',
+                self.client,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are an AI analyzing vendor responses. Return analysis as JSON with fields: sentiment, intent, key_commitments (array), suggested_action, escalation_recommended (boolean)."},
@@ -268,7 +340,6 @@ We request an immediate resolution to this matter. Please confirm the next steps
             )
             
             # Try to parse JSON response
-            content = response.choices[0].message.content
             try:
                 analysis = json.loads(content)
             except json.JSONDecodeError:
@@ -298,10 +369,12 @@ We request an immediate resolution to this matter. Please confirm the next steps
                 'error': str(e)
             }
     
-    async def generate_conversation_summary(self, conversation_history: List[Dict]) -> Dict[str, Any]:
+    async def generate_conversation_summary(self, conversation_history: List[Dict], previous_summary: str = '') -> Dict[str, Any]:
         """Generate conversation summary and next action"""
         
         if not conversation_history:
+            if previous_summary:
+                return {'summary': previous_summary, 'next_action': 'Continue monitoring', 'key_points': []}
             return {
                 'summary': 'No conversation history available.',
                 'next_action': 'Initiate contact with vendor.',
@@ -314,7 +387,26 @@ We request an immediate resolution to this matter. Please confirm the next steps
             for msg in conversation_history
         ])
         
-        prompt = f"""
+        if previous_summary:
+            # Rolling summary: only the messages since the last summary are sent
+            prompt = f"""
+        Update the summary of this vendor communication thread with the new messages and suggest next action.
+        
+        Summary so far:
+        {previous_summary}
+        
+        New messages:
+        {conversation_text}
+        
+        Provide:
+        1. Brief summary of the whole thread (2-3 sentences)
+        2. Key points discussed (array)
+        3. Suggested next action
+        
+        Return as JSON with fields: summary, key_points (array), next_action
+        """
+        else:
+            prompt = f"""
         Summarize this vendor communication thread and suggest next action:
         
         {conversation_text}
@@ -328,8 +420,10 @@ We request an immediate resolution to this matter. Please confirm the next steps
         """
         
         try:
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
+            content = await call_with_retry(
+                cached_completion,
+                'conversation_summary',
+                self.client,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are an AI summarizing vendor communications. Return JSON with fields: summary, key_points (array), next_action."},
@@ -338,7 +432,6 @@ We request an immediate resolution to this matter. Please confirm the next steps
                 temperature=0.3
             )
             
-            content = response.choices[0].message.content
             try:
                 result = json.loads(content)
             except json.JSONDecodeError:
@@ -357,7 +450,8 @@ We request an immediate resolution to this matter. Please confirm the next steps
             return {
                 'summary': f'Error generating summary: {str(e)}',
                 'key_points': [],
-                'next_action': 'Review manually'
+                'next_action': 'Review manually',
+                'error': str(e)
             }
     
     def _generate_fallback_email(self, issue_data: Dict[str, Any]) -> str:
@@ -473,8 +567,14 @@ We request an immediate resolution to this matter. Please confirm the next steps
             'escalation_recommended': False
         }
     
-    async def generate_conversation_summary(self, conversation_history: List[Dict]) -> Dict[str, Any]:
+    async def generate_conversation_summary(self, conversation_history: List[Dict], previous_summary: str = '') -> Dict[str, Any]:
         """Mock conversation summary"""
+        if previous_summary:
+            return {
+                'summary': f'{previous_summary} + {len(conversation_history)} new messages',
+                'key_points': ['Point 1', 'Point 2'],
+                'next_action': 'Continue monitoring'
+            }
         return {
             'summary': f'Mock summary of {len(conversation_history)} messages',
             'key_points': ['Point 1', 'Point 2'],
@@ -482,6 +582,49 @@ We request an immediate resolution to this matter. Please confirm the next steps
         }
 
 
+class FakeLatencyAIService(MockAIService):
+    """
+    MockAIService that behaves like a remote provider, for offline benchmarks
+    of the reply pipeline: every call blocks a worker thread for AI_FAKE_LATENCY
+    seconds (as the synchronous OpenAI client does) and is rate limited at a
+    rate of AI_FAKE_RATE_LIMIT_RATE, going through the same retry path.
+    """
+
+    def __init__(self, latency=None, rate_limit_rate=None, retry_after=None):
+        self.latency = getattr(settings, 'AI_FAKE_LATENCY', 1.0) if latency is None else latency
+        self.rate_limit_rate = getattr(settings, 'AI_FAKE_RATE_LIMIT_RATE', 0.0) if rate_limit_rate is None else rate_limit_rate
+        self.retry_after = retry_after
+        self.calls = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    def _request(self):
+        with self._lock:
+            self.calls += 1
+            limited = random.random() < self.rate_limit_rate
+            if limited:
+                self.rate_limited += 1
+        if limited:
+            raise AIRateLimitError(retry_after=self.retry_after)
+        time.sleep(self.latency)
+
+    async def generate_issue_email(self, issue_data: Dict[str, Any]) -> Dict[str, Any]:
+        await call_with_retry(self._request)
+        return await super().generate_issue_email(issue_data)
+
+    async def draft_reply(self, issue_data: Dict[str, Any], conversation_history: List[Dict], vendor_message: str) -> Dict[str, Any]:
+        await call_with_retry(self._request)
+        return await super().draft_reply(issue_data, conversation_history, vendor_message)
+
+    async def analyze_vendor_reply(self, issue_data: Dict[str, Any], vendor_email_text: str) -> Dict[str, Any]:
+        await call_with_retry(self._request)
+        return await super().analyze_vendor_reply(issue_data, vendor_email_text)
+
+    async def generate_conversation_summary(self, conversation_history: List[Dict], previous_summary: str = '') -> Dict[str, Any]:
+        await call_with_retry(self._request)
+        return await super().generate_conversation_summary(conversation_history, previous_summary)
+
+
 # Import the proper EmailService with HTML template support
 from .email_service import EmailService as ProperEmailService
 
@@ -513,6 +656,7 @@ class EmailServiceWrapper:
         Returns:
             Dictionary with processing results including analysis and generated response
         """
+        from .conversation import thread_tail
         from .models import AICommunicationLog
         
         vendor_message = email_data.get('body', '')
@@ -532,19 +676,11 @@ class EmailServiceWrapper:
             in_reply_to=email_data.get('in_reply_to', '')
         )
         
-        # Get conversation history for context
-        conversation_history = []
-        previous_messages = AICommunicationLog.objects.filter(
-            issue=issue,
-            message_type='email'
-        ).order_by('timestamp')
-        
-        for msg in previous_messages:
-            conversation_history.append({
-                'sender': msg.sender,
-                'message': msg.message,
-                'timestamp': msg.timestamp.isoformat()
-            })
+        # Get conversation history for context (only the tail the prompt uses)
+        conversation_history = [
+            {'sender': msg['sender'], 'message': msg['message'], 'timestamp': msg['timestamp'].isoformat()}
+            for msg in thread_tail(issue, getattr(settings, 'AI_REPLY_HISTORY_MESSAGES', 5))
+        ]
         
         # Analyze vendor reply using AI
         issue_data = {
@@ -659,8 +795,12 @@ class IssueAIManager:
     """Manager for AI-powered issue communications"""
     
     def __init__(self):
-        use_mock = getattr(settings, 'USE_MOCK_AI', True)
-        self.ai_service = MockAIService() if use_mock else OpenAIService()
+        backend = getattr(settings, 'AI_SERVICE_BACKEND', '')
+        if backend:
+            self.ai_service = import_string(backend)()
+        else:
+            use_mock = getattr(settings, 'USE_MOCK_AI', True)
+            self.ai_service = MockAIService() if use_mock else OpenAIService()
         self.email_service = EmailServiceWrapper()
     
     async def start_issue_conversation(self, issue) -> Dict[str, Any]:
@@ -785,14 +925,13 @@ class IssueAIManager:
         sender_name = "Procurement Team"
         
         # Get conversation history
+        from .conversation import thread_tail
         from .models import AICommunicationLog
         
         @sync_to_async
         def get_history():
-            return list(AICommunicationLog.objects.filter(
-                issue=issue,
-                message_type='email'
-            ).order_by('timestamp').values('sender', 'message'))
+            # Only the tail the prompt uses; older messages are covered by the summary
+            return thread_tail(issue, getattr(settings, 'AI_REPLY_HISTORY_MESSAGES', 5))
         
         history = await get_history()
 
@@ -825,6 +964,7 @@ class IssueAIManager:
             'priority': getattr(issue, 'priority', ''),
             'include_products': bool(wants_product_info),
             'affected_products': products_for_context,
+            'conversation_summary': issue.last_summary,
         }
         
         # Generate reply using draft_reply method
@@ -967,6 +1107,50 @@ class IssueAIManager:
         await update_issue()
         
         return analysis
+    
+    async def update_conversation_summary(self, issue, min_new_messages: int = 1) -> Dict[str, Any]:
+        """
+        Fold the emails that arrived since the last summary into
+        Issue.last_summary. Only the previous summary and the new emails are
+        sent to the model, AI_SUMMARY_BATCH_SIZE emails at a time; nothing is
+        done while fewer than min_new_messages emails are new.
+        """
+        from asgiref.sync import sync_to_async
+        from .conversation import messages_after, summary_checkpoint
+        from .models import Issue
+        
+        batch_size = getattr(settings, 'AI_SUMMARY_BATCH_SIZE', 50)
+        summary = {'summary': issue.last_summary, 'next_action': issue.next_action, 'key_points': [], 'updated': False}
+        checkpoint = await sync_to_async(summary_checkpoint)(issue)
+        
+        while True:
+            batch = await sync_to_async(messages_after)(issue, checkpoint, batch_size)
+            if not batch or (not summary['updated'] and len(batch) < min_new_messages):
+                break
+            result = await self.ai_service.generate_conversation_summary(batch, previous_summary=summary['summary'])
+            if result.get('error'):
+                # Keep the checkpoint; these emails are summarized on the next update
+                logger.error(f"Failed to summarize conversation of issue {issue.id}: {result['error']}")
+                break
+            summary = {**result, 'updated': True}
+            checkpoint = batch[-1]
+            if len(batch) < batch_size:
+                break
+        
+        if summary['updated']:
+            issue.last_summary = summary['summary']
+            issue.next_action = summary['next_action']
+            issue.last_summary_at = timezone.now()
+            issue.last_summary_message_id = checkpoint['id']
+            # Update only the summary columns, other fields may be saved concurrently
+            await sync_to_async(Issue.objects.filter(pk=issue.pk).update)(
+                last_summary=issue.last_summary,
+                next_action=issue.next_action,
+                last_summary_at=issue.last_summary_at,
+                last_summary_message_id=issue.last_summary_message_id,
+            )
+        
+        return summary
 
 
 # Singleton instance
@@ -0,0 +1,85 @@
+"""
+Batched email sending over reused SMTP connections.
+
+EmailMessage.send() opens a new SMTP connection (and TLS session) for every
+message. send_messages_pooled() instead opens up to EMAIL_BULK_CONNECTIONS
+connections and sends each one's share of the messages on it with
+send_messages(), one thread per connection.
+
+A connection that drops mid-batch (the server hung up, timed out, or
+answered 421) is re-opened and the message retried, up to
+EMAIL_BULK_RETRIES times; other failures, such as refused recipients, are
+reported for that message only and the batch carries on.
+"""
+import logging
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+NOT_SENT = 'Not sent'
+
+
+def _is_disconnect(error):
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    return isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError))
+
+
+def _send_share(messages, indexes, errors, retries):
+    """Send messages[i] for i in indexes over one connection, recording failures in errors[i]"""
+    connection = get_connection(fail_silently=False)
+    try:
+        for index in indexes:
+            attempt = 0
+            while True:
+                try:
+                    # No-op while the connection is open; re-opens it after a disconnect
+                    connection.open()
+                    connection.send_messages([messages[index]])
+                    errors[index] = None
+                    break
+                except Exception as e:
+                    if _is_disconnect(e) and attempt < retries:
+                        attempt += 1
+                        logger.warning(f"SMTP connection lost ({e}), reconnecting (attempt {attempt}/{retries})")
+                        connection.close()
+                        continue
+                    errors[index] = str(e) or e.__class__.__name__
+                    if _is_disconnect(e):
+                        connection.close()
+                    break
+    finally:
+        try:
+            connection.close()
+        except Exception as e:
+            logger.warning(f"Error closing SMTP connection: {e}")
+
+
+def send_messages_pooled(messages, connections=None, retries=None):
+    """
+    Send EmailMessages over up to `connections` reused connections.
+    Returns one entry per message: None when it was sent, else the error text.
+    """
+    connections = connections or getattr(settings, 'EMAIL_BULK_CONNECTIONS', 3)
+    retries = getattr(settings, 'EMAIL_BULK_RETRIES', 2) if retries is None else retries
+    errors = [NOT_SENT] * len(messages)
+    if not messages:
+        return errors
+
+    # Round-robin shares keep the connections evenly loaded
+    shares = [list(range(start, len(messages), connections)) for start in range(min(connections, len(messages)))]
+    with ThreadPoolExecutor(max_workers=len(shares), thread_name_prefix='smtp-bulk') as executor:
+        futures = [executor.submit(_send_share, messages, share, errors, retries) for share in shares]
+        for future, share in zip(futures, shares):
+            try:
+                future.result()
+            except Exception as e:
+                # The connection could not be created: nothing left in this share was sent
+                logger.error(f"Bulk email connection failed: {e}")
+                for index in share:
+                    if errors[index] is NOT_SENT:
+                        errors[index] = str(e)
+    return errors
@@ -0,0 +1,47 @@
+"""
+Conversation history queries for AI prompts.
+
+Issue threads can run to hundreds of emails, so prompts never load a whole
+thread:
+
+- thread_tail() reads the last N emails with a descending (timestamp, id)
+  query limited to N, which the (issue, timestamp) index answers directly;
+- messages_after() pages forward from a (timestamp, id) keyset checkpoint.
+  The rolling summary (Issue.last_summary) remembers the last email it
+  folded in (Issue.last_summary_message), so each update only reads and
+  sends the emails that arrived since.
+"""
+from django.db.models import Q
+
+from .models import AICommunicationLog
+
+HISTORY_FIELDS = ('id', 'sender', 'message', 'timestamp')
+
+
+def _thread(issue):
+    return AICommunicationLog.objects.filter(issue=issue, message_type='email')
+
+
+def thread_tail(issue, limit):
+    """The last `limit` emails of an issue, oldest first"""
+    rows = _thread(issue).order_by('-timestamp', '-id').values(*HISTORY_FIELDS)[:limit]
+    return list(reversed(rows))
+
+
+def summary_checkpoint(issue):
+    """{'id', 'timestamp'} of the last email folded into the summary, None before the first summary"""
+    if not issue.last_summary_message_id:
+        return None
+    return AICommunicationLog.objects.filter(pk=issue.last_summary_message_id).values('id', 'timestamp').first()
+
+
+def messages_after(issue, checkpoint=None, limit=None):
+    """Emails after a checkpoint (see summary_checkpoint), oldest first, at most `limit`"""
+    messages = _thread(issue)
+    if checkpoint is not None:
+        messages = messages.filter(
+            Q(timestamp__gt=checkpoint['timestamp']) |
+            Q(timestamp=checkpoint['timestamp'], id__gt=checkpoint['id'])
+        )
+    messages = messages.order_by('timestamp', 'id').values(*HISTORY_FIELDS)
+    return list(messages[:limit] if limit else messages)
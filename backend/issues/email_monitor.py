@@ -1,5 +1,12 @@
 """
 Email Monitor Service - Automatically fetches vendor replies via IMAP
+
+Only messages that arrived since the last cycle are looked at (see
+issues.imap_sync): their headers are fetched in one batch and full bodies
+are downloaded only for messages whose subject or reply headers reference
+an issue. The IMAP connection is kept open between cycles unless
+EMAIL_MONITOR_KEEP_CONNECTION is off. The replies of a cycle are analysed
+and answered together by issues.reply_pipeline.
 """
 import imaplib
 import email
@@ -11,11 +18,28 @@ from typing import Dict, List, Optional
 from django.conf import settings
 from django.utils import timezone
 from issues.models import Issue, AICommunicationLog
-from issues.ai_services import ai_manager
-import asyncio
+from issues.imap_sync import MailboxSync
+from issues.reply_pipeline import reply_pipeline
 
 logger = logging.getLogger(__name__)
 
+SLUG_PATTERN = r'([a-z0-9-]+-[a-f0-9]{8})'
+SHORT_UUID_PATTERN = r'[a-f0-9]{8}'
+UUID_PATTERN = r'[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}'
+
+# Issue references in subjects / bodies, most specific first. Our own
+# Message-IDs look like <issue-{uuid}-{timestamp}@buy2rent.eu>, so replies
+# also match through In-Reply-To / References.
+ISSUE_REFERENCE_PATTERNS = [
+    rf'\[Issue\s*#\s*({SLUG_PATTERN})\]',
+    rf'Issue\s*#\s*({SLUG_PATTERN})',
+    rf'#({SLUG_PATTERN})',
+    rf'\[Issue\s*#\s*({UUID_PATTERN})\]',
+    rf'Issue\s*#?\s*({UUID_PATTERN})',
+    rf'issue-({UUID_PATTERN})',
+    rf'#({SHORT_UUID_PATTERN})',
+]
+
 
 class EmailMonitor:
     """Monitor email inbox for vendor responses"""
@@ -26,18 +50,27 @@ class EmailMonitor:
         # Use same credentials as SMTP
         self.imap_user = getattr(settings, 'EMAIL_HOST_USER', '')
         self.imap_password = getattr(settings, 'EMAIL_HOST_PASSWORD', '')
+        self.imap_use_ssl = getattr(settings, 'IMAP_USE_SSL', True)
+        self.mailbox = getattr(settings, 'IMAP_INBOX_FOLDER', 'INBOX')
+        self.keep_connection = getattr(settings, 'EMAIL_MONITOR_KEEP_CONNECTION', True)
         self.imap = None
+        self.sync = None
         
     def connect(self):
         """Connect to IMAP server"""
         try:
-            self.imap = imaplib.IMAP4_SSL(self.imap_host, self.imap_port)
+            if self.imap_use_ssl:
+                self.imap = imaplib.IMAP4_SSL(self.imap_host, self.imap_port)
+            else:
+                self.imap = imaplib.IMAP4(self.imap_host, self.imap_port)
             self.imap.login(self.imap_user, self.imap_password)
-            self.imap.select('INBOX')
+            self.sync = MailboxSync(self.imap, self.imap_user, self.mailbox)
+            self.sync.select()
             logger.info(f"Connected to IMAP server {self.imap_host}")
             return True
         except Exception as e:
             logger.error(f"Failed to connect to IMAP: {e}")
+            self.disconnect()
             return False
     
     def disconnect(self):
@@ -48,23 +81,11 @@ class EmailMonitor:
                 self.imap.logout()
             except:
                 pass
+        self.imap = None
+        self.sync = None
     
-    def extract_issue_id_from_email(self, subject: str, body: str) -> Optional[str]:
-        """Extract Issue UUID from email subject or body"""
-        slug_pattern = r'([a-z0-9-]+-[a-f0-9]{8})'
-        short_uuid_pattern = r'[a-f0-9]{8}'
-        uuid_pattern = r'[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}'
-
-        patterns = [
-            rf'\[Issue\s*#\s*({slug_pattern})\]',
-            rf'Issue\s*#\s*({slug_pattern})',
-            rf'#({slug_pattern})',
-            rf'\[Issue\s*#\s*({uuid_pattern})\]',
-            rf'Issue\s*#?\s*({uuid_pattern})',
-            rf'issue-({uuid_pattern})',
-            rf'#({short_uuid_pattern})',
-        ]
-
+    def extract_issue_id_from_email(self, subject: str, body: str, headers: str = '') -> Optional[str]:
+        """Extract Issue UUID from email subject, body or reply headers (In-Reply-To / References)"""
         def _resolve(extracted: str) -> Optional[str]:
             try:
                 if '-' in extracted and len(extracted) > 8:
@@ -88,22 +109,33 @@ class EmailMonitor:
                 logger.error(f"Error resolving issue identifier {extracted}: {e}")
             return None
 
-        for pattern in patterns:
-            match = re.search(pattern, subject or '', re.IGNORECASE)
-            if match:
-                resolved = _resolve(match.group(1))
-                if resolved:
-                    return resolved
-
-        for pattern in patterns:
-            match = re.search(pattern, body or '', re.IGNORECASE)
-            if match:
-                resolved = _resolve(match.group(1))
-                if resolved:
-                    return resolved
+        for text in (subject, body, headers):
+            for pattern in ISSUE_REFERENCE_PATTERNS:
+                match = re.search(pattern, text or '', re.IGNORECASE)
+                if match:
+                    resolved = _resolve(match.group(1))
+                    if resolved:
+                        return resolved
 
         return None
     
+    def has_issue_reference(self, msg) -> bool:
+        """Cheap check on headers only (no database lookups): could this message belong to an issue?"""
+        text = ' '.join([
+            self.decode_header_value(msg.get('Subject', '')),
+            msg.get('In-Reply-To', '') or '',
+            msg.get('References', '') or '',
+        ])
+        return any(re.search(pattern, text, re.IGNORECASE) for pattern in ISSUE_REFERENCE_PATTERNS)
+    
+    def email_issue_id(self, email_data: Dict) -> Optional[str]:
+        """Issue referenced by a parsed email"""
+        return self.extract_issue_id_from_email(
+            email_data.get('subject', ''),
+            email_data.get('body', ''),
+            f"{email_data.get('in_reply_to', '')} {email_data.get('references', '')}",
+        )
+    
     def parse_email_message(self, msg) -> Dict:
         """Parse email message and extract relevant data"""
         result = {
@@ -114,6 +146,7 @@ class EmailMonitor:
             'body': '',
             'message_id': '',
             'in_reply_to': '',
+            'references': '',
         }
         
         # Extract headers
@@ -122,6 +155,7 @@ class EmailMonitor:
         result['to'] = self.decode_header_value(msg.get('To', ''))
         result['message_id'] = msg.get('Message-ID', '')
         result['in_reply_to'] = msg.get('In-Reply-To', '')
+        result['references'] = msg.get('References', '')
         
         # Parse date
         date_str = msg.get('Date', '')
@@ -167,58 +201,53 @@ class EmailMonitor:
         return ' '.join(decoded_parts)
     
     def fetch_unread_emails(self):
-        """Fetch all emails from inbox"""
+        """
+        Fetch the emails that arrived since the last sync and reference an issue.
+        The checkpoint only moves once monitor_inbox has processed them.
+        """
         emails = []
         
         try:
-            # Get last 50 emails to check for vendor replies
-            # This ensures we catch recent replies even if marked as read
-            status, messages = self.imap.search(None, 'ALL')
-            
-            if status != 'OK':
-                logger.error("Failed to search emails")
+            new_uids = self.sync.new_uids()
+            if not new_uids:
                 return emails
             
-            email_ids = messages[0].split()
-            # Process only the last 50 emails to avoid processing old emails
-            recent_email_ids = email_ids[-50:] if len(email_ids) > 50 else email_ids
+            # Headers of every new message in one batch, bodies only for issue replies
+            headers = self.sync.fetch_headers(new_uids)
+            matching_uids = [uid for uid in new_uids if uid in headers and self.has_issue_reference(headers[uid])]
+            messages = self.sync.fetch_messages(matching_uids)
             
-            for email_id in recent_email_ids:
-                # Fetch email
-                status, msg_data = self.imap.fetch(email_id, '(RFC822)')
-                
-                if status != 'OK':
-                    continue
-                
-                # Parse email
-                raw_email = msg_data[0][1]
-                msg = email.message_from_bytes(raw_email)
-                
-                email_data = self.parse_email_message(msg)
-                emails.append(email_data)
-                
-                # Mark as read
-                self.imap.store(email_id, '+FLAGS', '\\Seen')
+            for uid in matching_uids:
+                if uid in messages:
+                    emails.append(self.parse_email_message(messages[uid]))
+            
+            # Mark as read
+            if matching_uids:
+                self.sync.mark_seen(matching_uids)
+            self.sync.advance(new_uids)
             
-            logger.info(f"Fetched {len(emails)} unread emails")
+            logger.info(f"Fetched {len(emails)} issue emails out of {len(new_uids)} new messages")
             
         except Exception as e:
             logger.error(f"Error fetching emails: {e}")
+            # Reconnect (and resume from the checkpoint) on the next cycle
+            self.disconnect()
         
         return emails
     
-    def process_vendor_response(self, email_data: Dict):
-        """Process vendor email response and link to issue"""
+    def record_vendor_response(self, email_data: Dict) -> Optional[Issue]:
+        """
+        Store a vendor email on its issue. Returns the issue when the email
+        still needs an AI reply, None otherwise.
+        """
+        issue_id = None
         try:
             # Extract issue ID
-            issue_id = self.extract_issue_id_from_email(
-                email_data['subject'],
-                email_data['body']
-            )
+            issue_id = self.email_issue_id(email_data)
             
             if not issue_id:
                 logger.info(f"No issue ID found in email: {email_data['subject']}")
-                return
+                return None
             
             # Get issue from database
             issue = Issue.objects.get(id=issue_id)
@@ -243,7 +272,7 @@ class EmailMonitor:
                     ).exists()
                     
                     if ai_reply_exists:
-                        return
+                        return None
             
             # Create vendor response log (if not already stored)
             vendor_log = existing_vendor_log
@@ -265,60 +294,58 @@ class EmailMonitor:
             
             logger.info(f"Added vendor response for issue {issue_id}")
             
-            # Generate AI reply asynchronously
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                # Analyze and generate reply
-                analysis = loop.run_until_complete(
-                    ai_manager.analyze_vendor_response(issue, email_data['body'])
-                )
-                
-                reply_result = loop.run_until_complete(
-                    ai_manager.generate_reply_for_approval(issue, email_data['body'])
-                )
-                
-                logger.info(f"Generated AI reply for issue {issue_id}")
-                
-            except Exception as e:
-                logger.error(f"Error generating AI reply: {e}")
-            finally:
-                loop.close()
-                
+            return issue
         except Issue.DoesNotExist:
             logger.warning(f"Issue not found: {issue_id}")
         except Exception as e:
             logger.error(f"Error processing vendor response: {e}")
+        return None
+    
+    def process_vendor_response(self, email_data: Dict):
+        """Process vendor email response and link to issue"""
+        issue = self.record_vendor_response(email_data)
+        if issue:
+            reply_pipeline.run([(issue, email_data['body'])])
     
     def monitor_inbox(self):
         """Main monitoring loop - fetch and process emails"""
-        if not self.connect():
+        if self.imap is None and not self.connect():
             logger.error("Failed to connect to IMAP server")
             return
         
         try:
-            # Fetch unread emails
+            # Fetch new emails
             emails = self.fetch_unread_emails()
             logger.info(f"Found {len(emails)} emails to check")
             
             processed_count = 0
-            # Process each email
+            pending_replies = []
+            # Store each email on its issue; AI replies are generated together below
             for email_data in emails:
                 # Check if email has Issue ID
-                issue_id = self.extract_issue_id_from_email(
-                    email_data.get('subject', ''),
-                    email_data.get('body', '')
-                )
+                issue_id = self.email_issue_id(email_data)
                 
                 if issue_id:
                     logger.info(f"Found email with Issue ID: {issue_id}")
-                    self.process_vendor_response(email_data)
+                    issue = self.record_vendor_response(email_data)
+                    if issue:
+                        pending_replies.append((issue, email_data['body']))
                     processed_count += 1
             
-            logger.info(f"Processed {processed_count} vendor responses out of {len(emails)} emails")
+            # Analyse and draft replies concurrently across issues
+            results = reply_pipeline.run(pending_replies)
+            failed = sum(1 for result in results if not result['success'])
+            
+            logger.info(
+                f"Processed {processed_count} vendor responses out of {len(emails)} emails, "
+                f"{len(results) - failed} AI replies generated, {failed} failed"
+            )
             
+            if self.sync:
+                self.sync.save_checkpoint()
         finally:
-            self.disconnect()
+            if not self.keep_connection:
+                self.disconnect()
 
 
 # Singleton instance
@@ -0,0 +1,118 @@
+"""
+Rendering of issue emails: message text to HTML, templates, plain text.
+
+- format_message_html() turns a message into HTML in one pass of a
+  precompiled pattern (Markdown links and bare URLs, images shown inline)
+  and keeps the last EMAIL_RENDER_CACHE_SIZE results, so a message that is
+  rendered again (re-sends, retries) is not formatted twice.
+- Compiled email templates are kept per process (outside DEBUG, where
+  template edits must show up without a restart).
+- html_to_text() derives the text/plain part with precompiled patterns.
+  strip_tags() ran Django's HTML parser over the whole template, took
+  milliseconds per email and left the stylesheet in the text.
+
+The rendered HTML of an email is stored on its AICommunicationLog
+(html_content), so later sends of the same entry reuse it; editing the
+message clears it.
+"""
+import html
+import re
+from functools import lru_cache
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+_LINK_RE = re.compile(r'\[(?P<label>[^\]]+)\]\((?P<link>https?://[^\s)]+)\)|(?P<url>https?://[^\s<>]+)')
+_IMAGE_URL_RE = re.compile(r'\.(png|jpe?g|gif|webp|bmp|svg)(\?.*)?$', re.IGNORECASE)
+
+_HIDDEN_RE = re.compile(r'<!--.*?-->|<(head|style|script)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_BREAK_RE = re.compile(r'<br\s*/?>|</(?:p|div|tr|table|h[1-6]|li)\s*>', re.IGNORECASE)
+_ANCHOR_RE = re.compile(r'<a\b[^>]*?href="(?P<href>[^"]*)"[^>]*>(?P<label>.*?)</a\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]*>')
+_LINE_EDGES_RE = re.compile(r'[^\S\n]*\n[^\S\n]*')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+def _is_image_url(url):
+    return bool(_IMAGE_URL_RE.search(url)) or 'media/' in url
+
+
+def _image_html(url, alt):
+    return (
+        f'<div style="margin:12px 0;">'
+        f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer">'
+        f'<img src="{escape(url)}" alt="{escape(alt)}" '
+        f'style="max-width:100%;height:auto;border-radius:8px;border:1px solid #e5e7eb;" />'
+        f'</a>'
+        f'<div style="font-size:12px;color:#6b7280;margin-top:6px;">'
+        f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer" style="color:#2563eb;text-decoration:none;">Open image</a>'
+        f'</div>'
+        f'</div>'
+    )
+
+
+def _link_html(url, label):
+    return (
+        f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer" '
+        f'style="color:#2563eb;text-decoration:none;">{escape(label)}</a>'
+    )
+
+
+@lru_cache(maxsize=getattr(settings, 'EMAIL_RENDER_CACHE_SIZE', 256))
+def _format(text):
+    parts = []
+    position = 0
+    for match in _LINK_RE.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        if match.group('link'):
+            url, label, alt = match.group('link'), match.group('label'), match.group('label')
+        else:
+            url = label = match.group('url')
+            alt = 'Product Image'
+        parts.append(_image_html(url, alt) if _is_image_url(url) else _link_html(url, label))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return ''.join(parts).replace('\n', '<br>')
+
+
+def format_message_html(message):
+    """Message text as HTML: escaped, line breaks kept, links clickable and image links shown inline"""
+    text = (message or '').replace('\r\n', '\n').replace('\r', '\n')
+    return mark_safe(_format(text))
+
+
+@lru_cache(maxsize=None)
+def _cached_template(template_name):
+    return get_template(template_name)
+
+
+def get_email_template(template_name):
+    if settings.DEBUG:
+        return get_template(template_name)
+    return _cached_template(template_name)
+
+
+def _anchor_text(match):
+    label = _TAG_RE.sub('', match.group('label')).strip()
+    href = match.group('href')
+    # Image-only links (icons, inline photos) have no text; photos are followed by an "Open image" link
+    if not label or not href.startswith('http') or label == href:
+        return label
+    return f'{label} ({href})'
+
+
+def html_to_text(html_content):
+    """Readable text/plain alternative of an HTML email, with links written out as label (url)"""
+    # Whitespace in HTML source is not significant; collapsing it first leaves a fraction of the text
+    text = ' '.join(_HIDDEN_RE.sub('', html_content).split())
+    text = _ANCHOR_RE.sub(_anchor_text, text)
+    text = _BREAK_RE.sub('\n', text)
+    text = _LINE_EDGES_RE.sub('\n', html.unescape(_TAG_RE.sub('', text)))
+    return _BLANK_LINES_RE.sub('\n\n', text).strip()
+
+
+def render_email(template_name, context):
+    """(html, plain text) of an email template"""
+    html_content = get_email_template(template_name).render(context)
+    return html_content, html_to_text(html_content)
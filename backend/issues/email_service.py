@@ -1,91 +1,18 @@
 """
 Email Service for Issue Management
 Handles outbound email sending with proper tracking and Issue UUID embedding
+Issue emails are queued in the outbox (issues.outbox) and sent by the outbox worker
 """
 from typing import Dict, Any
 from django.conf import settings
-from django.core.mail import EmailMessage, EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.core.mail import EmailMessage
 from django.utils import timezone
-from django.utils.html import strip_tags, escape
-from django.utils.safestring import mark_safe
 from datetime import timedelta
 import logging
-import re
 
-logger = logging.getLogger(__name__)
-
-def _format_message_html(message: str):
-    text = (message or '').replace('\r\n', '\n').replace('\r', '\n')
-
-    def is_image_url(url: str) -> bool:
-        return bool(re.search(r'\.(png|jpe?g|gif|webp|bmp|svg)(\?.*)?$', url, re.IGNORECASE))
-
-    snippets = []
-
-    def token_for(html: str) -> str:
-        token = f"__HTMLTOKEN{len(snippets)}__"
-        snippets.append((token, html))
-        return token
-
-    md_link_re = re.compile(r'\[([^\]]+)\]\((https?://[^\s)]+)\)')
-
-    def md_link_sub(m):
-        label = m.group(1)
-        url = m.group(2)
-        if is_image_url(url) or 'media/' in url:
-            html = (
-                f'<div style="margin:12px 0;">'
-                f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer">'
-                f'<img src="{escape(url)}" alt="{escape(label)}" '
-                f'style="max-width:100%;height:auto;border-radius:8px;border:1px solid #e5e7eb;" />'
-                f'</a>'
-                f'<div style="font-size:12px;color:#6b7280;margin-top:6px;">'
-                f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer" style="color:#2563eb;text-decoration:none;">Open image</a>'
-                f'</div>'
-                f'</div>'
-            )
-            return token_for(html)
-        html = (
-            f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer" '
-            f'style="color:#2563eb;text-decoration:none;">{escape(label)}</a>'
-        )
-        return token_for(html)
-
-    text = md_link_re.sub(md_link_sub, text)
-
-    url_re = re.compile(r'(https?://[^\s<>]+)')
-
-    def url_sub(m):
-        url = m.group(1)
-        if is_image_url(url) or 'media/' in url:
-            html = (
-                f'<div style="margin:12px 0;">'
-                f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer">'
-                f'<img src="{escape(url)}" alt="Product Image" '
-                f'style="max-width:100%;height:auto;border-radius:8px;border:1px solid #e5e7eb;" />'
-                f'</a>'
-                f'<div style="font-size:12px;color:#6b7280;margin-top:6px;">'
-                f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer" style="color:#2563eb;text-decoration:none;">Open image</a>'
-                f'</div>'
-                f'</div>'
-            )
-            return token_for(html)
-        html = (
-            f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer" '
-            f'style="color:#2563eb;text-decoration:none;">{escape(url)}</a>'
-        )
-        return token_for(html)
-
-    text = url_re.sub(url_sub, text)
-
-    rendered = escape(text)
-    for token, html in snippets:
-        rendered = rendered.replace(token, html)
-
-    rendered = rendered.replace('\n', '<br>')
-    return mark_safe(rendered)
+from .email_rendering import format_message_html, html_to_text, render_email
 
+logger = logging.getLogger(__name__)
 
 class EmailService:
     """Service for sending and tracking issue-related emails"""
@@ -93,9 +20,9 @@ class EmailService:
     def __init__(self):
         self.from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'procurement@buy2rent.eu')
     
-    def send_issue_email(self, issue, subject: str, body: str, is_initial_report: bool = True, ai_data: Dict[str, Any] = None) -> str:
+    def send_issue_email(self, issue, subject: str, body: str, is_initial_report: bool = True, ai_data: Dict[str, Any] = None, outbound=None) -> str:
         """
-        Send email to vendor about issue with HTML template
+        Queue email to vendor about issue with HTML template (sent by the outbox worker)
         
         Args:
             issue: Issue model instance
@@ -103,9 +30,10 @@ class EmailService:
             body: Email body (plain text or AI-generated message)
             is_initial_report: Whether this is the initial issue report (uses detailed template)
             ai_data: Optional dictionary with AI-generated structured data
+            outbound: Queued issue report being written by the outbox worker, filled in with this email
         
         Returns:
-            email_message_id: The Message-ID header from sent email
+            email_message_id: The Message-ID header the email is sent with
         """
         from .models import AICommunicationLog
         
@@ -121,11 +49,11 @@ class EmailService:
         # Using 5 minutes window to prevent accidental double-sends while allowing legitimate follow-ups
         duplicate_window_minutes = getattr(settings, 'EMAIL_DUPLICATE_PREVENTION_MINUTES', 5)
         recently = timezone.now() - timedelta(minutes=duplicate_window_minutes)
-        existing_sent = AICommunicationLog.objects.filter(
+        existing_sent = outbound is None and AICommunicationLog.objects.filter(
             issue=issue,
             sender='AI',
             message_type='email',
-            status='sent',
+            status__in=['queued', 'sent'],
             email_to=vendor_email,
             subject=subject,
             message=normalized_body,
@@ -220,7 +148,7 @@ class EmailService:
                 }
                 
                 # Render HTML template
-                html_content = render_to_string('emails/issue_report.html', context)
+                html_content, plain_text = render_email('emails/issue_report.html', context)
             else:
                 # Reply template
                 context = {
@@ -229,12 +157,9 @@ class EmailService:
                     'issue_slug': issue.get_issue_slug() if hasattr(issue, 'get_issue_slug') else str(issue.id),
                     'order_reference': issue.order.po_number if issue.order else 'N/A',
                     'message_body': normalized_body,
-                    'message_body_html': _format_message_html(normalized_body),
+                    'message_body_html': format_message_html(normalized_body),
                 }
-                html_content = render_to_string('emails/issue_reply.html', context)
-            
-            # Create plain text version for email body
-            plain_text = strip_tags(html_content)
+                html_content, plain_text = render_email('emails/issue_reply.html', context)
             
             # Create clean message text for chat UI display (no HTML/CSS cruft)
             if is_initial_report:
@@ -254,65 +179,36 @@ class EmailService:
                 # For replies: just the message body
                 chat_message = f"Dear {issue.vendor.name if issue.vendor else 'Vendor'},\n\n{normalized_body}"
             
-            # Create email message with HTML
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=plain_text,
-                from_email=self.from_email,
-                to=[vendor_email],
-                reply_to=[self.from_email],
+            # Queue the email with a communication log holding the clean chat message for UI display
+            email_message_id = self._queue(
+                AICommunicationLog(
+                    issue=issue,
+                    sender='AI',
+                    message=chat_message,  # Clean message for chat UI display
+                    html_content=html_content,  # Full HTML template for email reference
+                    message_type='email',
+                    subject=subject,
+                    email_from=self.from_email,
+                    email_to=vendor_email,
+                    email_thread_id=f'issue-{issue.id}',
+                    ai_generated=True,
+                ),
+                plain_text,
+                html_content,
+                outbound=outbound,
             )
             
-            # Attach HTML version
-            email.attach_alternative(html_content, "text/html")
-            
-            # Add custom headers for tracking
-            email.extra_headers = {
-                'X-Issue-ID': str(issue.id),
-                'X-Issue-Thread': f'issue-{issue.id}',
-            }
-            
-            # Send email and verify it was actually sent
-            sent_count = email.send(fail_silently=False)
-            
-            if sent_count == 0:
-                raise RuntimeError(f"Email send returned 0 - email was not sent to {vendor_email}")
-            
-            logger.info(f"Email successfully sent to {vendor_email} (sent_count={sent_count})")
-            
-            # Get Message-ID (Django doesn't expose this easily, so we generate one)
-            email_message_id = f"<issue-{issue.id}-{timezone.now().timestamp()}@buy2rent.eu>"
-            
-            # Create communication log with clean chat message for UI display
-            log_entry = AICommunicationLog.objects.create(
-                issue=issue,
-                sender='AI',
-                message=chat_message,  # Clean message for chat UI display
-                html_content=html_content,  # Full HTML template for email reference
-                message_type='email',
-                subject=subject,
-                email_from=self.from_email,
-                email_to=vendor_email,
-                email_message_id=email_message_id,
-                email_thread_id=f'issue-{issue.id}',
-                ai_generated=True,
-                status='sent',
-                timestamp=timezone.now()
-            )
-            
-            # Update issue
-            if not issue.first_sent_at:
-                issue.first_sent_at = timezone.now()
+            # Update issue (first_sent_at is set by the outbox worker once delivered)
             issue.status = 'Pending Vendor Response'
             issue.ai_activated = True
             issue.save()
             
-            logger.info(f"Email sent for issue {issue.id} to {vendor_email}")
+            logger.info(f"Email queued for issue {issue.id} to {vendor_email}")
             
             return email_message_id
             
         except Exception as e:
-            logger.error(f"Failed to send email for issue {issue.id}: {e}")
+            logger.error(f"Failed to queue email for issue {issue.id}: {e}")
             
             # Create failed log entry
             AICommunicationLog.objects.create(
@@ -333,7 +229,7 @@ class EmailService:
     
     def send_manual_message(self, issue, subject: str, body: str, user) -> str:
         """
-        Send manual message from admin to vendor with HTML template
+        Queue manual message from admin to vendor with HTML template
         
         Args:
             issue: Issue model instance
@@ -342,7 +238,7 @@ class EmailService:
             user: User sending the message
         
         Returns:
-            email_message_id: The Message-ID header from sent email
+            email_message_id: The Message-ID header the email is sent with
         """
         from .models import AICommunicationLog
         
@@ -363,57 +259,30 @@ class EmailService:
                 'issue_slug': issue.get_issue_slug() if hasattr(issue, 'get_issue_slug') else str(issue.id),
                 'order_reference': issue.order.po_number if issue.order else 'N/A',
                 'message_body': normalized_body,
-                'message_body_html': _format_message_html(normalized_body),
+                'message_body_html': format_message_html(normalized_body),
             }
             
             # Render HTML template
-            html_content = render_to_string('emails/manual_message.html', context)
-            plain_text = strip_tags(html_content)
-            
-            # Create email message with HTML
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=plain_text,
-                from_email=self.from_email,
-                to=[vendor_email],
-                reply_to=[self.from_email],
-            )
-            
-            # Attach HTML version
-            email.attach_alternative(html_content, "text/html")
-            
-            email.extra_headers = {
-                'X-Issue-ID': str(issue.id),
-                'X-Issue-Thread': f'issue-{issue.id}',
-            }
-            
-            # Send email and verify
-            sent_count = email.send(fail_silently=False)
-            
-            if sent_count == 0:
-                raise RuntimeError(f"Email send returned 0 - email was not sent to {vendor_email}")
-            
-            logger.info(f"Manual email successfully sent to {vendor_email} (sent_count={sent_count})")
-            
-            email_message_id = f"<issue-{issue.id}-{timezone.now().timestamp()}@buy2rent.eu>"
-            
-            # Create communication log (store plain text version)
-            AICommunicationLog.objects.create(
-                issue=issue,
-                sender='Admin',
-                message=normalized_body,
-                html_content=html_content,
-                message_type='email',
-                subject=subject,
-                email_from=self.from_email,
-                email_to=vendor_email,
-                email_message_id=email_message_id,
-                email_thread_id=f'issue-{issue.id}',
-                ai_generated=False,
-                status='sent',
-                approved_by=user,
-                approved_at=timezone.now(),
-                timestamp=timezone.now()
+            html_content, plain_text = render_email('emails/manual_message.html', context)
+            
+            # Queue the email with its communication log (store plain text version)
+            email_message_id = self._queue(
+                AICommunicationLog(
+                    issue=issue,
+                    sender='Admin',
+                    message=normalized_body,
+                    html_content=html_content,
+                    message_type='email',
+                    subject=subject,
+                    email_from=self.from_email,
+                    email_to=vendor_email,
+                    email_thread_id=f'issue-{issue.id}',
+                    ai_generated=False,
+                    approved_by=user,
+                    approved_at=timezone.now(),
+                ),
+                plain_text,
+                html_content,
             )
             
             # Update issue status if needed
@@ -421,88 +290,76 @@ class EmailService:
                 issue.status = 'Pending Vendor Response'
                 issue.save()
             
-            logger.info(f"Manual email sent for issue {issue.id} by {user.email}")
+            logger.info(f"Manual email queued for issue {issue.id} by {user.email}")
             
             return email_message_id
             
         except Exception as e:
-            logger.error(f"Failed to send manual email for issue {issue.id}: {e}")
+            logger.error(f"Failed to queue manual email for issue {issue.id}: {e}")
             raise
     
     def send_approved_draft(self, communication_log, user) -> bool:
         """
-        Send an approved AI-generated draft with HTML template
+        Queue an approved AI-generated draft with HTML template
         
         Args:
             communication_log: AICommunicationLog instance with status='pending_approval'
             user: User approving the message
         
         Returns:
-            bool: True if sent successfully
+            bool: True if queued successfully
         """
         if communication_log.status != 'pending_approval':
             raise ValueError("Communication log is not pending approval")
         
         issue = communication_log.issue
-        vendor_email = communication_log.email_to
         
         try:
-            # Prepare context for HTML template (reply template)
-            context = {
-                'vendor_name': issue.vendor.name if issue.vendor else 'Vendor',
-                'issue_id': str(issue.id),
-                'issue_slug': issue.get_issue_slug(),
-                'order_reference': issue.order.po_number if issue.order else 'N/A',
-                'message_body': communication_log.message,
-                'message_body_html': _format_message_html(communication_log.message),
-            }
+            html_content, plain_text = self.render_reply(communication_log)
             
-            # Render HTML template
-            html_content = render_to_string('emails/issue_reply.html', context)
-            plain_text = strip_tags(html_content)
-            
-            # Create email message with HTML
-            email = EmailMultiAlternatives(
-                subject=communication_log.subject,
-                body=plain_text,
-                from_email=self.from_email,
-                to=[vendor_email],
-                reply_to=[self.from_email],
-            )
-            
-            # Attach HTML version
-            email.attach_alternative(html_content, "text/html")
-            
-            email.extra_headers = {
-                'X-Issue-ID': str(issue.id),
-                'X-Issue-Thread': f'issue-{issue.id}',
-            }
-            
-            # Send email and verify
-            sent_count = email.send(fail_silently=False)
-            
-            if sent_count == 0:
-                raise RuntimeError(f"Email send returned 0 - email was not sent to {vendor_email}")
-            
-            logger.info(f"Approved draft successfully sent to {vendor_email} (sent_count={sent_count})")
-            
-            # Update communication log
-            communication_log.status = 'sent'
+            # Queue the email; the draft becomes its communication log
             communication_log.approved_by = user
             communication_log.approved_at = timezone.now()
-            communication_log.email_message_id = f"<issue-{issue.id}-{timezone.now().timestamp()}@buy2rent.eu>"
-            communication_log.save()
+            self._queue(communication_log, plain_text, html_content)
             
-            logger.info(f"Approved draft sent for issue {issue.id} by {user.email}")
+            logger.info(f"Approved draft queued for issue {issue.id} by {user.email}")
             
             return True
             
         except Exception as e:
-            logger.error(f"Failed to send approved draft for issue {issue.id}: {e}")
+            logger.error(f"Failed to queue approved draft for issue {issue.id}: {e}")
             communication_log.status = 'failed'
             communication_log.save()
             raise
     
+    def render_reply(self, communication_log):
+        """
+        (html, plain text) of a reply email, memoized on the log's html_content
+        so later sends of the same entry do not render it again
+        """
+        if communication_log.html_content:
+            return communication_log.html_content, html_to_text(communication_log.html_content)
+        
+        issue = communication_log.issue
+        context = {
+            'vendor_name': issue.vendor.name if issue.vendor else 'Vendor',
+            'issue_id': str(issue.id),
+            'issue_slug': issue.get_issue_slug(),
+            'order_reference': issue.order.po_number if issue.order else 'N/A',
+            'message_body': communication_log.message,
+            'message_body_html': format_message_html(communication_log.message),
+        }
+        html_content, plain_text = render_email('emails/issue_reply.html', context)
+        # Saved with the log (queue_email saves it)
+        communication_log.html_content = html_content
+        return html_content, plain_text
+    
+    def _queue(self, communication_log, plain_text: str, html_content: str, outbound=None) -> str:
+        """Hand the email of a communication log to the outbox (issues.outbox); returns its Message-ID"""
+        from .outbox import queue_email
+        
+        return queue_email(communication_log, plain_text, html_content, reply_to=self.from_email, outbound=outbound)
+    
     def send_bulk_emails(self, issue_ids: list, subject: str, body: str, user, include_issue_details: bool = True, include_photos: bool = False) -> dict:
         """
         Send bulk emails to vendors grouped by their issues
@@ -519,7 +376,9 @@ class EmailService:
             dict: Summary of sent emails with success/failure counts
         """
         from .models import Issue, AICommunicationLog
+        from .bulk_mail import send_messages_pooled
         from collections import defaultdict
+        from email.utils import make_msgid
         
         # Group issues by vendor
         issues = Issue.objects.filter(id__in=issue_ids).select_related('vendor', 'product')
@@ -537,81 +396,79 @@ class EmailService:
             'errors': []
         }
         
-        # Send email to each vendor
+        # Build one email per vendor
+        batch = []
         for vendor, vendor_issue_list in vendor_issues.items():
-            try:
-                # Build email content
-                email_subject = subject
-                email_body = body + "\n\n"
-                
-                if include_issue_details:
-                    email_body += "=" * 60 + "\n"
-                    email_body += "ISSUE DETAILS\n"
-                    email_body += "=" * 60 + "\n\n"
-                    
-                    for idx, issue in enumerate(vendor_issue_list, 1):
-                        email_body += f"Issue #{idx} - ID: {issue.id}\n"
-                        email_body += f"Product: {issue.product_name or (issue.product.product if issue.product else 'N/A')}\n"
-                        email_body += f"Type: {issue.type}\n"
-                        email_body += f"Description: {issue.description}\n"
-                        email_body += f"Reported: {issue.reported_on.strftime('%Y-%m-%d')}\n"
-                        email_body += f"Status: {issue.status}\n"
-                        email_body += "-" * 60 + "\n\n"
-                
-                email_body += "\n\nBest regards,\n"
-                email_body += "Procurement Team\n"
-                email_body += "Buy2Rent"
-                
-                # Create email message
-                email = EmailMessage(
-                    subject=email_subject,
-                    body=email_body,
-                    from_email=self.from_email,
-                    to=[vendor.email],
-                    reply_to=[self.from_email],
-                )
-                
-                # Send email
-                email.send(fail_silently=False)
-                
-                email_message_id = f"<bulk-{timezone.now().timestamp()}@buy2rent.eu>"
+            email_subject = subject
+            email_body = body + "\n\n"
+            
+            if include_issue_details:
+                email_body += "=" * 60 + "\n"
+                email_body += "ISSUE DETAILS\n"
+                email_body += "=" * 60 + "\n\n"
                 
-                # Create communication log for each issue
+                for idx, issue in enumerate(vendor_issue_list, 1):
+                    email_body += f"Issue #{idx} - ID: {issue.id}\n"
+                    email_body += f"Product: {issue.product_name or (issue.product.product if issue.product else 'N/A')}\n"
+                    email_body += f"Type: {issue.type}\n"
+                    email_body += f"Description: {issue.description}\n"
+                    email_body += f"Reported: {issue.reported_on.strftime('%Y-%m-%d')}\n"
+                    email_body += f"Status: {issue.status}\n"
+                    email_body += "-" * 60 + "\n\n"
+            
+            email_body += "\n\nBest regards,\n"
+            email_body += "Procurement Team\n"
+            email_body += "Buy2Rent"
+            
+            email_message_id = make_msgid(idstring='bulk', domain='buy2rent.eu')
+            email = EmailMessage(
+                subject=email_subject,
+                body=email_body,
+                from_email=self.from_email,
+                to=[vendor.email],
+                reply_to=[self.from_email],
+                headers={'Message-ID': email_message_id},
+            )
+            batch.append((vendor, vendor_issue_list, email))
+        
+        # Send all of them over a few reused SMTP connections
+        send_errors = send_messages_pooled([email for _, _, email in batch])
+        
+        now = timezone.now()
+        thread_id = f'bulk-{now.timestamp()}'
+        logs = []
+        sent_issues = []
+        for (vendor, vendor_issue_list, email), error in zip(batch, send_errors):
+            if error is None:
+                results['sent'] += 1
+                sent_issues.extend(vendor_issue_list)
+                logger.info(f"Bulk email sent to {vendor.name} ({vendor.email}) for {len(vendor_issue_list)} issues")
                 for issue in vendor_issue_list:
-                    AICommunicationLog.objects.create(
+                    logs.append(AICommunicationLog(
                         issue=issue,
                         sender='Admin',
-                        message=email_body,
+                        message=email.body,
                         message_type='email',
-                        subject=email_subject,
+                        subject=email.subject,
                         email_from=self.from_email,
                         email_to=vendor.email,
-                        email_message_id=email_message_id,
-                        email_thread_id=f'bulk-{timezone.now().timestamp()}',
+                        email_message_id=email.extra_headers['Message-ID'],
+                        email_thread_id=thread_id,
                         ai_generated=False,
                         status='sent',
                         approved_by=user,
-                        approved_at=timezone.now(),
-                        timestamp=timezone.now()
-                    )
-                    
-                    # Update issue status if needed
-                    if issue.status == 'Open':
-                        issue.status = 'Pending Vendor Response'
-                        issue.save()
-                
-                results['sent'] += 1
-                logger.info(f"Bulk email sent to {vendor.name} ({vendor.email}) for {len(vendor_issue_list)} issues")
-                
-            except Exception as e:
+                        approved_at=now,
+                        timestamp=now
+                    ))
+            else:
                 results['failed'] += 1
-                error_msg = f"Failed to send to {vendor.name}: {str(e)}"
+                error_msg = f"Failed to send to {vendor.name}: {error}"
                 results['errors'].append(error_msg)
                 logger.error(error_msg)
                 
                 # Create failed log entries
                 for issue in vendor_issue_list:
-                    AICommunicationLog.objects.create(
+                    logs.append(AICommunicationLog(
                         issue=issue,
                         sender='Admin',
                         message=body,
@@ -619,13 +476,60 @@ class EmailService:
                         subject=subject,
                         email_from=self.from_email,
                         email_to=vendor.email,
-                        email_thread_id=f'bulk-{timezone.now().timestamp()}',
+                        email_thread_id=thread_id,
                         ai_generated=False,
                         status='failed',
-                        timestamp=timezone.now()
-                    )
+                        timestamp=now
+                    ))
+        
+        AICommunicationLog.objects.bulk_create(logs)
+        
+        # Move open issues that were emailed to waiting for the vendor, in one statement
+        opened = [issue for issue in sent_issues if issue.status == 'Open']
+        if opened:
+            Issue.objects.filter(id__in=[issue.id for issue in opened], status='Open').update(
+                status='Pending Vendor Response', updated_at=now
+            )
+            for issue in opened:
+                issue.status = 'Pending Vendor Response'
+        self._emit_bulk_events(logs, opened, user, results)
         
         return results
+    
+    def _emit_bulk_events(self, logs, updated_issues, user, results):
+        """Side effects of the bulk writes, which bypass the model signals"""
+        from activities.models import Activity
+        from dashboard.cache import schedule_generation_bump
+        from notifications.events import CONVERSATIONS_TOPIC, issue_topic, publish_many_on_commit
+        from products.status_rollup import schedule_rollup_refresh
+        from .serializers import AICommunicationLogSerializer
+        
+        if logs:
+            schedule_generation_bump('AICommunicationLog')
+            # Open conversation panels receive the messages, as they do from the post_save receiver
+            publish_many_on_commit([
+                ('message', [CONVERSATIONS_TOPIC, issue_topic(log.issue_id)], data)
+                for log, data in zip(logs, AICommunicationLogSerializer(logs, many=True).data)
+            ])
+        if not updated_issues:
+            return
+        schedule_generation_bump('Issue')
+        schedule_rollup_refresh(product_ids=[issue.product_id for issue in updated_issues])
+        try:
+            Activity.log(
+                activity_type='issue',
+                action='status_changed',
+                title='Bulk email sent',
+                description=(
+                    f"{len(updated_issues)} issues moved to Pending Vendor Response after emailing "
+                    f"{results['sent']} vendors"
+                ),
+                user=user,
+                object_type='Issue',
+                metadata={'issue_ids': [str(issue.id) for issue in updated_issues]},
+            )
+        except Exception as e:
+            logger.error(f"Failed to log bulk email activity: {str(e)}")
 
 
 # Singleton instance
@@ -0,0 +1,190 @@
+"""
+Long-lived IMAP listener for the email monitor.
+
+Keeps one authenticated connection open and waits for new mail with IMAP
+IDLE (RFC 2177), so vendor replies are processed seconds after they arrive
+instead of on the next poll. Servers without IDLE are polled with NOOP on
+the same connection. IDLE is re-issued before EMAIL_IDLE_TIMEOUT (servers
+drop idling clients after ~30 minutes), and lost connections are re-opened
+with exponential backoff.
+
+imaplib has no IDLE support before Python 3.14, so the command is driven
+here: IDLE is sent, untagged responses are read as they arrive (select()
+on the socket, non-blocking reads), and DONE ends it.
+"""
+import imaplib
+import logging
+import re
+import select
+import socket
+import ssl
+import threading
+import time
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Untagged responses that mean the mailbox changed
+_CHANGE_RE = re.compile(rb'^\* \d+ (EXISTS|RECENT|EXPUNGE)\b', re.IGNORECASE)
+
+
+class IdleNotSupported(Exception):
+    pass
+
+
+def _read_available_lines(imap, partial=b''):
+    """
+    Lines the server has already sent, read without blocking.
+    Returns (complete lines, trailing partial line, whether anything was read);
+    pass the partial line back in on the next call.
+    """
+    sock = imap.socket()
+    lines = []
+    received = False
+    sock.setblocking(False)
+    try:
+        while True:
+            try:
+                data = imap.readline()
+            except (BlockingIOError, ssl.SSLWantReadError, socket.timeout):
+                break
+            if not data:
+                break
+            received = True
+            partial += data
+            if partial.endswith(b'\n'):
+                lines.append(partial)
+                partial = b''
+    finally:
+        sock.setblocking(True)
+    return lines, partial, received
+
+
+def _wait_readable(imap, timeout):
+    sock = imap.socket()
+    if isinstance(sock, ssl.SSLSocket) and sock.pending():
+        return True
+    readable, _, _ = select.select([sock], [], [], max(timeout, 0))
+    return bool(readable)
+
+
+def idle(imap, timeout, stop_event=None):
+    """
+    Run one IDLE command for at most `timeout` seconds.
+    Returns True when the server reported a mailbox change.
+    """
+    if 'IDLE' not in imap.capabilities:
+        raise IdleNotSupported('IDLE not advertised')
+
+    tag = imap._new_tag()
+    imap.send(tag + b' IDLE\r\n')
+    line = imap.readline()
+    while line.startswith(b'* '):
+        line = imap.readline()
+    if not line:
+        # Not a refusal: the connection is gone, and the next one may IDLE
+        raise imap.abort('connection closed before IDLE')
+    if not line.startswith(b'+'):
+        raise IdleNotSupported(line.decode('utf-8', errors='replace').strip())
+
+    deadline = time.monotonic() + timeout
+    # Anything sent together with the continuation is already buffered
+    lines, partial, _ = _read_available_lines(imap)
+    changed = any(_CHANGE_RE.match(line) for line in lines)
+    while not changed:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or (stop_event is not None and stop_event.is_set()):
+            break
+        # Wake up at least every second to notice stop requests
+        if not _wait_readable(imap, min(remaining, 1.0)):
+            continue
+        lines, partial, received = _read_available_lines(imap, partial)
+        if not received:
+            # Readable but nothing to read: the server closed the connection
+            raise imap.abort('connection closed during IDLE')
+        changed = any(_CHANGE_RE.match(line) for line in lines)
+
+    imap.send(b'DONE\r\n')
+    while True:
+        line = imap.readline()
+        if not line:
+            raise imap.abort('connection closed after IDLE')
+        if line.startswith(tag):
+            if not line[len(tag):].strip().upper().startswith(b'OK'):
+                raise imap.error(line.decode('utf-8', errors='replace').strip())
+            return changed
+        if _CHANGE_RE.match(line):
+            changed = True
+
+
+def noop_poll(imap):
+    """NOOP on the selected mailbox; True when it reported new or removed messages"""
+    imap.noop()
+    changed = False
+    for name in ('EXISTS', 'RECENT', 'EXPUNGE'):
+        _, data = imap.response(name)
+        if data and data[0] is not None:
+            changed = True
+    return changed
+
+
+class ImapIdleListener:
+    """
+    Drives an EmailMonitor from one long-lived connection.
+
+        listener = ImapIdleListener(email_monitor)
+        listener.run()          # until stop() or KeyboardInterrupt
+    """
+
+    def __init__(self, monitor, idle_timeout=None, poll_interval=None, max_backoff=None):
+        self.monitor = monitor
+        self.idle_timeout = idle_timeout or getattr(settings, 'EMAIL_IDLE_TIMEOUT', 600)
+        self.poll_interval = poll_interval or getattr(settings, 'EMAIL_IDLE_POLL_INTERVAL', 30)
+        self.max_backoff = max_backoff or getattr(settings, 'EMAIL_IDLE_MAX_BACKOFF', 300)
+        self.stop_event = threading.Event()
+        self.use_idle = True
+        # The listener owns the connection between cycles
+        self.monitor.keep_connection = True
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _sleep(self, seconds):
+        self.stop_event.wait(seconds)
+
+    def _wait_for_change(self):
+        """Block until the mailbox changes or it is time to check anyway"""
+        imap = self.monitor.imap
+        if self.use_idle:
+            try:
+                return idle(imap, self.idle_timeout, self.stop_event)
+            except IdleNotSupported as e:
+                logger.warning(f"IMAP server does not support IDLE ({e}), falling back to NOOP polling")
+                self.use_idle = False
+        self._sleep(self.poll_interval)
+        return noop_poll(imap)
+
+    def run(self):
+        backoff = 1
+        while not self.stop_event.is_set():
+            if self.monitor.imap is None:
+                if not self.monitor.connect():
+                    logger.warning(f"IMAP connection failed, retrying in {backoff}s")
+                    self._sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+                backoff = 1
+                # Catch up on everything that arrived while disconnected
+                self.monitor.monitor_inbox()
+                continue
+
+            try:
+                changed = self._wait_for_change()
+            except (imaplib.IMAP4.error, OSError) as e:
+                logger.warning(f"IMAP connection lost: {e}")
+                self.monitor.disconnect()
+                continue
+
+            if changed:
+                self.monitor.monitor_inbox()
+        self.monitor.disconnect()
@@ -0,0 +1,186 @@
+"""
+Incremental IMAP mailbox sync.
+
+The last synced UID of a mailbox is persisted (MailboxSyncState) together
+with the mailbox UIDVALIDITY, and HIGHESTMODSEQ on servers with CONDSTORE,
+so each cycle only looks at messages that arrived since the previous one:
+
+- right after SELECT, UIDNEXT (and HIGHESTMODSEQ) tell whether anything
+  arrived, without another command;
+- on a kept-open connection a cycle is one `UID SEARCH UID <last+1>:*`;
+- new messages are fetched in batched UID FETCH commands, headers first
+  (BODY.PEEK, so nothing is marked read), and full bodies only for the
+  messages the caller selects.
+
+When UIDVALIDITY changes the stored UIDs are meaningless, so the checkpoint
+restarts from the most recent EMAIL_SYNC_INITIAL_MESSAGES messages.
+"""
+import email
+import logging
+import re
+from django.conf import settings
+from django.utils import timezone
+
+from .models import MailboxSyncState
+
+logger = logging.getLogger(__name__)
+
+HEADER_FIELDS = 'SUBJECT FROM TO DATE MESSAGE-ID IN-REPLY-TO REFERENCES'
+_UID_RE = re.compile(rb'\bUID (\d+)')
+_MODSEQ_RE = re.compile(rb'\bMODSEQ \((\d+)\)')
+
+
+def uid_set(uids):
+    """Compact IMAP sequence set for UIDs: [1, 2, 3, 7] -> '1:3,7'"""
+    ranges = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ','.join(str(start) if start == end else f'{start}:{end}' for start, end in ranges)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class MailboxSync:
+    """Sync checkpoint and batched fetches for one selected mailbox of an imaplib connection"""
+
+    def __init__(self, imap, account, mailbox='INBOX', batch_size=None, initial_messages=None):
+        self.imap = imap
+        self.account = account
+        self.mailbox = mailbox
+        self.batch_size = batch_size or getattr(settings, 'EMAIL_SYNC_BATCH_SIZE', 200)
+        self.initial_messages = initial_messages or getattr(settings, 'EMAIL_SYNC_INITIAL_MESSAGES', 50)
+        self.condstore = False
+        self.state = None
+        self._uidnext = None
+        self._highest_modseq = None
+        self._pending_uid = None
+        self._pending_modseq = None
+
+    def _response_int(self, name):
+        _, data = self.imap.response(name)
+        try:
+            return int(data[-1])
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    def select(self):
+        """SELECT the mailbox and load (or reset) its checkpoint"""
+        capabilities = self.imap.capabilities
+        if 'CONDSTORE' in capabilities and 'ENABLE' in capabilities:
+            try:
+                self.imap.enable('CONDSTORE')
+                self.condstore = True
+            except Exception as e:
+                logger.info(f"CONDSTORE not enabled for {self.mailbox}: {e}")
+
+        status, data = self.imap.select(self.mailbox)
+        if status != 'OK':
+            raise RuntimeError(f"Could not select mailbox {self.mailbox}: {data}")
+
+        uidvalidity = self._response_int('UIDVALIDITY') or 0
+        self._uidnext = self._response_int('UIDNEXT')
+        self._highest_modseq = self._response_int('HIGHESTMODSEQ') if self.condstore else None
+
+        self.state, _ = MailboxSyncState.objects.get_or_create(account=self.account, mailbox=self.mailbox)
+        if self.state.uidvalidity != uidvalidity:
+            if self.state.uidvalidity:
+                logger.warning(
+                    f"UIDVALIDITY of {self.mailbox} changed ({self.state.uidvalidity} -> {uidvalidity}), "
+                    f"restarting sync from the latest {self.initial_messages} messages"
+                )
+            self.state.uidvalidity = uidvalidity
+            self.state.last_uid = 0
+            self.state.highest_modseq = None
+            self.state.save(update_fields=['uidvalidity', 'last_uid', 'highest_modseq'])
+
+    def _unchanged_since_select(self, uidnext):
+        """Whether the SELECT response already shows there is nothing new"""
+        if not self.state.last_uid or uidnext > self.state.last_uid + 1:
+            return False
+        if self._highest_modseq is not None and self.state.highest_modseq is not None:
+            return self._highest_modseq == self.state.highest_modseq
+        return True
+
+    def new_uids(self):
+        """UIDs that arrived after the checkpoint, oldest first"""
+        # UIDNEXT is only current right after SELECT
+        uidnext, self._uidnext = self._uidnext, None
+        if uidnext is not None and self._unchanged_since_select(uidnext):
+            return []
+
+        if not self.state.last_uid:
+            # First sync of this mailbox (or new UIDVALIDITY): only the latest messages
+            status, data = self.imap.uid('SEARCH', None, 'ALL')
+            if status != 'OK':
+                raise RuntimeError(f"UID SEARCH failed: {data}")
+            uids = [int(uid) for uid in data[0].split()]
+            return uids[-self.initial_messages:]
+
+        status, data = self.imap.uid('SEARCH', None, f'UID {self.state.last_uid + 1}:*')
+        if status != 'OK':
+            raise RuntimeError(f"UID SEARCH failed: {data}")
+        # `n:*` always matches the highest UID, even when it is below n
+        return [uid for uid in (int(value) for value in data[0].split()) if uid > self.state.last_uid]
+
+    def _fetch(self, uids, items):
+        """{uid: (raw bytes, modseq)} for a batched UID FETCH"""
+        results = {}
+        for chunk in _chunks(sorted(uids), self.batch_size):
+            status, data = self.imap.uid('FETCH', uid_set(chunk), items)
+            if status != 'OK':
+                raise RuntimeError(f"UID FETCH failed: {data}")
+            for part in data:
+                if not isinstance(part, tuple):
+                    continue
+                uid_match = _UID_RE.search(part[0])
+                if not uid_match:
+                    continue
+                modseq_match = _MODSEQ_RE.search(part[0])
+                results[int(uid_match.group(1))] = (part[1], int(modseq_match.group(1)) if modseq_match else None)
+        return results
+
+    def fetch_headers(self, uids):
+        """{uid: email.message.Message with only the sync header fields}"""
+        items = f'(UID{" MODSEQ" if self.condstore else ""} BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})])'
+        headers = {}
+        for uid, (raw, modseq) in self._fetch(uids, items).items():
+            headers[uid] = email.message_from_bytes(raw)
+            if modseq is not None:
+                self._pending_modseq = max(self._pending_modseq or 0, modseq)
+        return headers
+
+    def fetch_messages(self, uids):
+        """{uid: full email.message.Message}"""
+        if not uids:
+            return {}
+        return {uid: email.message_from_bytes(raw) for uid, (raw, _) in self._fetch(uids, '(UID BODY.PEEK[])').items()}
+
+    def mark_seen(self, uids):
+        for chunk in _chunks(sorted(uids), self.batch_size):
+            self.imap.uid('STORE', uid_set(chunk), '+FLAGS.SILENT', '(\\Seen)')
+
+    def advance(self, uids):
+        """Remember the highest UID of this cycle; saved by save_checkpoint()"""
+        if uids:
+            self._pending_uid = max(max(uids), self._pending_uid or 0)
+
+    def save_checkpoint(self):
+        """Persist the checkpoint once the fetched messages have been processed"""
+        fields = ['last_synced_at']
+        if self._pending_uid and self._pending_uid > self.state.last_uid:
+            self.state.last_uid = self._pending_uid
+            fields.append('last_uid')
+        modseq = max(self._pending_modseq or 0, self._highest_modseq or 0)
+        if modseq and modseq != self.state.highest_modseq:
+            self.state.highest_modseq = modseq
+            fields.append('highest_modseq')
+        self.state.last_synced_at = timezone.now()
+        self.state.save(update_fields=fields)
+        self._pending_uid = self._pending_modseq = None
+        self._highest_modseq = None
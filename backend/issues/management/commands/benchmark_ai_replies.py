@@ -0,0 +1,98 @@
+"""
+Management command to benchmark AI reply generation for vendor emails:
+the previous one-reply-at-a-time processing (a new event loop per email)
+against issues.reply_pipeline, both with FakeLatencyAIService so no AI
+provider is called. Replies are spread over existing issues; the drafts the
+benchmark creates are deleted afterwards and nothing is emailed.
+"""
+import asyncio
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from issues.ai_services import FakeLatencyAIService, ai_manager
+from issues.models import AICommunicationLog, Issue
+from issues.reply_pipeline import ReplyPipeline
+
+
+class Command(BaseCommand):
+    help = 'Benchmark vendor reply analysis and drafting (sequential vs concurrent pipeline) with a fake AI backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replies', type=int, default=20, help='Vendor replies per run')
+        parser.add_argument('--issues', type=int, default=5, help='Existing issues the replies are spread over')
+        parser.add_argument('--latency', type=float, default=1.0, help='Seconds per fake AI call')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Share of fake AI calls that are rate limited')
+        parser.add_argument('--retry-after', type=float, default=None, help='Retry-After seconds sent with fake rate limits')
+        parser.add_argument('--concurrency', type=int, default=None, help='Pipeline concurrency (default AI_REPLY_CONCURRENCY)')
+        parser.add_argument('--skip-sequential', action='store_true', help='Only run the pipeline')
+
+    def handle(self, *args, **options):
+        issues = list(Issue.objects.select_related('vendor', 'order')[:max(options['issues'], 1)])
+        if not issues:
+            raise CommandError('No issues found; create at least one issue first')
+
+        replies = [
+            (issues[index % len(issues)], f'Benchmark vendor reply {index + 1}: we will send a replacement next week.')
+            for index in range(options['replies'])
+        ]
+        self.stdout.write(
+            f"{len(replies)} replies over {len(issues)} issues, {options['latency']}s per AI call, "
+            f"{options['rate_limit_rate']:.0%} rate limited\n"
+        )
+
+        original_service = ai_manager.ai_service
+        existing_logs = set(AICommunicationLog.objects.filter(issue__in=issues).values_list('id', flat=True))
+        results = {}
+        try:
+            # Never auto-send the benchmark drafts
+            with override_settings(AI_EMAIL_AUTO_APPROVE=False):
+                if not options['skip_sequential']:
+                    results['sequential'] = self._measure('sequential', self._run_sequential, replies, options)
+                results['pipeline'] = self._measure('pipeline', self._run_pipeline, replies, options)
+        finally:
+            ai_manager.ai_service = original_service
+            deleted, _ = AICommunicationLog.objects.filter(issue__in=issues).exclude(id__in=existing_logs).delete()
+            self.stdout.write(f'\nRemoved {deleted} benchmark log entries')
+
+        if 'sequential' in results and results['pipeline']:
+            speedup = results['sequential'] / results['pipeline']
+            self.stdout.write(self.style.SUCCESS(f'Pipeline is {speedup:.1f}x faster'))
+
+    def _measure(self, name, runner, replies, options):
+        service = FakeLatencyAIService(
+            latency=options['latency'],
+            rate_limit_rate=options['rate_limit_rate'],
+            retry_after=options['retry_after'],
+        )
+        ai_manager.ai_service = service
+        start = time.perf_counter()
+        failed = runner(replies, options)
+        seconds = time.perf_counter() - start
+        self.stdout.write(
+            f"{name:<11} {seconds:8.2f}s  {len(replies) / seconds:6.2f} replies/s  "
+            f"AI calls={service.calls} rate limited={service.rate_limited} failed={failed}"
+        )
+        return seconds
+
+    def _run_sequential(self, replies, options):
+        """The previous EmailMonitor.process_vendor_response behaviour"""
+        failed = 0
+        for issue, message in replies:
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(ai_manager.analyze_vendor_response(issue, message))
+                loop.run_until_complete(ai_manager.generate_reply_for_approval(issue, message))
+            except Exception:
+                failed += 1
+            finally:
+                loop.close()
+        return failed
+
+    def _run_pipeline(self, replies, options):
+        pipeline = ReplyPipeline(concurrency=options['concurrency'])
+        try:
+            results = pipeline.run(replies)
+        finally:
+            pipeline.close()
+        return sum(1 for result in results if not result['success'])
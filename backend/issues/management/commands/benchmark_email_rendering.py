@@ -0,0 +1,126 @@
+"""
+Management command to benchmark rendering of vendor reply emails: the
+previous path (regexes compiled and token placeholders substituted per
+message, render_to_string, strip_tags for the text part) against
+issues.email_rendering, and against re-sends served from the HTML stored
+on the communication log. Nothing is written to the database or emailed.
+"""
+import random
+import re
+import time
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from issues.email_rendering import format_message_html, html_to_text, render_email
+
+TEMPLATE = 'emails/issue_reply.html'
+
+SAMPLE_LINES = [
+    'Thank you for getting back to us about the damaged items.',
+    'Please see the photo here: https://procurement.buy2rent.eu/media/issues/photo-{n}.jpg',
+    'The tracking link is https://tracking.example.com/parcel?id={n}&lang=en',
+    'Details are in [the delivery note](https://procurement.buy2rent.eu/docs/note-{n}.pdf).',
+    'We expect the replacement to arrive within 5 working days.',
+    'Could you confirm the quantity & the delivery address <Building B>?',
+]
+
+
+def _legacy_format_message_html(message):
+    """The previous issues.email_service._format_message_html"""
+    text = (message or '').replace('\r\n', '\n').replace('\r', '\n')
+
+    def is_image_url(url):
+        return bool(re.search(r'\.(png|jpe?g|gif|webp|bmp|svg)(\?.*)?$', url, re.IGNORECASE))
+
+    snippets = []
+
+    def token_for(html):
+        token = f"__HTMLTOKEN{len(snippets)}__"
+        snippets.append((token, html))
+        return token
+
+    def image(url, alt):
+        return token_for(
+            f'<div style="margin:12px 0;"><a href="{escape(url)}" target="_blank" rel="noopener noreferrer">'
+            f'<img src="{escape(url)}" alt="{escape(alt)}" style="max-width:100%;height:auto;border-radius:8px;border:1px solid #e5e7eb;" />'
+            f'</a><div style="font-size:12px;color:#6b7280;margin-top:6px;"><a href="{escape(url)}" target="_blank" '
+            f'rel="noopener noreferrer" style="color:#2563eb;text-decoration:none;">Open image</a></div></div>'
+        )
+
+    def link(url, label):
+        return token_for(
+            f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer" '
+            f'style="color:#2563eb;text-decoration:none;">{escape(label)}</a>'
+        )
+
+    def md_link_sub(m):
+        url = m.group(2)
+        return image(url, m.group(1)) if is_image_url(url) or 'media/' in url else link(url, m.group(1))
+
+    def url_sub(m):
+        url = m.group(1)
+        return image(url, 'Product Image') if is_image_url(url) or 'media/' in url else link(url, url)
+
+    text = re.compile(r'\[([^\]]+)\]\((https?://[^\s)]+)\)').sub(md_link_sub, text)
+    text = re.compile(r'(https?://[^\s<>]+)').sub(url_sub, text)
+    rendered = escape(text)
+    for token, html in snippets:
+        rendered = rendered.replace(token, html)
+    return mark_safe(rendered.replace('\n', '<br>'))
+
+
+class Command(BaseCommand):
+    help = 'Benchmark vendor reply email rendering (previous vs precompiled/cached rendering)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000, help='Messages rendered per run')
+        parser.add_argument('--distinct', type=int, default=None, help='Distinct message texts (default: all distinct)')
+
+    def handle(self, *args, **options):
+        count = options['messages']
+        distinct = options['distinct'] or count
+        rng = random.Random(42)
+        texts = [
+            '\n\n'.join(line.format(n=n) for line in rng.sample(SAMPLE_LINES, 4))
+            for n in range(distinct)
+        ]
+        messages = [texts[index % distinct] for index in range(count)]
+        self.stdout.write(f'{count} messages ({distinct} distinct), template {TEMPLATE}\n')
+
+        legacy = self._measure('previous', messages, self._render_legacy)
+        rendered = self._measure('rendering', messages, self._render_new)
+        # Re-sends: the HTML is already stored on the communication log
+        stored = {text: render_email(TEMPLATE, self._context(text))[0] for text in texts}
+        self._measure('stored html', messages, lambda text: (stored[text], html_to_text(stored[text])))
+
+        self.stdout.write(self.style.SUCCESS(f'Rendering is {legacy / rendered:.1f}x faster'))
+
+    def _context(self, text, message_html=None):
+        return {
+            'vendor_name': 'Benchmark Vendor',
+            'issue_id': '00000000-0000-0000-0000-000000000000',
+            'issue_slug': 'benchmark-issue',
+            'order_reference': 'PO-BENCH',
+            'message_body': text,
+            'message_body_html': message_html if message_html is not None else format_message_html(text),
+        }
+
+    def _render_legacy(self, text):
+        html = render_to_string(TEMPLATE, self._context(text, _legacy_format_message_html(text)))
+        return html, strip_tags(html)
+
+    def _render_new(self, text):
+        return render_email(TEMPLATE, self._context(text))
+
+    def _measure(self, name, messages, render):
+        render(messages[0])  # Template loading is not part of the per-message cost
+        start = time.perf_counter()
+        for text in messages:
+            render(text)
+        seconds = time.perf_counter() - start
+        self.stdout.write(
+            f'{name:<12} {seconds:8.3f}s  {seconds * 1000 / len(messages):7.3f} ms/message'
+        )
+        return seconds
@@ -1,11 +1,14 @@
 """
 Django management command to monitor vendor email responses.
 Run with: python manage.py monitor_vendor_emails
+Or, keeping one IMAP connection open and waiting with IDLE:
+    python manage.py monitor_vendor_emails --listen
 """
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from issues.email_monitor import email_monitor
+from issues.imap_idle import ImapIdleListener
 import time
 import logging
 import os
@@ -29,6 +32,12 @@ class Command(BaseCommand):
             default=60,
             help='Check interval in seconds (default: 60)',
         )
+        parser.add_argument(
+            '--listen',
+            action='store_true',
+            help='Keep one IMAP connection open and process replies as they arrive (IDLE, '
+                 'or NOOP polling every --interval seconds when the server has no IDLE)',
+        )
         parser.add_argument(
             '--max-errors',
             type=int,
@@ -72,6 +81,16 @@ class Command(BaseCommand):
                     raise
                 return
 
+            if options['listen']:
+                self.stdout.write('Listening for vendor emails (IMAP IDLE)...')
+                self.stdout.write('Press Ctrl+C to stop')
+                listener = ImapIdleListener(email_monitor, poll_interval=interval)
+                try:
+                    listener.run()
+                except KeyboardInterrupt:
+                    self.stdout.write(self.style.WARNING('\nStopping email monitor...'))
+                return
+
             self.stdout.write(f'Monitoring emails every {interval} seconds...')
             self.stdout.write('Press Ctrl+C to stop')
 
@@ -96,6 +115,7 @@ class Command(BaseCommand):
 
                     time.sleep(interval)
         finally:
+            email_monitor.disconnect()
             if lock_fp:
                 try:
                     fcntl.flock(lock_fp.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,82 @@
+"""
+Django management command that delivers queued emails (see issues.outbox).
+Run with: python manage.py process_email_outbox
+Or, to send what is due once and exit (e.g. from cron):
+    python manage.py process_email_outbox --once
+Several workers can run at once; each claims its own batch.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from issues.outbox import process_outbox, worker_name
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Send queued vendor emails from the outbox, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send the emails that are due and exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Seconds to wait when nothing is due (default: EMAIL_OUTBOX_POLL_INTERVAL)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Emails claimed per batch (default: EMAIL_OUTBOX_BATCH_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or getattr(settings, 'EMAIL_OUTBOX_POLL_INTERVAL', 2)
+        batch_size = options['batch_size'] or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+        worker = worker_name()
+
+        self.stdout.write(self.style.SUCCESS(f'Starting email outbox worker {worker}...'))
+        if not options['once']:
+            self.stdout.write('Press Ctrl+C to stop')
+
+        totals = dict.fromkeys(('sent', 'retried', 'failed'), 0)
+        while True:
+            try:
+                counts = process_outbox(batch_size=batch_size, worker=worker)
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('\nStopping email outbox worker...'))
+                break
+            except Exception as e:
+                # Database hiccup: the claimed emails are claimed again after EMAIL_OUTBOX_CLAIM_TIMEOUT
+                logger.error(f"Error while processing the email outbox: {e}", exc_info=True)
+                self.stdout.write(self.style.ERROR(f'Error: {e}'))
+                counts = {'claimed': 0}
+
+            for key in totals:
+                totals[key] += counts.get(key, 0)
+            if counts['claimed']:
+                self.stdout.write(
+                    f"Sent {counts['sent']}, retrying {counts['retried']}, failed {counts['failed']}"
+                )
+
+            # A full batch means more may be due right away
+            if counts['claimed'] >= batch_size:
+                continue
+            if options['once']:
+                break
+            try:
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('\nStopping email outbox worker...'))
+                break
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Email outbox worker stopped: {totals['sent']} sent, {totals['retried']} to retry, {totals['failed']} failed"
+        ))
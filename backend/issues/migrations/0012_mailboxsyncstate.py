@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0011_add_performance_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailboxSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account', models.CharField(help_text='IMAP login the mailbox belongs to', max_length=255)),
+                ('mailbox', models.CharField(default='INBOX', max_length=255)),
+                ('uidvalidity', models.BigIntegerField(default=0)),
+                ('last_uid', models.BigIntegerField(default=0, help_text='Highest UID already synced')),
+                ('highest_modseq', models.BigIntegerField(blank=True, help_text='HIGHESTMODSEQ at the last sync (CONDSTORE servers)', null=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('account', 'mailbox')},
+            },
+        ),
+    ]
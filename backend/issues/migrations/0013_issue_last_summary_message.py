@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0012_mailboxsyncstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='last_summary_message',
+            field=models.ForeignKey(blank=True, help_text='Last email folded into the summary; later emails are summarized incrementally', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='issues.aicommunicationlog'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:09
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0013_issue_last_summary_message'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aicommunicationlog',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('pending_approval', 'Pending Approval'), ('queued', 'Queued'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('failed', 'Failed'), ('received', 'Received')], default='internal', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('kind', models.CharField(choices=[('message', 'Message'), ('issue_report', 'Issue Report')], default='message', help_text='Issue reports are written by the worker before sending', max_length=20)),
+                ('from_email', models.EmailField(blank=True, max_length=254)),
+                ('to_email', models.EmailField(blank=True, max_length=254)),
+                ('reply_to', models.EmailField(blank=True, max_length=254)),
+                ('subject', models.CharField(blank=True, max_length=500)),
+                ('body', models.TextField(blank=True)),
+                ('html_body', models.TextField(blank=True)),
+                ('headers', models.JSONField(blank=True, default=dict)),
+                ('message_id', models.CharField(blank=True, help_text='Message-ID header the email is sent with', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('claimed_by', models.CharField(blank=True, help_text='Worker sending the email', max_length=100)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('communication_log', models.ForeignKey(blank=True, help_text='Conversation entry marked sent or failed once the email is delivered', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbound_emails', to='issues.aicommunicationlog')),
+                ('issue', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outbound_emails', to='issues.issue')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='issues_outb_status_c0b48a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Start existing rows from their creation time rather than the time of this migration"""
+    AICommunicationLog = apps.get_model('issues', 'AICommunicationLog')
+    AICommunicationLog.objects.using(schema_editor.connection.alias).update(updated_at=models.F('timestamp'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0014_outboundemail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aicommunicationlog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='aicommunicationlog',
+            index=models.Index(fields=['issue', 'updated_at', 'id'], name='issues_aico_issue_i_bb5e00_idx'),
+        ),
+    ]
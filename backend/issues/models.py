@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 from apartments.models import Apartment
 from products.models import Product
 from vendors.models import Vendor
@@ -68,6 +69,10 @@ class Issue(models.Model):
     sla_response_hours = models.IntegerField(default=24, help_text="Expected response time in hours")
     last_summary = models.TextField(blank=True, help_text="AI-generated conversation summary")
     last_summary_at = models.DateTimeField(null=True, blank=True, help_text="When summary was last updated")
+    last_summary_message = models.ForeignKey(
+        'AICommunicationLog', on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        help_text="Last email folded into the summary; later emails are summarized incrementally"
+    )
     next_action = models.TextField(blank=True, help_text="AI-suggested next action")
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -198,6 +203,7 @@ class AICommunicationLog(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('pending_approval', 'Pending Approval'),
+        ('queued', 'Queued'),
         ('sent', 'Sent'),
         ('delivered', 'Delivered'),
         ('failed', 'Failed'),
@@ -239,14 +245,105 @@ class AICommunicationLog(models.Model):
     # Control fields
     requires_approval = models.BooleanField(default=False)
     manual_override = models.BooleanField(default=False, help_text="Message was manually edited")
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['timestamp']
         indexes = [
             models.Index(fields=['issue', 'timestamp']),
+            models.Index(fields=['issue', 'updated_at', 'id']),  # Delta sync (config.delta_sync)
             models.Index(fields=['email_thread_id']),
             models.Index(fields=['status']),
         ]
     
     def __str__(self):
         return f"{self.sender} - {self.timestamp}"
+
+
+class MailboxSyncState(models.Model):
+    """
+    IMAP sync checkpoint for one mailbox (see issues.imap_sync).
+    UIDs are only meaningful for the UIDVALIDITY they were seen with; when the
+    server reports a different UIDVALIDITY the checkpoint is reset.
+    """
+    account = models.CharField(max_length=255, help_text="IMAP login the mailbox belongs to")
+    mailbox = models.CharField(max_length=255, default='INBOX')
+    uidvalidity = models.BigIntegerField(default=0)
+    last_uid = models.BigIntegerField(default=0, help_text="Highest UID already synced")
+    highest_modseq = models.BigIntegerField(null=True, blank=True, help_text="HIGHESTMODSEQ at the last sync (CONDSTORE servers)")
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        unique_together = [['account', 'mailbox']]
+    
+    def __str__(self):
+        return f"{self.account}/{self.mailbox} @ UID {self.last_uid}"
+
+
+class OutboundEmail(models.Model):
+    """
+    An email in the outbox (see issues.outbox). Requests store the rendered
+    message here and return; the process_email_outbox worker claims due
+    entries, sends them and retries failures with exponential backoff.
+    Initial issue reports are queued before their text exists and are
+    written with the AI service by the worker.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    KIND_CHOICES = [
+        ('message', 'Message'),
+        ('issue_report', 'Issue Report'),
+    ]
+    
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        unique=True
+    )
+    
+    issue = models.ForeignKey(Issue, on_delete=models.CASCADE, null=True, blank=True, related_name='outbound_emails')
+    communication_log = models.ForeignKey(
+        AICommunicationLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='outbound_emails',
+        help_text="Conversation entry marked sent or failed once the email is delivered"
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='message', help_text="Issue reports are written by the worker before sending")
+    
+    # Message
+    from_email = models.EmailField(blank=True)
+    to_email = models.EmailField(blank=True)
+    reply_to = models.EmailField(blank=True)
+    subject = models.CharField(max_length=500, blank=True)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    message_id = models.CharField(max_length=255, blank=True, help_text="Message-ID header the email is sent with")
+    
+    # Delivery
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    claimed_by = models.CharField(max_length=100, blank=True, help_text="Worker sending the email")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject or self.get_kind_display()} -> {self.to_email} ({self.status})"
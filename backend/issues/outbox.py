@@ -0,0 +1,329 @@
+"""
+Durable outbound email queue.
+
+EmailService does not talk to the SMTP server inside the request: it stores
+the rendered email as an OutboundEmail, saves the conversation entry as
+'queued' and returns. The outbox worker (manage.py process_email_outbox)
+then, in a loop:
+
+- claims up to EMAIL_OUTBOX_BATCH_SIZE due entries, locking the rows with
+  SELECT ... FOR UPDATE SKIP LOCKED so several workers never claim the
+  same email;
+- writes the text of queued issue reports with the AI service;
+- sends the batch over pooled SMTP connections (issues.bulk_mail);
+- marks each email sent, or schedules a retry after
+  EMAIL_OUTBOX_RETRY_BASE_DELAY * 2 ** (attempts - 1) seconds, until
+  EMAIL_OUTBOX_MAX_ATTEMPTS attempts have failed.
+
+Entries claimed by a worker that died mid-batch are claimed again after
+EMAIL_OUTBOX_CLAIM_TIMEOUT seconds, so an email is sent at least once even
+when a process is recycled.
+
+EMAIL_OUTBOX_BACKEND decides what happens right after an email is queued:
+nothing (the worker picks it up), or delivery on a thread of the web
+process or inline, for setups that do not run the worker.
+"""
+import asyncio
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from email.utils import make_msgid
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .bulk_mail import send_messages_pooled
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_ID_DOMAIN = 'buy2rent.eu'
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def queue_email(log, body, html_body='', reply_to='', outbound=None):
+    """
+    Queue the email described by a conversation entry (subject, sender and
+    recipient) and save the entry as 'queued'. `outbound` is the issue
+    report entry being written by the worker, which sends it right away.
+    Returns the Message-ID the email will be sent with.
+    """
+    issue = log.issue
+    # The issue reference in the Message-ID comes back in the vendor's In-Reply-To
+    message_id = make_msgid(idstring=f'issue-{issue.id}', domain=MESSAGE_ID_DOMAIN)
+    composing = outbound is not None
+    outbound = outbound or OutboundEmail(issue=issue)
+
+    with transaction.atomic():
+        log.status = 'queued'
+        log.email_message_id = message_id
+        log.save()
+
+        outbound.kind = 'message'
+        outbound.communication_log = log
+        outbound.from_email = log.email_from
+        outbound.to_email = log.email_to
+        outbound.reply_to = reply_to or log.email_from
+        outbound.subject = log.subject
+        outbound.body = body
+        outbound.html_body = html_body
+        outbound.headers = {
+            'Message-ID': message_id,
+            'X-Issue-ID': str(issue.id),
+            'X-Issue-Thread': f'issue-{issue.id}',
+        }
+        outbound.message_id = message_id
+        outbound.save()
+
+    if not composing:
+        notify_backend()
+    logger.info(f"Queued email {outbound.id} for issue {issue.id} to {log.email_to}")
+    return message_id
+
+
+def queue_issue_report(issue):
+    """Queue the initial report of a new issue; the worker writes it with the AI service and sends it"""
+    outbound = OutboundEmail.objects.create(
+        issue=issue,
+        kind='issue_report',
+        to_email=(issue.vendor.email if issue.vendor else '') or issue.vendor_contact,
+    )
+    notify_backend()
+    logger.info(f"Queued issue report {outbound.id} for issue {issue.id}")
+    return outbound
+
+
+def compose_issue_report(outbound):
+    """Write the initial report of an issue with the AI service and fill in its outbox entry"""
+    from .ai_services_complete import ai_service
+    from .email_service import email_service
+
+    issue = outbound.issue
+    issue_data = {
+        'issue_id': str(issue.id),
+        'vendor_name': issue.vendor.name,
+        'type': issue.type,
+        'priority': issue.priority,
+        'product_name': issue.get_product_name(),
+        'description': issue.description,
+        'impact': issue.impact,
+        'order_reference': f"Order #{issue.order.po_number}" if issue.order else None
+    }
+    result = asyncio.run(ai_service.generate_issue_email(issue_data))
+    if not result.get('success'):
+        logger.warning(f"Using fallback content for issue {issue.id}. AI generation error: {result.get('error')}")
+
+    # Simple, clean subject: Order #PO, Product, Priority
+    priority_label = issue.priority or 'Medium'
+    product_name = issue.get_product_name()
+    if issue.order and issue.order.po_number:
+        subject = f"Order #{issue.order.po_number}, {product_name}, {priority_label} Priority"
+    else:
+        subject = f"{product_name}, {priority_label} Priority"
+
+    # Sent even if AI generation failed, with the fallback body
+    body = result.get('body', result.get('opening_message', issue.description))
+    email_service.send_issue_email(
+        issue=issue,
+        subject=subject,
+        body=body,
+        is_initial_report=True,
+        ai_data=result,
+        outbound=outbound,
+    )
+
+
+def claim_batch(limit, worker):
+    """Mark up to `limit` due entries as being sent by `worker` and return them"""
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_CLAIM_TIMEOUT', 600))
+    due = Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', claimed_at__lt=stale)
+
+    if connection.features.has_select_for_update:
+        with transaction.atomic():
+            ids = list(
+                OutboundEmail.objects
+                .select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+                .filter(due)
+                .order_by('next_attempt_at')
+                .values_list('id', flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            OutboundEmail.objects.filter(id__in=ids).update(status='sending', claimed_by=worker, claimed_at=now)
+    else:
+        # No row locks (SQLite): one UPDATE statement takes the write lock up front,
+        # where a read followed by a write in one transaction could fail with "database is locked"
+        due_ids = OutboundEmail.objects.filter(due).order_by('next_attempt_at').values('id')[:limit]
+        if not OutboundEmail.objects.filter(id__in=due_ids).update(status='sending', claimed_by=worker, claimed_at=now):
+            return []
+
+    return list(
+        OutboundEmail.objects
+        .filter(status='sending', claimed_by=worker, claimed_at=now)
+        .select_related('issue__vendor', 'issue__order', 'communication_log')
+        .order_by('next_attempt_at')
+    )
+
+
+def build_message(outbound):
+    email = EmailMultiAlternatives(
+        subject=outbound.subject,
+        body=outbound.body,
+        from_email=outbound.from_email or None,
+        to=[outbound.to_email],
+        reply_to=[outbound.reply_to] if outbound.reply_to else None,
+        headers=outbound.headers,
+    )
+    if outbound.html_body:
+        email.attach_alternative(outbound.html_body, "text/html")
+    return email
+
+
+def retry_delay(attempts):
+    """Seconds before the next attempt after `attempts` failed ones"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_DELAY', 30)
+    return min(base * 2 ** (attempts - 1), getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_DELAY', 3600))
+
+
+def _mark_sent(outbound, now):
+    outbound.status = 'sent'
+    outbound.attempts += 1
+    outbound.sent_at = now
+    outbound.last_error = ''
+    outbound.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+
+    log = outbound.communication_log
+    if log is not None and log.status == 'queued':
+        log.status = 'sent'
+        log.save(update_fields=['status', 'updated_at'])
+    issue = outbound.issue
+    if issue is not None and issue.first_sent_at is None:
+        issue.first_sent_at = now
+        issue.save(update_fields=['first_sent_at', 'updated_at'])
+
+
+def _mark_failed(outbound, error, now):
+    """Schedule a retry, or give up after EMAIL_OUTBOX_MAX_ATTEMPTS attempts. Returns True when retried."""
+    outbound.attempts += 1
+    outbound.last_error = error
+    retry = outbound.attempts < getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+    if retry:
+        outbound.status = 'pending'
+        outbound.next_attempt_at = now + timedelta(seconds=retry_delay(outbound.attempts))
+        logger.warning(
+            f"Email {outbound.id} to {outbound.to_email} failed (attempt {outbound.attempts}), "
+            f"retrying at {outbound.next_attempt_at:%H:%M:%S}: {error}"
+        )
+    else:
+        outbound.status = 'failed'
+        logger.error(f"Email {outbound.id} to {outbound.to_email} failed after {outbound.attempts} attempts: {error}")
+    outbound.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+
+    log = outbound.communication_log
+    if not retry and log is not None and log.status == 'queued':
+        log.status = 'failed'
+        log.save(update_fields=['status', 'updated_at'])
+    return retry
+
+
+def process_outbox(batch_size=None, worker=None):
+    """
+    Claim one batch of due emails and send it.
+    Returns {'claimed': n, 'sent': n, 'retried': n, 'failed': n}.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+    counts = dict.fromkeys(('claimed', 'sent', 'retried', 'failed'), 0)
+    close_old_connections()
+
+    claimed = claim_batch(batch_size, worker or worker_name())
+    counts['claimed'] = len(claimed)
+    ready = []
+    for outbound in claimed:
+        try:
+            if outbound.kind == 'issue_report':
+                compose_issue_report(outbound)
+            ready.append((outbound, build_message(outbound)))
+        except Exception as e:
+            logger.error(f"Could not prepare email {outbound.id}: {e}", exc_info=True)
+            counts['retried' if _mark_failed(outbound, str(e), timezone.now()) else 'failed'] += 1
+
+    errors = send_messages_pooled([message for _, message in ready])
+    now = timezone.now()
+    for (outbound, _), error in zip(ready, errors):
+        if error is None:
+            _mark_sent(outbound, now)
+            counts['sent'] += 1
+        else:
+            counts['retried' if _mark_failed(outbound, error, now) else 'failed'] += 1
+
+    if claimed:
+        logger.info(
+            f"Outbox batch: {counts['sent']} sent, {counts['retried']} to retry, {counts['failed']} failed"
+        )
+    return counts
+
+
+class WorkerOutboxBackend:
+    """Leaves delivery to the process_email_outbox worker."""
+
+    def submit(self):
+        pass
+
+
+class SyncOutboxBackend:
+    """Sends inline, in the request. Useful for development and tests."""
+
+    def submit(self):
+        process_outbox()
+
+
+class ThreadOutboxBackend:
+    """
+    Sends on a background thread of the current process, for setups that do
+    not run the worker. Retries, and emails a recycled process did not get
+    to, stay in the outbox until the next submit.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-outbox')
+
+    def submit(self):
+        self._executor.submit(self._run)
+
+    def _run(self):
+        try:
+            while process_outbox()['claimed']:
+                pass
+        except Exception as e:
+            logger.error(f"Outbox delivery failed: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_outbox_backend():
+    """Return the process-wide backend configured by EMAIL_OUTBOX_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_path = getattr(settings, 'EMAIL_OUTBOX_BACKEND', 'issues.outbox.WorkerOutboxBackend')
+            _backend = import_string(backend_path)()
+        return _backend
+
+
+def notify_backend():
+    """Hand newly queued emails to the outbox backend once they are committed"""
+    transaction.on_commit(lambda: get_outbox_backend().submit())
@@ -0,0 +1,117 @@
+"""
+Concurrent AI processing of vendor replies.
+
+The email monitor hands all vendor replies of a cycle to the pipeline
+instead of analysing and drafting them one at a time on a new event loop:
+
+- replies are grouped by issue; within an issue they are processed in
+  arrival order, so each draft sees the previous reply in its history;
+- different issues are processed concurrently, at most
+  AI_REPLY_CONCURRENCY replies at a time;
+- everything runs on one event loop that lives in a background thread for
+  the life of the process, with a worker pool of the same size for the
+  blocking AI client calls.
+
+After its reply, an issue's rolling summary is brought up to date once
+AI_SUMMARY_MIN_NEW_MESSAGES emails arrived since the last summary.
+
+Rate limits and transient API errors are retried by the AI services
+(see issues.ai_services.call_with_retry).
+"""
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class ReplyPipeline:
+    """
+    Analyse vendor replies and draft answers for approval.
+
+        results = reply_pipeline.run([(issue, message), ...])
+    """
+
+    def __init__(self, manager=None, concurrency=None):
+        self._manager = manager
+        self.concurrency = concurrency or getattr(settings, 'AI_REPLY_CONCURRENCY', 8)
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            from .ai_services import ai_manager
+            self._manager = ai_manager
+        return self._manager
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                # asyncio.to_thread (the blocking OpenAI client) runs on this pool
+                loop.set_default_executor(
+                    ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='ai-reply')
+                )
+                threading.Thread(target=loop.run_forever, name='ai-reply-loop', daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, replies):
+        """
+        Process [(issue, vendor message)] and block until all are done.
+        Returns one result dict per reply, in input order.
+        """
+        if not replies:
+            return []
+        future = asyncio.run_coroutine_threadsafe(self._process(replies), self._get_loop())
+        return future.result()
+
+    def close(self):
+        with self._lock:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+    async def _process(self, replies):
+        # Database work of the AI manager runs on asgiref's shared sync thread,
+        # whose connection may have gone stale between cycles
+        await sync_to_async(close_old_connections)()
+
+        threads = OrderedDict()
+        for index, (issue, message) in enumerate(replies):
+            threads.setdefault(issue.pk, []).append((index, issue, message))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = [None] * len(replies)
+
+        async def process_thread(items):
+            for index, issue, message in items:
+                async with semaphore:
+                    results[index] = await self._process_reply(issue, message)
+
+        await asyncio.gather(*(process_thread(items) for items in threads.values()))
+        return results
+
+    async def _process_reply(self, issue, message):
+        try:
+            analysis = await self.manager.analyze_vendor_response(issue, message)
+            reply = await self.manager.generate_reply_for_approval(issue, message)
+            logger.info(f"Generated AI reply for issue {issue.id}")
+            min_new_messages = getattr(settings, 'AI_SUMMARY_MIN_NEW_MESSAGES', 4)
+            if min_new_messages:
+                # Keep the rolling summary current; this issue's replies run in order, so no overlap
+                await self.manager.update_conversation_summary(issue, min_new_messages=min_new_messages)
+            return {'success': True, 'issue_id': str(issue.id), 'analysis': analysis, 'reply': reply}
+        except Exception as e:
+            logger.error(f"Error generating AI reply for issue {issue.id}: {e}")
+            return {'success': False, 'issue_id': str(issue.id), 'error': str(e)}
+
+
+# Singleton instance
+reply_pipeline = ReplyPipeline()
@@ -4,6 +4,7 @@ from apartments.serializers import ApartmentSerializer
 from products.serializers import ProductSerializer
 from vendors.serializers import VendorSerializer
 from orders.serializers import OrderSerializer, OrderItemSerializer
+from products.resolver import get_resolver
 
 
 class IssueItemSerializer(serializers.ModelSerializer):
@@ -62,9 +63,6 @@ class IssueItemSerializer(serializers.ModelSerializer):
     
     def get_product_image(self, obj):
         """Get product image URL with absolute path"""
-        from products.models import Product
-        from orders.models import OrderItem
-        
         # First check order_item's stored image URL
         if obj.order_item and obj.order_item.product_image_url:
             return self._get_full_image_url(obj.order_item.product_image_url)
@@ -81,45 +79,11 @@ class IssueItemSerializer(serializers.ModelSerializer):
             if image:
                 return image
         
-        # Try to find product by exact name match first
-        if obj.product_name:
-            try:
-                # Exact match
-                matched_product = Product.objects.filter(product__iexact=obj.product_name).first()
-                if matched_product:
-                    image = self._get_image_from_product(matched_product)
-                    if image:
-                        return image
-                
-                # Contains match
-                matched_product = Product.objects.filter(product__icontains=obj.product_name).first()
-                if matched_product:
-                    image = self._get_image_from_product(matched_product)
-                    if image:
-                        return image
-                
-                # Reverse contains - product name contains our search term
-                for product in Product.objects.all()[:100]:  # Limit to avoid performance issues
-                    if product.product and obj.product_name.lower() in product.product.lower():
-                        image = self._get_image_from_product(product)
-                        if image:
-                            return image
-            except Exception:
-                pass
-        
-        # Try to find order item by product name and get its image
+        # Match the name against the apartment's products, then its order items
         if obj.product_name:
-            try:
-                order_item = OrderItem.objects.filter(product_name__icontains=obj.product_name).first()
-                if order_item:
-                    if order_item.product_image_url:
-                        return self._get_full_image_url(order_item.product_image_url)
-                    if order_item.product:
-                        image = self._get_image_from_product(order_item.product)
-                        if image:
-                            return image
-            except Exception:
-                pass
+            image = get_resolver(self.context).image(obj.issue.apartment_id, name=obj.product_name, order_items=True)
+            if image:
+                return self._get_full_image_url(image)
         
         return None
 
@@ -149,6 +113,12 @@ class AICommunicationLogSerializer(serializers.ModelSerializer):
         model = AICommunicationLog
         fields = '__all__'
         read_only_fields = ['timestamp']
+    
+    def update(self, instance, validated_data):
+        # The stored email HTML was rendered from the old text
+        if 'message' in validated_data and validated_data['message'] != instance.message and 'html_content' not in validated_data:
+            validated_data['html_content'] = ''
+        return super().update(instance, validated_data)
 
 
 class IssueListSerializer(serializers.ModelSerializer):
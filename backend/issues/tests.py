@@ -0,0 +1,274 @@
+import datetime
+import queue
+import re
+import socket
+import socketserver
+import threading
+from email.message import EmailMessage
+from unittest import mock
+from django.db import connections
+from django.test import TransactionTestCase
+from apartments.models import Apartment
+from clients.models import Client
+from vendors.models import Vendor
+from .email_monitor import EmailMonitor
+from .imap_idle import ImapIdleListener
+from .models import Issue, MailboxSyncState
+
+ACCOUNT = 'monitor@example.com'
+
+
+class FakeImapServer(socketserver.ThreadingTCPServer):
+    """
+    Minimal IMAP server with one mailbox, speaking what EmailMonitor and
+    ImapIdleListener send: CAPABILITY, LOGIN, SELECT, IDLE, NOOP,
+    UID SEARCH / FETCH / STORE, CLOSE and LOGOUT. UIDs are 1, 2, 3...
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeImapHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.handlers = set()
+        self.connections = 0
+        self.idling = threading.Event()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def deliver(self, raw):
+        """Add a message; clients in IDLE are told right away, the others on their next command"""
+        with self.lock:
+            self.messages.append(raw)
+            idlers = [handler for handler in self.handlers if handler.in_idle]
+        for handler in idlers:
+            handler.report_changes()
+
+    def drop_connections(self):
+        """Cut every open connection, as a server restart or network failure would"""
+        self.idling.clear()
+        with self.lock:
+            handlers = list(self.handlers)
+        for handler in handlers:
+            handler.connection.shutdown(socket.SHUT_RDWR)
+
+
+class FakeImapHandler(socketserver.StreamRequestHandler):
+    CAPABILITIES = 'IMAP4rev1 IDLE'
+
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.in_idle = False
+        self.reported = 0
+        with self.server.lock:
+            self.server.handlers.add(self)
+            self.server.connections += 1
+
+    def finish(self):
+        with self.server.lock:
+            self.server.handlers.discard(self)
+        try:
+            super().finish()
+        except OSError:
+            pass
+
+    def send(self, *lines):
+        data = b''.join(line if isinstance(line, bytes) else line.encode() + b'\r\n' for line in lines)
+        with self.write_lock:
+            try:
+                self.wfile.write(data)
+                self.wfile.flush()
+            except OSError:
+                pass
+
+    def report_changes(self):
+        """Untagged EXISTS when messages arrived since the client was last told"""
+        with self.server.lock:
+            count = len(self.server.messages)
+            changed, self.reported = count != self.reported, count
+        if changed:
+            self.send(f'* {count} EXISTS')
+
+    def handle(self):
+        self.send(f'* OK [CAPABILITY {self.CAPABILITIES}] Fake IMAP ready')
+        try:
+            for line in self.rfile:
+                tag, command, arguments = (line.decode().rstrip('\r\n').split(' ', 2) + [''])[:3]
+                method = getattr(self, f'do_{command.lower()}', None)
+                if method is None:
+                    self.send(f'{tag} BAD unknown command')
+                elif method(tag, arguments) is False:
+                    return
+        except OSError:
+            # Dropped by drop_connections()
+            pass
+
+    def _uids(self, uid_set):
+        """UIDs of existing messages in an IMAP sequence set such as `1,3:*`"""
+        with self.server.lock:
+            highest = len(self.server.messages)
+        uids = set()
+        for part in uid_set.split(','):
+            start, _, end = part.partition(':')
+            start = highest if start == '*' else int(start)
+            end = start if not end else (highest if end == '*' else int(end))
+            uids.update(range(min(start, end), max(start, end) + 1))
+        return sorted(uid for uid in uids if 1 <= uid <= highest)
+
+    def do_capability(self, tag, arguments):
+        self.send(f'* CAPABILITY {self.CAPABILITIES}', f'{tag} OK CAPABILITY completed')
+
+    def do_login(self, tag, arguments):
+        self.send(f'{tag} OK LOGIN completed')
+
+    def do_noop(self, tag, arguments):
+        self.report_changes()
+        self.send(f'{tag} OK NOOP completed')
+
+    def do_close(self, tag, arguments):
+        self.send(f'{tag} OK CLOSE completed')
+
+    def do_logout(self, tag, arguments):
+        self.send('* BYE logging out', f'{tag} OK LOGOUT completed')
+        return False
+
+    def do_select(self, tag, arguments):
+        with self.server.lock:
+            count = self.reported = len(self.server.messages)
+        self.send(
+            f'* {count} EXISTS', '* OK [UIDVALIDITY 1] UIDs valid', f'* OK [UIDNEXT {count + 1}] Predicted next UID',
+            f'{tag} OK [READ-WRITE] SELECT completed',
+        )
+
+    def do_idle(self, tag, arguments):
+        self.send('+ idling')
+        with self.server.lock:
+            self.in_idle = True
+        self.report_changes()
+        self.server.idling.set()
+        try:
+            for line in self.rfile:
+                if line.strip().upper() == b'DONE':
+                    break
+            else:
+                return False
+        finally:
+            self.in_idle = False
+        self.send(f'{tag} OK IDLE terminated')
+
+    def do_uid(self, tag, arguments):
+        command, _, arguments = arguments.partition(' ')
+        command = command.upper()
+        if command == 'SEARCH':
+            # ALL, or UID <set>
+            uid_set = arguments.split()[-1]
+            uids = self._uids('1:*' if uid_set.upper() == 'ALL' else uid_set)
+            self.send(f'* SEARCH {" ".join(map(str, uids))}'.rstrip(), f'{tag} OK SEARCH completed')
+        elif command == 'FETCH':
+            uid_set, _, items = arguments.partition(' ')
+            for uid in self._uids(uid_set):
+                raw = self.server.messages[uid - 1]
+                section = 'BODY' + re.search(r'BODY(?:\.PEEK)?(\[[^\]]*\])', items).group(1)
+                if 'HEADER.FIELDS' in section:
+                    raw = raw.split(b'\n\n', 1)[0] + b'\n\n'
+                self.send(f'* {uid} FETCH (UID {uid} {section} {{{len(raw)}}}'.encode() + b'\r\n' + raw + b')\r\n')
+            self.send(f'{tag} OK FETCH completed')
+        else:
+            self.send(f'{tag} OK {command} completed')
+
+
+class ImapIdleListenerTests(TransactionTestCase):
+    """New mail reaches the mailbox sync through IDLE, and again after the connection drops"""
+
+    def setUp(self):
+        today = datetime.date.today()
+        client = Client.objects.create(name='Client', email='client@example.com')
+        apartment = Apartment.objects.create(
+            name='Apartment', client=client, address='Address', start_date=today, due_date=today
+        )
+        vendor = Vendor.objects.create(name='Vendor', email='vendor@example.com')
+        self.issue = Issue.objects.create(apartment=apartment, vendor=vendor, type='Damaged', description='Broken')
+
+        self.server = FakeImapServer()
+        self.server.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.monitor = EmailMonitor()
+        self.monitor.imap_host, self.monitor.imap_port, self.monitor.imap_use_ssl = '127.0.0.1', self.server.port, False
+        self.monitor.imap_user, self.monitor.imap_password = ACCOUNT, 'password'
+
+        # Vendor replies handed over by the sync, instead of storing them and drafting AI answers
+        self.received = queue.Queue()
+        recorder = mock.patch.object(
+            EmailMonitor, 'record_vendor_response', side_effect=lambda email_data: self.received.put(email_data)
+        )
+        recorder.start()
+        self.addCleanup(recorder.stop)
+
+    def start_listener(self):
+        listener = ImapIdleListener(self.monitor, idle_timeout=30, poll_interval=1, max_backoff=1)
+
+        def run():
+            try:
+                listener.run()
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.assertTrue(self.server.idling.wait(10), 'listener did not enter IDLE')
+        return listener, thread
+
+    def stop_listener(self, listener, thread):
+        listener.stop()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+
+    def deliver_reply(self, number):
+        message = EmailMessage()
+        message['Subject'] = f'Re: [Issue #{self.issue.id}] reply {number}'
+        message['From'] = 'vendor@example.com'
+        message['To'] = ACCOUNT
+        message['Message-ID'] = f'<reply-{number}@example.com>'
+        message.set_content(f'Reply {number}')
+        self.server.deliver(message.as_bytes())
+
+    def next_subject(self):
+        return self.received.get(timeout=10)['subject']
+
+    def test_idle_wakeup_syncs_new_mail(self):
+        listener, thread = self.start_listener()
+
+        self.deliver_reply(1)
+        # Well within the 30 second IDLE timeout: the EXISTS response woke the listener
+        self.assertTrue(self.next_subject().endswith('reply 1'))
+        self.deliver_reply(2)
+        self.assertTrue(self.next_subject().endswith('reply 2'))
+
+        self.stop_listener(listener, thread)
+        self.assertEqual(MailboxSyncState.objects.get(account=ACCOUNT).last_uid, 2)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_reconnect_catches_up(self):
+        listener, thread = self.start_listener()
+        self.deliver_reply(1)
+        self.assertTrue(self.next_subject().endswith('reply 1'))
+
+        self.server.drop_connections()
+        self.deliver_reply(2)
+        # Fetched by the catch-up sync after reconnecting, from the saved checkpoint
+        self.assertTrue(self.next_subject().endswith('reply 2'))
+        self.assertTrue(self.server.idling.wait(10), 'listener did not resume IDLE')
+
+        self.stop_listener(listener, thread)
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(MailboxSyncState.objects.get(account=ACCOUNT).last_uid, 2)
+        self.assertTrue(self.received.empty())
@@ -6,12 +6,14 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.conf import settings
 import asyncio
+from config.delta_sync import changes_since, collection_version, not_modified, set_version_headers
 from config.swagger_utils import add_viewset_tags
 from .models import Issue, IssueItem, IssuePhoto, AICommunicationLog
 from .serializers import IssueSerializer, IssueListSerializer, IssuePhotoSerializer, AICommunicationLogSerializer
 from .ai_services_complete import ai_service
 from .ai_services import ai_manager
 from .email_service import email_service
+from .outbox import queue_issue_report
 import logging
 
 logger = logging.getLogger(__name__)
@@ -58,74 +60,14 @@ class IssueViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Override to auto-send AI email on issue creation"""
-        import threading
-        
         issue = serializer.save()
         
         # Auto-send AI email if enabled and vendor exists
         auto_activate = getattr(settings, 'AI_EMAIL_AUTO_ACTIVATE', True)
         if auto_activate and issue.vendor and issue.auto_notify_vendor:
-            # Send email in background thread to avoid blocking the response
-            def send_email_background(issue_id):
-                try:
-                    # Re-fetch issue in new thread context
-                    from .models import Issue
-                    issue_obj = Issue.objects.select_related('vendor', 'order').get(id=issue_id)
-                    
-                    # Generate AI email
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    
-                    issue_data = {
-                        'issue_id': str(issue_obj.id),
-                        'vendor_name': issue_obj.vendor.name,
-                        'type': issue_obj.type,
-                        'priority': issue_obj.priority,
-                        'product_name': issue_obj.get_product_name(),
-                        'description': issue_obj.description,
-                        'impact': issue_obj.impact,
-                        'order_reference': f"Order #{issue_obj.order.po_number}" if issue_obj.order else None
-                    }
-                    
-                    result = loop.run_until_complete(
-                        ai_service.generate_issue_email(issue_data)
-                    )
-                    loop.close()
-                    
-                    # Send email even if AI generation failed (use fallback content)
-                    # Simple, clean subject: Order #PO, Product, Priority
-                    priority_label = issue_obj.priority or 'Medium'
-                    product_name = issue_obj.get_product_name()
-                    
-                    if issue_obj.order and issue_obj.order.po_number:
-                        subject = f"Order #{issue_obj.order.po_number}, {product_name}, {priority_label} Priority"
-                    else:
-                        subject = f"{product_name}, {priority_label} Priority"
-                    
-                    # Use AI-generated body or fallback body
-                    body = result.get('body', result.get('opening_message', issue_obj.description))
-                    
-                    # Send email with HTML template (initial report)
-                    email_service.send_issue_email(
-                        issue=issue_obj,
-                        subject=subject,
-                        body=body,
-                        is_initial_report=True,
-                        ai_data=result
-                    )
-                    
-                    if result.get('success'):
-                        logger.info(f"Auto-sent AI email for issue {issue_obj.id}")
-                    else:
-                        logger.warning(f"Sent email with fallback content for issue {issue_obj.id}. AI generation error: {result.get('error')}")
-                        
-                except Exception as e:
-                    logger.error(f"Failed to auto-send email for issue {issue_id}: {e}")
-            
-            # Start background thread for email sending
-            email_thread = threading.Thread(target=send_email_background, args=(issue.id,), daemon=True)
-            email_thread.start()
-            logger.info(f"Issue {issue.id} created, email sending started in background")
+            # The outbox worker writes the email with AI and sends it, so the response is not held up
+            queue_issue_report(issue)
+            logger.info(f"Issue {issue.id} created, email queued in the outbox")
     
     @action(detail=True, methods=['post'])
     def activate_ai_email(self, request, pk=None):
@@ -179,16 +121,39 @@ class IssueViewSet(viewsets.ModelViewSet):
         emails = AICommunicationLog.objects.filter(
             issue=issue,
             message_type='email'
-        ).order_by('timestamp')
+        )
         
-        serializer = AICommunicationLogSerializer(emails, many=True)
-        return Response({
-            'issue_id': str(issue.id),
-            'thread_id': f"issue-{issue.id}",
-            'messages': serializer.data,
-            'ai_activated': issue.ai_activated,
-            'current_status': issue.status
-        })
+        return self._thread_response(
+            request, issue, emails, 'messages',
+            thread_id=f"issue-{issue.id}",
+            ai_activated=issue.ai_activated,
+            current_status=issue.status
+        )
+    
+    def _thread_response(self, request, issue, logs, results_key, **fields):
+        """
+        Messages of an issue, or with `?since=<cursor>` only those changed since
+        plus deleted ids; 304 when nothing changed (see config.delta_sync)
+        """
+        since = request.query_params.get('since', '')
+        version = collection_version(logs, scope=issue.id, extra=(issue.updated_at,), since=since)
+        response = not_modified(request, version)
+        if response is not None:
+            return response
+        
+        def serialize(rows):
+            return AICommunicationLogSerializer(rows, many=True).data
+        
+        body = {'issue_id': str(issue.id)}
+        if since:
+            delta = changes_since(logs, since, serialize, scope=issue.id)
+            body[results_key] = delta.pop('results')
+            body.update(delta)
+            version = version._replace(cursor=delta['cursor'])
+        else:
+            body[results_key] = serialize(logs.order_by('timestamp'))
+        body.update(fields, total_messages=version.count)
+        return set_version_headers(Response(body), version)
     
     @action(detail=True, methods=['post'])
     def generate_ai_reply(self, request, pk=None):
@@ -300,7 +265,8 @@ class IssueViewSet(viewsets.ModelViewSet):
             
             return Response({
                 'success': True,
-                'message': 'Manual message sent successfully',
+                'queued': True,
+                'message': 'Manual message queued for sending',
                 'email_message_id': email_message_id
             })
         except Exception as e:
@@ -314,26 +280,25 @@ class IssueViewSet(viewsets.ModelViewSet):
         """Get full conversation thread for this issue"""
         issue = self.get_object()
         
-        # Get all communication logs ordered by timestamp
-        logs = AICommunicationLog.objects.filter(
-            issue=issue
-        ).order_by('timestamp')
-        
-        serializer = AICommunicationLogSerializer(logs, many=True)
-        
-        return Response({
-            'issue_id': str(issue.id),
-            'conversation': serializer.data,
-            'total_messages': logs.count(),
-            'ai_activated': issue.ai_activated,
-            'status': issue.status
-        })
+        logs = AICommunicationLog.objects.filter(issue=issue)
+        return self._thread_response(
+            request, issue, logs, 'conversation',
+            ai_activated=issue.ai_activated,
+            status=issue.status
+        )
     
     @action(detail=True, methods=['get'], url_path='summary')
     def summary(self, request, pk=None):
-        """Get AI-generated conversation summary and next action"""
+        """
+        Get AI-generated conversation summary and next action.
+        ?refresh=true first folds the emails that arrived since the last summary into it.
+        """
         issue = self.get_object()
         
+        if request.query_params.get('refresh') == 'true':
+            from asgiref.sync import async_to_sync
+            async_to_sync(ai_manager.update_conversation_summary)(issue)
+        
         return Response({
             'issue_id': str(issue.id),
             'last_summary': issue.last_summary,
@@ -468,7 +433,8 @@ class AICommunicationLogViewSet(viewsets.ModelViewSet):
             email_service.send_approved_draft(message, request.user)
             return Response({
                 'success': True,
-                'message': 'Email approved and sent'
+                'queued': True,
+                'message': 'Email approved and queued for sending'
             })
         except Exception as e:
             message.status = 'failed'
@@ -500,13 +466,15 @@ class AICommunicationLogViewSet(viewsets.ModelViewSet):
         message.message = new_content
         message.subject = new_subject
         message.manual_override = True
+        message.html_content = ''  # Rendered from the old text
         message.save()
 
         try:
             email_service.send_approved_draft(message, request.user)
             return Response({
                 'success': True,
-                'message': 'Email edited and sent'
+                'queued': True,
+                'message': 'Email edited and queued for sending'
             })
         except Exception as e:
             message.status = 'failed'
@@ -0,0 +1,416 @@
+"""
+Live event stream for issue conversations and notifications.
+
+Instead of polling the conversation of every open issue panel and the
+notifications / unread count of every tab, the frontend keeps one
+server-sent event connection open (GET /api/events/stream/) and receives:
+
+- `message` / `message_updated`: an AICommunicationLog row was created or
+  changed, serialized as in the issue conversation endpoint (topics
+  `conversations` and `issue:<id>`);
+- `notification`: a notification was created for the user (`user:<id>`);
+- `unread_count`: the user's unread notification count changed, and once
+  when the stream opens.
+
+Events are published by post_save / post_delete handlers
+(notifications.signals) when the transaction commits, and fanned out to
+the open streams of a process by the EventHub. REALTIME_EVENT_BACKEND
+decides how an event gets from the process that published it to the
+processes serving streams:
+
+- DatabaseEventBackend (default) stores events as RealtimeEvent rows. Each
+  process serving streams runs one thread that polls for new rows every
+  REALTIME_POLL_INTERVAL seconds, however many streams it has open, so
+  events from the gunicorn workers, the email monitor and the outbox worker
+  all arrive. Ids are allocated before commit, so a row may become visible
+  after one with a higher id: each poll re-scans the rows created in the
+  last COMMIT_OVERLAP and skips the ones it already dispatched. Clients
+  reconnecting with Last-Event-ID get what they missed.
+- LocalEventBackend delivers within the publishing process only, for
+  setups where a single process does everything (development).
+
+EventSource cannot send an Authorization header, so a client first gets a
+stream ticket (POST /api/events/ticket/): a signed token that only opens
+streams and expires after REALTIME_STREAM_TICKET_TTL seconds, so the copy
+access logs keep of the stream URL is not a usable credential.
+
+Streams are served by the ASGI application (config.asgi), where an open
+stream is a coroutine instead of a worker thread. Under WSGI they work too,
+but each holds a worker for up to REALTIME_STREAM_TIMEOUT seconds.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from config.sse import sse_comment, sse_event, sse_retry
+
+logger = logging.getLogger(__name__)
+
+CONVERSATIONS_TOPIC = 'conversations'
+PRUNE_INTERVAL = 60
+REPLAY_LIMIT = 500
+# How long an event row may take to commit after its id and created_at were taken
+COMMIT_OVERLAP = timedelta(seconds=10)
+TICKET_SALT = 'notifications.events.stream-ticket'
+
+_pending = threading.local()
+
+
+def issue_topic(issue_id):
+    return f'issue:{issue_id}'
+
+
+def user_topic(user_id):
+    return f'user:{user_id}'
+
+
+class Subscription:
+    """Queue of events for one open stream; deliver() may be called from any thread"""
+
+    def __init__(self, topics, loop=None):
+        self.topics = frozenset(topics)
+        self.loop = loop
+        maxsize = getattr(settings, 'REALTIME_SUBSCRIBER_QUEUE_SIZE', 1000)
+        self.queue = asyncio.Queue(maxsize) if loop is not None else queue.Queue(maxsize)
+        self.overflowed = False
+
+    def matches(self, event):
+        return not self.topics.isdisjoint(event['topics'])
+
+    def deliver(self, event):
+        if self.loop is None:
+            self._put(event)
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The stream's event loop is gone; it unsubscribes as it closes
+            pass
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except (asyncio.QueueFull, queue.Full):
+            # The client stopped reading: its stream ends and it catches up on reconnect
+            self.overflowed = True
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def get_blocking(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventHub:
+    """The open streams of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self, topics, loop=None):
+        subscription = Subscription(topics, loop)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        get_event_backend().listen()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def has_subscribers(self):
+        return bool(self._subscriptions)
+
+    def dispatch(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.matches(event):
+                subscription.deliver(event)
+
+
+hub = EventHub()
+
+
+class LocalEventBackend:
+    """Delivers events to the streams of the publishing process only."""
+
+    def publish(self, event, topics, data):
+        hub.dispatch({'id': None, 'event': event, 'topics': list(topics), 'data': data})
+
+    def publish_many(self, events):
+        for event, topics, data in events:
+            self.publish(event, topics, data)
+
+    def listen(self):
+        pass
+
+    def events_after(self, event_id, topics):
+        return []
+
+
+class DatabaseEventBackend:
+    """
+    Stores events as RealtimeEvent rows. A process serving streams polls
+    for new rows on one thread and hands them to the hub.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_prune = 0.0
+
+    def publish(self, event, topics, data):
+        from .models import RealtimeEvent
+
+        RealtimeEvent.objects.create(event=event, topics=list(topics), data=data)
+        self._prune_if_due()
+
+    def publish_many(self, events):
+        from .models import RealtimeEvent
+
+        RealtimeEvent.objects.bulk_create([
+            RealtimeEvent(event=event, topics=list(topics), data=data) for event, topics, data in events
+        ])
+        self._prune_if_due()
+
+    def listen(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._poll, name='realtime-events', daemon=True)
+                self._thread.start()
+
+    def events_after(self, event_id, topics):
+        """Stored events after `event_id` for these topics, for a reconnecting client"""
+        from .models import RealtimeEvent
+
+        events = (self._as_event(row) for row in RealtimeEvent.objects.filter(id__gt=event_id)[:REPLAY_LIMIT])
+        return [event for event in events if not set(topics).isdisjoint(event['topics'])]
+
+    @staticmethod
+    def _as_event(row):
+        return {'id': row.id, 'event': row.event, 'topics': row.topics, 'data': row.data}
+
+    def _poll(self):
+        from .models import RealtimeEvent
+
+        last_id = None
+        dispatched = {}  # id -> created_at of the rows in the overlap window already dispatched
+        while True:
+            try:
+                if not hub.has_subscribers():
+                    # Nobody to deliver to: no queries, and no backlog for the next stream
+                    if last_id is not None:
+                        last_id = None
+                        dispatched = {}
+                        connection.close()
+                else:
+                    window_start = timezone.now() - COMMIT_OVERLAP
+                    if last_id is None:
+                        last_id = RealtimeEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+                        dispatched = dict(
+                            RealtimeEvent.objects.filter(created_at__gte=window_start).values_list('id', 'created_at')
+                        )
+                    rows = RealtimeEvent.objects.filter(Q(id__gt=last_id) | Q(created_at__gte=window_start))
+                    if dispatched:
+                        rows = rows.exclude(id__in=list(dispatched))
+                    for row in rows[:REPLAY_LIMIT]:
+                        last_id = max(last_id, row.id)
+                        dispatched[row.id] = row.created_at
+                        hub.dispatch(self._as_event(row))
+                    dispatched = {
+                        event_id: created_at for event_id, created_at in dispatched.items()
+                        if created_at >= window_start
+                    }
+                    self._prune_if_due()
+            except Exception as e:
+                logger.error(f"Error while polling realtime events: {str(e)}")
+                close_old_connections()
+            time.sleep(getattr(settings, 'REALTIME_POLL_INTERVAL', 0.5))
+
+    def _prune_if_due(self):
+        from .models import RealtimeEvent
+
+        now = time.monotonic()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        retention = getattr(settings, 'REALTIME_EVENT_RETENTION', 300)
+        RealtimeEvent.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=retention)).delete()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_event_backend():
+    """Return the process-wide backend configured by REALTIME_EVENT_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_path = getattr(settings, 'REALTIME_EVENT_BACKEND', 'notifications.events.DatabaseEventBackend')
+            _backend = import_string(backend_path)()
+        return _backend
+
+
+def publish(event, topics, data):
+    """Send an event to the streams subscribed to any of `topics`"""
+    try:
+        get_event_backend().publish(event, topics, data)
+    except Exception as e:
+        # Streams are a convenience on top of the REST endpoints, which stay authoritative
+        logger.error(f"Failed to publish {event} event: {str(e)}")
+
+
+def publish_on_commit(event, topics, data):
+    transaction.on_commit(lambda: publish(event, topics, data))
+
+
+def publish_many_on_commit(events):
+    """Publish (event, topics, data) triples in one write when the current transaction commits"""
+    def send():
+        try:
+            get_event_backend().publish_many(events)
+        except Exception as e:
+            logger.error(f"Failed to publish {len(events)} events: {str(e)}")
+
+    if events:
+        transaction.on_commit(send)
+
+
+def issue_stream_ticket(user):
+    """Signed token that opens the user's event stream for REALTIME_STREAM_TICKET_TTL seconds"""
+    return signing.dumps(str(user.pk), salt=TICKET_SALT)
+
+
+def stream_ticket_user(ticket):
+    """The active user a stream ticket was issued to, or None if it is invalid or expired"""
+    from django.contrib.auth import get_user_model
+
+    try:
+        user_id = signing.loads(ticket, salt=TICKET_SALT, max_age=getattr(settings, 'REALTIME_STREAM_TICKET_TTL', 30))
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(pk=user_id, is_active=True).first()
+
+
+def unread_count(user_id):
+    from .models import Notification
+
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def schedule_unread_count(user_id):
+    """Publish the user's unread count when the current transaction commits, once per transaction"""
+    pending = getattr(_pending, 'users', None)
+    if pending is None:
+        pending = _pending.users = set()
+    pending.add(user_id)
+    transaction.on_commit(_flush_unread_counts)
+
+
+def _flush_unread_counts():
+    pending = getattr(_pending, 'users', None)
+    _pending.users = None
+    for user_id in pending or ():
+        try:
+            publish('unread_count', [user_topic(user_id)], {'unread_count': unread_count(user_id)})
+        except Exception as e:
+            logger.error(f"Failed to publish the unread count of user {user_id}: {str(e)}")
+
+
+def stream_topics(user, issue_ids=()):
+    """The user's notifications, plus the conversations of `issue_ids` (all conversations if empty)"""
+    topics = [user_topic(user.pk)]
+    if issue_ids:
+        topics += [issue_topic(issue_id) for issue_id in issue_ids]
+    else:
+        topics.append(CONVERSATIONS_TOPIC)
+    return topics
+
+
+def _format(event):
+    return sse_event(event['event'], event['data'], event_id=event['id'])
+
+
+def _opening(user, topics, last_event_id):
+    """Messages sent when a stream opens: missed events, then the current unread count"""
+    messages = [sse_retry(getattr(settings, 'REALTIME_RETRY_MS', 3000)), sse_comment('connected')]
+    replayed = [] if last_event_id is None else get_event_backend().events_after(last_event_id, topics)
+    messages += [_format(event) for event in replayed]
+    messages.append(sse_event('unread_count', {'unread_count': unread_count(user.pk)}))
+    return messages, {event['id'] for event in replayed}
+
+
+def _is_replayed(event, replayed_ids):
+    # Ids are not in commit order: a live event may have a lower id than a replayed one
+    return event['id'] is not None and event['id'] in replayed_ids
+
+
+async def event_stream(user, topics, last_event_id=None):
+    """Server-sent-events generator for the ASGI application"""
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT_INTERVAL', 15)
+    timeout = getattr(settings, 'REALTIME_STREAM_TIMEOUT', 3600)
+    loop = asyncio.get_running_loop()
+    # Subscribed before the replay, so nothing published in between is lost
+    subscription = hub.subscribe(topics, loop)
+    try:
+        messages, replayed_ids = await sync_to_async(_opening)(user, topics, last_event_id)
+        for message in messages:
+            yield message
+
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0 or subscription.overflowed:
+                yield sse_event('reconnect', {'reason': 'overflow' if subscription.overflowed else 'timeout'})
+                return
+            event = await subscription.get(min(heartbeat, remaining))
+            if event is None:
+                yield sse_comment('keep-alive')
+            elif not _is_replayed(event, replayed_ids):
+                yield _format(event)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def event_stream_sync(user, topics, last_event_id=None):
+    """The same stream for WSGI servers; it holds a worker thread while open"""
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT_INTERVAL', 15)
+    timeout = getattr(settings, 'REALTIME_STREAM_TIMEOUT', 3600)
+    subscription = hub.subscribe(topics)
+    try:
+        messages, replayed_ids = _opening(user, topics, last_event_id)
+        yield from messages
+        close_old_connections()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or subscription.overflowed:
+                yield sse_event('reconnect', {'reason': 'overflow' if subscription.overflowed else 'timeout'})
+                return
+            event = subscription.get_blocking(min(heartbeat, remaining))
+            if event is None:
+                yield sse_comment('keep-alive')
+            elif not _is_replayed(event, replayed_ids):
+                yield _format(event)
+    finally:
+        hub.unsubscribe(subscription)
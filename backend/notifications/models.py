@@ -1,4 +1,5 @@
 import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth import get_user_model
 
@@ -77,6 +78,7 @@ class Notification(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'updated_at', 'id']),  # Delta sync (config.delta_sync)
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['notification_type']),
         ]
@@ -128,3 +130,22 @@ class NotificationPreference(models.Model):
     
     def __str__(self):
         return f"Preferences for {self.user.email}"
+
+
+class RealtimeEvent(models.Model):
+    """
+    Event published to the live event stream (see notifications.events),
+    stored so that every web process can pick it up and reconnecting
+    clients can catch up from their Last-Event-ID. Rows are pruned after
+    REALTIME_EVENT_RETENTION seconds. The auto-increment id is the cursor.
+    """
+    event = models.CharField(max_length=50)
+    topics = models.JSONField(default=list)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.id}: {self.event}"
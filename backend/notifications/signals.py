@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from .events import CONVERSATIONS_TOPIC, issue_topic, publish_on_commit, schedule_unread_count, user_topic
+from .models import Notification
+from .serializers import NotificationSerializer
 from .utils import create_notification
 
 User = get_user_model()
@@ -33,11 +36,39 @@ def notify_admins(title, message, notification_type='info', priority='medium',
     return notifications
 
 
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    """Push new notifications and unread count changes to the user's event streams"""
+    if created:
+        publish_on_commit('notification', [user_topic(instance.user_id)], NotificationSerializer(instance).data)
+    schedule_unread_count(instance.user_id)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    schedule_unread_count(instance.user_id)
+
+
 # Import models lazily to avoid circular imports
 def setup_signals():
     """Setup all notification signals - call this from apps.py ready()"""
     
     # Try to import and connect signals for each app
+    try:
+        from issues.models import AICommunicationLog
+        from issues.serializers import AICommunicationLogSerializer
+        
+        @receiver(post_save, sender=AICommunicationLog)
+        def communication_log_saved(sender, instance, created, **kwargs):
+            # Open conversation panels receive the message instead of polling for it
+            publish_on_commit(
+                'message' if created else 'message_updated',
+                [CONVERSATIONS_TOPIC, issue_topic(instance.issue_id)],
+                AICommunicationLogSerializer(instance).data
+            )
+    except ImportError:
+        pass
+
     try:
         from products.models import Product
         
@@ -6,18 +6,21 @@ from django.utils import timezone
 from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
+from config.delta_sync import DeltaSyncListMixin
 from .models import Notification, NotificationPreference
 from .serializers import (
     NotificationSerializer,
     NotificationPreferenceSerializer,
     CreateNotificationSerializer
 )
+from .events import schedule_unread_count
 from .utils import create_notification
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(DeltaSyncListMixin, viewsets.ModelViewSet):
     """
-    ViewSet for managing user notifications
+    ViewSet for managing user notifications.
+    list() answers unchanged polls with 304 and accepts `?since=<cursor>` (see config.delta_sync).
     """
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
@@ -31,6 +34,9 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """Return notifications for the current user only"""
         return Notification.objects.filter(user=self.request.user)
     
+    def get_delta_scope(self):
+        return self.request.user.id
+    
     @extend_schema(
         tags=['Notifications'],
         summary='List user notifications',
@@ -102,7 +108,9 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def mark_all_read(self, request):
         notifications = self.get_queryset().filter(is_read=False)
         count = notifications.count()
-        notifications.update(is_read=True, read_at=timezone.now())
+        now = timezone.now()
+        notifications.update(is_read=True, read_at=now, updated_at=now)
+        schedule_unread_count(request.user.id)  # update() sends no post_save
         return Response({
             'status': 'success',
             'marked_count': count
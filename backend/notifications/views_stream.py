@@ -0,0 +1,81 @@
+"""
+Live event stream endpoint (see notifications.events)
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from django.conf import settings
+from django.views.decorators.http import require_GET
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from config.sse import event_stream_response
+from .events import event_stream, event_stream_sync, issue_stream_ticket, stream_ticket_user, stream_topics
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def stream_ticket_view(request):
+    """
+    Short-lived ticket for opening the event stream, which EventSource can
+    only authenticate through its URL. Get a new one before every (re)connect.
+
+    POST /api/events/ticket/
+    """
+    return Response({
+        'ticket': issue_stream_ticket(request.user),
+        'expires_in': getattr(settings, 'REALTIME_STREAM_TICKET_TTL', 30),
+    })
+
+
+def _authenticate(request):
+    """
+    The user of a stream request: a JWT from the Authorization header, a
+    stream ticket from the `ticket` query parameter, or the session user.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header:
+        try:
+            raw_token = authentication.get_raw_token(header)
+            return authentication.get_user(authentication.get_validated_token(raw_token)) if raw_token else None
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return None
+    if request.GET.get('ticket'):
+        return stream_ticket_user(request.GET['ticket'])
+    user = request.user
+    return user if user.is_authenticated else None
+
+
+def _last_event_id(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _issue_ids(request):
+    return [issue_id.strip() for issue_id in request.GET.get('issues', '').split(',') if issue_id.strip()]
+
+
+@require_GET
+async def event_stream_view(request):
+    """
+    GET /api/events/stream/?issues=<id>,<id>&ticket=<stream ticket>
+
+    Server-sent events for the user's notifications and unread count, and
+    for new messages of the given issues (all issues if `issues` is omitted).
+    """
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    topics = stream_topics(user, _issue_ids(request))
+    if isinstance(request, ASGIRequest):
+        return event_stream_response(event_stream(user, topics, _last_event_id(request)))
+    # A WSGI server can only iterate a synchronous stream, on its worker thread
+    return event_stream_response(event_stream_sync(user, topics, _last_event_id(request)))
@@ -2,7 +2,7 @@ import pandas as pd
 import logging
 import uuid
 import os
-from openpyxl import load_workbook
+import zipfile
 from datetime import datetime, date
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
@@ -10,6 +10,10 @@ from django.db import transaction
 from django.utils import timezone
 from .models import Order, OrderItem
 from products.models import Product
+from products.category_models import ImportSession
+from products.import_jobs import ImportProgress, enqueue_import
+from products.xlsx_stream import XlsxStreamReader, clean_column_name, iter_dataframe_rows
+from products.image_ingest import ImageIngestor
 from apartments.models import Apartment
 from vendors.models import Vendor
 
@@ -25,6 +29,8 @@ class OrderImportService:
     def __init__(self):
         self.supported_formats = ['.xlsx', '.xls', '.csv']
         self.image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
+        self.progress = ImportProgress()
+        self.images = ImageIngestor()
     
     def validate_file(self, file):
         """Validate uploaded file"""
@@ -41,7 +47,7 @@ class OrderImportService:
         
         return errors
     
-    def process_import(self, file, order_data, user=None):
+    def process_import(self, file, order_data, user=None, run_async=False):
         """
         Main method to process file import and create order with items
         
@@ -58,9 +64,12 @@ class OrderImportService:
                 - shipping_address: Optional shipping address
                 - notes: Optional notes
             user: User object
+            run_async: Store the upload on a pending ImportSession and run the
+                import in the background job backend instead of inline
         
         Returns:
             Dictionary with success status and results
+            (with run_async: {'success': True, 'queued': True, 'session_id': ...})
         """
         try:
             # Validate file
@@ -88,29 +97,29 @@ class OrderImportService:
             except Vendor.DoesNotExist:
                 return {'success': False, 'errors': ['Invalid vendor_id provided']}
             
+            if run_async:
+                # Keep the upload on an import session so the worker can read it
+                import_session = ImportSession.objects.create(
+                    apartment=apartment,
+                    file_name=file.name,
+                    file_size=file.size,
+                    file_type=os.path.splitext(file.name)[1].lower().replace('.', ''),
+                    uploaded_file=file,
+                    import_type='order',
+                    job_params={
+                        'order_data': order_data,
+                        'user_id': str(user.pk) if user and user.is_authenticated else None,
+                    },
+                    status='pending'
+                )
+                enqueue_import(import_session)
+                return {'success': True, 'queued': True, 'session_id': str(import_session.id)}
+            
             # Save file temporarily
             temp_path = self._save_temp_file(file)
             
             try:
-                # Parse the file to get products
-                if file.name.lower().endswith('.csv'):
-                    products_data = self._parse_csv(temp_path)
-                else:
-                    products_data = self._parse_excel(temp_path, apartment)
-                
-                if not products_data:
-                    return {'success': False, 'errors': ['No valid products found in file']}
-                
-                # Create order and order items in a transaction
-                result = self._create_order_with_items(
-                    apartment=apartment,
-                    vendor=vendor,
-                    products_data=products_data,
-                    order_data=order_data,
-                    user=user
-                )
-                
-                return result
+                return self._import_file(temp_path, file.name, apartment, vendor, order_data, user)
                 
             finally:
                 # Clean up temp file
@@ -121,6 +130,68 @@ class OrderImportService:
             logger.error(f"Order import error: {str(e)}", exc_info=True)
             return {'success': False, 'errors': [str(e)]}
     
+    def process_session(self, import_session):
+        """
+        Run a queued order import (called by the import job worker)
+        """
+        try:
+            params = import_session.job_params or {}
+            order_data = params.get('order_data', {})
+            apartment = import_session.apartment
+            vendor = Vendor.objects.get(id=order_data.get('vendor_id'))
+            user = None
+            if params.get('user_id'):
+                from django.contrib.auth import get_user_model
+                user = get_user_model().objects.filter(pk=params['user_id']).first()
+            
+            import_session.status = 'processing'
+            import_session.save(update_fields=['status'])
+            self.progress = ImportProgress(import_session)
+            
+            result = self._import_file(
+                import_session.uploaded_file.path, import_session.file_name,
+                apartment, vendor, order_data, user
+            )
+        except Exception as e:
+            logger.error(f"Order import job error: {str(e)}", exc_info=True)
+            result = {'success': False, 'errors': [str(e)]}
+        
+        data = result.get('data', {})
+        import_session.status = 'completed' if result.get('success') else 'failed'
+        import_session.total_products = data.get('total_items', 0)
+        import_session.successful_imports = data.get('successful_imports', 0)
+        import_session.failed_imports = data.get('failed_imports', 0)
+        import_session.error_log = data.get('errors', []) if result.get('success') else result.get('errors', [])
+        import_session.result = result
+        import_session.processed_rows = self.progress.processed_rows
+        import_session.total_rows = max(self.progress.total_rows, self.progress.processed_rows)
+        import_session.processed_sheets = self.progress.processed_sheets
+        import_session.current_sheet = self.progress.current_sheet[:255]
+        import_session.completed_at = timezone.now()
+        import_session.save()
+        
+        return result
+    
+    def _import_file(self, file_path, file_name, apartment, vendor, order_data, user):
+        """Parse a stored upload and create the order with its items"""
+        # Parse the file to get products
+        if file_name.lower().endswith('.csv'):
+            products_data = self._parse_csv(file_path)
+        else:
+            products_data = self._parse_excel(file_path, apartment)
+        
+        if not products_data:
+            return {'success': False, 'errors': ['No valid products found in file']}
+        
+        # Create order and order items in a transaction
+        return self._create_order_with_items(
+            apartment=apartment,
+            vendor=vendor,
+            products_data=products_data,
+            order_data=order_data,
+            user=user
+        )
+    
     def _save_temp_file(self, file):
         """Save uploaded file temporarily"""
         temp_dir = '/tmp'
@@ -140,40 +211,47 @@ class OrderImportService:
         """Parse CSV file and extract product data"""
         try:
             df = pd.read_csv(file_path)
-            return self._extract_products_from_dataframe(df)
+            self.progress.set_totals(total_sheets=1)
+            self.progress.start_sheet('CSV_Import', len(df))
+            products = self._extract_products_from_dataframe(df)
+            self.progress.finish_sheet()
+            return products
         except Exception as e:
             logger.error(f"CSV parsing error: {str(e)}")
             return []
     
     def _parse_excel(self, file_path, apartment):
-        """Parse Excel file and extract product data from all sheets"""
+        """Parse Excel file in a single streaming pass and extract product data from all sheets"""
         try:
-            # Extract images first
-            row_image_map = self._extract_excel_images_with_openpyxl(file_path, apartment)
+            if not zipfile.is_zipfile(file_path):
+                # Legacy .xls workbooks are not zip archives and have no embedded-image support
+                return self._parse_xls(file_path)
             
-            excel_file = pd.ExcelFile(file_path)
             all_products = []
-            
-            # Process each sheet
-            for sheet_name in excel_file.sheet_names:
-                try:
-                    df = pd.read_excel(file_path, sheet_name=sheet_name)
-                    
-                    # Skip empty sheets
-                    if df.empty or len(df) == 0:
-                        logger.info(f"Skipping empty sheet: {sheet_name}")
+            with XlsxStreamReader(file_path, normalize_header=clean_column_name) as reader:
+                self.progress.set_totals(total_sheets=len(reader.sheet_names))
+                
+                # Process each sheet
+                for sheet_name in reader.sheet_names:
+                    try:
+                        sheet = reader.open_sheet(sheet_name)
+                        self.progress.start_sheet(sheet_name, max(reader.sheet_row_count(sheet_name) - 1, 0))
+                        
+                        # Skip empty sheets
+                        if not sheet.columns:
+                            logger.info(f"Skipping empty sheet: {sheet_name}")
+                            self.progress.finish_sheet()
+                            continue
+                        
+                        # Extract products (and their embedded images) from this sheet
+                        products = self._extract_products_from_rows(sheet, sheet.columns, sheet_name)
+                        all_products.extend(products)
+                        self.progress.finish_sheet()
+                        
+                    except Exception as e:
+                        logger.error(f"Error processing sheet '{sheet_name}': {str(e)}")
+                        self.progress.finish_sheet()
                         continue
-                    
-                    # Get images for this sheet
-                    sheet_images = row_image_map.get(sheet_name, {})
-                    
-                    # Extract products from this sheet
-                    products = self._extract_products_from_dataframe(df, sheet_images)
-                    all_products.extend(products)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing sheet '{sheet_name}': {str(e)}")
-                    continue
             
             return all_products
             
@@ -181,12 +259,33 @@ class OrderImportService:
             logger.error(f"Excel parsing error: {str(e)}")
             return []
     
-    def _extract_products_from_dataframe(self, df, sheet_images=None):
-        """Extract product data from a pandas DataFrame"""
-        products = []
+    def _parse_xls(self, file_path):
+        """Parse a legacy .xls workbook sheet by sheet with pandas"""
+        excel_file = pd.ExcelFile(file_path)
+        all_products = []
+        self.progress.set_totals(total_sheets=len(excel_file.sheet_names))
+        
+        for sheet_name in excel_file.sheet_names:
+            try:
+                df = excel_file.parse(sheet_name)
+                self.progress.start_sheet(sheet_name, len(df))
+                if not df.empty:
+                    all_products.extend(self._extract_products_from_dataframe(df))
+            except Exception as e:
+                logger.error(f"Error processing sheet '{sheet_name}': {str(e)}")
+            self.progress.finish_sheet()
         
+        return all_products
+    
+    def _extract_products_from_dataframe(self, df):
+        """Extract product data from a pandas DataFrame (CSV and .xls files)"""
         # Clean column names
         df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+        return self._extract_products_from_rows(iter_dataframe_rows(df), df.columns)
+    
+    def _extract_products_from_rows(self, rows, columns, sheet_name=''):
+        """Extract product data from (row_number, row, images) tuples"""
+        products = []
         
         # Map common column variations
         column_mapping = {
@@ -211,13 +310,14 @@ class OrderImportService:
         # Normalize columns
         normalized_columns = {}
         for standard_name, variations in column_mapping.items():
-            for col in df.columns:
+            for col in columns:
                 if col in variations:
                     normalized_columns[col] = standard_name
                     break
         
         # Process each row
-        for index, row in df.iterrows():
+        for excel_row, row, images in rows:
+            self.progress.advance()
             try:
                 # Skip empty rows
                 if not self._is_row_meaningful(row):
@@ -227,15 +327,15 @@ class OrderImportService:
                 product_data = self._extract_product_data(row, normalized_columns)
                 
                 # Add image from Excel if available
-                if sheet_images:
-                    excel_row = index + 2  # +2 because Excel has header row and is 1-based
-                    if excel_row in sheet_images:
-                        product_data['product_image'] = sheet_images[excel_row]
+                if images:
+                    stored = self._store_row_image(images, sheet_name)
+                    if stored:
+                        product_data['product_image'] = stored.url
                 
                 products.append(product_data)
                 
             except Exception as e:
-                logger.error(f"Error processing row {index + 2}: {str(e)}")
+                logger.error(f"Error processing row {excel_row}: {str(e)}")
                 continue
         
         return products
@@ -304,7 +404,7 @@ class OrderImportService:
     def _get_value(self, row, column_mapping, field_name, default=''):
         """Get value from row using column mapping"""
         for col_name, mapped_name in column_mapping.items():
-            if mapped_name == field_name and col_name in row.index:
+            if mapped_name == field_name and col_name in row:
                 value = row[col_name]
                 if pd.isna(value):
                     return default
@@ -320,9 +420,8 @@ class OrderImportService:
             'quantity', 'qty',
         ]
         
-        row_dict = row.to_dict()
-        
-        for key, value in row_dict.items():
+        # Rows are pandas Series (CSV/.xls) or dicts (streamed .xlsx)
+        for key, value in row.items():
             if pd.notna(value) and str(value).strip():
                 col_name = str(key).lower().strip().replace(' ', '_')
                 
@@ -335,85 +434,13 @@ class OrderImportService:
         
         return False
     
-    def _extract_excel_images_with_openpyxl(self, file_path, apartment):
-        """Extract images from Excel file using openpyxl"""
+    def _store_row_image(self, images, sheet_name):
+        """Store the image anchored on a row (the last one wins, as before); returns a StoredImage"""
         try:
-            from django.conf import settings
-            
-            wb = load_workbook(file_path, data_only=False)
-            row_image_map = {}
-            
-            for sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
-                sheet_images = {}
-                
-                if hasattr(ws, '_images') and ws._images:
-                    logger.info(f"Found {len(ws._images)} images in sheet '{sheet_name}'")
-                    
-                    for i, img in enumerate(ws._images):
-                        try:
-                            row_num = img.anchor._from.row + 1
-                            
-                            if not hasattr(img, '_data'):
-                                continue
-                            
-                            img_data = img._data()
-                            if not img_data:
-                                continue
-                            
-                            # Determine image extension
-                            if hasattr(img, 'format') and img.format:
-                                extension = f".{img.format.lower()}"
-                            else:
-                                if img_data.startswith(b'\x89PNG'):
-                                    extension = '.png'
-                                elif img_data.startswith(b'\xff\xd8'):
-                                    extension = '.jpg'
-                                elif img_data.startswith(b'GIF'):
-                                    extension = '.gif'
-                                else:
-                                    extension = '.png'
-                            
-                            # Create media folder structure
-                            folder_path = os.path.join(
-                                settings.MEDIA_ROOT,
-                                'order_products',
-                                str(apartment.id),
-                                sheet_name.replace(' ', '_').lower()
-                            )
-                            os.makedirs(folder_path, exist_ok=True)
-                            
-                            # Generate unique filename
-                            img_name = f"row_{row_num}_img_{i+1}_{uuid.uuid4().hex[:8]}{extension}"
-                            img_path = os.path.join(folder_path, img_name)
-                            
-                            # Save image data
-                            with open(img_path, 'wb') as f:
-                                f.write(img_data)
-                            
-                            # Store relative path for database
-                            relative_path = os.path.join(
-                                'order_products',
-                                str(apartment.id),
-                                sheet_name.replace(' ', '_').lower(),
-                                img_name
-                            ).replace('\\', '/')
-                            
-                            sheet_images[row_num] = f"/media/{relative_path}"
-                            logger.info(f"✅ Extracted image for row {row_num}: {relative_path}")
-                            
-                        except Exception as e:
-                            logger.error(f"❌ Error processing image {i+1} in sheet '{sheet_name}': {str(e)}")
-                            continue
-                
-                if sheet_images:
-                    row_image_map[sheet_name] = sheet_images
-            
-            return row_image_map
-            
+            return self.images.ingest_bytes(images[-1].read())
         except Exception as e:
-            logger.error(f"Error extracting images with openpyxl: {str(e)}")
-            return {}
+            logger.error(f"❌ Error processing image {images[-1].index} in sheet '{sheet_name}': {str(e)}")
+            return None
     
     def _create_order_with_items(self, apartment, vendor, products_data, order_data, user):
         """Create order and order items in a transaction"""
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Order, OrderItem
 from products.models import Product
+from products.resolver import get_resolver
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -74,42 +75,11 @@ class OrderItemSerializer(serializers.ModelSerializer):
             if image:
                 return image
         
-        # If no linked product, try to find product by SKU first (more reliable)
-        if obj.sku:
-            try:
-                matched_product = Product.objects.filter(sku__iexact=obj.sku).first()
-                if matched_product:
-                    image = self._get_image_from_product(matched_product)
-                    if image:
-                        return image
-            except Exception:
-                pass
-        
-        # Try to find product by name match
-        if obj.product_name:
-            try:
-                # Try exact match first
-                matched_product = Product.objects.filter(product__iexact=obj.product_name).first()
-                if matched_product:
-                    image = self._get_image_from_product(matched_product)
-                    if image:
-                        return image
-                
-                # Try contains match - check if product name contains the order item name
-                matched_product = Product.objects.filter(product__icontains=obj.product_name).first()
-                if matched_product:
-                    image = self._get_image_from_product(matched_product)
-                    if image:
-                        return image
-                
-                # Try reverse contains - check if order item name contains the product name
-                for product in Product.objects.exclude(product_image='').exclude(image_url='')[:100]:
-                    if product.product and product.product.lower() in obj.product_name.lower():
-                        image = self._get_image_from_product(product)
-                        if image:
-                            return image
-            except Exception:
-                pass
+        # If no linked product, match the SKU, then the name, against the apartment's products
+        if obj.sku or obj.product_name:
+            image = get_resolver(self.context).image(obj.order.apartment_id, sku=obj.sku, name=obj.product_name)
+            if image:
+                return self._get_full_image_url(image)
         
         return None
     
@@ -119,23 +89,9 @@ class OrderItemSerializer(serializers.ModelSerializer):
         if obj.product and obj.product.category:
             return obj.product.category.name
         
-        # If no linked product, try to find product by SKU
-        if obj.sku:
-            try:
-                matched_product = Product.objects.select_related('category').filter(sku__iexact=obj.sku).first()
-                if matched_product and matched_product.category:
-                    return matched_product.category.name
-            except Exception:
-                pass
-        
-        # Try to find product by name match
-        if obj.product_name:
-            try:
-                matched_product = Product.objects.select_related('category').filter(product__iexact=obj.product_name).first()
-                if matched_product and matched_product.category:
-                    return matched_product.category.name
-            except Exception:
-                pass
+        # If no linked product, find the product by SKU, then by name
+        if obj.sku or obj.product_name:
+            return get_resolver(self.context).category(obj.order.apartment_id, sku=obj.sku, name=obj.product_name)
         
         return None
 
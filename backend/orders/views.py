@@ -9,6 +9,7 @@ from config.swagger_utils import add_viewset_tags
 from .models import Order, OrderItem
 from .serializers import OrderSerializer, OrderListSerializer
 from .import_service import OrderImportService
+from products.import_jobs import queued_import_response_data, wants_async_import
 
 
 @add_viewset_tags('Orders', 'Order')
@@ -122,7 +123,9 @@ class OrderViewSet(viewsets.ModelViewSet):
         tags=['Orders'],
         operation_id='import_order',
         summary='Import order from Excel/CSV file',
-        description='Upload an Excel or CSV file to create an order with all products as order items',
+        description='Upload an Excel or CSV file to create an order with all products as order items. '
+                    'Send async=true to run the import in the background (202 with an import session id '
+                    'whose progress is served by /api/products/import_progress/).',
         request={
             'multipart/form-data': {
                 'type': 'object',
@@ -233,9 +236,17 @@ class OrderViewSet(viewsets.ModelViewSet):
             result = import_service.process_import(
                 file=uploaded_file,
                 order_data=order_data,
-                user=request.user
+                user=request.user,
+                run_async=wants_async_import(request)
             )
             
+            if result.get('queued'):
+                return Response({
+                    'message': 'Order import queued',
+                    'order_created': False,
+                    **queued_import_response_data(request, result['session_id'])
+                }, status=status.HTTP_202_ACCEPTED)
+            
             if result['success']:
                 return Response({
                     'message': result['message'],
@@ -0,0 +1,273 @@
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Product, ProductStatusRollup
+from .tags import TAG_FIELDS, sync_product_tags
+
+logger = logging.getLogger(__name__)
+
+
+class ProductBulkWriter:
+    """
+    Bulk-write engine for product imports.
+
+    Preloads an in-memory (sku -> product) / (product name -> product) index for
+    one apartment, collects rows into create/update sets and flushes them with
+    bulk_create/bulk_update. bulk_* bypasses post_save, so Activity and
+    Notification side effects (and the status rollup and tag rows of new
+    products) are emitted once per flushed batch instead.
+    """
+
+    # Fields written back for rows that match an existing product
+    IMPORT_META_FIELDS = ['import_session', 'import_row_number', 'import_data', 'product_image', 'thumbnail_url', 'updated_at']
+
+    def __init__(self, apartment, import_session, user=None, vendor=None, batch_size=None):
+        self.apartment = apartment
+        self.import_session = import_session
+        self.user = user
+        self.vendor = vendor
+        self.batch_size = batch_size or getattr(settings, 'PRODUCT_IMPORT_BATCH_SIZE', 500)
+
+        self.by_sku = {}
+        self.by_name = {}
+        self.pending_creates = []
+        self.pending_updates = {}
+        self.pending_images = []
+        self.update_fields = set(self.IMPORT_META_FIELDS)
+        if vendor:
+            self.update_fields.add('vendor')
+
+        self.created_count = 0
+        self.updated_count = 0
+        self._build_index()
+
+    def _build_index(self):
+        """Load the apartment's products once, newest first (matches filter().first())"""
+        # thumbnail_url is written back for every matched row; loading it here avoids a deferred-field query per product
+        products = Product.objects.filter(apartment=self.apartment).only(
+            'id', 'apartment_id', 'sku', 'product', 'created_at', 'thumbnail_url'
+        )
+        for product in products:
+            product.apartment = self.apartment
+            self._index(product)
+        logger.info(f"Indexed {len(self.by_name)} product names / {len(self.by_sku)} SKUs for apartment {self.apartment.id}")
+
+    def _index(self, product):
+        if product.sku:
+            self.by_sku.setdefault(product.sku, product)
+        if product.product:
+            self.by_name.setdefault(product.product, product)
+
+    def _unindex(self, product):
+        if self.by_sku.get(product.sku) is product:
+            del self.by_sku[product.sku]
+        if self.by_name.get(product.product) is product:
+            del self.by_name[product.product]
+
+    def find(self, product_data):
+        """Find an existing (or pending) product by SKU, then by product name"""
+        existing = None
+        if product_data.get('sku'):
+            existing = self.by_sku.get(product_data['sku'])
+        if not existing and product_data.get('product'):
+            existing = self.by_name.get(product_data['product'])
+        return existing
+
+    def add_row(self, product_data, category, row_number, import_data):
+        """
+        Stage one spreadsheet row. Returns the (unsaved or pending) Product
+        so callers can attach images before the batch is flushed.
+        """
+        product = self.find(product_data)
+
+        if product is not None:
+            # The row may change the SKU / name: re-key the product so later rows find it by the new ones
+            self._unindex(product)
+            for key, value in product_data.items():
+                setattr(product, key, value)
+            self._index(product)
+            if self.vendor:
+                product.vendor = self.vendor
+            product.import_session = self.import_session
+            product.import_row_number = row_number
+            product.import_data = import_data
+            self.update_fields.update(product_data.keys())
+
+            # Products created earlier in this import and not flushed yet stay in the create set
+            if not product._state.adding:
+                self.pending_updates[product.pk] = product
+        else:
+            product = Product(
+                apartment=self.apartment,
+                category=category,
+                vendor=self.vendor,
+                import_session=self.import_session,
+                import_row_number=row_number,
+                import_data=import_data,
+                created_by=self.user.username if self.user else 'system',
+                **product_data
+            )
+            self.pending_creates.append(product)
+            self._index(product)
+
+        return product
+
+    def defer_image(self, product, pending_image):
+        """Attach a remote image that is still downloading; it is applied before the product is written"""
+        self.pending_images.append((product, pending_image))
+
+    def _apply_pending_images(self):
+        pending, self.pending_images = self.pending_images, []
+        for product, pending_image in pending:
+            stored = pending_image.result()
+            if stored:
+                product.product_image = stored.url
+                product.thumbnail_url = stored.thumbnail_url
+
+    def flush_if_full(self):
+        """Flush pending rows once either set reaches the batch size"""
+        if len(self.pending_creates) >= self.batch_size or len(self.pending_updates) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """
+        Write all pending creates and updates.
+        Returns a list of (row_number, error message) for rows that could not be saved.
+        """
+        failures = []
+        self._apply_pending_images()
+
+        creates, self.pending_creates = self.pending_creates, []
+        updates, self.pending_updates = list(self.pending_updates.values()), {}
+
+        for start in range(0, len(creates), self.batch_size):
+            batch = creates[start:start + self.batch_size]
+            saved = self._write_batch(batch, failures, created=True)
+            if saved:
+                self.created_count += len(saved)
+                # New products have no orders, payments or issues yet: default rollups are exact
+                ProductStatusRollup.objects.bulk_create(
+                    [ProductStatusRollup(product=product) for product in saved], ignore_conflicts=True
+                )
+                sync_product_tags(saved, created=True)
+                self._emit_batch_events(saved, created=True)
+
+        for start in range(0, len(updates), self.batch_size):
+            batch = updates[start:start + self.batch_size]
+            saved = self._write_batch(batch, failures, created=False)
+            if saved:
+                self.updated_count += len(saved)
+                if self.update_fields & set(TAG_FIELDS.values()):
+                    sync_product_tags(saved)
+                self._emit_batch_events(saved, created=False)
+
+        return failures
+
+    def _write_batch(self, batch, failures, created):
+        """
+        Write one batch in a single statement. If the batch is rejected, fall
+        back to per-row saves so only the offending rows are reported as failed.
+        """
+        now = timezone.now()
+        for product in batch:
+            product.updated_at = now
+
+        try:
+            with transaction.atomic():
+                if created:
+                    Product.objects.bulk_create(batch, batch_size=self.batch_size)
+                else:
+                    self._bulk_update(batch)
+            return batch
+        except Exception as e:
+            logger.warning(f"Bulk {'create' if created else 'update'} of {len(batch)} products failed, retrying row by row: {str(e)}")
+
+        saved = []
+        for product in batch:
+            try:
+                with transaction.atomic():
+                    if created:
+                        Product.objects.bulk_create([product])
+                    else:
+                        self._bulk_update([product])
+                saved.append(product)
+            except Exception as e:
+                if created:
+                    self._unindex(product)
+                failures.append((product.import_row_number, str(e)))
+        return saved
+
+    def _bulk_update(self, batch):
+        """
+        bulk_update builds a CASE/WHEN per row and field, which dominates its cost.
+        Columns holding the same value across the whole batch (import session,
+        vendor, timestamps, empty spreadsheet columns) go into one plain UPDATE;
+        only the varying columns go through bulk_update.
+        """
+        uniform = {}
+        varying = []
+        for name in sorted(self.update_fields):
+            attname = Product._meta.get_field(name).attname
+            first = getattr(batch[0], attname)
+            if all(getattr(product, attname) == first for product in batch[1:]):
+                uniform[attname] = first
+            else:
+                varying.append(name)
+
+        if uniform:
+            Product.objects.filter(pk__in=[product.pk for product in batch]).update(**uniform)
+        if varying:
+            Product.objects.bulk_update(batch, varying, batch_size=self.batch_size)
+
+    def _emit_batch_events(self, products, created):
+        """Log one Activity and one admin Notification summarizing a flushed batch"""
+        from activities.models import Activity
+        from notifications.signals import notify_admins
+        from dashboard.cache import schedule_generation_bump
+        from clients.portfolio import schedule_stats_invalidation
+        from .resolver import schedule_index_invalidation
+
+        # bulk_* also bypasses the dashboard cache, client statistics and product index invalidation signals
+        schedule_generation_bump('Product')
+        schedule_stats_invalidation(client_id=self.apartment.client_id)
+        schedule_index_invalidation(self.apartment.id)
+
+        count = len(products)
+        action = 'created' if created else 'updated'
+        file_name = self.import_session.file_name if self.import_session else 'import'
+        title = 'Products imported' if created else 'Products updated'
+        description = f"{count} products {action} in {self.apartment.name} from {file_name}"
+
+        try:
+            Activity.log(
+                activity_type='product',
+                action=action,
+                title=title,
+                description=description,
+                user=self.user,
+                apartment=self.apartment,
+                object_id=str(self.import_session.id) if self.import_session else '',
+                object_type='ImportSession',
+                metadata={
+                    'model': 'Product',
+                    'action': action,
+                    'count': count,
+                    'product_ids': [str(p.id) for p in products],
+                }
+            )
+            if created:
+                notify_admins(
+                    title='Products Imported',
+                    message=f'{count} products have been added to "{self.apartment.name}" from {file_name}.',
+                    notification_type='info',
+                    priority='low',
+                    action_url=f'/apartments/{self.apartment.id}',
+                    action_text='View Products',
+                    related_object_type='ImportSession',
+                    related_object_id=str(self.import_session.id) if self.import_session else ''
+                )
+        except Exception as e:
+            # Don't let logging errors break the import
+            logger.error(f"Error emitting import batch events: {str(e)}")
@@ -80,12 +80,28 @@ class ImportSession(models.Model):
         help_text="Uploaded Excel/CSV file stored on server"
     )
     
+    # Job Information
+    IMPORT_TYPE_CHOICES = [
+        ('products', 'Products'),
+        ('order', 'Order'),
+    ]
+    import_type = models.CharField(max_length=20, choices=IMPORT_TYPE_CHOICES, default='products')
+    job_params = models.JSONField(default=dict, blank=True, help_text="Parameters the background import job runs with")
+    result = models.JSONField(default=dict, blank=True, help_text="Final result payload of the import job")
+    
     # Import Results
     total_sheets = models.IntegerField(default=0)
     total_products = models.IntegerField(default=0)
     successful_imports = models.IntegerField(default=0)
     failed_imports = models.IntegerField(default=0)
     
+    # Progress (updated while the import job runs)
+    processed_sheets = models.IntegerField(default=0)
+    current_sheet = models.CharField(max_length=255, blank=True)
+    total_rows = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(default=0)
+    progress_updated_at = models.DateTimeField(null=True, blank=True)
+    
     # Status
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -107,3 +123,38 @@ class ImportSession(models.Model):
     
     def __str__(self):
         return f"Import {self.file_name} - {self.apartment.name}"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+    
+    @property
+    def progress_percent(self):
+        """Row-based progress, 100 once the job has finished"""
+        if self.is_finished:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.processed_rows * 100 / self.total_rows))
+
+
+class ProductImageSource(models.Model):
+    """
+    Remote image URL already ingested by an import, mapped to the
+    content-addressed file its bytes were stored under.
+    Lets re-imports reuse the stored image without downloading it again.
+    """
+    url = models.TextField()
+    url_hash = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the URL")
+    sha256 = models.CharField(max_length=64, db_index=True, help_text="SHA-256 of the image bytes")
+    file_path = models.CharField(max_length=255, help_text="Storage name of the image file")
+    thumbnail_path = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.url} -> {self.file_path}"
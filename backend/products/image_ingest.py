@@ -0,0 +1,412 @@
+"""
+Image ingestion for spreadsheet imports.
+
+Every image (embedded in a workbook or fetched from a URL) is stored once,
+under a path derived from the SHA-256 of its bytes, so re-importing the same
+pictures writes no new files. Remote URLs are fetched concurrently on a
+bounded thread pool that shares one pooled HTTP session, and URLs that were
+ingested before are answered from ProductImageSource without network I/O.
+Thumbnails are rendered on a background pool, off the request path; until
+one exists, thumbnail_url is the image itself. ImageIngestor.close() does
+not wait for them: once the last render of an import finishes, the pool
+points that import's products at their thumbnails.
+
+Pool threads download, hash and write files; the only database access off
+the importing thread is that thumbnail update.
+"""
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Case, Value, When
+
+logger = logging.getLogger(__name__)
+
+IMAGE_ROOT = 'product_images'
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
+# Images per UPDATE when switching an import's products to rendered thumbnails
+THUMBNAIL_UPDATE_BATCH = 500
+
+_pool_lock = threading.Lock()
+_store_lock = threading.Lock()
+_fetch_executor = None
+_thumbnail_executor = None
+_http_session = None
+# sha256 -> Future of a thumbnail being rendered, shared by every import that needs it
+_renders = {}
+
+
+def _get_fetch_executor():
+    """Process-wide pool and pooled HTTP session for image downloads"""
+    global _fetch_executor, _http_session
+    with _pool_lock:
+        if _fetch_executor is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            workers = getattr(settings, 'IMPORT_IMAGE_FETCH_WORKERS', 8)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_session = session
+            _fetch_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-image-fetch')
+        return _fetch_executor
+
+
+def _get_thumbnail_executor():
+    global _thumbnail_executor
+    with _pool_lock:
+        if _thumbnail_executor is None:
+            _thumbnail_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='import-thumbnail')
+        return _thumbnail_executor
+
+
+def image_path(sha256, extension):
+    return f"{IMAGE_ROOT}/{sha256[:2]}/{sha256}{extension}"
+
+
+def thumbnail_path(sha256):
+    return f"{IMAGE_ROOT}/thumbs/{sha256[:2]}/{sha256}.jpg"
+
+
+def detect_extension(data, default='.png'):
+    """Guess an image extension from its magic bytes"""
+    if data.startswith(b'\x89PNG'):
+        return '.png'
+    if data.startswith(b'\xff\xd8'):
+        return '.jpg'
+    if data.startswith(b'GIF'):
+        return '.gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return '.webp'
+    if data.startswith(b'BM'):
+        return '.bmp'
+    return default
+
+
+class StoredImage:
+    """Where an ingested image lives, as stored on products"""
+
+    def __init__(self, sha256, file_path, thumbnail='', content_type='', size=0, thumbnail_render=None):
+        self.sha256 = sha256
+        self.file_path = file_path
+        self.thumbnail_path = thumbnail
+        self.content_type = content_type
+        self.size = size
+        # Future of a thumbnail still being rendered (True once its file is written)
+        self.thumbnail_render = thumbnail_render
+
+    @property
+    def url(self):
+        return default_storage.url(self.file_path)
+
+    @property
+    def thumbnail_url(self):
+        """The thumbnail once its file exists, else the image itself"""
+        return default_storage.url(self.thumbnail_path) if self.thumbnail_path else self.url
+
+
+def store_image_bytes(data, extension=None, content_type=''):
+    """
+    Store image bytes under their content address and schedule a thumbnail.
+    Existing files are left untouched, so identical images are written once.
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    extension = (extension or detect_extension(data)).lower()
+    if extension == '.jpeg':
+        extension = '.jpg'
+    name = image_path(sha256, extension)
+
+    # The lock keeps two threads storing the same new image from racing into
+    # get_available_name() and saving a renamed copy
+    with _store_lock:
+        if not default_storage.exists(name):
+            default_storage.save(name, ContentFile(data))
+
+    thumbnail, render = _schedule_thumbnail(sha256, data)
+    return StoredImage(sha256, name, thumbnail, content_type, len(data), thumbnail_render=render)
+
+
+def _schedule_thumbnail(sha256, data):
+    """
+    (thumbnail path, None) if the thumbnail exists, ('', future) while it
+    renders, ('', None) if the image cannot be decoded
+    """
+    name = thumbnail_path(sha256)
+    if default_storage.exists(name):
+        return name, None
+    render = _pending_render(sha256)
+    if render is not None:
+        return '', render
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()  # Header check only; decoding happens in the background
+    except Exception:
+        return '', None
+    render = _get_thumbnail_executor().submit(_render_thumbnail, name, data)
+    with _pool_lock:
+        _renders[sha256] = render
+    render.add_done_callback(lambda future: _renders.pop(sha256, None))
+    return '', render
+
+
+def _pending_render(sha256):
+    with _pool_lock:
+        return _renders.get(sha256)
+
+
+def _render_thumbnail(name, data):
+    """Write a thumbnail file; returns False if rendering failed"""
+    try:
+        from PIL import Image
+        size = getattr(settings, 'IMPORT_THUMBNAIL_SIZE', 300)
+        with Image.open(io.BytesIO(data)) as img:
+            img.thumbnail((size, size))
+            buffer = io.BytesIO()
+            img.convert('RGB').save(buffer, 'JPEG', quality=80)
+        with _store_lock:
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+        return True
+    except Exception as e:
+        logger.error(f"Failed to render thumbnail {name}: {str(e)}")
+        return False
+
+
+def _fetch_image(url, timeout):
+    """Download and store one remote image (runs on the fetch pool)"""
+    try:
+        response = _http_session.get(url, timeout=timeout)
+        response.raise_for_status()
+    except Exception as e:
+        logger.error(f"Failed to download image from {url}: {str(e)}")
+        return None
+
+    # Check if it's actually an image
+    content_type = response.headers.get('content-type', '').split(';')[0].strip()
+    if not content_type.startswith('image/'):
+        logger.warning(f"URL {url} does not return an image (content-type: {content_type})")
+        return None
+
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    if extension not in IMAGE_EXTENSIONS:
+        extension = mimetypes.guess_extension(content_type) or detect_extension(response.content, '.jpg')
+
+    try:
+        return store_image_bytes(response.content, extension, content_type)
+    except Exception as e:
+        logger.error(f"Error storing image from {url}: {str(e)}")
+        return None
+
+
+class PendingImage:
+    """Handle for a remote image requested from an ImageIngestor"""
+
+    def __init__(self, ingestor, url):
+        self.ingestor = ingestor
+        self.url = url
+        self.url_hash = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        self.future = None
+        self.stored = None
+        self.resolved = False
+
+    def result(self):
+        """The StoredImage, or None if the URL could not be ingested (blocks until fetched)"""
+        return self.ingestor._resolve(self)
+
+
+class ImageIngestor:
+    """
+    Per-import front end of the image pipeline.
+
+    Remote URLs are looked up in ProductImageSource in batches of
+    `lookup_batch_size` and only unknown URLs are handed to the fetch pool,
+    so downloads overlap with parsing the rest of the sheet.
+    """
+
+    def __init__(self, lookup_batch_size=50, timeout=None):
+        self.lookup_batch_size = lookup_batch_size
+        self.timeout = timeout or getattr(settings, 'IMPORT_IMAGE_FETCH_TIMEOUT', 30)
+        self._requests = {}
+        self._undispatched = []
+        self._new_sources = []
+        self._rendering = {}
+        self.stored_count = 0
+        self.fetched_count = 0
+        self.reused_count = 0
+
+    def ingest_bytes(self, data):
+        """Store an embedded image; returns a StoredImage or None for empty data"""
+        if not data:
+            return None
+        self.stored_count += 1
+        return self._track_thumbnail(store_image_bytes(data))
+
+    def _track_thumbnail(self, stored):
+        if stored is not None and stored.thumbnail_render is not None:
+            self._rendering.setdefault(stored.sha256, []).append(stored)
+        return stored
+
+    def request_url(self, url):
+        """Start ingesting a remote image; returns a PendingImage"""
+        pending = self._requests.get(url)
+        if pending is None:
+            pending = PendingImage(self, url)
+            self._requests[url] = pending
+            self._undispatched.append(pending)
+            if len(self._undispatched) >= self.lookup_batch_size:
+                self._dispatch()
+        return pending
+
+    def _dispatch(self):
+        """Resolve queued URLs seen by earlier imports in one query and fetch the rest"""
+        from .category_models import ProductImageSource
+
+        batch, self._undispatched = self._undispatched, []
+        if not batch:
+            return
+
+        known = {
+            source.url_hash: source
+            for source in ProductImageSource.objects.filter(url_hash__in=[p.url_hash for p in batch])
+        }
+        executor = None
+        for pending in batch:
+            source = known.get(pending.url_hash)
+            if source and default_storage.exists(source.file_path):
+                thumbnail, render = source.thumbnail_path, None
+                if not thumbnail:
+                    # Recorded while its thumbnail was still rendering
+                    if default_storage.exists(thumbnail_path(source.sha256)):
+                        thumbnail = thumbnail_path(source.sha256)
+                    else:
+                        render = _pending_render(source.sha256)
+                pending.stored = self._track_thumbnail(StoredImage(
+                    source.sha256, source.file_path, thumbnail, source.content_type, source.size,
+                    thumbnail_render=render,
+                ))
+                pending.resolved = True
+                self.reused_count += 1
+            else:
+                executor = executor or _get_fetch_executor()
+                pending.future = executor.submit(_fetch_image, pending.url, self.timeout)
+
+    def _resolve(self, pending):
+        if pending.resolved:
+            return pending.stored
+        if pending.future is None:
+            self._dispatch()
+            if pending.resolved:
+                return pending.stored
+
+        pending.stored = self._track_thumbnail(pending.future.result())
+        pending.resolved = True
+        if pending.stored:
+            self.fetched_count += 1
+            self._new_sources.append(pending)
+        return pending.stored
+
+    def close(self, import_session=None):
+        """
+        Record newly fetched URLs so later imports can skip the download, and
+        have the products of `import_session` switched to their thumbnails
+        once those are rendered
+        """
+        from .category_models import ProductImageSource
+
+        # Make sure every requested URL has finished and been accounted for
+        for pending in list(self._requests.values()):
+            pending.result()
+
+        sources, self._new_sources = self._new_sources, []
+        if sources:
+            ProductImageSource.objects.bulk_create([
+                ProductImageSource(
+                    url=pending.url,
+                    url_hash=pending.url_hash,
+                    sha256=pending.stored.sha256,
+                    file_path=pending.stored.file_path,
+                    thumbnail_path=pending.stored.thumbnail_path,
+                    content_type=pending.stored.content_type,
+                    size=pending.stored.size,
+                )
+                for pending in sources
+            ], ignore_conflicts=True)
+
+        rendering, self._rendering = self._rendering, {}
+        if rendering and import_session is not None:
+            update = ThumbnailUpdate(import_session.id, rendering)
+            # The products must be committed before the pool can update them
+            transaction.on_commit(update.start)
+        logger.info(
+            f"Image ingestion: {self.stored_count} embedded, {self.fetched_count} downloaded, "
+            f"{self.reused_count} reused from earlier imports, {len(rendering)} thumbnails rendering"
+        )
+
+
+class ThumbnailUpdate:
+    """
+    Switches the products of one import from the full image to its thumbnail
+    after the last pending render of that import has finished. Failed renders
+    keep the image itself as thumbnail.
+    """
+
+    def __init__(self, import_session_id, rendering):
+        self.import_session_id = import_session_id
+        # sha256 -> StoredImages whose thumbnail was still rendering
+        self.rendering = rendering
+        self._lock = threading.Lock()
+        self._outstanding = sum(len(images) for images in rendering.values())
+
+    def start(self):
+        for images in self.rendering.values():
+            for stored in images:
+                stored.thumbnail_render.add_done_callback(self._render_done)
+
+    def _render_done(self, future):
+        with self._lock:
+            self._outstanding -= 1
+            if self._outstanding:
+                return
+        # Callbacks may run on the importing thread; the update never does
+        _get_thumbnail_executor().submit(self.apply)
+
+    def apply(self):
+        from .category_models import ProductImageSource
+        from .models import Product
+
+        # Images with the same content share the thumbnail
+        rendered = [
+            images[0] for images in self.rendering.values()
+            if any(stored.thumbnail_render.result() for stored in images)
+        ]
+        try:
+            for start in range(0, len(rendered), THUMBNAIL_UPDATE_BATCH):
+                batch = rendered[start:start + THUMBNAIL_UPDATE_BATCH]
+                for stored in batch:
+                    stored.thumbnail_path = thumbnail_path(stored.sha256)
+                Product.objects.filter(
+                    import_session_id=self.import_session_id,
+                    thumbnail_url__in=[stored.url for stored in batch],
+                ).update(thumbnail_url=Case(
+                    *[When(thumbnail_url=stored.url, then=Value(stored.thumbnail_url)) for stored in batch]
+                ))
+                ProductImageSource.objects.filter(
+                    sha256__in=[stored.sha256 for stored in batch], thumbnail_path='',
+                ).update(thumbnail_path=Case(
+                    *[When(sha256=stored.sha256, then=Value(stored.thumbnail_path)) for stored in batch]
+                ))
+        except Exception as e:
+            logger.error(f"Failed to apply thumbnails of import {self.import_session_id}: {str(e)}")
+        finally:
+            connection.close()
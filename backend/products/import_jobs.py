@@ -0,0 +1,416 @@
+"""
+Background execution of product and order imports.
+
+An upload is stored on an ImportSession and handed to the configured job
+backend, which runs run_import_job(session_id) outside the request/response
+cycle. While it runs, the import services write progress counters back onto
+the session so clients can poll or stream them.
+
+Models are imported inside functions: with the spawn start method this module
+is imported by worker processes before Django is set up.
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import partial
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class ImportProgress:
+    """
+    Throttled writer for ImportSession progress counters.
+    Counters are kept in memory and written with a single UPDATE at most once
+    per `min_interval` seconds (and always at sheet boundaries).
+    A progress object without a session is a no-op.
+    """
+
+    def __init__(self, import_session=None, min_interval=0.5):
+        self.import_session = import_session
+        self.min_interval = min_interval
+        self.total_sheets = 0
+        self.processed_sheets = 0
+        self.current_sheet = ''
+        self.total_rows = 0
+        self.processed_rows = 0
+        self._total_rows_known = False
+        self._last_flush = 0
+
+    def set_totals(self, total_rows=None, total_sheets=None):
+        """Record totals when they are known up front"""
+        if total_rows:
+            self.total_rows = total_rows
+            self._total_rows_known = True
+        if total_sheets is not None:
+            self.total_sheets = total_sheets
+        self.flush(force=True)
+
+    def start_sheet(self, sheet_name, rows):
+        self.current_sheet = sheet_name
+        if not self._total_rows_known:
+            self.total_rows += rows
+        self.flush(force=True)
+
+    def advance(self, rows=1):
+        self.processed_rows += rows
+        self.flush()
+
+    def finish_sheet(self):
+        self.processed_sheets += 1
+        self.flush(force=True)
+
+    def flush(self, force=False):
+        if self.import_session is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.min_interval:
+            return
+        self._last_flush = now
+
+        from .category_models import ImportSession
+        fields = {
+            'processed_sheets': self.processed_sheets,
+            'current_sheet': self.current_sheet[:255],
+            'total_rows': max(self.total_rows, self.processed_rows),
+            'processed_rows': self.processed_rows,
+            'progress_updated_at': timezone.now(),
+        }
+        if self.total_sheets:
+            fields['total_sheets'] = self.total_sheets
+        try:
+            ImportSession.objects.filter(pk=self.import_session.pk).update(**fields)
+        except Exception as e:
+            # Progress reporting must never break the import itself
+            logger.warning(f"Could not update progress for import {self.import_session.pk}: {str(e)}")
+
+
+class JobHeartbeat:
+    """
+    Context manager touching the session's progress_updated_at every
+    IMPORT_JOB_HEARTBEAT_INTERVAL seconds while a job runs, so a job whose
+    process died can be told from one that is slow between progress updates.
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _beat(self):
+        from .category_models import ImportSession
+
+        interval = getattr(settings, 'IMPORT_JOB_HEARTBEAT_INTERVAL', 30)
+        try:
+            while not self._stop.wait(interval):
+                try:
+                    ImportSession.objects.filter(pk=self.session_id, status='processing').update(
+                        progress_updated_at=timezone.now()
+                    )
+                except Exception as e:
+                    logger.warning(f"Heartbeat of import {self.session_id} failed: {str(e)}")
+        finally:
+            connection.close()  # This thread's connection
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._beat, name='import-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def claim_import(session_id):
+    """Move a pending session to processing; False if another worker claimed it first"""
+    from .category_models import ImportSession
+
+    return ImportSession.objects.filter(pk=session_id, status='pending').update(
+        status='processing', progress_updated_at=timezone.now()
+    ) == 1
+
+
+def run_import_job(session_id):
+    """
+    Execute the import stored on an ImportSession.
+    This is the unit of work every job backend runs.
+    """
+    from .category_models import ImportSession
+
+    close_old_connections()
+    try:
+        # A re-queued session may be submitted twice; only one submission runs it
+        if not claim_import(session_id):
+            logger.info(f"Import {session_id} was already claimed, skipping")
+            return False
+        with JobHeartbeat(session_id):
+            import_session = ImportSession.objects.select_related('apartment').get(pk=session_id)
+            if import_session.import_type == 'order':
+                from orders.import_service import OrderImportService
+                result = OrderImportService().process_session(import_session)
+            else:
+                from .import_service import ProductImportService
+                result = ProductImportService().process_session(import_session)
+        return result.get('success', False)
+    finally:
+        close_old_connections()
+
+
+def _stale_before():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'IMPORT_JOB_STALE_AFTER', 300))
+
+
+def is_stale(import_session):
+    """Whether an unfinished session has not reported progress or a heartbeat for IMPORT_JOB_STALE_AFTER seconds"""
+    if import_session.is_finished:
+        return False
+    last_seen = import_session.progress_updated_at or import_session.started_at
+    return last_seen < _stale_before()
+
+
+def reap_stale_imports(session_ids=None):
+    """
+    Recover sessions whose job stopped reporting, e.g. because the web
+    process holding the job pool was recycled. Stale 'processing' sessions
+    are marked failed: their job died part way. Stale 'pending' sessions were
+    never picked up and are submitted again. Returns (failed, requeued).
+    """
+    from .category_models import ImportSession
+
+    stale_before = _stale_before()
+    sessions = ImportSession.objects.all()
+    if session_ids is not None:
+        sessions = sessions.filter(pk__in=list(session_ids))
+    stale = Q(progress_updated_at__lt=stale_before) | Q(progress_updated_at__isnull=True, started_at__lt=stale_before)
+
+    failed = sessions.filter(stale, status='processing').update(
+        status='failed',
+        error_log=['The import job stopped responding (its worker process exited); please upload the file again'],
+        completed_at=timezone.now(),
+    )
+    requeued = 0
+    for session_id in sessions.filter(stale, status='pending').values_list('pk', flat=True):
+        # Touch the session first, so concurrent reapers submit it only once per stale period
+        touched = ImportSession.objects.filter(stale, pk=session_id, status='pending').update(
+            progress_updated_at=timezone.now()
+        )
+        if touched:
+            logger.warning(f"Re-queueing import {session_id}: no worker picked it up")
+            get_import_job_backend().submit(str(session_id))
+            requeued += 1
+    if failed:
+        logger.warning(f"Marked {failed} stale import sessions as failed")
+    return failed, requeued
+
+
+def refresh_if_stale(import_session):
+    """Reap the session if it went stale and return its current state (used when clients read progress)"""
+    if is_stale(import_session):
+        reap_stale_imports([import_session.pk])
+        import_session.refresh_from_db()
+    return import_session
+
+
+def mark_import_failed(session_id, error):
+    """Mark a session failed when its job could not run to completion"""
+    from .category_models import ImportSession
+
+    try:
+        ImportSession.objects.filter(pk=session_id).exclude(status='completed').update(
+            status='failed',
+            error_log=[str(error)],
+            completed_at=timezone.now(),
+        )
+    finally:
+        close_old_connections()
+
+
+class SyncImportJobBackend:
+    """Runs the job inline. Useful for development, tests and management commands."""
+
+    def submit(self, session_id):
+        try:
+            run_import_job(session_id)
+        except Exception as e:
+            logger.error(f"Import job {session_id} failed: {str(e)}", exc_info=True)
+            mark_import_failed(session_id, e)
+
+
+class ThreadImportJobBackend:
+    """Runs each job on a daemon thread of the current process."""
+
+    def submit(self, session_id):
+        threading.Thread(
+            target=SyncImportJobBackend().submit, args=(session_id,), daemon=True
+        ).start()
+
+
+def _init_worker():
+    """Initializer for spawned worker processes"""
+    import django
+    django.setup()
+
+
+def _job_done(session_id, future):
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Import job {session_id} crashed: {str(error)}")
+        mark_import_failed(session_id, error)
+
+
+class ProcessPoolImportJobBackend:
+    """
+    Runs jobs on a local pool of worker processes, so parsing and image
+    extraction do not compete with request handling for the GIL.
+    No external broker is needed; the pool lives in the web process.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or getattr(settings, 'IMPORT_JOB_WORKERS', 2)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def submit(self, session_id):
+        session_id = str(session_id)
+        try:
+            future = self._get_executor().submit(run_import_job, session_id)
+        except Exception as e:
+            # A broken pool is replaced on the next submit
+            logger.error(f"Could not submit import job {session_id}: {str(e)}")
+            with self._lock:
+                self._executor = None
+            mark_import_failed(session_id, e)
+            return
+        future.add_done_callback(partial(_job_done, session_id))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_import_job_backend():
+    """Return the process-wide job backend configured by IMPORT_JOB_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_path = getattr(
+                settings, 'IMPORT_JOB_BACKEND', 'products.import_jobs.ProcessPoolImportJobBackend'
+            )
+            _backend = import_string(backend_path)()
+        return _backend
+
+
+def enqueue_import(import_session):
+    """Submit an ImportSession to the job backend once it is committed"""
+    session_id = str(import_session.id)
+    transaction.on_commit(lambda: get_import_job_backend().submit(session_id))
+    logger.info(f"Queued {import_session.import_type} import {session_id} ({import_session.file_name})")
+
+
+def import_progress_payload(import_session):
+    """Progress snapshot shared by the polling endpoint and the event stream"""
+    return {
+        'session_id': str(import_session.id),
+        'import_type': import_session.import_type,
+        'status': import_session.status,
+        'file_name': import_session.file_name,
+        'total_sheets': import_session.total_sheets,
+        'processed_sheets': import_session.processed_sheets,
+        'current_sheet': import_session.current_sheet,
+        'total_rows': import_session.total_rows,
+        'processed_rows': import_session.processed_rows,
+        'successful_imports': import_session.successful_imports,
+        'failed_imports': import_session.failed_imports,
+        'progress_percent': import_session.progress_percent,
+        'errors': import_session.error_log if import_session.is_finished else [],
+        'result': import_session.result if import_session.is_finished else {},
+    }
+
+
+def import_progress_stream(session_id, poll_interval=1.0, heartbeat_interval=15.0, timeout=None):
+    """
+    Server-sent-events generator for an import session.
+    Emits a `progress` event whenever the snapshot changes and a final `done`
+    event once the job finishes; comment heartbeats keep proxies from closing
+    the connection.
+
+    The stream holds a WSGI worker, so it closes after
+    IMPORT_PROGRESS_STREAM_TIMEOUT seconds with a `timeout` event; EventSource
+    reconnects by itself after the advertised retry delay and resumes.
+    """
+    from config.sse import sse_event, sse_comment, sse_retry
+    from .category_models import ImportSession
+
+    timeout = timeout or getattr(settings, 'IMPORT_PROGRESS_STREAM_TIMEOUT', 60)
+    started = time.monotonic()
+    last_payload = None
+    last_sent = started
+
+    yield sse_retry(getattr(settings, 'IMPORT_PROGRESS_STREAM_RETRY_MS', 2000))
+    yield sse_comment('connected')
+    while True:
+        import_session = ImportSession.objects.filter(pk=session_id).first()
+        if import_session is None:
+            yield sse_event('error', {'error': 'Import session not found'})
+            return
+        import_session = refresh_if_stale(import_session)
+
+        payload = import_progress_payload(import_session)
+        if payload != last_payload:
+            yield sse_event('progress', payload)
+            last_payload = payload
+            last_sent = time.monotonic()
+
+        if import_session.is_finished:
+            yield sse_event('done', payload)
+            return
+
+        now = time.monotonic()
+        if now - started > timeout:
+            yield sse_event('timeout', {'session_id': str(session_id), 'reconnect': True})
+            return
+        if now - last_sent > heartbeat_interval:
+            yield sse_comment('keep-alive')
+            last_sent = now
+
+        time.sleep(poll_interval)
+
+
+def wants_async_import(request):
+    """Whether an upload request asked for background processing (`async` form/query flag)"""
+    value = request.data.get('async', request.query_params.get('async'))
+    if value is None:
+        return getattr(settings, 'IMPORT_JOBS_ASYNC_DEFAULT', False)
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+def queued_import_response_data(request, session_id):
+    """Response payload for an upload that was handed to the job backend"""
+    from django.urls import reverse
+
+    progress_url = f"{reverse('product-import-progress')}?session_id={session_id}"
+    stream_url = f"{reverse('product-import-progress-stream')}?session_id={session_id}"
+    return {
+        'session_id': session_id,
+        'status': 'pending',
+        'progress_url': request.build_absolute_uri(progress_url),
+        'stream_url': request.build_absolute_uri(stream_url),
+    }
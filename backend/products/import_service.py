@@ -2,30 +2,70 @@ import pandas as pd
 import logging
 import uuid
 import os
-from openpyxl import load_workbook
+import zipfile
 from openpyxl.drawing.image import Image as OpenpyxlImage
 from datetime import datetime
+from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.db import transaction
 from django.utils import timezone
 from .models import Product
 from .category_models import ProductCategory, ImportSession
+from .bulk_import import ProductBulkWriter
+from .import_jobs import ImportProgress, enqueue_import
+from .xlsx_stream import XlsxStreamReader, clean_column_name, iter_dataframe_rows
+from .image_ingest import ImageIngestor
 from apartments.models import Apartment
 from vendors.models import Vendor
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Map common column variations - Updated with all Excel columns
+COLUMN_MAPPING = {
+    'sn': ['s.n', 'sn', 'serial_number', 'number', 'no'],
+    'room': ['room', 'location', 'area'],
+    'product_name': ['product_name', 'product', 'name', 'item', 'item_name', 'product name'],
+    'product_image': ['product_image', 'product image', 'image', 'photo', 'picture', 'image_url', 'photo_url', 'picture_url'],
+    'description': ['description', 'desc', 'details', 'product_description'],
+    'sku': ['sku', 'product_code', 'item_code', 'code'],
+    'quantity': ['quantity', 'qty', 'amount', 'count'],
+    'cost': ['cost', 'price', 'unit_price'],
+    'total_cost': ['total_cost', 'total cost', 'total_price', 'total price'],
+    'link': ['link', 'url', 'vendor_link', 'product_link'],
+    'size': ['size', 'dimensions', 'measurements'],
+    'nm': ['nm', 'square_meter', 'sqm'],
+    'plusz_nm': ['plusz_nm', 'plusz nm', 'plus_nm', 'plus nm', 'extra_nm'],
+    'price_per_nm': ['price/nm', 'price_per_nm', 'price per nm'],
+    'price_per_package': ['price/package', 'price_per_package', 'package_price'],
+    'nm_per_package': ['nm/package', 'nm_per_package', 'nm per package'],
+    'all_package': ['all_package', 'all package', 'total_packages'],
+    'package_need_to_order': ['package_need_to_order', 'package need to order', 'packages_to_order'],
+    'all_price': ['all_price', 'all price', 'total_amount', 'final_price'],
+    'brand': ['brand', 'manufacturer', 'make'],
+    'model': ['model', 'model_number', 'part_number'],
+    'color': ['color', 'colour'],
+    'material': ['material', 'fabric', 'composition'],
+    'weight': ['weight'],
+    'vendor_link': ['vendor_link', 'supplier_link'],
+}
+
 
 class ProductImportService:
     """
     Service to handle Excel/CSV file imports for products
     """
     
-    def __init__(self):
+    def __init__(self, bulk=None, batch_size=None):
         self.supported_formats = ['.xlsx', '.xls', '.csv']
         self.image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
+        # Bulk mode writes products with bulk_create/bulk_update instead of one save() per row
+        self.bulk = getattr(settings, 'PRODUCT_IMPORT_BULK_MODE', True) if bulk is None else bulk
+        self.batch_size = batch_size or getattr(settings, 'PRODUCT_IMPORT_BATCH_SIZE', 500)
+        self._bulk_writer = None
+        self.progress = ImportProgress()
+        self.images = ImageIngestor()
     
     def validate_file(self, file):
         """Validate uploaded file"""
@@ -42,9 +82,11 @@ class ProductImportService:
         
         return errors
     
-    def process_import(self, file, apartment_id, vendor_id=None, user=None):
+    def process_import(self, file, apartment_id, vendor_id=None, user=None, run_async=False):
         """
-        Main method to process file import
+        Main method to process file import.
+        With run_async the upload is stored on a pending ImportSession and handed
+        to the import job backend; the returned dict then only carries the session id.
         """
         try:
             # Validate file
@@ -73,43 +115,102 @@ class ProductImportService:
                 file_size=file.size,
                 file_type=os.path.splitext(file.name)[1].lower().replace('.', ''),
                 uploaded_file=file,  # Save the file permanently
-                status='processing'
+                import_type='products',
+                job_params={
+                    'vendor_id': str(vendor.id) if vendor else None,
+                    'user_id': str(user.pk) if user and user.is_authenticated else None,
+                },
+                status='pending' if run_async else 'processing'
             )
             
             logger.info(f"Saved uploaded file to: {import_session.uploaded_file.path}")
             
-            # Use the saved file path for processing
-            file_path = import_session.uploaded_file.path
+            if run_async:
+                enqueue_import(import_session)
+                return {'success': True, 'queued': True, 'session_id': str(import_session.id)}
             
-            try:
-                # Process file based on type
-                if file.name.lower().endswith('.csv'):
-                    result = self._process_csv(file_path, apartment, import_session, user, vendor)
-                else:
-                    result = self._process_excel_with_images(file_path, apartment, import_session, user, vendor)
-                
-                # Update import session
-                import_session.status = 'completed' if result['success'] else 'failed'
-                import_session.total_products = result.get('total_products', 0)
-                import_session.successful_imports = result.get('successful_imports', 0)
-                import_session.failed_imports = result.get('failed_imports', 0)
-                import_session.completed_at = timezone.now()
-                import_session.error_log = result.get('errors', [])
-                import_session.save()
-                
-                return result
-                
-            except Exception as e:
-                logger.error(f"Error during import processing: {str(e)}")
-                import_session.status = 'failed'
-                import_session.error_log = [str(e)]
-                import_session.save()
-                raise
+            return self._run_session(import_session, apartment, vendor, user)
                     
         except Exception as e:
             logger.error(f"Import error: {str(e)}")
             return {'success': False, 'errors': [str(e)]}
     
+    def process_session(self, import_session):
+        """
+        Run a queued import (called by the import job worker)
+        """
+        try:
+            params = import_session.job_params or {}
+            apartment = import_session.apartment
+            vendor = Vendor.objects.filter(id=params['vendor_id']).first() if params.get('vendor_id') else None
+            user = None
+            if params.get('user_id'):
+                from django.contrib.auth import get_user_model
+                user = get_user_model().objects.filter(pk=params['user_id']).first()
+            
+            import_session.status = 'processing'
+            import_session.save(update_fields=['status'])
+            
+            return self._run_session(import_session, apartment, vendor, user)
+        
+        except Exception as e:
+            logger.error(f"Import job error: {str(e)}")
+            return {'success': False, 'errors': [str(e)]}
+    
+    def _run_session(self, import_session, apartment, vendor, user):
+        """Process the stored upload of an import session and record the outcome on it"""
+        # Use the saved file path for processing
+        file_path = import_session.uploaded_file.path
+        self.progress = ImportProgress(import_session)
+        
+        # Preload the product index once per import for bulk mode
+        if self.bulk:
+            self._bulk_writer = ProductBulkWriter(
+                apartment, import_session, user=user, vendor=vendor, batch_size=self.batch_size
+            )
+        
+        try:
+            # Process file based on type
+            if import_session.file_name.lower().endswith('.csv'):
+                result = self._process_csv(file_path, apartment, import_session, user, vendor)
+            else:
+                result = self._process_excel_with_images(file_path, apartment, import_session, user, vendor)
+            
+            # Wait for outstanding image downloads and remember their URLs for re-imports;
+            # thumbnails are applied in the background once rendered
+            self.images.close(import_session)
+            
+            # Update import session
+            import_session.status = 'completed' if result['success'] else 'failed'
+            import_session.total_products = result.get('total_products', 0)
+            import_session.successful_imports = result.get('successful_imports', 0)
+            import_session.failed_imports = result.get('failed_imports', 0)
+            import_session.completed_at = timezone.now()
+            import_session.error_log = result.get('errors', [])
+            import_session.result = result
+            self._apply_progress(import_session)
+            import_session.save()
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error during import processing: {str(e)}")
+            import_session.status = 'failed'
+            import_session.error_log = [str(e)]
+            import_session.completed_at = timezone.now()
+            self._apply_progress(import_session)
+            import_session.save()
+            raise
+    
+    def _apply_progress(self, import_session):
+        """Copy the in-memory progress counters onto the session before a full save()"""
+        import_session.total_sheets = self.progress.total_sheets or import_session.total_sheets
+        import_session.processed_sheets = self.progress.processed_sheets
+        import_session.current_sheet = self.progress.current_sheet[:255]
+        import_session.total_rows = max(self.progress.total_rows, self.progress.processed_rows)
+        import_session.processed_rows = self.progress.processed_rows
+        import_session.progress_updated_at = timezone.now()
+    
     def _save_temp_file(self, file):
         """Save uploaded file temporarily"""
         temp_dir = '/tmp'
@@ -129,6 +230,8 @@ class ProductImportService:
         """Process CSV file"""
         try:
             df = pd.read_csv(file_path)
+            self.progress.set_totals(total_rows=len(df), total_sheets=1)
+            self.progress.start_sheet('CSV_Import', len(df))
             
             # Create a single category for CSV
             category, created = ProductCategory.objects.get_or_create(
@@ -140,13 +243,15 @@ class ProductImportService:
                 }
             )
             
-            return self._process_dataframe(df, apartment, category, import_session, user, 'CSV_Import', vendor)
+            result = self._process_dataframe(df, apartment, category, import_session, user, 'CSV_Import', vendor)
+            self.progress.finish_sheet()
+            return result
             
         except Exception as e:
             return {'success': False, 'errors': [f"CSV processing error: {str(e)}"]}
     
-    def _process_excel(self, file_path, apartment, import_session, user):
-        """Process Excel file with multiple sheets"""
+    def _process_excel(self, file_path, apartment, import_session, user, vendor=None):
+        """Process Excel file with multiple sheets (legacy .xls workbooks, which cannot be streamed)"""
         try:
             excel_file = pd.ExcelFile(file_path)
             
@@ -156,16 +261,18 @@ class ProductImportService:
             all_errors = []
             
             import_session.total_sheets = len(excel_file.sheet_names)
-            import_session.save()
+            self.progress.set_totals(total_sheets=len(excel_file.sheet_names))
             
             # Process each sheet
             for sheet_name in excel_file.sheet_names:
                 try:
-                    df = pd.read_excel(file_path, sheet_name=sheet_name)
+                    df = excel_file.parse(sheet_name)
+                    self.progress.start_sheet(sheet_name, len(df))
                     
                     # Skip empty sheets
                     if df.empty or len(df) == 0:
                         logger.info(f"Skipping empty sheet: {sheet_name}")
+                        self.progress.finish_sheet()
                         continue
                     
                     # Create category for this sheet
@@ -179,17 +286,19 @@ class ProductImportService:
                     )
                     
                     # Process dataframe
-                    result = self._process_dataframe(df, apartment, category, import_session, user, sheet_name)
+                    result = self._process_dataframe(df, apartment, category, import_session, user, sheet_name, vendor)
                     
                     total_products += result.get('total_products', 0)
                     successful_imports += result.get('successful_imports', 0)
                     failed_imports += result.get('failed_imports', 0)
                     all_errors.extend(result.get('errors', []))
+                    self.progress.finish_sheet()
                     
                 except Exception as e:
                     error_msg = f"Sheet '{sheet_name}' error: {str(e)}"
                     all_errors.append(error_msg)
                     logger.error(error_msg)
+                    self.progress.finish_sheet()
             
             return {
                 'success': len(all_errors) == 0,
@@ -205,52 +314,22 @@ class ProductImportService:
     
     def _process_dataframe(self, df, apartment, category, import_session, user, sheet_name, vendor=None):
         """Process a pandas DataFrame and update products with vendor"""
-        successful_imports = 0
-        failed_imports = 0
-        errors = []
-        
         # Clean column names
         df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
         
-        # Map common column variations - Updated with all Excel columns
-        column_mapping = {
-            'sn': ['s.n', 'sn', 'serial_number', 'number', 'no'],
-            'room': ['room', 'location', 'area'],
-            'product_name': ['product_name', 'product', 'name', 'item', 'item_name', 'product name'],
-            'product_image': ['product_image', 'product image', 'image', 'photo', 'picture', 'image_url', 'photo_url', 'picture_url'],
-            'description': ['description', 'desc', 'details', 'product_description'],
-            'sku': ['sku', 'product_code', 'item_code', 'code'],
-            'quantity': ['quantity', 'qty', 'amount', 'count'],
-            'cost': ['cost', 'price', 'unit_price'],
-            'total_cost': ['total_cost', 'total cost', 'total_price', 'total price'],
-            'link': ['link', 'url', 'vendor_link', 'product_link'],
-            'size': ['size', 'dimensions', 'measurements'],
-            'nm': ['nm', 'square_meter', 'sqm'],
-            'plusz_nm': ['plusz_nm', 'plusz nm', 'plus_nm', 'plus nm', 'extra_nm'],
-            'price_per_nm': ['price/nm', 'price_per_nm', 'price per nm'],
-            'price_per_package': ['price/package', 'price_per_package', 'package_price'],
-            'nm_per_package': ['nm/package', 'nm_per_package', 'nm per package'],
-            'all_package': ['all_package', 'all package', 'total_packages'],
-            'package_need_to_order': ['package_need_to_order', 'package need to order', 'packages_to_order'],
-            'all_price': ['all_price', 'all price', 'total_amount', 'final_price'],
-            'brand': ['brand', 'manufacturer', 'make'],
-            'model': ['model', 'model_number', 'part_number'],
-            'color': ['color', 'colour'],
-            'material': ['material', 'fabric', 'composition'],
-            'weight': ['weight'],
-            'vendor_link': ['vendor_link', 'supplier_link'],
-        }
+        if self._bulk_writer:
+            return self._process_rows_bulk(iter_dataframe_rows(df), df.columns, apartment, category, sheet_name)
+        
+        successful_imports = 0
+        failed_imports = 0
+        errors = []
         
         # Normalize columns
-        normalized_columns = {}
-        for standard_name, variations in column_mapping.items():
-            for col in df.columns:
-                if col in variations:
-                    normalized_columns[col] = standard_name
-                    break
+        normalized_columns = self._normalize_columns(df.columns)
         
         with transaction.atomic():
             for index, row in df.iterrows():
+                self.progress.advance()
                 try:
                     # Check if row has meaningful data before processing
                     if not self._is_row_meaningful(row):
@@ -401,7 +480,7 @@ class ProductImportService:
     def _get_value(self, row, column_mapping, field_name, default=''):
         """Get value from row using column mapping"""
         for col_name, mapped_name in column_mapping.items():
-            if mapped_name == field_name and col_name in row.index:
+            if mapped_name == field_name and col_name in row:
                 value = row[col_name]
                 if pd.isna(value):
                     return default
@@ -414,20 +493,8 @@ class ProductImportService:
             return
             
         try:
-            # Check if it's a valid URL
-            if image_url.startswith(('http://', 'https://')):
-                # Option 1: Download and store locally (recommended)
-                downloaded_url = self._download_and_store_image(product, image_url)
-                if downloaded_url:
-                    product.product_image = downloaded_url
-                else:
-                    # Fallback: store original URL if download fails
-                    product.product_image = image_url
-            else:
-                # If it's not a URL, treat it as a filename or description
-                product.product_image = image_url
-                
-            product.save(update_fields=['product_image'])
+            product.product_image = self._resolve_product_image(product, image_url)
+            product.save(update_fields=['product_image', 'thumbnail_url'])
             
         except Exception as e:
             logger.error(f"Error processing image for product {product.id}: {str(e)}")
@@ -435,48 +502,19 @@ class ProductImportService:
             product.product_image = image_url
             product.save(update_fields=['product_image'])
     
-    def _download_and_store_image(self, product, image_url):
-        """Download image from URL and store it locally"""
-        try:
-            import requests
-            from django.core.files.base import ContentFile
-            from django.core.files.storage import default_storage
-            from urllib.parse import urlparse
-            import mimetypes
-            
-            # Download the image
-            response = requests.get(image_url, timeout=30, stream=True)
-            response.raise_for_status()
-            
-            # Check if it's actually an image
-            content_type = response.headers.get('content-type', '')
-            if not content_type.startswith('image/'):
-                logger.warning(f"URL {image_url} does not return an image (content-type: {content_type})")
-                return None
-            
-            # Get file extension from URL or content type
-            parsed_url = urlparse(image_url)
-            file_extension = os.path.splitext(parsed_url.path)[1]
-            if not file_extension:
-                # Guess extension from content type
-                file_extension = mimetypes.guess_extension(content_type) or '.jpg'
-            
-            # Generate unique filename
-            filename = f"products/{product.apartment.id}/{product.id}_{uuid.uuid4().hex[:8]}{file_extension}"
-            
-            # Save the image
-            image_content = ContentFile(response.content)
-            saved_path = default_storage.save(filename, image_content)
-            
-            # Return the URL to access the saved image
-            return default_storage.url(saved_path)
-            
-        except requests.RequestException as e:
-            logger.error(f"Failed to download image from {image_url}: {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Error storing image from {image_url}: {str(e)}")
-            return None
+    def _resolve_product_image(self, product, image_url):
+        """Return the value to store in product_image for an image cell (downloaded URL or original)"""
+        # Check if it's a valid URL
+        if image_url.startswith(('http://', 'https://')):
+            # Download once and store under a content-addressed path (reused on re-import)
+            stored = self.images.request_url(image_url).result()
+            if stored:
+                product.thumbnail_url = stored.thumbnail_url
+                return stored.url
+            # Fallback: store original URL if download fails
+            return image_url
+        # If it's not a URL, treat it as a filename or description
+        return image_url
     
     def _is_row_meaningful(self, row):
         """
@@ -496,8 +534,8 @@ class ProductImportService:
             'material', 'color'                      # Material properties
         ]
         
-        # Convert row to dict and check for meaningful values
-        row_dict = row.to_dict()
+        # Rows are pandas Series (CSV/.xls) or dicts (streamed .xlsx)
+        row_dict = dict(row.items())
         
         # Check if any key field has a non-empty, meaningful value
         for key, value in row_dict.items():
@@ -524,160 +562,69 @@ class ProductImportService:
         # Require at least 3 non-empty fields for a row to be meaningful
         return non_empty_count >= 3
     
-    def _extract_excel_images_with_openpyxl(self, file_path, apartment):
-        """
-        Extract images from Excel file using openpyxl to properly handle embedded images
-        Returns a dictionary mapping row numbers to image file paths
-        """
-        try:
-            from django.conf import settings
-            
-            # Load workbook with openpyxl
-            wb = load_workbook(file_path, data_only=False)
-            row_image_map = {}  # {sheet_name: {row_number: image_path}}
-            
-            for sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
-                sheet_images = {}
-                
-                # Extract images with row mapping
-                if hasattr(ws, '_images') and ws._images:
-                    logger.info(f"Found {len(ws._images)} images in sheet '{sheet_name}'")
-                    
-                    for i, img in enumerate(ws._images):
-                        try:
-                            # Get the row number from image anchor
-                            row_num = img.anchor._from.row + 1  # Convert to 1-based indexing
-                            logger.info(f"Processing image {i+1} at row {row_num} in sheet '{sheet_name}'")
-                            
-                            # Get image data first
-                            if not hasattr(img, '_data'):
-                                logger.warning(f"Image {i+1} in sheet '{sheet_name}' has no _data attribute, skipping")
-                                continue
-                            
-                            img_data = img._data()
-                            if not img_data:
-                                logger.warning(f"Image {i+1} in sheet '{sheet_name}' has empty data, skipping")
-                                continue
-                            
-                            # Determine image extension
-                            if hasattr(img, 'format') and img.format:
-                                extension = f".{img.format.lower()}"
-                                logger.info(f"Image format from attribute: {extension}")
-                            else:
-                                # Try to detect format from image data
-                                if img_data.startswith(b'\x89PNG'):
-                                    extension = '.png'
-                                elif img_data.startswith(b'\xff\xd8'):
-                                    extension = '.jpg'
-                                elif img_data.startswith(b'GIF'):
-                                    extension = '.gif'
-                                else:
-                                    extension = '.png'  # Default
-                                logger.info(f"Image format detected from data: {extension}")
-                            
-                            # Create media folder structure
-                            folder_path = os.path.join(
-                                settings.MEDIA_ROOT, 
-                                'apartment_products', 
-                                str(apartment.id),
-                                sheet_name.replace(' ', '_').lower()
-                            )
-                            os.makedirs(folder_path, exist_ok=True)
-                            logger.info(f"Created/verified folder: {folder_path}")
-                            
-                            # Generate unique filename
-                            img_name = f"row_{row_num}_img_{i+1}_{uuid.uuid4().hex[:8]}{extension}"
-                            img_path = os.path.join(folder_path, img_name)
-                            
-                            # Save image data
-                            with open(img_path, 'wb') as f:
-                                f.write(img_data)
-                            
-                            logger.info(f"Saved image to: {img_path}")
-                            
-                            # Store relative path for database
-                            relative_path = os.path.join(
-                                'apartment_products',
-                                str(apartment.id),
-                                sheet_name.replace(' ', '_').lower(),
-                                img_name
-                            ).replace('\\', '/')
-                            
-                            sheet_images[row_num] = f"/media/{relative_path}"
-                            logger.info(f"✅ Extracted image for row {row_num}: {relative_path}")
-                            
-                        except Exception as e:
-                            logger.error(f"❌ Error processing image {i+1} in sheet '{sheet_name}': {str(e)}", exc_info=True)
-                            continue
-                
-                if sheet_images:
-                    row_image_map[sheet_name] = sheet_images
-                    logger.info(f"Sheet '{sheet_name}': Mapped {len(sheet_images)} images to rows")
-            
-            return row_image_map
-            
-        except Exception as e:
-            logger.error(f"Error extracting images with openpyxl: {str(e)}")
-            return {}
-    
     def _process_excel_with_images(self, file_path, apartment, import_session, user, vendor=None):
         """
-        Enhanced Excel processing that extracts embedded images using openpyxl
+        Stream the workbook in a single pass: rows are read lazily in read-only
+        mode and embedded images are read from the xlsx archive only for the
+        rows they are anchored to.
         """
+        if not zipfile.is_zipfile(file_path):
+            # Legacy .xls workbooks are not zip archives and have no embedded-image support
+            return self._process_excel(file_path, apartment, import_session, user, vendor)
+        
         try:
-            # First, extract all images from the Excel file
-            logger.info("Extracting embedded images from Excel file...")
-            row_image_map = self._extract_excel_images_with_openpyxl(file_path, apartment)
-            
-            # Then process the Excel file normally with pandas
-            excel_file = pd.ExcelFile(file_path)
-            
             total_products = 0
             successful_imports = 0
             failed_imports = 0
             all_errors = []
+            images_extracted = 0
             
-            import_session.total_sheets = len(excel_file.sheet_names)
-            import_session.save()
-            
-            # Process each sheet
-            for sheet_name in excel_file.sheet_names:
-                try:
-                    df = pd.read_excel(file_path, sheet_name=sheet_name)
-                    
-                    # Skip empty sheets
-                    if df.empty or len(df) == 0:
-                        logger.info(f"Skipping empty sheet: {sheet_name}")
-                        continue
-                    
-                    # Create category for this sheet
-                    category, created = ProductCategory.objects.get_or_create(
-                        apartment=apartment,
-                        sheet_name=sheet_name,
-                        defaults={
-                            'name': sheet_name.replace('_', ' ').title(),
-                            'import_file_name': import_session.file_name,
-                        }
-                    )
-                    
-                    # Get images for this sheet
-                    sheet_images = row_image_map.get(sheet_name, {})
-                    
-                    # Process dataframe with image mapping
-                    result = self._process_dataframe_with_images(
-                        df, apartment, category, import_session, user, sheet_name, sheet_images, vendor
-                    )
-                    
-                    total_products += result.get('total_products', 0)
-                    successful_imports += result.get('successful_imports', 0)
-                    failed_imports += result.get('failed_imports', 0)
-                    all_errors.extend(result.get('errors', []))
-                    
-                except Exception as e:
-                    error_msg = f"Sheet '{sheet_name}' error: {str(e)}"
-                    all_errors.append(error_msg)
-                    logger.error(error_msg)
+            with XlsxStreamReader(file_path, normalize_header=clean_column_name) as reader:
+                sheet_names = reader.sheet_names
+                import_session.total_sheets = len(sheet_names)
+                self.progress.set_totals(total_rows=reader.total_data_rows(), total_sheets=len(sheet_names))
+                
+                # Process each sheet
+                for sheet_name in sheet_names:
+                    try:
+                        sheet = reader.open_sheet(sheet_name)
+                        self.progress.start_sheet(sheet_name, max(reader.sheet_row_count(sheet_name) - 1, 0))
+                        
+                        # Skip empty sheets
+                        if not sheet.columns:
+                            logger.info(f"Skipping empty sheet: {sheet_name}")
+                            self.progress.finish_sheet()
+                            continue
+                        
+                        # Create category for this sheet
+                        category, created = ProductCategory.objects.get_or_create(
+                            apartment=apartment,
+                            sheet_name=sheet_name,
+                            defaults={
+                                'name': sheet_name.replace('_', ' ').title(),
+                                'import_file_name': import_session.file_name,
+                            }
+                        )
+                        
+                        if self._bulk_writer:
+                            result = self._process_rows_bulk(sheet, sheet.columns, apartment, category, sheet_name)
+                        else:
+                            result = self._process_rows_with_images(
+                                sheet, sheet.columns, apartment, category, import_session, user, sheet_name, vendor
+                            )
+                        
+                        total_products += result.get('total_products', 0)
+                        successful_imports += result.get('successful_imports', 0)
+                        failed_imports += result.get('failed_imports', 0)
+                        images_extracted += result.get('images_extracted', 0)
+                        all_errors.extend(result.get('errors', []))
+                        self.progress.finish_sheet()
+                        
+                    except Exception as e:
+                        error_msg = f"Sheet '{sheet_name}' error: {str(e)}"
+                        all_errors.append(error_msg)
+                        logger.error(error_msg)
+                        self.progress.finish_sheet()
             
             return {
                 'success': len(all_errors) == 0,
@@ -685,61 +632,39 @@ class ProductImportService:
                 'successful_imports': successful_imports,
                 'failed_imports': failed_imports,
                 'errors': all_errors,
-                'sheets_processed': len(excel_file.sheet_names),
-                'images_extracted': sum(len(images) for images in row_image_map.values())
+                'sheets_processed': len(sheet_names),
+                'images_extracted': images_extracted
             }
             
         except Exception as e:
             return {'success': False, 'errors': [f"Excel with images processing error: {str(e)}"]}
     
-    def _process_dataframe_with_images(self, df, apartment, category, import_session, user, sheet_name, sheet_images, vendor=None):
-        """Process dataframe and assign images based on row mapping, update products with vendor"""
+    def _store_row_image(self, images, sheet_name):
+        """Store the image anchored on a row (the last one wins, as before); returns a StoredImage"""
+        try:
+            return self.images.ingest_bytes(images[-1].read())
+        except Exception as e:
+            logger.error(f"❌ Error processing image {images[-1].index} in sheet '{sheet_name}': {str(e)}", exc_info=True)
+            return None
+    
+    def _process_rows_with_images(self, rows, columns, apartment, category, import_session, user, sheet_name, vendor=None):
+        """
+        Process streamed (row_number, row, images) tuples, assign embedded images
+        to the rows they are anchored on and update products with vendor
+        """
+        total_products = 0
         successful_imports = 0
         failed_imports = 0
+        images_extracted = 0
         errors = []
         
-        # Clean column names
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-        
-        # Use existing column mapping
-        column_mapping = {
-            'sn': ['s.n', 'sn', 'serial_number', 'number', 'no'],
-            'room': ['room', 'location', 'area'],
-            'product_name': ['product_name', 'product', 'name', 'item', 'item_name', 'product name'],
-            'product_image': ['product_image', 'product image', 'image', 'photo', 'picture', 'image_url', 'photo_url', 'picture_url'],
-            'description': ['description', 'desc', 'details', 'product_description'],
-            'sku': ['sku', 'product_code', 'item_code', 'code'],
-            'quantity': ['quantity', 'qty', 'amount', 'count'],
-            'cost': ['cost', 'price', 'unit_price'],
-            'total_cost': ['total_cost', 'total cost', 'total_price', 'total price'],
-            'link': ['link', 'url', 'vendor_link', 'product_link'],
-            'size': ['size', 'dimensions', 'measurements'],
-            'nm': ['nm', 'square_meter', 'sqm'],
-            'plusz_nm': ['plusz_nm', 'plusz nm', 'plus_nm', 'plus nm', 'extra_nm'],
-            'price_per_nm': ['price/nm', 'price_per_nm', 'price per nm'],
-            'price_per_package': ['price/package', 'price_per_package', 'package_price'],
-            'nm_per_package': ['nm/package', 'nm_per_package', 'nm per package'],
-            'all_package': ['all_package', 'all package', 'total_packages'],
-            'package_need_to_order': ['package_need_to_order', 'package need to order', 'packages_to_order'],
-            'all_price': ['all_price', 'all price', 'total_amount', 'final_price'],
-            'brand': ['brand', 'manufacturer', 'make'],
-            'model': ['model', 'model_number', 'part_number'],
-            'color': ['color', 'colour'],
-            'material': ['material', 'fabric', 'composition'],
-            'weight': ['weight'],
-            'vendor_link': ['vendor_link', 'supplier_link'],
-        }
-        
         # Normalize columns
-        normalized_columns = {}
-        for standard_name, variations in column_mapping.items():
-            for col in df.columns:
-                if col in variations:
-                    normalized_columns[col] = standard_name
-                    break
+        normalized_columns = self._normalize_columns(columns)
         
         # Process each row
-        for index, row in df.iterrows():
+        for excel_row, row, images in rows:
+            total_products += 1
+            self.progress.advance()
             try:
                 # Skip empty rows
                 if not self._is_row_meaningful(row):
@@ -750,7 +675,7 @@ class ProductImportService:
                 
                 # Create import data for reference
                 import_data = {}
-                for key, value in row.to_dict().items():
+                for key, value in row.items():
                     if pd.notna(value):
                         import_data[str(key)] = str(value)
                     else:
@@ -782,7 +707,7 @@ class ProductImportService:
                             logger.info(f"✅ Assigned vendor '{vendor.name}' to existing product '{existing_product.product}'")
                         
                         existing_product.import_session = import_session
-                        existing_product.import_row_number = index + 2
+                        existing_product.import_row_number = excel_row
                         existing_product.import_data = import_data
                         existing_product.save()
                         
@@ -795,7 +720,7 @@ class ProductImportService:
                             category=category,
                             vendor=vendor,
                             import_session=import_session,
-                            import_row_number=index + 2,
+                            import_row_number=excel_row,
                             import_data=import_data,
                             created_by=user.username if user else 'system',
                             **product_data
@@ -805,18 +730,17 @@ class ProductImportService:
                         else:
                             logger.warning(f"⚠️  Created new product: {product.product} (SKU: {product.sku}) WITHOUT vendor")
                     
-                    # Handle images: both embedded (from openpyxl) and URL-based (from cells)
-                    excel_row = index + 2  # +2 because Excel has header row and is 1-based
-                    
+                    # Handle images: both embedded (from the xlsx drawing parts) and URL-based (from cells)
                     logger.info(f"Checking for images for product '{product.product}' at Excel row {excel_row}")
-                    logger.info(f"Available images in sheet: {list(sheet_images.keys()) if sheet_images else 'None'}")
+                    stored = self._store_row_image(images, sheet_name) if images else None
                     
                     # First, check for embedded images
-                    if excel_row in sheet_images:
-                        image_path = sheet_images[excel_row]
-                        product.product_image = image_path
-                        product.save(update_fields=['product_image'])
-                        logger.info(f"✅ Assigned embedded image to product '{product.product}' (row {excel_row}): {image_path}")
+                    if stored:
+                        images_extracted += 1
+                        product.product_image = stored.url
+                        product.thumbnail_url = stored.thumbnail_url
+                        product.save(update_fields=['product_image', 'thumbnail_url'])
+                        logger.info(f"✅ Assigned embedded image to product '{product.product}' (row {excel_row}): {stored.url}")
                     
                     # Second, check for URL-based images from cells (if no embedded image found)
                     elif product_data.get('product_image'):
@@ -828,15 +752,98 @@ class ProductImportService:
                     successful_imports += 1
                     
             except Exception as e:
-                error_msg = f"Row {index + 2} in sheet '{sheet_name}': {str(e)}"
+                error_msg = f"Row {excel_row} in sheet '{sheet_name}': {str(e)}"
                 errors.append(error_msg)
                 failed_imports += 1
                 logger.error(error_msg)
         
         return {
             'success': len(errors) == 0,
-            'total_products': len(df),
+            'total_products': total_products,
+            'successful_imports': successful_imports,
+            'failed_imports': failed_imports,
+            'images_extracted': images_extracted,
+            'errors': errors
+        }
+    
+    def _process_rows_bulk(self, rows, columns, apartment, category, sheet_name):
+        """
+        Bulk-mode counterpart of _process_rows_with_images.
+        Rows are matched against the preloaded product index and staged in the
+        bulk writer, which flushes them with bulk_create/bulk_update per batch.
+        """
+        writer = self._bulk_writer
+        total_products = 0
+        successful_imports = 0
+        failed_imports = 0
+        images_extracted = 0
+        errors = []
+        
+        normalized_columns = self._normalize_columns(columns)
+        
+        def record_failures(failures):
+            nonlocal successful_imports, failed_imports
+            for row_number, message in failures:
+                error_msg = f"Row {row_number} in sheet '{sheet_name}': {message}"
+                errors.append(error_msg)
+                successful_imports -= 1
+                failed_imports += 1
+                logger.error(error_msg)
+        
+        for excel_row, row, images in rows:
+            total_products += 1
+            self.progress.advance()
+            try:
+                # Skip empty rows
+                if not self._is_row_meaningful(row):
+                    continue
+                
+                product_data = self._extract_product_data(row, normalized_columns)
+                
+                import_data = {}
+                for key, value in row.items():
+                    import_data[str(key)] = str(value) if pd.notna(value) else None
+                
+                product = writer.add_row(product_data, category, excel_row, import_data)
+                
+                # Embedded images win over URL-based images from cells
+                stored = self._store_row_image(images, sheet_name) if images else None
+                if stored:
+                    images_extracted += 1
+                    product.product_image = stored.url
+                    product.thumbnail_url = stored.thumbnail_url
+                elif product_data['product_image'].startswith(('http://', 'https://')):
+                    # Downloaded concurrently; the writer applies the result before the batch is written
+                    writer.defer_image(product, self.images.request_url(product_data['product_image']))
+                
+                successful_imports += 1
+                record_failures(writer.flush_if_full())
+                
+            except Exception as e:
+                error_msg = f"Row {excel_row} in sheet '{sheet_name}': {str(e)}"
+                errors.append(error_msg)
+                failed_imports += 1
+                logger.error(error_msg)
+        
+        # Flush the remainder so per-sheet counts are final
+        record_failures(writer.flush())
+        logger.info(f"Sheet '{sheet_name}': bulk import staged {successful_imports} rows ({writer.created_count} created, {writer.updated_count} updated so far)")
+        
+        return {
+            'success': len(errors) == 0,
+            'total_products': total_products,
             'successful_imports': successful_imports,
             'failed_imports': failed_imports,
+            'images_extracted': images_extracted,
             'errors': errors
         }
+    
+    def _normalize_columns(self, columns):
+        """Map cleaned dataframe column names to standard field names"""
+        normalized_columns = {}
+        for standard_name, variations in COLUMN_MAPPING.items():
+            for col in columns:
+                if col in variations:
+                    normalized_columns[col] = standard_name
+                    break
+        return normalized_columns
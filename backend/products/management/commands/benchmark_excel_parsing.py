@@ -0,0 +1,216 @@
+"""
+Management command to benchmark spreadsheet parsing for product imports:
+the previous pandas + full openpyxl load against the streaming xlsx reader.
+Each parser runs in a fresh process so peak RSS is measured in isolation.
+No database writes are made.
+"""
+import io
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from queue import Empty
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _legacy_parse(file_path):
+    """The pre-streaming path: full openpyxl load for images, then pandas per sheet"""
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    images = 0
+    wb = load_workbook(file_path, data_only=False)
+    for ws in wb.worksheets:
+        for img in ws._images:
+            img._data()
+            images += 1
+
+    rows = 0
+    excel_file = pd.ExcelFile(file_path)
+    for sheet_name in excel_file.sheet_names:
+        df = pd.read_excel(file_path, sheet_name=sheet_name)
+        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+        for index, row in df.iterrows():
+            row.to_dict()
+            rows += 1
+    return rows, images
+
+
+def _streaming_parse(file_path):
+    """Single pass with XlsxStreamReader; image bytes are read as their rows go by"""
+    from products.xlsx_stream import XlsxStreamReader, clean_column_name
+
+    rows = 0
+    images = 0
+    with XlsxStreamReader(file_path, normalize_header=clean_column_name) as reader:
+        for sheet_name, row_number, row, row_images in reader.iter_rows():
+            rows += 1
+            for image in row_images:
+                image.read()
+                images += 1
+    return rows, images
+
+
+PARSERS = {
+    'legacy': _legacy_parse,
+    'streaming': _streaming_parse,
+}
+
+
+def _max_rss_bytes():
+    # On Linux ru_maxrss survives fork+exec (it would report the parent's peak),
+    # so read the high-water mark of this process' own address space instead
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _run_parser(name, file_path, queue):
+    # Both import services import pandas and openpyxl anyway; load them before the baseline
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+
+    baseline = _max_rss_bytes()
+    start = time.perf_counter()
+    rows, images = PARSERS[name](file_path)
+    queue.put({
+        'seconds': time.perf_counter() - start,
+        'rows': rows,
+        'images': images,
+        'peak_rss': _max_rss_bytes(),
+        'baseline_rss': baseline,
+    })
+
+
+class Command(BaseCommand):
+    help = 'Benchmark time and peak memory of Excel import parsing (legacy vs streaming)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Benchmark an existing .xlsx file instead of a generated one')
+        parser.add_argument('--sheets', type=int, default=3, help='Sheets in the generated workbook')
+        parser.add_argument('--rows', type=int, default=2000, help='Data rows per generated sheet')
+        parser.add_argument('--image-every', type=int, default=4, help='Embed an image every N rows (0 for none)')
+        parser.add_argument('--image-size', type=int, default=160, help='Edge length in pixels of generated images')
+        parser.add_argument('--repeat', type=int, default=1, help='Runs per parser; the fastest run is reported')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated workbook')
+
+    def handle(self, *args, **options):
+        file_path = options['file']
+        generated = False
+
+        if file_path:
+            if not os.path.exists(file_path):
+                raise CommandError(f'File not found: {file_path}')
+        else:
+            file_path = self._generate_workbook(options)
+            generated = True
+
+        try:
+            size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            self.stdout.write(f'Workbook: {file_path} ({size_mb:.1f} MB)\n')
+
+            results = {}
+            for name in PARSERS:
+                runs = [self._measure(name, file_path) for _ in range(max(options['repeat'], 1))]
+                results[name] = min(runs, key=lambda run: run['seconds'])
+                results[name]['peak_rss'] = max(run['peak_rss'] for run in runs)
+                self._report(name, results[name])
+
+            legacy, streaming = results['legacy'], results['streaming']
+            if legacy['rows'] != streaming['rows'] or legacy['images'] != streaming['images']:
+                self.stdout.write(self.style.WARNING(
+                    f"Parsers disagree: legacy {legacy['rows']} rows / {legacy['images']} images, "
+                    f"streaming {streaming['rows']} rows / {streaming['images']} images "
+                    f"(pandas keeps blank rows inside a sheet, the streaming reader skips them)"
+                ))
+
+            speedup = legacy['seconds'] / streaming['seconds'] if streaming['seconds'] else 0
+            legacy_growth = legacy['peak_rss'] - legacy['baseline_rss']
+            streaming_growth = streaming['peak_rss'] - streaming['baseline_rss']
+            self.stdout.write(self.style.SUCCESS(
+                f'\nStreaming is {speedup:.1f}x faster; parser memory growth '
+                f'{self._mb(legacy_growth)} -> {self._mb(streaming_growth)}'
+            ))
+        finally:
+            if generated and not options['keep']:
+                os.remove(file_path)
+
+    def _measure(self, name, file_path):
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+        process = context.Process(target=_run_parser, args=(name, file_path, queue))
+        process.start()
+        try:
+            while True:
+                try:
+                    return queue.get(timeout=1)
+                except Empty:
+                    if not process.is_alive():
+                        raise CommandError(f'{name} parser exited with code {process.exitcode}')
+        finally:
+            process.join()
+
+    def _report(self, name, result):
+        growth = result['peak_rss'] - result['baseline_rss']
+        self.stdout.write(
+            f"{name:<10} {result['seconds']:8.2f}s  rows={result['rows']:<8} images={result['images']:<6} "
+            f"peak RSS {self._mb(result['peak_rss'])} (+{self._mb(growth)} while parsing)"
+        )
+
+    def _mb(self, value):
+        return f'{value / (1024 * 1024):.1f} MB'
+
+    def _generate_workbook(self, options):
+        """Build a product sheet workbook shaped like real imports, with embedded photos"""
+        from openpyxl import Workbook
+        from openpyxl.drawing.image import Image
+        from PIL import Image as PILImage
+
+        self.stdout.write('Generating benchmark workbook...')
+        size = options['image_size']
+        image_every = options['image_every']
+        rng = random.Random(42)
+
+        wb = Workbook()
+        wb.remove(wb.active)
+        for sheet in range(options['sheets']):
+            ws = wb.create_sheet(f'Room {sheet + 1}')
+            ws.append([
+                'S.N', 'Room', 'Product Name', 'Product Image', 'Description', 'SKU',
+                'Quantity', 'Cost', 'Total cost', 'Link', 'Size', 'Brand', 'Color', 'Material'
+            ])
+            for i in range(options['rows']):
+                row_number = i + 2
+                ws.append([
+                    i + 1, f'Room {sheet + 1}', f'Product {sheet}-{i}', None,
+                    f'Description of product {i} ' * 3, f'SKU-{sheet}-{i}',
+                    rng.randint(1, 10), f'{rng.randint(1000, 250000)} Ft', f'{rng.randint(1000, 900000)} Ft',
+                    f'https://example.com/products/{sheet}/{i}', f'{rng.randint(20, 300)}x{rng.randint(20, 300)} cm',
+                    rng.choice(['IKEA', 'JYSK', 'Kika', 'Möbelix']), rng.choice(['white', 'black', 'oak']),
+                    rng.choice(['wood', 'metal', 'fabric'])
+                ])
+                if image_every and i % image_every == 0:
+                    # Noise compresses badly, which keeps the photos realistically sized
+                    buffer = io.BytesIO()
+                    PILImage.frombytes('RGB', (size, size), rng.randbytes(size * size * 3)).save(
+                        buffer, 'JPEG', quality=85
+                    )
+                    buffer.seek(0)
+                    image = Image(buffer)
+                    image.format = 'jpeg'
+                    ws.add_image(image, f'D{row_number}')
+
+        handle, file_path = tempfile.mkstemp(prefix='import_benchmark_', suffix='.xlsx')
+        os.close(handle)
+        wb.save(file_path)
+        return file_path
@@ -0,0 +1,185 @@
+"""
+Management command to benchmark the Product indexes (Product.Meta.indexes and,
+on PostgreSQL, the trigram search indexes of products.search_indexes).
+
+Seeds --products products spread over --apartments benchmark apartments, times
+the hot queries (apartment product list, import lookups, statistics counts,
+search) with the indexes in place and again with them dropped, then restores
+the indexes and removes the seeded data (unless --keep).
+Run with: python manage.py benchmark_product_indexes --products 500000
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from apartments.models import Apartment
+from clients.models import Client
+from products.models import Product
+from products.search_indexes import create_trigram_indexes, drop_trigram_indexes
+
+BENCHMARK_CLIENT_EMAIL = 'index-benchmark@buy2rent.invalid'
+
+NOUNS = ['Sofa', 'Chair', 'Table', 'Lamp', 'Wardrobe', 'Bed Frame', 'Mattress', 'Mirror', 'Rug', 'Shelf',
+         'Curtain', 'Desk', 'Nightstand', 'Dresser', 'Cabinet', 'Stool', 'Ottoman', 'Bench', 'Pillow', 'Towel']
+ADJECTIVES = ['Oak', 'Walnut', 'Velvet', 'Linen', 'Marble', 'Rattan', 'Steel', 'Glass', 'Leather', 'Bamboo',
+              'Nordic', 'Classic', 'Compact', 'Large', 'Grey', 'White', 'Black', 'Green', 'Beige', 'Blue']
+BRANDS = ['IKEA', 'JYSK', 'Westwing', 'Kika', 'Mobelix', 'Sofacompany', 'Bolia', 'Muuto', 'HAY', 'Vitra',
+          'Kave Home', 'La Redoute', 'Maisons du Monde', 'Zara Home', 'H&M Home', 'Butlers', 'Depot', 'XXXLutz']
+PAYMENT_STATUSES = ['Unpaid', 'Unpaid', 'Partially Paid', 'Paid', 'Paid', 'Paid']
+ISSUE_STATES = ['No Issue'] * 18 + ['Issue Reported', 'Resolved']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the Product table indexes: seed products and time the hot queries with and without them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=500000, help='Products to seed')
+        parser.add_argument('--apartments', type=int, default=100, help='Apartments the products are spread over')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Products per bulk insert')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the median is reported')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data afterwards')
+
+    def handle(self, *args, **options):
+        if Client.objects.filter(email=BENCHMARK_CLIENT_EMAIL).exists():
+            raise CommandError(
+                'Benchmark data from an earlier --keep run exists; remove the client '
+                f'{BENCHMARK_CLIENT_EMAIL} and its apartments first'
+            )
+
+        rng = random.Random(42)
+        self.repeat = options['repeat']
+        client, apartments = self._seed(rng, options['products'], options['apartments'], options['batch_size'])
+        try:
+            queries = self._queries(rng, apartments)
+
+            self._analyze()
+            with_indexes = self._measure('with indexes', queries)
+
+            self._drop_indexes()
+            try:
+                self._analyze()
+                without_indexes = self._measure('without indexes', queries)
+            finally:
+                started = time.perf_counter()
+                self._create_indexes()
+                self._analyze()
+                self.stdout.write(f'Indexes rebuilt in {time.perf_counter() - started:.1f}s')
+        finally:
+            if options['keep']:
+                self.stdout.write(f'Seeded data kept (client {BENCHMARK_CLIENT_EMAIL})')
+            else:
+                self._cleanup(client)
+
+        self.stdout.write(f"\n{'query':<28} {'without':>12} {'with':>12} {'speedup':>9}")
+        for name in queries:
+            before, after = without_indexes[name], with_indexes[name]
+            speedup = before / after if after else float('inf')
+            self.stdout.write(f'{name:<28} {before:10.2f}ms {after:10.2f}ms {speedup:8.1f}x')
+        self.stdout.write(self.style.SUCCESS(f"\nBenchmark finished on {connection.vendor}"))
+
+    def _seed(self, rng, count, apartment_count, batch_size):
+        started = time.perf_counter()
+        client = Client.objects.create(name='Index Benchmark', email=BENCHMARK_CLIENT_EMAIL)
+        today = date.today()
+        apartments = Apartment.objects.bulk_create([
+            Apartment(
+                name=f'Index Benchmark {number}',
+                client=client,
+                address='Benchmark',
+                start_date=today,
+                due_date=today + timedelta(days=90),
+            )
+            for number in range(apartment_count)
+        ])
+
+        batch = []
+        for number in range(count):
+            batch.append(Product(
+                apartment=apartments[number % apartment_count],
+                product=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {number}',
+                sku=f'SKU-{number:07d}',
+                brand=rng.choice(BRANDS),
+                payment_status=rng.choice(PAYMENT_STATUSES),
+                payment_due_date=today + timedelta(days=rng.randint(-60, 60)),
+                issue_state=rng.choice(ISSUE_STATES),
+            ))
+            if len(batch) >= batch_size:
+                Product.objects.bulk_create(batch)
+                batch = []
+                self.stdout.write(f'Seeded {number + 1}/{count} products', ending='\r')
+        if batch:
+            Product.objects.bulk_create(batch)
+        self.stdout.write(f'Seeded {count} products in {apartment_count} apartments '
+                          f'in {time.perf_counter() - started:.1f}s')
+        return client, apartments
+
+    def _queries(self, rng, apartments):
+        apartment = apartments[len(apartments) // 2]
+        sample = Product.objects.filter(apartment=apartment).only('sku', 'product')[:50]
+        probe = rng.choice(list(sample))
+        search = Q(product__icontains='walnut desk 12') | Q(sku__icontains='walnut desk 12') | Q(brand__icontains='walnut desk 12')
+        today = date.today()
+        return {
+            'apartment product list': lambda: list(Product.objects.filter(apartment=apartment)[:25]),
+            'latest products': lambda: list(Product.objects.all()[:25]),
+            'import lookup by sku': lambda: Product.objects.filter(apartment=apartment, sku=probe.sku).first(),
+            'import lookup by name': lambda: Product.objects.filter(apartment=apartment, product=probe.product).first(),
+            'open issues count': lambda: Product.objects.filter(apartment=apartment).exclude(issue_state='No Issue').count(),
+            'overdue payments count': lambda: Product.objects.filter(
+                apartment=apartment,
+                payment_due_date__lt=today,
+                payment_status__in=['Unpaid', 'Partially Paid'],
+            ).count(),
+            'apartment search': lambda: list(Product.objects.filter(apartment=apartment).filter(search)[:25]),
+            'search all products': lambda: list(Product.objects.filter(search)[:25]),
+        }
+
+    def _measure(self, label, queries):
+        self.stdout.write(f'Timing queries {label}...')
+        timings = {}
+        for name, query in queries.items():
+            query()  # Warm the cache: only the query plan is compared
+            runs = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                query()
+                runs.append((time.perf_counter() - started) * 1000)
+            timings[name] = statistics.median(runs)
+        return timings
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Product._meta.db_table}')
+
+    def _drop_indexes(self):
+        with connection.schema_editor() as schema_editor:
+            for index in Product._meta.indexes:
+                schema_editor.remove_index(Product, index)
+            drop_trigram_indexes(schema_editor, concurrently=False)
+
+    def _create_indexes(self):
+        with connection.schema_editor() as schema_editor:
+            for index in Product._meta.indexes:
+                schema_editor.add_index(Product, index)
+            create_trigram_indexes(schema_editor, concurrently=False)
+
+    def _cleanup(self, client):
+        started = time.perf_counter()
+        # The seeded rows have nothing pointing at them, so plain DELETEs are enough. A
+        # cascading delete would load every product, the activity logged for each deleted
+        # apartment would reference a removed row, and SQLite would check the replacement_of
+        # self-reference with a table scan per deleted product.
+        client_id = Client._meta.pk.get_db_prep_value(client.pk, connection)
+        with connection.constraint_checks_disabled(), connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {Product._meta.db_table} WHERE apartment_id IN '
+                f'(SELECT id FROM {Apartment._meta.db_table} WHERE client_id = %s)',
+                [client_id],
+            )
+            cursor.execute(f'DELETE FROM {Apartment._meta.db_table} WHERE client_id = %s', [client_id])
+        client.delete()
+        self.stdout.write(f'Removed the seeded data in {time.perf_counter() - started:.1f}s')
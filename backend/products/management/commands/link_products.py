@@ -0,0 +1,24 @@
+"""
+Management command to link order items and issue items without a product
+to the product of their apartment with the same SKU or name, when exactly
+one product matches (see products.resolver). Linked rows show their
+product's image and category without name matching.
+"""
+import time
+from django.core.management.base import BaseCommand
+from products.resolver import link_unlinked_rows
+
+
+class Command(BaseCommand):
+    help = 'Link order items and issue items without a product to their unambiguous product match'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per update')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        order_items, issue_items = link_unlinked_rows(batch_size=max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(
+            f'Linked {order_items} order items and {issue_items} issue items '
+            f'in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,17 @@
+"""
+Management command to recover import sessions whose job stopped reporting
+(see products.import_jobs.reap_stale_imports). Progress reads reap the
+session they look at; run this from cron to catch the ones nobody watches.
+"""
+from django.core.management.base import BaseCommand
+from products.import_jobs import reap_stale_imports
+
+
+class Command(BaseCommand):
+    help = 'Fail stale processing imports and re-queue pending imports no worker picked up'
+
+    def handle(self, *args, **options):
+        failed, requeued = reap_stale_imports()
+        self.stdout.write(self.style.SUCCESS(
+            f'Marked {failed} stale imports as failed and re-queued {requeued}'
+        ))
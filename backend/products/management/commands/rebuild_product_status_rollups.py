@@ -0,0 +1,50 @@
+"""
+Management command to rebuild ProductStatusRollup from orders, payments,
+deliveries and issues, or to verify the stored rollups against the live
+computation.
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from products.status_rollup import (
+    rebuild_product_status_rollups, refresh_product_status_rollups, verify_product_status_rollups,
+)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or verify) the denormalized product status rollup table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Only compare stored rollups with the live computation')
+        parser.add_argument('--fix', action='store_true', help='With --verify, refresh the missing and mismatched rollups')
+        parser.add_argument('--batch-size', type=int, default=500, help='Products per batch')
+        parser.add_argument('--show', type=int, default=10, help='Mismatches to print with --verify')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        start = time.perf_counter()
+
+        if not options['verify']:
+            written = rebuild_product_status_rollups(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt {written} product status rollups in {time.perf_counter() - start:.1f}s'
+            ))
+            return
+
+        result = verify_product_status_rollups(batch_size=batch_size)
+        missing, mismatched = result['missing'], result['mismatched']
+        self.stdout.write(
+            f"Checked {result['checked']} products in {time.perf_counter() - start:.1f}s: "
+            f"{len(missing)} missing, {len(mismatched)} mismatched"
+        )
+        for product_id, differences in list(mismatched.items())[:options['show']]:
+            details = ', '.join(f'{field}: {stored!r} != {expected!r}' for field, (stored, expected) in differences.items())
+            self.stdout.write(f'  {product_id}: {details}')
+
+        stale = list(missing) + list(mismatched)
+        if not stale:
+            self.stdout.write(self.style.SUCCESS('All product status rollups are up to date'))
+        elif options['fix']:
+            refreshed = refresh_product_status_rollups(stale, batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Refreshed {refreshed} product status rollups'))
+        else:
+            raise CommandError(f'{len(stale)} product status rollups are out of date (run with --fix or without --verify)')
@@ -0,0 +1,22 @@
+"""
+Management command to rebuild the ProductTag table from the status and
+delivery status tag lists of all products (see products.tags).
+"""
+import time
+from django.core.management.base import BaseCommand
+from products.tags import rebuild_product_tags
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the indexed product status / delivery status tag table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Products per batch')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        checked, rewritten = rebuild_product_tags(batch_size=max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} products in {time.perf_counter() - start:.1f}s: '
+            f'rewrote the tags of {rewritten}'
+        ))
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_alter_product_image_file_alter_product_image_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importsession',
+            name='current_sheet',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='importsession',
+            name='import_type',
+            field=models.CharField(choices=[('products', 'Products'), ('order', 'Order')], default='products', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='importsession',
+            name='job_params',
+            field=models.JSONField(blank=True, default=dict, help_text='Parameters the background import job runs with'),
+        ),
+        migrations.AddField(
+            model_name='importsession',
+            name='processed_rows',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importsession',
+            name='processed_sheets',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importsession',
+            name='progress_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='importsession',
+            name='result',
+            field=models.JSONField(blank=True, default=dict, help_text='Final result payload of the import job'),
+        ),
+        migrations.AddField(
+            model_name='importsession',
+            name='total_rows',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_importsession_job_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductImageSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.TextField()),
+                ('url_hash', models.CharField(help_text='SHA-256 of the URL', max_length=64, unique=True)),
+                ('sha256', models.CharField(db_index=True, help_text='SHA-256 of the image bytes', max_length=64)),
+                ('file_path', models.CharField(help_text='Storage name of the image file', max_length=255)),
+                ('thumbnail_path', models.CharField(blank=True, max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
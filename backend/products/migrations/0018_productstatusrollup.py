@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_productimagesource'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStatusRollup',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='status_rollup', serialize=False, to='products.product')),
+                ('is_ordered', models.BooleanField(db_index=True, default=False)),
+                ('has_active_order', models.BooleanField(db_index=True, default=False)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('latest_order_status', models.CharField(blank=True, db_index=True, help_text='Status of the most recent order containing the product', max_length=20)),
+                ('payment_status', models.CharField(choices=[('Unpaid', 'Unpaid'), ('Partially Paid', 'Partially Paid'), ('Paid', 'Paid')], db_index=True, default='Unpaid', help_text="Derived from payments of the product's order items", max_length=20)),
+                ('latest_delivery_status', models.CharField(blank=True, db_index=True, help_text='Delivery status of the most recent order that has a delivery', max_length=20)),
+                ('issue_status', models.CharField(db_index=True, default='No Issue', help_text='Status of the latest issue', max_length=30)),
+                ('issue_priority', models.CharField(blank=True, max_length=20)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Product Status Rollup',
+                'verbose_name_plural': 'Product Status Rollups',
+            },
+        ),
+    ]
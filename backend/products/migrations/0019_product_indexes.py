@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0004_apartment_extra_data'),
+        ('products', '0018_productstatusrollup'),
+        ('vendors', '0003_vendor_active_issues_vendor_address_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at'], name='products_pr_created_bce1a7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['apartment', '-created_at'], name='products_pr_apartme_7f440d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['apartment', 'sku'], name='products_pr_apartme_d3d395_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['apartment', 'product'], name='products_pr_apartme_b16206_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['apartment', 'payment_status', 'payment_due_date'], name='products_pr_apartme_08207f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['apartment', 'issue_state'], name='products_pr_apartme_f8df7f_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from products.search_indexes import create_trigram_indexes, drop_trigram_indexes
+
+
+def create_indexes(apps, schema_editor):
+    create_trigram_indexes(schema_editor)
+
+
+def drop_indexes(apps, schema_editor):
+    drop_trigram_indexes(schema_editor)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('products', '0019_product_indexes'),
+    ]
+
+    operations = [
+        # GIN trigram indexes for product search; PostgreSQL only, nothing to do on SQLite
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:35
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0004_apartment_extra_data'),
+        ('products', '0020_product_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTag',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('status', 'Status'), ('delivery', 'Delivery Status')], max_length=20)),
+                ('tag', models.CharField(max_length=100)),
+                ('apartment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='apartments.apartment')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Product Tag',
+                'verbose_name_plural': 'Product Tags',
+                'indexes': [models.Index(fields=['apartment', 'kind', 'tag', 'product'], name='products_pr_apartme_867e9c_idx'), models.Index(fields=['kind', 'tag', 'product'], name='products_pr_kind_24a0c7_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'kind', 'tag'), name='unique_product_tag')],
+            },
+        ),
+    ]
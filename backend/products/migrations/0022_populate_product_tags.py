@@ -0,0 +1,50 @@
+# Fill ProductTag from the status / delivery status tag lists of existing products
+
+from django.db import migrations
+
+from products.tags import NORMALIZERS, TAG_FIELDS, tag_values
+
+BATCH_SIZE = 1000
+
+
+def populate_product_tags(apps, schema_editor):
+    """Store legacy string values as lists, then write one ProductTag row per tag"""
+    Product = apps.get_model('products', 'Product')
+    ProductTag = apps.get_model('products', 'ProductTag')
+    db_alias = schema_editor.connection.alias
+
+    product_ids = list(Product.objects.using(db_alias).order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(product_ids), BATCH_SIZE):
+        products = Product.objects.using(db_alias).filter(pk__in=product_ids[start:start + BATCH_SIZE]).only(
+            'id', 'apartment', *TAG_FIELDS.values()
+        )
+        tags = []
+        for product in products:
+            legacy = [field for field in TAG_FIELDS.values() if not isinstance(getattr(product, field), list)]
+            for kind, field in TAG_FIELDS.items():
+                setattr(product, field, NORMALIZERS[kind](getattr(product, field)))
+            if legacy:
+                Product.objects.using(db_alias).filter(pk=product.pk).update(
+                    **{field: getattr(product, field) for field in legacy}
+                )
+            tags.extend(
+                ProductTag(product_id=product.pk, apartment_id=product.apartment_id, kind=kind, tag=tag)
+                for kind, tag in sorted(tag_values(product))
+            )
+        ProductTag.objects.using(db_alias).bulk_create(tags, batch_size=BATCH_SIZE)
+
+
+def clear_product_tags(apps, schema_editor):
+    ProductTag = apps.get_model('products', 'ProductTag')
+    ProductTag.objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0021_producttag'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_product_tags, clear_product_tags),
+    ]
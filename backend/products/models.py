@@ -1,11 +1,26 @@
 import uuid
 from django.db import models
+from django.utils.functional import cached_property
 from django.core.validators import MinValueValidator
 from apartments.models import Apartment
 from vendors.models import Vendor
 from .category_models import ProductCategory, ImportSession
 
 
+class ProductQuerySet(models.QuerySet):
+    """Status tag filters backed by the indexed ProductTag table (see products.tags)"""
+
+    def with_tags(self, kind, tags):
+        """Products having at least one of `tags` of the given kind"""
+        return self.filter(pk__in=ProductTag.objects.filter(kind=kind, tag__in=tags).values('product'))
+
+    def with_status(self, *tags):
+        return self.with_tags(ProductTag.STATUS, tags)
+
+    def with_delivery_tag(self, *tags):
+        return self.with_tags(ProductTag.DELIVERY, tags)
+
+
 class Product(models.Model):
     AVAILABILITY_CHOICES = [
         ('In Stock', 'In Stock'),
@@ -55,6 +70,8 @@ class Product(models.Model):
         help_text="Unique UUID identifier for security"
     )
     
+    objects = ProductQuerySet.as_manager()
+    
     apartment = models.ForeignKey(Apartment, on_delete=models.CASCADE, related_name='products')
     category = models.ForeignKey(
         ProductCategory, 
@@ -214,7 +231,17 @@ class Product(models.Model):
     
     class Meta:
         ordering = ['-created_at']
-    
+        # Matched to the hot access paths; the trigram search indexes on
+        # product/sku/brand are PostgreSQL-only (migration 0020)
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['apartment', '-created_at']),
+            models.Index(fields=['apartment', 'sku']),
+            models.Index(fields=['apartment', 'product']),
+            models.Index(fields=['apartment', 'payment_status', 'payment_due_date']),
+            models.Index(fields=['apartment', 'issue_state']),
+        ]
+
     def __str__(self):
         return f"{self.product} - {self.apartment.name}"
     
@@ -237,47 +264,28 @@ class Product(models.Model):
             tags.append('Issue Reported')
         return tags
     
+    @cached_property
+    def status_info(self):
+        """
+        Order, payment, issue and delivery status of this product.
+        Loaded in one batch (see products.status_info); list serializers
+        prime it for a whole page of products at once.
+        """
+        from .status_info import load_product_status_info
+        return load_product_status_info([self])[self.pk]
+    
     @property
     def order_status_info(self):
         """
         Get order status information for this product.
         Returns a list of order statuses where this product appears.
         """
-        from orders.models import OrderItem
-        
-        # Get all order items that reference this product
-        order_items = OrderItem.objects.filter(product=self).select_related('order')
-        
-        # Collect unique order statuses
-        order_statuses = []
-        seen_statuses = set()
-        
-        for item in order_items:
-            status = item.order.status
-            if status not in seen_statuses:
-                order_statuses.append({
-                    'status': status,
-                    'po_number': item.order.po_number,
-                    'order_id': str(item.order.id),
-                    'placed_on': item.order.placed_on.isoformat() if item.order.placed_on else None,
-                    'quantity': item.quantity,
-                    'expected_delivery': item.order.expected_delivery.isoformat() if item.order.expected_delivery else None,
-                    'shipping_address': item.order.shipping_address or None,
-                })
-                seen_statuses.add(status)
-        
-        return order_statuses
+        return self.status_info['order_status_info']
     
     @property
     def has_active_order(self):
         """Check if product has any active orders (draft or sent)"""
-        from orders.models import OrderItem
-        
-        active_statuses = ['draft', 'sent']
-        return OrderItem.objects.filter(
-            product=self,
-            order__status__in=active_statuses
-        ).exists()
+        return self.status_info['has_active_order']
     
     @property
     def payment_status_from_orders(self):
@@ -285,42 +293,7 @@ class Product(models.Model):
         Calculate payment status based on payments for orders containing this product.
         Returns 'Paid', 'Partially Paid', or 'Unpaid'
         """
-        from orders.models import OrderItem
-        from payments.models import Payment
-        
-        # Get all order items for this product
-        order_items = OrderItem.objects.filter(product=self).select_related('order')
-        
-        if not order_items.exists():
-            return 'Unpaid'
-        
-        total_amount_due = 0
-        total_amount_paid = 0
-        
-        for item in order_items:
-            # Calculate this item's share of the order total
-            item_total = float(item.quantity) * float(item.unit_price)
-            total_amount_due += item_total
-            
-            # Get payments for this order
-            payments = Payment.objects.filter(order=item.order)
-            for payment in payments:
-                # Check if this specific item is included in the payment
-                if payment.order_items.filter(id=item.id).exists():
-                    # Calculate proportional payment for this item
-                    if payment.total_amount > 0:
-                        item_proportion = item_total / float(payment.total_amount)
-                        total_amount_paid += float(payment.amount_paid) * item_proportion
-        
-        if total_amount_due == 0:
-            return 'Unpaid'
-        
-        if total_amount_paid >= total_amount_due:
-            return 'Paid'
-        elif total_amount_paid > 0:
-            return 'Partially Paid'
-        else:
-            return 'Unpaid'
+        return self.status_info['payment_status_from_orders']
     
     @property
     def issue_status_info(self):
@@ -328,34 +301,12 @@ class Product(models.Model):
         Get the latest issue status for this product from the Issues page.
         Returns a dict with status, priority, and type information.
         """
-        from issues.models import Issue
-        
-        # Get the most recent issue for this product
-        latest_issue = Issue.objects.filter(product=self).order_by('-created_at').first()
-        
-        if not latest_issue:
-            return {
-                'status': 'No Issue',
-                'priority': None,
-                'type': None,
-                'issue_id': None,
-                'ai_activated': False
-            }
-        
-        return {
-            'status': latest_issue.status,
-            'priority': latest_issue.priority,
-            'type': latest_issue.type,
-            'issue_id': str(latest_issue.id),
-            'created_at': latest_issue.created_at.isoformat() if latest_issue.created_at else None,
-            'ai_activated': latest_issue.ai_activated
-        }
+        return self.status_info['issue_status_info']
     
     @property
     def is_ordered(self):
         """Check if product has been ordered"""
-        from orders.models import OrderItem
-        return OrderItem.objects.filter(product=self).exists()
+        return self.status_info['is_ordered']
     
     @property
     def delivery_status_info(self):
@@ -363,45 +314,7 @@ class Product(models.Model):
         Get delivery status information for this product.
         Returns a list of delivery statuses where this product's orders appear.
         """
-        from orders.models import OrderItem
-        from deliveries.models import Delivery
-        
-        # Get all order items that reference this product
-        order_items = OrderItem.objects.filter(product=self).select_related('order')
-        
-        # Collect delivery information from orders
-        delivery_statuses = []
-        seen_deliveries = set()
-        
-        for item in order_items:
-            # Check if the order has an associated delivery
-            try:
-                delivery = Delivery.objects.get(order=item.order)
-                delivery_key = str(delivery.id)
-                
-                if delivery_key not in seen_deliveries:
-                    # Get the latest location from status history
-                    latest_location = None
-                    latest_status_history = delivery.status_history.filter(location__isnull=False).exclude(location='').order_by('-created_at').first()
-                    if latest_status_history:
-                        latest_location = latest_status_history.location
-                    
-                    delivery_statuses.append({
-                        'status': delivery.status,
-                        'order_reference': delivery.order_reference,
-                        'delivery_id': str(delivery.id),
-                        'expected_date': delivery.expected_date.isoformat() if delivery.expected_date else None,
-                        'actual_date': delivery.actual_date.isoformat() if delivery.actual_date else None,
-                        'tracking_number': delivery.tracking_number,
-                        'priority': delivery.priority,
-                        'location': latest_location,
-                    })
-                    seen_deliveries.add(delivery_key)
-            except Delivery.DoesNotExist:
-                # No delivery record for this order yet
-                pass
-        
-        return delivery_statuses
+        return self.status_info['delivery_status_info']
     
     @property
     def combined_status_info(self):
@@ -418,3 +331,92 @@ class Product(models.Model):
             'is_ordered': self.is_ordered,
             'has_active_order': self.has_active_order,
         }
+
+
+class ProductTagQuerySet(models.QuerySet):
+
+    def product_count(self):
+        """Number of distinct products among these tag rows, counted from the index alone"""
+        return self.values('product').distinct().count()
+
+
+class ProductTag(models.Model):
+    """
+    One row per status / delivery status tag of a product, mirroring the
+    Product.status and Product.delivery_status_tags JSON lists so products
+    can be filtered and counted by tag with an index. Written when a product
+    is saved (products.signals); rebuild with `manage.py rebuild_product_tags`.
+    """
+    STATUS = 'status'
+    DELIVERY = 'delivery'
+    KIND_CHOICES = [
+        (STATUS, 'Status'),
+        (DELIVERY, 'Delivery Status'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='tags')
+    # Copied from the product so per-apartment counts are read from one index
+    apartment = models.ForeignKey(Apartment, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    tag = models.CharField(max_length=100)
+    
+    objects = ProductTagQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = 'Product Tag'
+        verbose_name_plural = 'Product Tags'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'kind', 'tag'], name='unique_product_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['apartment', 'kind', 'tag', 'product']),
+            models.Index(fields=['kind', 'tag', 'product']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id}: {self.kind} {self.tag}"
+
+
+class ProductStatusRollup(models.Model):
+    """
+    Denormalized order / payment / delivery / issue status of a product,
+    one row per product, so lists and dashboards can filter and sort on
+    lifecycle status with indexed columns instead of deriving it in Python.
+    Kept up to date by products.signals; rebuild and verify with
+    `manage.py rebuild_product_status_rollups`.
+    """
+    PAYMENT_STATUS_CHOICES = [
+        ('Unpaid', 'Unpaid'),
+        ('Partially Paid', 'Partially Paid'),
+        ('Paid', 'Paid'),
+    ]
+    
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='status_rollup'
+    )
+    
+    # Orders
+    is_ordered = models.BooleanField(default=False, db_index=True)
+    has_active_order = models.BooleanField(default=False, db_index=True)
+    order_count = models.PositiveIntegerField(default=0)
+    latest_order_status = models.CharField(max_length=20, blank=True, db_index=True, help_text="Status of the most recent order containing the product")
+    
+    # Payments, deliveries and issues
+    payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='Unpaid', db_index=True, help_text="Derived from payments of the product's order items")
+    latest_delivery_status = models.CharField(max_length=20, blank=True, db_index=True, help_text="Delivery status of the most recent order that has a delivery")
+    issue_status = models.CharField(max_length=30, default='No Issue', db_index=True, help_text="Status of the latest issue")
+    issue_priority = models.CharField(max_length=20, blank=True)
+    
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Product Status Rollup'
+        verbose_name_plural = 'Product Status Rollups'
+    
+    def __str__(self):
+        return f"{self.product_id}: {self.latest_order_status or 'not ordered'} / {self.payment_status}"
+
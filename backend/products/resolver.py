@@ -0,0 +1,249 @@
+"""
+Resolve order items and issue items without a product link to catalog
+products by SKU / name, for their image and category.
+
+The serializers used to try several LIKE queries over the whole product
+table per row and field (iexact, icontains, a scan of 100 products, then
+order items). Instead each apartment's products are indexed by normalized
+name and SKU together with their image and category. The index is built
+with one query, kept in the PRODUCT_INDEX_CACHE_ALIAS cache for
+PRODUCT_INDEX_CACHE_TTL seconds and dropped when a product of the apartment
+changes (see products.signals, and ProductBulkWriter for bulk imports).
+Serializers share one ProductResolver per request through their context,
+so a page costs one cache read per apartment and the matching runs in
+memory. Only names matching no product
+fall back to a query on the apartment's order items.
+
+New rows are linked to their product when the match is unambiguous, and
+`manage.py link_products` does the same for existing rows, so most rows
+resolve through the product link and the name matching is a fallback.
+"""
+import logging
+import threading
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'product-index'
+CONTEXT_KEY = 'product_resolver'
+
+IndexEntry = namedtuple('IndexEntry', ['product_id', 'image', 'category'])
+
+_pending = threading.local()
+
+
+def normalize(value):
+    """Case- and whitespace-insensitive form of a product name or SKU"""
+    return ' '.join(str(value or '').split()).casefold()
+
+
+def product_image_path(product):
+    """Image of a product as stored: product_image, then the deprecated image_url / image_file"""
+    if product.product_image:
+        return product.product_image
+    if product.image_url:
+        return product.image_url
+    if product.image_file:
+        return product.image_file.url
+    return None
+
+
+def get_cache():
+    return caches[getattr(settings, 'PRODUCT_INDEX_CACHE_ALIAS', 'product_index')]
+
+
+def _index_key(apartment_id):
+    return f'{KEY_PREFIX}:{apartment_id}'
+
+
+def build_index(apartment_id):
+    """Name / SKU index of an apartment's products"""
+    from .models import Product
+
+    index = {'by_name': {}, 'by_sku': {}, 'names': []}
+    products = Product.objects.filter(apartment_id=apartment_id).select_related('category').only(
+        'id', 'product', 'sku', 'product_image', 'image_url', 'image_file', 'category__name'
+    )
+    # Product ordering (newest first) decides between equal names, as .first() did
+    for product in products:
+        entry = IndexEntry(product.pk, product_image_path(product), product.category.name if product.category else None)
+        name, sku = normalize(product.product), normalize(product.sku)
+        if name:
+            index['by_name'].setdefault(name, []).append(entry)
+            index['names'].append((name, entry))
+        if sku:
+            index['by_sku'].setdefault(sku, []).append(entry)
+    return index
+
+
+def get_indexes(apartment_ids):
+    """{apartment_id: index}, from the cache where possible"""
+    apartment_ids = {apartment_id for apartment_id in apartment_ids if apartment_id}
+    cache = get_cache()
+    keys = {_index_key(apartment_id): apartment_id for apartment_id in apartment_ids}
+    try:
+        cached = cache.get_many(list(keys))
+    except Exception as e:
+        logger.error(f"Product index cache read failed: {str(e)}")
+        cached = {}
+
+    indexes = {keys[key]: index for key, index in cached.items()}
+    built = {}
+    for apartment_id in apartment_ids - set(indexes):
+        built[_index_key(apartment_id)] = indexes[apartment_id] = build_index(apartment_id)
+    if built:
+        try:
+            cache.set_many(built, timeout=getattr(settings, 'PRODUCT_INDEX_CACHE_TTL', 600))
+        except Exception as e:
+            logger.error(f"Product index cache write failed: {str(e)}")
+    return indexes
+
+
+def schedule_index_invalidation(apartment_id):
+    """Drop an apartment's index when the current transaction commits, once per transaction"""
+    if not apartment_id:
+        return
+    pending = getattr(_pending, 'apartments', None)
+    if pending is None:
+        pending = _pending.apartments = set()
+    pending.add(apartment_id)
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    pending = getattr(_pending, 'apartments', None)
+    _pending.apartments = None
+    if pending:
+        try:
+            get_cache().delete_many([_index_key(apartment_id) for apartment_id in pending])
+        except Exception as e:
+            logger.error(f"Failed to invalidate product indexes of {len(pending)} apartments: {str(e)}")
+
+
+class ProductResolver:
+    """
+    Matches rows to products of their apartment. Indexes are loaded once
+    per apartment; preload() fetches those of a whole page at once.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._order_item_images = {}
+
+    def preload(self, apartment_ids):
+        missing = set(apartment_ids) - set(self._indexes)
+        if missing:
+            self._indexes.update(get_indexes(missing))
+
+    def _index(self, apartment_id):
+        if not apartment_id:
+            return None
+        if apartment_id not in self._indexes:
+            self.preload([apartment_id])
+        return self._indexes[apartment_id]
+
+    def _candidates(self, index, sku, name, fuzzy):
+        """Entries in the order the serializers used to try them"""
+        sku, name = normalize(sku), normalize(name)
+        if sku:
+            yield from index['by_sku'].get(sku, ())
+        if name:
+            yield from index['by_name'].get(name, ())
+            if fuzzy:
+                # Product name containing the row's name, then the reverse
+                yield from (entry for product_name, entry in index['names'] if name in product_name)
+                yield from (entry for product_name, entry in index['names'] if product_name in name)
+
+    def match(self, apartment_id, sku='', name=''):
+        """The only product with this SKU, else the only one with this name; None if absent or ambiguous"""
+        index = self._index(apartment_id)
+        if index is None:
+            return None
+        for entries in (index['by_sku'].get(normalize(sku), ()), index['by_name'].get(normalize(name), ())):
+            if entries:
+                return entries[0] if len(entries) == 1 else None
+        return None
+
+    def image(self, apartment_id, sku='', name='', order_items=False):
+        """Stored image path of the best matching product (or order item) that has one"""
+        index = self._index(apartment_id)
+        if index is None:
+            return None
+        for entry in self._candidates(index, sku, name, fuzzy=True):
+            if entry.image:
+                return entry.image
+        if order_items and name:
+            return self._order_item_image(apartment_id, name)
+        return None
+
+    def _order_item_image(self, apartment_id, name):
+        """Image of an order item of the apartment named like `name` (queried, remembered per resolver)"""
+        from orders.models import OrderItem
+
+        key = (apartment_id, normalize(name))
+        if key not in self._order_item_images:
+            order_items = OrderItem.objects.filter(
+                order__apartment_id=apartment_id, product_name__icontains=name
+            ).select_related('product')
+            self._order_item_images[key] = next(
+                (image for image in (
+                    item.product_image_url or (product_image_path(item.product) if item.product else None)
+                    for item in order_items[:20]
+                ) if image),
+                None,
+            )
+        return self._order_item_images[key]
+
+    def category(self, apartment_id, sku='', name=''):
+        """Category name of the product with this SKU or exact name"""
+        index = self._index(apartment_id)
+        if index is None:
+            return None
+        for entry in self._candidates(index, sku, name, fuzzy=False):
+            if entry.category:
+                return entry.category
+        return None
+
+
+def get_resolver(context):
+    """The resolver shared by all serializers of a request (nested serializers share the root context)"""
+    resolver = context.get(CONTEXT_KEY)
+    if resolver is None:
+        resolver = context[CONTEXT_KEY] = ProductResolver()
+    return resolver
+
+
+def link_unlinked_rows(batch_size=500):
+    """
+    Store unambiguous SKU / exact-name matches as the product link of order
+    items and issue items without one. Returns (order items, issue items) linked.
+    """
+    from issues.models import IssueItem
+    from orders.models import OrderItem
+    from .status_rollup import schedule_rollup_refresh
+
+    resolver = ProductResolver()
+    linked = []
+    for model, apartment_path, sku_field, unlinked in (
+        (OrderItem, 'order__apartment_id', 'sku', {}),
+        # Issue items of an order item are identified through it
+        (IssueItem, 'issue__apartment_id', None, {'order_item__isnull': True}),
+    ):
+        rows = model.objects.filter(product__isnull=True, **unlinked).exclude(
+            product_name='', **({sku_field: ''} if sku_field else {})
+        ).values_list('pk', apartment_path, 'product_name', *([sku_field] if sku_field else []))
+        links = []
+        for pk, apartment_id, name, *sku in rows.iterator(chunk_size=batch_size):
+            entry = resolver.match(apartment_id, sku=sku[0] if sku else '', name=name)
+            if entry:
+                links.append(model(pk=pk, product_id=entry.product_id))
+        with transaction.atomic():
+            model.objects.bulk_update(links, ['product'], batch_size=batch_size)
+            if model is OrderItem:
+                # Linked order items now count towards their product's status rollup
+                schedule_rollup_refresh(product_ids={row.product_id for row in links})
+        linked.append(len(links))
+    return tuple(linked)
@@ -0,0 +1,44 @@
+"""
+Trigram indexes for product search on PostgreSQL.
+
+The product list is searched with icontains on product, sku and brand
+(SearchFilter), which PostgreSQL runs as UPPER(col::text) LIKE UPPER('%term%').
+A B-tree index cannot serve a leading wildcard, so each column gets a GIN
+index on UPPER(col) with the pg_trgm operator class, matching that expression.
+
+SQLite has neither GIN nor pg_trgm: there the functions below do nothing and
+a search is narrowed by the (apartment, ...) indexes of Product instead,
+since the list is filtered by apartment.
+"""
+
+TRIGRAM_INDEXES = {
+    'products_product_name_trgm': 'product',
+    'products_product_sku_trgm': 'sku',
+    'products_product_brand_trgm': 'brand',
+}
+
+
+def supports_trigram_indexes(connection):
+    return connection.vendor == 'postgresql'
+
+
+def create_trigram_indexes(schema_editor, concurrently=True):
+    """Create the pg_trgm extension and the search indexes (PostgreSQL only)"""
+    if not supports_trigram_indexes(schema_editor.connection):
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CONCURRENTLY keeps the table writable while a large index is built; it cannot run in a transaction
+    concurrently = 'CONCURRENTLY ' if concurrently else ''
+    for name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX {concurrently}IF NOT EXISTS {schema_editor.quote_name(name)} '
+            f'ON products_product USING gin (UPPER({schema_editor.quote_name(column)}) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(schema_editor, concurrently=True):
+    if not supports_trigram_indexes(schema_editor.connection):
+        return
+    concurrently = 'CONCURRENTLY ' if concurrently else ''
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX {concurrently}IF EXISTS {schema_editor.quote_name(name)}')
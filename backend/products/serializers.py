@@ -3,6 +3,24 @@ from .models import Product
 from .category_models import ProductCategory, ImportSession
 from apartments.serializers import ApartmentSerializer
 from vendors.serializers import VendorSerializer
+from .status_info import attach_related_counts, prime_product_status_info
+from .tags import delivery_tags, status_tags
+
+
+class ProductListSerializer(serializers.ListSerializer):
+    """
+    Serializes a page of products with a fixed number of queries.
+    Status info and the counts shown by the nested vendor/client serializers
+    are loaded for all products at once and cached on the instances, instead
+    of being queried product by product.
+    """
+
+    def to_representation(self, data):
+        products = list(data.all() if hasattr(data, 'all') else data)
+        if products:
+            attach_related_counts(products)
+            prime_product_status_info(products)
+        return super().to_representation(products)
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -30,49 +48,11 @@ class ProductSerializer(serializers.ModelSerializer):
     
     def get_status(self, obj):
         """Ensure status is always returned as an array"""
-        import json
-        status_value = obj.status
-        
-        # If it's already a list, return it
-        if isinstance(status_value, list):
-            return status_value
-        
-        # If it's a JSON string, parse it
-        if isinstance(status_value, str):
-            try:
-                parsed = json.loads(status_value)
-                if isinstance(parsed, list):
-                    return parsed
-                return [parsed] if parsed else ['Design Approved']
-            except:
-                return [status_value] if status_value else ['Design Approved']
-        
-        # Default fallback
-        return ['Design Approved']
+        return status_tags(obj.status)
     
     def get_delivery_status_tags(self, obj):
         """Ensure delivery_status_tags is always returned as an array"""
-        import json
-        tags_value = obj.delivery_status_tags
-        
-        # If it's already a list, return it
-        if isinstance(tags_value, list):
-            return tags_value
-        
-        # If it's a JSON string, parse it
-        if isinstance(tags_value, str):
-            try:
-                parsed = json.loads(tags_value)
-                if isinstance(parsed, list):
-                    return parsed
-                # If it's comma-separated string, split it
-                return [tag.strip() for tag in tags_value.split(',') if tag.strip()]
-            except:
-                # If parsing fails, split by comma
-                return [tag.strip() for tag in tags_value.split(',') if tag.strip()]
-        
-        # Default fallback
-        return []
+        return delivery_tags(obj.delivery_status_tags)
     
     # Enhanced product_image field that provides full URL
     product_image = serializers.SerializerMethodField()
@@ -255,6 +235,7 @@ class ProductSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Product
+        list_serializer_class = ProductListSerializer
         fields = [
             'id', 'apartment', 'apartment_id', 'apartment_details', 'category', 'category_details', 'category_name',
             'import_session', 'product', 'description', 'vendor', 'vendor_details', 
@@ -318,6 +299,7 @@ class ImportSessionSerializer(serializers.ModelSerializer):
     apartment_name = serializers.CharField(source='apartment.name', read_only=True)
     duration = serializers.SerializerMethodField()
     uploaded_file_url = serializers.SerializerMethodField()
+    progress_percent = serializers.IntegerField(read_only=True)
     
     def get_duration(self, obj):
         """Calculate import duration"""
@@ -341,7 +323,9 @@ class ImportSessionSerializer(serializers.ModelSerializer):
             'id', 'apartment', 'apartment_name', 'file_name', 'file_size', 
             'file_type', 'uploaded_file', 'uploaded_file_url', 'total_sheets', 
             'total_products', 'successful_imports', 'failed_imports', 'status', 
-            'error_log', 'started_at', 'completed_at', 'duration'
+            'error_log', 'started_at', 'completed_at', 'duration',
+            'import_type', 'processed_sheets', 'current_sheet', 'total_rows',
+            'processed_rows', 'progress_percent', 'progress_updated_at'
         ]
         read_only_fields = ['started_at', 'completed_at', 'uploaded_file_url']
 
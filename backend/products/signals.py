@@ -0,0 +1,107 @@
+from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
+from django.dispatch import receiver
+from orders.models import Order, OrderItem
+from payments.models import Payment
+from issues.models import Issue, IssueItem
+from deliveries.models import Delivery, DeliveryStatusHistory
+from .models import Product
+from .resolver import ProductResolver, schedule_index_invalidation
+from .status_rollup import schedule_rollup_refresh
+from .tags import TAG_FIELDS, sync_product_tags
+
+# Product fields stored in the product resolver index
+INDEXED_FIELDS = {'apartment', 'product', 'sku', 'product_image', 'image_url', 'image_file', 'category'}
+
+
+# Keep ProductStatusRollup in sync with the rows it is derived from.
+# Handlers only record what changed; the refresh runs once per transaction.
+
+@receiver(post_save, sender=Product)
+def create_product_status_rollup(sender, instance, created, **kwargs):
+    if created:
+        schedule_rollup_refresh(product_ids=[instance.pk])
+
+
+# Keep ProductTag in sync with the status / delivery status tag lists of a product
+
+@receiver(post_save, sender=Product)
+def sync_status_tags(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'apartment', *TAG_FIELDS.values()} & set(update_fields):
+        return
+    sync_product_tags([instance], created=created)
+
+
+@receiver(pre_save, sender=OrderItem)
+@receiver(pre_save, sender=Issue)
+def remember_previous_product(sender, instance, **kwargs):
+    """When an existing row is moved to another product, the old product needs a refresh too"""
+    if instance._state.adding:
+        return
+    instance._previous_product_id = sender.objects.filter(pk=instance.pk).values_list(
+        'product_id', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def refresh_rollup_for_product(sender, instance, **kwargs):
+    schedule_rollup_refresh(product_ids=[
+        instance.product_id, getattr(instance, '_previous_product_id', None)
+    ])
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=Delivery)
+@receiver(post_delete, sender=Delivery)
+def refresh_rollup_for_order(sender, instance, **kwargs):
+    order_id = instance.pk if sender is Order else instance.order_id
+    schedule_rollup_refresh(order_ids=[order_id])
+
+
+@receiver(post_save, sender=DeliveryStatusHistory)
+@receiver(post_delete, sender=DeliveryStatusHistory)
+def refresh_rollup_for_delivery(sender, instance, **kwargs):
+    schedule_rollup_refresh(delivery_ids=[instance.delivery_id])
+
+
+@receiver(m2m_changed, sender=Payment.order_items.through)
+def refresh_rollup_for_payment_items(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # instance is an OrderItem
+        schedule_rollup_refresh(product_ids=[instance.product_id])
+    else:
+        schedule_rollup_refresh(order_ids=[instance.order_id])
+
+
+# Keep the product resolver index of an apartment in line with its products,
+# and link new order / issue items to their product when the match is unambiguous
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    schedule_index_invalidation(instance.apartment_id)
+
+
+@receiver(pre_save, sender=OrderItem)
+def link_order_item_product(sender, instance, **kwargs):
+    if instance._state.adding and instance.product_id is None and (instance.sku or instance.product_name):
+        entry = ProductResolver().match(instance.order.apartment_id, sku=instance.sku, name=instance.product_name)
+        if entry:
+            instance.product_id = entry.product_id
+
+
+@receiver(pre_save, sender=IssueItem)
+def link_issue_item_product(sender, instance, **kwargs):
+    if instance._state.adding and instance.product_id is None and instance.product_name:
+        if instance.order_item_id is None:
+            entry = ProductResolver().match(instance.issue.apartment_id, name=instance.product_name)
+            if entry:
+                instance.product_id = entry.product_id
@@ -0,0 +1,262 @@
+"""
+Batch loading of the order / payment / issue / delivery status of products.
+
+Product.order_status_info, has_active_order, is_ordered,
+payment_status_from_orders, issue_status_info and delivery_status_info are
+all derived from the same related rows. Loading them for a whole list of
+products at once takes a fixed number of queries, no matter how many
+products are serialized.
+"""
+from collections import defaultdict
+from django.db.models import Count, prefetch_related_objects
+
+
+ACTIVE_ORDER_STATUSES = ['draft', 'sent']
+
+
+def load_product_status_info(products):
+    """
+    Return {product_id: status info dict} for the given products.
+    The keys of each dict match the Product properties that expose them.
+    Runs at most six queries.
+    """
+    from orders.models import OrderItem
+    from payments.models import Payment
+    from issues.models import Issue
+    from deliveries.models import Delivery, DeliveryStatusHistory
+
+    product_ids = [product.pk for product in products if product.pk]
+    if not product_ids:
+        return {}
+
+    # Order items (same default ordering as OrderItem.objects.filter(product=...))
+    items_by_product = defaultdict(list)
+    for item in OrderItem.objects.filter(product_id__in=product_ids).select_related('order'):
+        items_by_product[item.product_id].append(item)
+    order_ids = {item.order_id for items in items_by_product.values() for item in items}
+    item_ids = [item.id for items in items_by_product.values() for item in items]
+
+    # Payments of those orders, and which order items each payment covers
+    payments_by_order = defaultdict(list)
+    paid_items = set()
+    deliveries_by_order = {}
+    latest_location = {}
+    if order_ids:
+        payments = list(Payment.objects.filter(order_id__in=order_ids).only(
+            'id', 'order_id', 'total_amount', 'amount_paid'
+        ))
+        for payment in payments:
+            payments_by_order[payment.order_id].append(payment)
+        if payments:
+            paid_items = set(Payment.order_items.through.objects.filter(
+                payment_id__in=[payment.id for payment in payments],
+                orderitem_id__in=item_ids,
+            ).values_list('payment_id', 'orderitem_id'))
+
+        deliveries_by_order = {
+            delivery.order_id: delivery
+            for delivery in Delivery.objects.filter(order_id__in=order_ids)
+        }
+        if deliveries_by_order:
+            # Latest known location per delivery
+            history = DeliveryStatusHistory.objects.filter(
+                delivery_id__in=[delivery.id for delivery in deliveries_by_order.values()],
+                location__isnull=False,
+            ).exclude(location='').order_by('-created_at').values_list('delivery_id', 'location')
+            for delivery_id, location in history:
+                latest_location.setdefault(delivery_id, location)
+
+    # Most recent issue per product
+    latest_issue = {}
+    for issue in Issue.objects.filter(product_id__in=product_ids).order_by('-created_at'):
+        latest_issue.setdefault(issue.product_id, issue)
+
+    return {
+        product_id: {
+            'order_status_info': _order_status_info(items_by_product[product_id]),
+            'has_active_order': any(
+                item.order.status in ACTIVE_ORDER_STATUSES for item in items_by_product[product_id]
+            ),
+            'is_ordered': bool(items_by_product[product_id]),
+            'payment_status_from_orders': _payment_status(
+                items_by_product[product_id], payments_by_order, paid_items
+            ),
+            'issue_status_info': _issue_status_info(latest_issue.get(product_id)),
+            'delivery_status_info': _delivery_status_info(
+                items_by_product[product_id], deliveries_by_order, latest_location
+            ),
+            **_latest_statuses(items_by_product[product_id], deliveries_by_order),
+        }
+        for product_id in product_ids
+    }
+
+
+def _order_status_info(order_items):
+    """One entry per distinct order status the product appears in"""
+    order_statuses = []
+    seen_statuses = set()
+
+    for item in order_items:
+        status = item.order.status
+        if status not in seen_statuses:
+            order_statuses.append({
+                'status': status,
+                'po_number': item.order.po_number,
+                'order_id': str(item.order.id),
+                'placed_on': item.order.placed_on.isoformat() if item.order.placed_on else None,
+                'quantity': item.quantity,
+                'expected_delivery': item.order.expected_delivery.isoformat() if item.order.expected_delivery else None,
+                'shipping_address': item.order.shipping_address or None,
+            })
+            seen_statuses.add(status)
+
+    return order_statuses
+
+
+def _payment_status(order_items, payments_by_order, paid_items):
+    """'Paid', 'Partially Paid' or 'Unpaid' from the payments covering the product's order items"""
+    if not order_items:
+        return 'Unpaid'
+
+    total_amount_due = 0
+    total_amount_paid = 0
+
+    for item in order_items:
+        # Calculate this item's share of the order total
+        item_total = float(item.quantity) * float(item.unit_price)
+        total_amount_due += item_total
+
+        for payment in payments_by_order.get(item.order_id, []):
+            # Only payments that include this specific item count towards it
+            if (payment.id, item.id) in paid_items and payment.total_amount > 0:
+                item_proportion = item_total / float(payment.total_amount)
+                total_amount_paid += float(payment.amount_paid) * item_proportion
+
+    if total_amount_due == 0:
+        return 'Unpaid'
+
+    if total_amount_paid >= total_amount_due:
+        return 'Paid'
+    elif total_amount_paid > 0:
+        return 'Partially Paid'
+    else:
+        return 'Unpaid'
+
+
+def _latest_statuses(order_items, deliveries_by_order):
+    """Summary of the product's most recent order and delivery (used by ProductStatusRollup)"""
+    orders = sorted(
+        {item.order_id: item.order for item in order_items}.values(),
+        key=lambda order: (order.placed_on, order.created_at),
+        reverse=True,
+    )
+    delivery = next(
+        (deliveries_by_order[order.id] for order in orders if order.id in deliveries_by_order), None
+    )
+    return {
+        'order_count': len(orders),
+        'latest_order_status': orders[0].status if orders else '',
+        'latest_delivery_status': delivery.status if delivery else '',
+    }
+
+
+def _issue_status_info(latest_issue):
+    if not latest_issue:
+        return {
+            'status': 'No Issue',
+            'priority': None,
+            'type': None,
+            'issue_id': None,
+            'ai_activated': False
+        }
+
+    return {
+        'status': latest_issue.status,
+        'priority': latest_issue.priority,
+        'type': latest_issue.type,
+        'issue_id': str(latest_issue.id),
+        'created_at': latest_issue.created_at.isoformat() if latest_issue.created_at else None,
+        'ai_activated': latest_issue.ai_activated
+    }
+
+
+def _delivery_status_info(order_items, deliveries_by_order, latest_location):
+    """One entry per delivery of the orders the product appears in"""
+    delivery_statuses = []
+    seen_deliveries = set()
+
+    for item in order_items:
+        delivery = deliveries_by_order.get(item.order_id)
+        if delivery is None or delivery.id in seen_deliveries:
+            # No delivery record for this order yet
+            continue
+
+        delivery_statuses.append({
+            'status': delivery.status,
+            'order_reference': delivery.order_reference,
+            'delivery_id': str(delivery.id),
+            'expected_date': delivery.expected_date.isoformat() if delivery.expected_date else None,
+            'actual_date': delivery.actual_date.isoformat() if delivery.actual_date else None,
+            'tracking_number': delivery.tracking_number,
+            'priority': delivery.priority,
+            'location': latest_location.get(delivery.id),
+        })
+        seen_deliveries.add(delivery.id)
+
+    return delivery_statuses
+
+
+def prime_product_status_info(products):
+    """Load status info for all products at once and cache it on each instance"""
+    status_info = load_product_status_info(products)
+    for product in products:
+        if product.pk in status_info:
+            product.__dict__['status_info'] = status_info[product.pk]
+
+
+def attach_related_counts(products):
+    """
+    Load the relations ProductSerializer nests (apartment, client, vendor,
+    category) and the counts their serializers show, in a fixed number of
+    queries. Counts are stored as *_annotated attributes, which the nested
+    serializers prefer over per-object count() queries.
+    """
+    from apartments.models import Apartment
+    from orders.models import Order
+    from issues.models import Issue
+
+    # No-op for relations already loaded with select_related
+    prefetch_related_objects(products, 'apartment__client', 'vendor', 'category')
+
+    # select_related gives every product its own vendor/client instance, so annotate each of them
+    vendor_ids = {product.vendor_id for product in products if product.vendor_id}
+    client_ids = {
+        product.apartment.client_id for product in products
+        if product.apartment_id and product.apartment.client_id
+    }
+
+    orders_count = {}
+    active_issues = {}
+    if vendor_ids:
+        orders_count = dict(
+            Order.objects.filter(vendor_id__in=vendor_ids).order_by()
+            .values('vendor_id').annotate(count=Count('id')).values_list('vendor_id', 'count')
+        )
+        active_issues = dict(
+            Issue.objects.filter(vendor_id__in=vendor_ids).exclude(status='Closed').order_by()
+            .values('vendor_id').annotate(count=Count('id')).values_list('vendor_id', 'count')
+        )
+
+    apartments_count = {}
+    if client_ids:
+        apartments_count = dict(
+            Apartment.objects.filter(client_id__in=client_ids).order_by()
+            .values('client_id').annotate(count=Count('id')).values_list('client_id', 'count')
+        )
+
+    for product in products:
+        if product.vendor_id:
+            product.vendor.orders_count_annotated = orders_count.get(product.vendor_id, 0)
+            product.vendor.active_issues_annotated = active_issues.get(product.vendor_id, 0)
+        if product.apartment_id and product.apartment.client_id:
+            product.apartment.client.apartments_count_annotated = apartments_count.get(product.apartment.client_id, 0)
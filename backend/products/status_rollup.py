@@ -0,0 +1,168 @@
+"""
+Maintenance of ProductStatusRollup.
+
+Signal handlers (products.signals) record which products, orders and
+deliveries changed; the affected products are refreshed once, when the
+surrounding transaction commits, using the same batch loader that the
+product serializers read from (products.status_info). Rebuild and verify
+walk all products in batches.
+"""
+import logging
+import threading
+from django.db import transaction
+from .status_info import load_product_status_info
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_FIELDS = [
+    'is_ordered', 'has_active_order', 'order_count', 'latest_order_status',
+    'payment_status', 'latest_delivery_status', 'issue_status', 'issue_priority',
+]
+
+_pending = threading.local()
+
+
+def rollup_values(info):
+    """ProductStatusRollup column values for one product's status info"""
+    issue = info['issue_status_info']
+    return {
+        'is_ordered': info['is_ordered'],
+        'has_active_order': info['has_active_order'],
+        'order_count': info['order_count'],
+        'latest_order_status': info['latest_order_status'],
+        'payment_status': info['payment_status_from_orders'],
+        'latest_delivery_status': info['latest_delivery_status'],
+        'issue_status': issue['status'],
+        'issue_priority': issue['priority'] or '',
+    }
+
+
+def _load_rollups(product_ids):
+    """Build (unsaved) rollup rows for the given products that still exist"""
+    from .models import Product, ProductStatusRollup
+
+    products = list(Product.objects.filter(pk__in=product_ids).only('id'))
+    status_info = load_product_status_info(products)
+    return [
+        ProductStatusRollup(product_id=product_id, **rollup_values(info))
+        for product_id, info in status_info.items()
+    ]
+
+
+def refresh_product_status_rollups(product_ids, batch_size=500):
+    """Recompute and upsert the rollups of the given products; returns the number written"""
+    from .models import ProductStatusRollup
+
+    product_ids = list({product_id for product_id in product_ids if product_id})
+    written = 0
+    for start in range(0, len(product_ids), batch_size):
+        rollups = _load_rollups(product_ids[start:start + batch_size])
+        if rollups:
+            ProductStatusRollup.objects.bulk_create(
+                rollups,
+                update_conflicts=True,
+                unique_fields=['product'],
+                update_fields=ROLLUP_FIELDS + ['refreshed_at'],
+            )
+            written += len(rollups)
+    return written
+
+
+def schedule_rollup_refresh(product_ids=(), order_ids=(), delivery_ids=()):
+    """
+    Refresh the rollups affected by a change once the current transaction
+    commits (immediately in autocommit mode). Changes made in one transaction
+    are refreshed together, so a bulk order import refreshes each product once.
+    """
+    pending = getattr(_pending, 'changes', None)
+    if pending is None:
+        pending = _pending.changes = {'products': set(), 'orders': set(), 'deliveries': set()}
+    pending['products'].update(product_id for product_id in product_ids if product_id)
+    pending['orders'].update(order_id for order_id in order_ids if order_id)
+    pending['deliveries'].update(delivery_id for delivery_id in delivery_ids if delivery_id)
+
+    # Every change registers a callback; the first one to run takes all pending
+    # changes and the rest find nothing to do. Changes recorded in a transaction
+    # that rolls back stay pending and are refreshed with the next commit, which
+    # only costs a redundant (but correct) recomputation.
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    from orders.models import OrderItem
+    from deliveries.models import Delivery
+
+    pending = getattr(_pending, 'changes', None)
+    _pending.changes = None
+    if not pending:
+        return
+
+    product_ids = pending['products']
+    order_ids = pending['orders']
+    if pending['deliveries']:
+        order_ids |= set(
+            Delivery.objects.filter(pk__in=pending['deliveries'], order__isnull=False)
+            .values_list('order_id', flat=True)
+        )
+    if order_ids:
+        product_ids |= set(
+            OrderItem.objects.filter(order_id__in=order_ids, product__isnull=False)
+            .values_list('product_id', flat=True)
+        )
+    if not product_ids:
+        return
+
+    try:
+        refresh_product_status_rollups(product_ids)
+    except Exception as e:
+        # The rollup is derived data; `rebuild_product_status_rollups --verify --fix` repairs it
+        logger.error(f"Failed to refresh status rollups of {len(product_ids)} products: {str(e)}")
+
+
+def iter_product_id_batches(batch_size=500):
+    from .models import Product
+
+    product_ids = list(Product.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(product_ids), batch_size):
+        yield product_ids[start:start + batch_size]
+
+
+def rebuild_product_status_rollups(batch_size=500):
+    """Recompute every product's rollup and drop orphaned rows; returns the number written"""
+    from .models import Product, ProductStatusRollup
+
+    written = 0
+    for batch in iter_product_id_batches(batch_size):
+        written += refresh_product_status_rollups(batch, batch_size=batch_size)
+    ProductStatusRollup.objects.exclude(product__in=Product.objects.all()).delete()
+    return written
+
+
+def verify_product_status_rollups(batch_size=500):
+    """
+    Compare stored rollups with the live computation.
+    Returns {'checked', 'missing', 'mismatched'}; the last two map product ids
+    to the expected values (and, for mismatches, the differing fields).
+    """
+    from .models import ProductStatusRollup
+
+    result = {'checked': 0, 'missing': {}, 'mismatched': {}}
+    for batch in iter_product_id_batches(batch_size):
+        stored = {
+            rollup.product_id: rollup
+            for rollup in ProductStatusRollup.objects.filter(product_id__in=batch)
+        }
+        for expected in _load_rollups(batch):
+            result['checked'] += 1
+            rollup = stored.get(expected.product_id)
+            if rollup is None:
+                result['missing'][expected.product_id] = expected
+                continue
+            differences = {
+                field: (getattr(rollup, field), getattr(expected, field))
+                for field in ROLLUP_FIELDS
+                if getattr(rollup, field) != getattr(expected, field)
+            }
+            if differences:
+                result['mismatched'][expected.product_id] = differences
+    return result
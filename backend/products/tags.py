@@ -0,0 +1,131 @@
+"""
+Status tags of products in an indexed side table.
+
+Product.status and Product.delivery_status_tags stay JSON lists, which is
+what the API reads and writes. Each tag is also stored as a ProductTag row
+(product, apartment, kind, tag), rewritten when a product is saved, so
+"products with tag X" is an index lookup: a JSON list can only be matched by
+reading every row, and JSON lookups behave differently on SQLite and
+PostgreSQL.
+
+Filter with Product.objects.with_status() / with_delivery_tag(); count per
+apartment with ProductTag.objects.filter(...).product_count(). bulk_create
+and update() bypass post_save; call sync_product_tags() after them, or run
+`manage.py rebuild_product_tags`.
+"""
+import json
+from django.db import transaction
+
+# ProductTag kind -> Product field holding the tag list
+TAG_FIELDS = {
+    'status': 'status',
+    'delivery': 'delivery_status_tags',
+}
+
+DEFAULT_STATUS = ['Design Approved']
+TAG_MAX_LENGTH = 100
+
+
+def status_tags(value):
+    """Product.status as a list; legacy rows may hold a JSON string or a bare status"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return [value] if value else list(DEFAULT_STATUS)
+        if isinstance(parsed, list):
+            return parsed
+        return [parsed] if parsed else list(DEFAULT_STATUS)
+    return list(DEFAULT_STATUS)
+
+
+def delivery_tags(value):
+    """Product.delivery_status_tags as a list; legacy rows may hold a JSON string or comma-separated tags"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+            if isinstance(parsed, list):
+                return parsed
+        except ValueError:
+            pass
+        return [tag.strip() for tag in value.split(',') if tag.strip()]
+    return []
+
+
+NORMALIZERS = {
+    'status': status_tags,
+    'delivery': delivery_tags,
+}
+
+
+def tag_values(product):
+    """Set of (kind, tag) pairs of a product, as the API shows them"""
+    values = set()
+    for kind, field in TAG_FIELDS.items():
+        for tag in NORMALIZERS[kind](getattr(product, field)):
+            tag = str(tag).strip()[:TAG_MAX_LENGTH]
+            if tag:
+                values.add((kind, tag))
+    return values
+
+
+def sync_product_tags(products, created=False, batch_size=1000):
+    """
+    Bring the ProductTag rows of saved products in line with their tag lists.
+    Only products whose tags (or apartment) changed are rewritten; `created`
+    skips the lookup of existing rows. Returns the number of products rewritten.
+    """
+    from .models import ProductTag
+
+    products = [product for product in products if product.pk]
+    if not products:
+        return 0
+
+    expected = {
+        product.pk: (product.apartment_id, tag_values(product))
+        for product in products
+    }
+    stored = {product_id: (None, set()) for product_id in expected}
+    if not created:
+        rows = ProductTag.objects.filter(product_id__in=list(expected)).values_list(
+            'product_id', 'apartment_id', 'kind', 'tag'
+        )
+        for product_id, apartment_id, kind, tag in rows:
+            stored[product_id] = (apartment_id, stored[product_id][1] | {(kind, tag)})
+
+    changed = [
+        product_id for product_id, (apartment_id, values) in expected.items()
+        if values != stored[product_id][1] or (values and apartment_id != stored[product_id][0])
+    ]
+    if not changed:
+        return 0
+
+    with transaction.atomic():
+        if not created:
+            ProductTag.objects.filter(product_id__in=changed).delete()
+        ProductTag.objects.bulk_create(
+            [
+                ProductTag(product_id=product_id, apartment_id=expected[product_id][0], kind=kind, tag=tag)
+                for product_id in changed
+                for kind, tag in sorted(expected[product_id][1])
+            ],
+            batch_size=batch_size,
+        )
+    return len(changed)
+
+
+def rebuild_product_tags(batch_size=1000):
+    """Sync the tags of all products in batches; returns (products checked, products rewritten)"""
+    from .models import Product
+    from .status_rollup import iter_product_id_batches
+
+    checked = rewritten = 0
+    for batch in iter_product_id_batches(batch_size):
+        products = list(Product.objects.filter(pk__in=batch).only('id', 'apartment', *TAG_FIELDS.values()))
+        checked += len(products)
+        rewritten += sync_product_tags(products, batch_size=batch_size)
+    return checked, rewritten
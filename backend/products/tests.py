@@ -0,0 +1,107 @@
+import datetime
+import uuid
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework.test import APIClient
+from apartments.models import Apartment
+from clients.models import Client
+from deliveries.models import Delivery
+from issues.models import Issue
+from orders.models import Order, OrderItem
+from payments.models import Payment
+from vendors.models import Vendor
+from .models import Product
+
+
+class ProductListQueryCountTests(TestCase):
+    """The product list loads status info, vendors and clients per page, not per product"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+        cls.client_record = Client.objects.create(name='Client', email='client@example.com')
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def create_apartment(self, name, product_count):
+        today = datetime.date.today()
+        apartment = Apartment.objects.create(
+            name=name, client=self.client_record, address='Address', start_date=today, due_date=today
+        )
+        for i in range(product_count):
+            vendor = Vendor.objects.create(name=f'{name} vendor {i}', email=f'vendor{i}@example.com')
+            product = Product.objects.create(
+                apartment=apartment, vendor=vendor, product=f'{name} product {i}', sku=f'{name}-{i}',
+                unit_price=Decimal('100.00'), qty=2,
+            )
+            # A sent order gets its delivery from orders.signals
+            order = Order.objects.create(
+                po_number=f'{name}-PO-{i}', apartment=apartment, vendor=vendor, total=Decimal('200.00'),
+                placed_on=today, status='sent',
+            )
+            item = OrderItem.objects.create(
+                order=order, product=product, product_name=product.product,
+                unit_price=Decimal('100.00'), quantity=2, total_price=Decimal('200.00'),
+            )
+            payment = Payment.objects.create(
+                apartment=apartment, vendor=vendor, order=order, order_reference=order.po_number,
+                due_date=today, total_amount=Decimal('200.00'), amount_paid=Decimal('50.00'),
+            )
+            payment.order_items.add(item)
+            Issue.objects.create(
+                apartment=apartment, vendor=vendor, product=product, type='Damaged', description='Broken leg',
+            )
+        return apartment
+
+    def list_products(self, apartment):
+        return self.api.get('/api/products/', {'apartment': str(apartment.id)})
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        small = self.create_apartment('Small', 5)
+        large = self.create_apartment('Large', 50)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.list_products(small)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(Delivery.objects.filter(apartment=small).count(), 5)
+
+        with self.assertNumQueries(len(queries)):
+            response = self.list_products(large)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 50)
+
+    def test_list_reports_related_status(self):
+        apartment = self.create_apartment('Status', 2)
+
+        product = self.list_products(apartment).data['results'][0]
+
+        self.assertTrue(product['is_ordered'])
+        self.assertEqual(product['vendor_details']['orders_count'], 1)
+
+
+class ImportProgressTests(TestCase):
+    """Progress endpoints answer malformed and unknown session ids with 400 and 404"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_session_id_is_validated(self):
+        for url in ('/api/products/import_progress/', '/api/products/import_progress_stream/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.api.get(url, {'session_id': 'not-a-uuid'}).status_code, 400)
+                self.assertEqual(self.api.get(url, {'session_id': str(uuid.uuid4())}).status_code, 404)
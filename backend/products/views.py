@@ -2,6 +2,7 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.renderers import JSONRenderer
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse, JsonResponse
@@ -9,44 +10,69 @@ from django.conf import settings
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
 from drf_spectacular.openapi import OpenApiTypes
 from config.swagger_utils import add_viewset_tags
+from config.sse import EventStreamRenderer, event_stream_response
 from apartments.models import Apartment
-from .models import Product
+from .models import Product, ProductTag
 from .category_models import ProductCategory, ImportSession
 from .serializers import (
     ProductSerializer, ProductCategorySerializer, 
     ImportSessionSerializer, ProductImportSerializer
 )
 from .import_service import ProductImportService
+from .import_jobs import (
+    import_progress_payload, import_progress_stream, refresh_if_stale,
+    queued_import_response_data, wants_async_import
+)
 import pandas as pd
 import io
 import os
+import uuid
 
 
 @add_viewset_tags('Products', 'Product')
 class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.select_related('apartment', 'vendor').all()
+    queryset = Product.objects.select_related('apartment', 'apartment__client', 'vendor', 'category').all()
     serializer_class = ProductSerializer
     parser_classes = [JSONParser, MultiPartParser, FormParser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = [
         'apartment', 'vendor', 'availability', 'payment_status', 
-        'issue_state', 'category', 'room', 'replacement_requested', 'replacement_approved'
+        'issue_state', 'category', 'room', 'replacement_requested', 'replacement_approved',
+        # Lifecycle status derived from orders, payments, deliveries and issues (ProductStatusRollup)
+        'status_rollup__is_ordered', 'status_rollup__has_active_order', 'status_rollup__latest_order_status',
+        'status_rollup__payment_status', 'status_rollup__latest_delivery_status', 'status_rollup__issue_status'
     ]
     search_fields = ['product', 'sku', 'vendor__name', 'apartment__name', 'brand', 'category']
-    ordering_fields = ['product', 'unit_price', 'created_at', 'expected_delivery_date', 'actual_delivery_date']
+    ordering_fields = [
+        'product', 'unit_price', 'created_at', 'expected_delivery_date', 'actual_delivery_date',
+        'status_rollup__latest_order_status', 'status_rollup__payment_status',
+        'status_rollup__latest_delivery_status', 'status_rollup__issue_status'
+    ]
     ordering = ['-created_at']
 
     def get_queryset(self):
         """
         Optionally restricts the returned products to a given apartment,
         by filtering against a `apartment` query parameter in the URL.
+        `status` and `delivery_status_tags` (comma-separated) keep products
+        having any of the given tags.
         """
         queryset = super().get_queryset()
         apartment_id = self.request.query_params.get('apartment', None)
         if apartment_id is not None:
             queryset = queryset.filter(apartment=apartment_id)
+        status_tags = self._tag_param('status')
+        if status_tags:
+            queryset = queryset.with_status(*status_tags)
+        delivery_tags = self._tag_param('delivery_status_tags')
+        if delivery_tags:
+            queryset = queryset.with_delivery_tag(*delivery_tags)
         return queryset
     
+    def _tag_param(self, name):
+        value = self.request.query_params.get(name) or ''
+        return [tag.strip() for tag in value.split(',') if tag.strip()]
+    
     def perform_create(self, serializer):
         """Handle product creation with image file upload"""
         instance = serializer.save()
@@ -186,8 +212,9 @@ class ProductViewSet(viewsets.ModelViewSet):
         products = self.get_queryset().filter(apartment=apartment_id)
         
         total_items = products.count()
-        ordered_items = products.filter(status__in=['Ordered', 'Shipped', 'Delivered']).count()
-        delivered_items = products.filter(status='Delivered').count()
+        status_tags = ProductTag.objects.filter(apartment=apartment_id, kind=ProductTag.STATUS)
+        ordered_items = status_tags.filter(tag__in=['Ordered', 'Shipped', 'Delivered']).product_count()
+        delivered_items = status_tags.filter(tag='Delivered').product_count()
         open_issues = products.exclude(issue_state='No Issue').count()
         
         total_value = sum(p.total_amount for p in products)
@@ -218,7 +245,9 @@ class ProductViewSet(viewsets.ModelViewSet):
         tags=['Products'],
         operation_id='import_products',
         summary='Import products from Excel/CSV file',
-        description='Upload an Excel or CSV file to import products. Each sheet in Excel becomes a category.',
+        description='Upload an Excel or CSV file to import products. Each sheet in Excel becomes a category. '
+                    'Send async=true to run the import in the background: the response is 202 with the '
+                    'import session id, and progress is available from import_progress / import_progress_stream.',
         request=ProductImportSerializer,
         responses={
             200: {
@@ -304,9 +333,17 @@ class ProductViewSet(viewsets.ModelViewSet):
                 file=uploaded_file,
                 apartment_id=apartment_id,
                 vendor_id=vendor_id,
-                user=request.user
+                user=request.user,
+                run_async=wants_async_import(request)
             )
             
+            if result.get('queued'):
+                return Response({
+                    'success': True,
+                    'message': 'Import queued',
+                    'data': queued_import_response_data(request, result['session_id'])
+                }, status=status.HTTP_202_ACCEPTED)
+            
             if result['success']:
                 return Response({
                     'success': True,
@@ -461,9 +498,19 @@ class ProductViewSet(viewsets.ModelViewSet):
                 file=uploaded_file,
                 apartment_id=str(apartment.id),
                 vendor_id=vendor_id,
-                user=request.user
+                user=request.user,
+                run_async=wants_async_import(request)
             )
             
+            if result.get('queued'):
+                data = queued_import_response_data(request, result['session_id'])
+                data.update({'apartment_id': str(apartment.id), 'apartment_name': apartment.name})
+                return Response({
+                    'success': True,
+                    'message': 'Apartment created and product import queued',
+                    'data': data
+                }, status=status.HTTP_202_ACCEPTED)
+            
             if result['success']:
                 return Response({
                     'success': True,
@@ -672,6 +719,81 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @extend_schema(
+        tags=['Products'],
+        operation_id='get_import_progress',
+        summary='Get import progress',
+        description='Poll the progress counters of a product or order import session',
+        parameters=[
+            OpenApiParameter(
+                name='session_id',
+                type=OpenApiTypes.UUID,
+                location=OpenApiParameter.QUERY,
+                description='UUID of the import session'
+            )
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def import_progress(self, request):
+        """
+        Get the progress of an import session
+        """
+        session_id = request.query_params.get('session_id')
+        if not session_id:
+            return Response(
+                {'error': 'session_id parameter is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            session_id = uuid.UUID(session_id)
+        except ValueError:
+            return Response(
+                {'error': 'session_id must be a valid UUID'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        session = refresh_if_stale(get_object_or_404(ImportSession, id=session_id))
+        return Response(import_progress_payload(session))
+
+    @extend_schema(
+        tags=['Products'],
+        operation_id='stream_import_progress',
+        summary='Stream import progress',
+        description='Server-sent event stream of an import session: `progress` events while it runs, '
+                    'then a final `done` event',
+        parameters=[
+            OpenApiParameter(
+                name='session_id',
+                type=OpenApiTypes.UUID,
+                location=OpenApiParameter.QUERY,
+                description='UUID of the import session'
+            )
+        ]
+    )
+    @action(detail=False, methods=['get'], renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def import_progress_stream(self, request):
+        """
+        Stream the progress of an import session as server-sent events
+        """
+        session_id = request.query_params.get('session_id')
+        if not session_id:
+            return Response(
+                {'error': 'session_id parameter is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            session_id = uuid.UUID(session_id)
+        except ValueError:
+            return Response(
+                {'error': 'session_id must be a valid UUID'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        session = get_object_or_404(ImportSession, id=session_id)
+        return event_stream_response(import_progress_stream(session.id))
+
     @extend_schema(
         tags=['Products'],
         operation_id='delete_import_session',
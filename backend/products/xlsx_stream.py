@@ -0,0 +1,238 @@
+"""
+Single-pass streaming reader for .xlsx spreadsheet imports.
+
+Rows are read lazily with openpyxl in read-only mode, and embedded images are
+located by reading the drawing parts of the xlsx zip directly: only the small
+anchor XML is parsed up front, and image bytes are read from the archive when
+the row they are anchored to is imported. Peak memory therefore stays bounded
+by one row plus one image (and the workbook's shared-strings table) instead of
+the whole workbook, which the previous pd.read_excel + load_workbook(full)
+combination loaded twice.
+"""
+import logging
+import posixpath
+import zipfile
+from openpyxl import load_workbook
+from openpyxl.xml.functions import fromstring
+
+logger = logging.getLogger(__name__)
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+DOC_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+SHEET_DRAWING_NS = 'http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing'
+DRAWING_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+
+DRAWING_REL_TYPE = f'{DOC_REL_NS}/drawing'
+ANCHOR_TAGS = (f'{{{SHEET_DRAWING_NS}}}twoCellAnchor', f'{{{SHEET_DRAWING_NS}}}oneCellAnchor')
+
+
+def clean_column_name(name):
+    """Header cleaning used by the import services (strip, lower-case, spaces to underscores)"""
+    return str(name).strip().lower().replace(' ', '_')
+
+
+def _part_path(source_part, target):
+    """Resolve a relationship target against the part that declares it"""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def _rels_path(part):
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, '_rels', f'{name}.rels')
+
+
+class XlsxImage:
+    """An image anchored in a worksheet; its bytes stay in the archive until read()"""
+
+    def __init__(self, archive, part, row, column, index):
+        self._archive = archive
+        self.part = part
+        self.row = row  # 1-based, like worksheet rows
+        self.column = column  # 1-based
+        self.index = index  # 1-based position among the sheet's images
+
+    @property
+    def extension(self):
+        extension = posixpath.splitext(self.part)[1].lower()
+        return '.jpg' if extension == '.jpeg' else extension or '.png'
+
+    def read(self):
+        return self._archive.read(self.part)
+
+
+class XlsxSheetStream:
+    """
+    One worksheet of an XlsxStreamReader.
+    The first non-empty row is the header; iterating yields
+    (row_number, row_dict, images) for every following non-empty row.
+    """
+
+    def __init__(self, reader, name):
+        self.reader = reader
+        self.name = name
+        self.images = reader.sheet_images(name)
+        self._rows = enumerate(reader.workbook[name].iter_rows(values_only=True), start=1)
+        self.header_row = None
+        self.columns = self._read_header()
+
+    def _read_header(self):
+        for row_number, values in self._rows:
+            if any(value is not None for value in values):
+                self.header_row = row_number
+                return self.reader.build_columns(values)
+        return []
+
+    def __iter__(self):
+        columns = self.columns
+        width = len(columns)
+        for row_number, values in self._rows:
+            if all(value is None for value in values):
+                continue
+            row = dict(zip(columns, values[:width]))
+            yield row_number, row, self.images.get(row_number, [])
+
+
+class XlsxStreamReader:
+    """
+    Streaming reader for an .xlsx workbook.
+
+        with XlsxStreamReader(path, normalize_header=clean_column_name) as reader:
+            for sheet_name, row_number, row, images in reader.iter_rows():
+                ...
+
+    Header labels follow pandas.read_excel: blank headers become "Unnamed: N"
+    and duplicates get a ".1", ".2" suffix, so column mapping is unchanged.
+    """
+
+    def __init__(self, file_path, normalize_header=None):
+        self.file_path = file_path
+        self.normalize_header = normalize_header
+        self.archive = zipfile.ZipFile(file_path)
+        self.workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+        self._sheet_parts = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.workbook.close()
+        self.archive.close()
+
+    @property
+    def sheet_names(self):
+        return self.workbook.sheetnames
+
+    def sheet_row_count(self, sheet_name):
+        """Row count from the sheet dimension (header included); 0 if the file does not declare it"""
+        return self.workbook[sheet_name].max_row or 0
+
+    def total_data_rows(self):
+        return sum(max(self.sheet_row_count(name) - 1, 0) for name in self.sheet_names)
+
+    def open_sheet(self, sheet_name):
+        return XlsxSheetStream(self, sheet_name)
+
+    def iter_rows(self):
+        """Yield (sheet_name, row_number, row_dict, images) across all sheets"""
+        for sheet_name in self.sheet_names:
+            for row_number, row, images in self.open_sheet(sheet_name):
+                yield sheet_name, row_number, row, images
+
+    def build_columns(self, header_values):
+        columns = []
+        seen = {}
+        for position, value in enumerate(header_values):
+            label = f'Unnamed: {position}' if value is None or str(value).strip() == '' else str(value)
+            if label in seen:
+                seen[label] += 1
+                label = f'{label}.{seen[label]}'
+            else:
+                seen[label] = 0
+            columns.append(self.normalize_header(label) if self.normalize_header else label)
+        return columns
+
+    def _read_xml(self, part):
+        try:
+            return fromstring(self.archive.read(part))
+        except KeyError:
+            return None
+
+    def _relationships(self, part):
+        """{relationship id: (type, target part)} for a part"""
+        root = self._read_xml(_rels_path(part))
+        if root is None:
+            return {}
+        relationships = {}
+        for rel in root.iter(f'{{{PKG_REL_NS}}}Relationship'):
+            if rel.get('TargetMode') == 'External':
+                continue
+            relationships[rel.get('Id')] = (rel.get('Type'), _part_path(part, rel.get('Target')))
+        return relationships
+
+    def _worksheet_part(self, sheet_name):
+        if self._sheet_parts is None:
+            self._sheet_parts = {}
+            workbook_part = 'xl/workbook.xml'
+            relationships = self._relationships(workbook_part)
+            root = self._read_xml(workbook_part)
+            if root is not None:
+                for sheet in root.iter(f'{{{MAIN_NS}}}sheet'):
+                    rel = relationships.get(sheet.get(f'{{{DOC_REL_NS}}}id'))
+                    if rel:
+                        self._sheet_parts[sheet.get('name')] = rel[1]
+        return self._sheet_parts.get(sheet_name)
+
+    def sheet_images(self, sheet_name):
+        """
+        Map 1-based row numbers to the images anchored on them.
+        Only anchor XML is parsed; image data is read on demand.
+        """
+        images = {}
+        sheet_part = self._worksheet_part(sheet_name)
+        if not sheet_part:
+            return images
+
+        index = 0
+        for rel_type, drawing_part in self._relationships(sheet_part).values():
+            if rel_type != DRAWING_REL_TYPE:
+                continue
+            drawing = self._read_xml(drawing_part)
+            if drawing is None:
+                continue
+            media = self._relationships(drawing_part)
+
+            for anchor in drawing:
+                if anchor.tag not in ANCHOR_TAGS:
+                    continue
+                start = anchor.find(f'{{{SHEET_DRAWING_NS}}}from')
+                if start is None:
+                    continue
+                row = int(start.findtext(f'{{{SHEET_DRAWING_NS}}}row', '0')) + 1
+                column = int(start.findtext(f'{{{SHEET_DRAWING_NS}}}col', '0')) + 1
+
+                for blip in anchor.iter(f'{{{DRAWING_NS}}}blip'):
+                    rel = media.get(blip.get(f'{{{DOC_REL_NS}}}embed'))
+                    if not rel:
+                        continue
+                    index += 1
+                    images.setdefault(row, []).append(XlsxImage(self.archive, rel[1], row, column, index))
+
+        if images:
+            logger.info(f"Found {index} images in sheet '{sheet_name}'")
+        return images
+
+
+def iter_dataframe_rows(df):
+    """
+    Adapt a DataFrame (CSV and legacy .xls imports) to the (row_number, row, images)
+    tuples produced by XlsxSheetStream. Column names must already be cleaned.
+    """
+    for index, row in df.iterrows():
+        yield index + 2, row, []  # +2 because Excel has header row and is 1-based
+
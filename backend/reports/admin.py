@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import ReportJob
 
-# Reports app doesn't have models, so no admin registration needed
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ['report_type', 'output_format', 'status', 'row_count', 'requested_by', 'created_at', 'completed_at']
+    list_filter = ['report_type', 'output_format', 'status']
+    readonly_fields = ['id', 'created_at', 'started_at', 'completed_at']
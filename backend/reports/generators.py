@@ -0,0 +1,206 @@
+"""
+Report definitions.
+
+A report is a queryset plus a row function: rows() walks the queryset with
+iterator(chunk_size=REPORT_QUERY_CHUNK_SIZE), so a multi-year export holds
+one chunk of model instances in memory at a time, whatever the output
+format (see reports.writers).
+"""
+from collections import namedtuple
+from django.conf import settings
+from django.db.models import Avg, Count, Sum
+
+from apartments.models import Apartment
+from products.models import Product
+from orders.models import Order
+from payments.models import Payment
+from issues.models import Issue
+
+# `width` is in Excel character units; PDF widths are derived from it
+Column = namedtuple('Column', ['header', 'width', 'money'], defaults=[15, False])
+
+
+class Report:
+    """
+    Base report: subclasses define the columns, queryset and row values.
+    Row values are native Python types (str, int, Decimal, date); the
+    writers format them.
+    """
+    name = ''
+    title = ''
+    columns = []
+    uses_dates = False
+
+    def __init__(self, start_date=None, end_date=None, apartment_id=None, vendor_id=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.apartment_id = apartment_id
+        self.vendor_id = vendor_id
+
+    @property
+    def headers(self):
+        return [column.header for column in self.columns]
+
+    @property
+    def subtitle(self):
+        return f'{self.start_date} to {self.end_date}' if self.uses_dates else ''
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def row(self, obj):
+        raise NotImplementedError
+
+    def summary(self):
+        """[(label, value)] shown above the PDF / Excel tables"""
+        return [(f'Total {self.title.replace(" Report", "")}:', self.get_queryset().count())]
+
+    def rows(self):
+        chunk_size = getattr(settings, 'REPORT_QUERY_CHUNK_SIZE', 2000)
+        for obj in self.get_queryset().iterator(chunk_size=chunk_size):
+            yield self.row(obj)
+
+
+class OrdersReport(Report):
+    name = 'orders'
+    title = 'Orders Report'
+    uses_dates = True
+    columns = [
+        Column('PO Number', 18), Column('Apartment', 30), Column('Vendor', 30), Column('Items', 8),
+        Column('Total', 14, money=True), Column('Status', 12), Column('Date', 12),
+    ]
+
+    def get_queryset(self):
+        orders = Order.objects.filter(placed_on__gte=self.start_date, placed_on__lte=self.end_date)
+        if self.apartment_id:
+            orders = orders.filter(apartment_id=self.apartment_id)
+        if self.vendor_id:
+            orders = orders.filter(vendor_id=self.vendor_id)
+        return orders.select_related('apartment', 'vendor').order_by('placed_on', 'po_number')
+
+    def row(self, order):
+        return [
+            order.po_number, order.apartment.name, order.vendor.name, order.items_count,
+            order.total, order.status, order.placed_on,
+        ]
+
+    def summary(self):
+        # One aggregate instead of count() plus a Sum per output format
+        totals = self.get_queryset().order_by().aggregate(count=Count('pk'), value=Sum('total'), average=Avg('total'))
+        return [
+            ('Total Orders:', totals['count']),
+            ('Total Value:', totals['value'] or 0),
+            ('Average Order Value:', totals['average'] or 0),
+        ]
+
+
+class PaymentsReport(Report):
+    name = 'payments'
+    title = 'Payments Report'
+    uses_dates = True
+    columns = [
+        Column('Order Reference', 20), Column('Vendor', 30), Column('Amount', 14, money=True),
+        Column('Paid', 14, money=True), Column('Status', 12), Column('Due Date', 12),
+        Column('Last Payment', 14), Column('Method', 16),
+    ]
+
+    def get_queryset(self):
+        payments = Payment.objects.filter(due_date__gte=self.start_date, due_date__lte=self.end_date)
+        if self.vendor_id:
+            payments = payments.filter(vendor_id=self.vendor_id)
+        return payments.select_related('vendor').order_by('due_date', 'order_reference')
+
+    def row(self, payment):
+        return [
+            payment.order_reference, payment.vendor.name if payment.vendor else 'N/A',
+            payment.total_amount, payment.amount_paid, payment.status, payment.due_date,
+            payment.last_payment_date, payment.payment_method,
+        ]
+
+    def summary(self):
+        totals = self.get_queryset().order_by().aggregate(
+            count=Count('pk'), amount=Sum('total_amount'), paid=Sum('amount_paid'),
+        )
+        return [
+            ('Total Payments:', totals['count']),
+            ('Total Amount:', totals['amount'] or 0),
+            ('Total Paid:', totals['paid'] or 0),
+        ]
+
+
+class InventoryReport(Report):
+    name = 'inventory'
+    title = 'Inventory Report'
+    columns = [
+        Column('SKU', 16), Column('Name', 40), Column('Category', 20), Column('Vendor', 30),
+        Column('Price', 12, money=True), Column('Qty', 6), Column('Availability', 14),
+    ]
+
+    def get_queryset(self):
+        products = Product.objects.select_related('vendor', 'category')
+        if self.apartment_id:
+            products = products.filter(apartment_id=self.apartment_id)
+        if self.vendor_id:
+            products = products.filter(vendor_id=self.vendor_id)
+        return products.order_by('created_at')
+
+    def row(self, product):
+        return [
+            product.sku, product.product, product.category.name if product.category else '',
+            product.vendor.name if product.vendor else 'N/A', product.unit_price, product.qty,
+            product.availability,
+        ]
+
+
+class ApartmentsReport(Report):
+    name = 'apartments'
+    title = 'Apartments Report'
+    columns = [
+        Column('Name', 30), Column('Client', 30), Column('Status', 14), Column('Progress %', 11),
+        Column('Start Date', 12), Column('Due Date', 12),
+    ]
+
+    def get_queryset(self):
+        return Apartment.objects.select_related('client').order_by('name')
+
+    def row(self, apartment):
+        return [
+            apartment.name, apartment.client.name if apartment.client else 'N/A', apartment.status,
+            apartment.progress, apartment.start_date, apartment.due_date,
+        ]
+
+
+class IssuesReport(Report):
+    name = 'issues'
+    title = 'Issues Report'
+    uses_dates = True
+    columns = [
+        Column('Type', 24), Column('Product', 30), Column('Apartment', 30), Column('Vendor', 30),
+        Column('Priority', 10), Column('Status', 24), Column('Created Date', 12),
+    ]
+
+    def get_queryset(self):
+        issues = Issue.objects.filter(
+            created_at__date__gte=self.start_date,
+            created_at__date__lte=self.end_date
+        )
+        if self.apartment_id:
+            issues = issues.filter(apartment_id=self.apartment_id)
+        return issues.select_related('apartment', 'vendor').order_by('created_at')
+
+    def row(self, issue):
+        return [
+            issue.type, issue.product_name, issue.apartment.name if issue.apartment else 'N/A',
+            issue.vendor.name if issue.vendor else 'N/A', issue.priority, issue.resolution_status,
+            issue.created_at.date(),
+        ]
+
+
+REPORTS = {report.name: report for report in (OrdersReport, PaymentsReport, InventoryReport, ApartmentsReport, IssuesReport)}
+FORMATS = ('pdf', 'excel', 'csv')
+
+
+def get_report(report_type, **params):
+    """Instantiate a report by type, None for unknown types"""
+    report_class = REPORTS.get(report_type)
+    return report_class(**params) if report_class else None
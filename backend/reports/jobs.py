@@ -0,0 +1,251 @@
+"""
+Background rendering of reports to files.
+
+A ReportJob stores the report type, format and filters; the configured job
+backend runs run_report_job(job_id) outside the request/response cycle,
+which writes the report to a temporary file and stores it on the job.
+Clients poll the job and download the file once it is completed.
+
+Jobs run in the web process, so a recycled worker can take a job down with
+it; a heartbeat tells those apart from slow renders and reap_stale_report_jobs
+fails or re-queues them. Finished jobs and their files are deleted after
+REPORT_JOB_RETENTION_DAYS by delete_expired_report_jobs.
+"""
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .generators import get_report
+from .models import ReportJob
+from .writers import report_filename, write_report
+
+logger = logging.getLogger(__name__)
+
+DATE_PARAMETERS = ('start_date', 'end_date')
+
+
+def report_parameters(parameters):
+    """Report keyword arguments from the JSON stored on a job"""
+    params = dict(parameters)
+    for name in DATE_PARAMETERS:
+        if params.get(name):
+            params[name] = date.fromisoformat(params[name])
+    return params
+
+
+class JobHeartbeat:
+    """
+    Context manager touching the job's heartbeat_at every
+    REPORT_JOB_HEARTBEAT_INTERVAL seconds while it renders, so a job whose
+    worker died can be told from a large report that takes a while.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _beat(self):
+        interval = getattr(settings, 'REPORT_JOB_HEARTBEAT_INTERVAL', 30)
+        try:
+            while not self._stop.wait(interval):
+                try:
+                    ReportJob.objects.filter(pk=self.job_id, status='processing').update(heartbeat_at=timezone.now())
+                except Exception as e:
+                    logger.warning(f"Heartbeat of report job {self.job_id} failed: {str(e)}")
+        finally:
+            connection.close()  # This thread's connection
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._beat, name='report-job-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def claim_report_job(job_id):
+    """Move a pending job to processing; False if another worker claimed it first"""
+    now = timezone.now()
+    return ReportJob.objects.filter(pk=job_id, status='pending').update(
+        status='processing', started_at=now, heartbeat_at=now
+    ) == 1
+
+
+def run_report_job(job_id):
+    """Render the report described by a ReportJob into its file"""
+    close_old_connections()
+    try:
+        # A re-queued job may be submitted twice; only one submission renders it
+        if not claim_report_job(job_id):
+            logger.info(f"Report job {job_id} was already claimed, skipping")
+            return
+        job = ReportJob.objects.get(pk=job_id)
+
+        with JobHeartbeat(job_id):
+            report = get_report(job.report_type, **report_parameters(job.parameters))
+            file_name = report_filename(report, job.output_format)
+            with tempfile.TemporaryFile() as output:
+                row_count = write_report(report, job.output_format, output)
+                output.seek(0)
+                job.file.save(file_name, File(output), save=False)
+
+        job.file_name = file_name
+        job.row_count = row_count
+        job.status = 'completed'
+        job.completed_at = timezone.now()
+        job.save(update_fields=['file', 'file_name', 'row_count', 'status', 'completed_at'])
+        logger.info(f"Report job {job_id} completed: {row_count} rows in {file_name}")
+    except Exception as e:
+        logger.error(f"Report job {job_id} failed: {str(e)}", exc_info=True)
+        ReportJob.objects.filter(pk=job_id).update(status='failed', error=str(e), completed_at=timezone.now())
+    finally:
+        close_old_connections()
+
+
+def _stale_before():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'REPORT_JOB_STALE_AFTER', 300))
+
+
+def is_stale(job):
+    """Whether an unfinished job has not shown a heartbeat for REPORT_JOB_STALE_AFTER seconds"""
+    if job.is_finished:
+        return False
+    return (job.heartbeat_at or job.created_at) < _stale_before()
+
+
+def reap_stale_report_jobs(job_ids=None):
+    """
+    Recover jobs whose worker went away, e.g. because the web process
+    holding the job pool was recycled. Stale 'processing' jobs are marked
+    failed: they died part way. Stale 'pending' jobs were never picked up
+    and are submitted again. Returns (failed, requeued).
+    """
+    stale_before = _stale_before()
+    jobs = ReportJob.objects.all()
+    if job_ids is not None:
+        jobs = jobs.filter(pk__in=list(job_ids))
+    stale = Q(heartbeat_at__lt=stale_before) | Q(heartbeat_at__isnull=True, created_at__lt=stale_before)
+
+    failed = jobs.filter(stale, status='processing').update(
+        status='failed',
+        error='The report job stopped responding (its worker process exited); please request the report again',
+        completed_at=timezone.now(),
+    )
+    requeued = 0
+    for job_id in jobs.filter(stale, status='pending').values_list('pk', flat=True):
+        # Touch the job first, so concurrent reapers submit it only once per stale period
+        touched = ReportJob.objects.filter(stale, pk=job_id, status='pending').update(heartbeat_at=timezone.now())
+        if touched:
+            logger.warning(f"Re-queueing report job {job_id}: no worker picked it up")
+            get_report_job_backend().submit(str(job_id))
+            requeued += 1
+    if failed:
+        logger.warning(f"Marked {failed} stale report jobs as failed")
+    return failed, requeued
+
+
+def refresh_if_stale(job):
+    """Reap the job if it went stale and return its current state (used when clients poll it)"""
+    if is_stale(job):
+        reap_stale_report_jobs([job.pk])
+        job.refresh_from_db()
+    return job
+
+
+def delete_expired_report_jobs():
+    """
+    Delete finished jobs older than REPORT_JOB_RETENTION_DAYS together with
+    their rendered files. Returns the number of jobs deleted.
+    """
+    expired_before = timezone.now() - timedelta(days=getattr(settings, 'REPORT_JOB_RETENTION_DAYS', 7))
+    expired = ReportJob.objects.filter(status__in=['completed', 'failed'], created_at__lt=expired_before)
+    deleted = 0
+    for job in expired.only('id', 'file').iterator():
+        if job.file:
+            try:
+                job.file.delete(save=False)
+            except Exception as e:
+                logger.warning(f"Could not delete the file of report job {job.id}: {str(e)}")
+                continue
+        job.delete()
+        deleted += 1
+    if deleted:
+        logger.info(f"Deleted {deleted} expired report jobs")
+    return deleted
+
+
+class SyncReportJobBackend:
+    """Runs the job inline. Useful for development and tests."""
+
+    def submit(self, job_id):
+        run_report_job(job_id)
+
+
+class ThreadReportJobBackend:
+    """
+    Runs jobs on a small thread pool of the current process. Report
+    rendering mostly waits on the database and the file system, so threads
+    are enough, and REPORT_JOB_WORKERS bounds how many run at once.
+    """
+
+    def __init__(self, max_workers=None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or getattr(settings, 'REPORT_JOB_WORKERS', 2),
+            thread_name_prefix='report-job',
+        )
+
+    def submit(self, job_id):
+        self._executor.submit(run_report_job, job_id)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_report_job_backend():
+    """Return the process-wide job backend configured by REPORT_JOB_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_path = getattr(settings, 'REPORT_JOB_BACKEND', 'reports.jobs.ThreadReportJobBackend')
+            _backend = import_string(backend_path)()
+        return _backend
+
+
+def enqueue_report(job):
+    """Submit a ReportJob to the job backend once it is committed"""
+    job_id = str(job.id)
+    transaction.on_commit(lambda: get_report_job_backend().submit(job_id))
+    logger.info(f"Queued {job.report_type} report job {job_id} ({job.output_format})")
+
+
+def report_job_payload(request, job):
+    """Status snapshot of a report job, with the download URL once completed"""
+    payload = {
+        'job_id': str(job.id),
+        'report_type': job.report_type,
+        'format': job.output_format,
+        'parameters': job.parameters,
+        'status': job.status,
+        'row_count': job.row_count,
+        'error': job.error,
+        'created_at': job.created_at,
+        'completed_at': job.completed_at,
+        'status_url': request.build_absolute_uri(reverse('reports:report-job', args=[job.id])),
+        'download_url': None,
+    }
+    if job.status == 'completed':
+        payload['download_url'] = request.build_absolute_uri(reverse('reports:report-job-download', args=[job.id]))
+    return payload
@@ -0,0 +1,18 @@
+"""
+Management command to recover report jobs whose worker went away and to
+delete expired jobs with their files (see reports.jobs). Polling a job
+reaps it; run this from cron for the rest and for the retention cleanup.
+"""
+from django.core.management.base import BaseCommand
+from reports.jobs import delete_expired_report_jobs, reap_stale_report_jobs
+
+
+class Command(BaseCommand):
+    help = 'Fail or re-queue stale report jobs and delete expired ones with their files'
+
+    def handle(self, *args, **options):
+        failed, requeued = reap_stale_report_jobs()
+        deleted = delete_expired_report_jobs()
+        self.stdout.write(self.style.SUCCESS(
+            f'Marked {failed} stale report jobs as failed, re-queued {requeued} and deleted {deleted} expired'
+        ))
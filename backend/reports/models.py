@@ -1,3 +1,58 @@
+import uuid
+from django.conf import settings
 from django.db import models
 
-# Reports app doesn't need models - it generates reports from other apps' data
+
+class ReportJob(models.Model):
+    """
+    A report rendered to a file in the background (see reports.jobs),
+    for exports too large to generate within a request.
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        unique=True
+    )
+    
+    report_type = models.CharField(max_length=20)
+    output_format = models.CharField(max_length=10)
+    parameters = models.JSONField(default=dict, blank=True, help_text="Report filters (dates, apartment, vendor)")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='report_jobs'
+    )
+    
+    # Status
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True)
+    
+    # Output
+    file = models.FileField(upload_to='reports/%Y/%m/%d/', null=True, blank=True)
+    file_name = models.CharField(max_length=255, blank=True)
+    row_count = models.IntegerField(default=0)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last sign of life of the job running or re-queueing it")
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.report_type} report ({self.output_format}) - {self.status}"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
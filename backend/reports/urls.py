@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import ReportGeneratorView, ReportTemplatesView
+from .views import ReportGeneratorView, ReportTemplatesView, ReportJobView, ReportJobDownloadView
 
 app_name = 'reports'
 
 urlpatterns = [
     path('generate/', ReportGeneratorView.as_view(), name='generate-report'),
     path('templates/', ReportTemplatesView.as_view(), name='report-templates'),
+    path('jobs/<uuid:job_id>/', ReportJobView.as_view(), name='report-job'),
+    path('jobs/<uuid:job_id>/download/', ReportJobDownloadView.as_view(), name='report-job-download'),
 ]
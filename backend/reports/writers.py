@@ -0,0 +1,194 @@
+"""
+Output writers for reports.generators: CSV, Excel and PDF.
+
+- CSV is produced as a generator of encoded lines, so it can be streamed
+  with StreamingHttpResponse or written to a file.
+- Excel uses a write-only openpyxl workbook: rows are serialized as they
+  are appended instead of being kept as cell objects. Column widths come
+  from the report definition rather than a pass over every cell.
+- PDF splits the rows into tables of REPORT_PDF_TABLE_ROWS rows (repeating
+  the header), which keeps reportlab's table layout linear in the row count.
+
+Excel and PDF are written to a file object (a temporary file for
+downloads, the job's file for background reports).
+"""
+import csv
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+EXTENSIONS = {'csv': 'csv', 'excel': 'xlsx', 'pdf': 'pdf'}
+
+
+def report_filename(report, output_format):
+    return f'{report.name}_report_{datetime.now().strftime("%Y%m%d")}.{EXTENSIONS[output_format]}'
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def _money(value):
+    return f'€{value or 0:,.2f}'
+
+
+class _LineBuffer:
+    """File-like object handing back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(report):
+    """Encoded CSV lines: header, then one line per row"""
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(report.headers).encode('utf-8')
+    for row in report.rows():
+        yield writer.writerow([_text(value) for value in row]).encode('utf-8')
+
+
+def write_csv(report, file):
+    """Write the report as CSV; returns the number of data rows"""
+    lines = iter_csv(report)
+    file.write(next(lines))
+    count = 0
+    for line in lines:
+        file.write(line)
+        count += 1
+    return count
+
+
+def write_excel(report, file):
+    """Write the report as an .xlsx workbook; returns the number of data rows"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(report.title[:31])
+    for index, column in enumerate(report.columns, 1):
+        ws.column_dimensions[get_column_letter(index)].width = column.width
+
+    def styled(value, **style):
+        cell = WriteOnlyCell(ws, value=value)
+        for key, attr in style.items():
+            setattr(cell, key, attr)
+        return cell
+
+    ws.append([styled(report.title, font=Font(size=16, bold=True))])
+    ws.append([report.subtitle])
+    ws.append([])
+    ws.append([styled('Summary', font=Font(bold=True))])
+    for label, value in report.summary():
+        ws.append([label, value])
+    ws.append([])
+
+    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+    header_font = Font(color='FFFFFF', bold=True)
+    ws.append([styled(header, font=header_font, fill=header_fill) for header in report.headers])
+
+    count = 0
+    for row in report.rows():
+        ws.append([float(value) if isinstance(value, Decimal) else value for value in row])
+        count += 1
+
+    wb.save(file)
+    return count
+
+
+def _pdf_cells(report, row):
+    cells = []
+    for column, value in zip(report.columns, row):
+        text = _money(value) if column.money else _text(value)
+        cells.append(text[:max(int(column.width * 0.8), 8)])
+    return cells
+
+
+def write_pdf(report, file):
+    """Write the report as a PDF; returns the number of data rows"""
+    chunk_rows = max(getattr(settings, 'REPORT_PDF_TABLE_ROWS', 250), 1)
+    col_widths = [column.width * 0.075 * inch for column in report.columns]
+    pagesize = landscape(letter) if sum(col_widths) > 7.5 * inch else letter
+    doc = SimpleDocTemplate(file, pagesize=pagesize)
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#2C3E50'),
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+    elements = [Paragraph(report.title, title_style)]
+    if report.subtitle:
+        elements.append(Paragraph(report.subtitle, styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    summary_data = []
+    for label, value in report.summary():
+        summary_data.append([label, _money(value) if isinstance(value, Decimal) else str(value)])
+    summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 30))
+
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ])
+
+    def table(rows):
+        chunk = Table([report.headers] + rows, colWidths=col_widths, repeatRows=1)
+        chunk.setStyle(table_style)
+        return chunk
+
+    count = 0
+    rows = []
+    for row in report.rows():
+        rows.append(_pdf_cells(report, row))
+        count += 1
+        if len(rows) >= chunk_rows:
+            elements.append(table(rows))
+            rows = []
+    if rows or not count:
+        elements.append(table(rows))
+
+    doc.build(elements)
+    return count
+
+
+WRITERS = {'csv': write_csv, 'excel': write_excel, 'pdf': write_pdf}
+
+
+def write_report(report, output_format, file):
+    """Write a report in the given format to a binary file object; returns the row count"""
+    return WRITERS[output_format](report, file)
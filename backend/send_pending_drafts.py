@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 """
-Script to send pending AI draft replies
+Script to queue pending AI draft replies (sent by: python manage.py process_email_outbox)
 Usage: python send_pending_drafts.py
 """
 import os
@@ -16,7 +16,7 @@ from issues.email_service import email_service
 from django.conf import settings
 
 def send_pending_drafts():
-    """Send all pending AI draft replies"""
+    """Queue all pending AI draft replies in the outbox"""
     
     # Get all pending drafts
     pending_drafts = AICommunicationLog.objects.filter(
@@ -53,27 +53,27 @@ def send_pending_drafts():
             subject = f"Re: [Issue #{issue.id}] {draft.subject}"
             body = f"{draft.message}\n\n---\nReference: Issue #{issue.id}\nPlease keep this reference in your reply."
             
-            # Send email
-            print(f"📧 Sending email...")
+            # Queue email
+            print(f"📧 Queueing email...")
             email_message_id = email_service.send_issue_email(issue, subject, body)
             
-            # Update draft status to sent
+            # The queued email has its own log entry; retire the draft
             draft.status = 'sent'
             draft.email_message_id = email_message_id
             draft.save()
             
-            print(f"✅ Sent successfully! Message ID: {email_message_id}")
+            print(f"✅ Queued successfully! Message ID: {email_message_id}")
             sent_count += 1
             
         except Exception as e:
-            print(f"❌ Failed to send draft {draft.id}: {e}")
+            print(f"❌ Failed to queue draft {draft.id}: {e}")
             import traceback
             traceback.print_exc()
             failed_count += 1
     
     print(f"\n{'='*60}")
     print(f"Summary:")
-    print(f"  ✅ Sent: {sent_count}")
+    print(f"  ✅ Queued: {sent_count}")
     print(f"  ❌ Failed: {failed_count}")
     print(f"  📝 Total: {pending_drafts.count()}")
     
@@ -81,14 +81,14 @@ def send_pending_drafts():
 
 if __name__ == '__main__':
     print("="*60)
-    print("  Sending Pending AI Draft Replies")
+    print("  Queueing Pending AI Draft Replies")
     print("="*60)
     
     sent = send_pending_drafts()
     
     if sent > 0:
-        print(f"\n🎉 Successfully sent {sent} draft reply(ies)!")
+        print(f"\n🎉 Queued {sent} draft reply(ies) for the outbox worker!")
     else:
-        print("\nℹ️  No drafts were sent.")
+        print("\nℹ️  No drafts were queued.")
     
     sys.exit(0)
@@ -0,0 +1,116 @@
+"""
+Response cache for OpenAI chat completions.
+
+Identical requests (same model, messages and parameters) come up often:
+re-clicking "generate reply", re-processing a vendor email that was already
+seen, re-summarizing a thread that has not changed. cached_completion()
+keys the completion text on a SHA-256 digest of the full request, so the
+conversation history is part of the key, and keeps it for AI_CACHE_TTL
+seconds.
+
+- Entries live in the AI_CACHE_ALIAS cache. By default that is a LocMemCache
+  bounded to AI_CACHE_MAX_ENTRIES, evicting the least recently used entries
+  first. Point AI_CACHE_BACKEND at Redis to share entries across processes.
+- Concurrent identical requests in a process are coalesced: the first
+  caller calls the API and the others wait for its result.
+- Hit / miss / coalesced counts and the time spent on API calls are kept per
+  call type and process (see cache_metrics()).
+"""
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = 'ai'
+OUTCOMES = ('hit', 'miss', 'coalesced')
+CALL_TYPES = ('issue_email', 'draft_reply', 'analyze_reply', 'conversation_summary', 'enhance_text')
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+# Counters live in the process rather than the size-bounded cache, where they would be evicted
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[getattr(settings, 'AI_CACHE_ALIAS', 'ai')]
+
+
+def completion_key(params):
+    """Digest of a chat completion request: model, messages and sampling parameters"""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return f'{KEY_PREFIX}:completion:{hashlib.sha256(payload.encode("utf-8")).hexdigest()}'
+
+
+def _record(name, outcome, elapsed=None):
+    with _metrics_lock:
+        counts = _metrics.setdefault(name, dict.fromkeys(OUTCOMES + ('api_seconds',), 0))
+        counts[outcome] += 1
+        if elapsed is not None:
+            counts['api_seconds'] += elapsed
+
+
+def cache_metrics(names=None):
+    """{call type: {'hit': n, 'miss': n, 'coalesced': n, 'hit_ratio': 0..1, 'avg_api_ms': ms}} for this process"""
+    metrics = {}
+    with _metrics_lock:
+        for name in names or CALL_TYPES:
+            counts = dict(_metrics.get(name) or dict.fromkeys(OUTCOMES + ('api_seconds',), 0))
+            api_seconds = counts.pop('api_seconds')
+            total = sum(counts.values())
+            counts['hit_ratio'] = round((counts['hit'] + counts['coalesced']) / total, 3) if total else 0
+            counts['avg_api_ms'] = round(api_seconds * 1000 / counts['miss']) if counts['miss'] else 0
+            metrics[name] = counts
+    return metrics
+
+
+def _create(client, params):
+    response = client.chat.completions.create(**params)
+    return response.choices[0].message.content
+
+
+def cached_completion(name, client, **params):
+    """
+    Content of client.chat.completions.create(**params), served from the
+    cache when the same request was answered within AI_CACHE_TTL. Blocking;
+    `name` is the call type the metrics are counted under.
+    """
+    if not getattr(settings, 'AI_CACHE_ENABLED', True):
+        return _create(client, params)
+
+    cache = get_cache()
+    key = completion_key(params)
+    content = cache.get(key)
+    if content is not None:
+        _record(name, 'hit')
+        return content
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+
+    if not leader:
+        _record(name, 'coalesced')
+        return future.result()
+
+    try:
+        start = time.perf_counter()
+        content = _create(client, params)
+        elapsed = time.perf_counter() - start
+        if content:
+            cache.set(key, content, timeout=getattr(settings, 'AI_CACHE_TTL', 3600))
+        _record(name, 'miss', elapsed)
+        future.set_result(content)
+        return content
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
@@ -6,6 +6,8 @@ import os
 from openai import OpenAI
 from django.conf import settings
 
+from .ai_cache import cached_completion
+
 
 class AITextEnhancer:
     """Utility class for enhancing text using OpenAI"""
@@ -42,7 +44,9 @@ class AITextEnhancer:
         prompt = prompts.get(enhancement_type, prompts["improve"])
         
         try:
-            response = self.client.chat.completions.create(
+            enhanced_text = cached_completion(
+                'enhance_text',
+                self.client,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that enhances text. Always return only the enhanced text without any explanations or additional commentary."},
@@ -52,7 +56,7 @@ class AITextEnhancer:
                 max_tokens=500
             )
             
-            enhanced_text = response.choices[0].message.content.strip()
+            enhanced_text = (enhanced_text or '').strip()
             # Remove quotes if the AI wrapped the response in them
             if enhanced_text.startswith('"') and enhanced_text.endswith('"'):
                 enhanced_text = enhanced_text[1:-1]
@@ -5,6 +5,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from .ai_cache import cache_metrics
 from .ai_text_enhancer import get_text_enhancer
 
 
@@ -56,3 +57,15 @@ def enhance_text(request):
             {'error': f'Failed to enhance text: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def ai_cache_metrics(request):
+    """
+    Hit / miss / coalesced counts of the AI response cache per call type,
+    with the average duration of the API calls that were made
+    
+    GET /api/utils/ai-cache-metrics/
+    """
+    return Response(cache_metrics())
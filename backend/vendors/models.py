@@ -1,7 +1,74 @@
 import uuid
+from decimal import Decimal
 from django.db import models
+from django.db.models import Count, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import EmailValidator, URLValidator
 
+# Rows of each related list embedded in the vendor detail
+DETAIL_LIST_LIMIT = 50
+
+
+def _per_vendor(queryset, aggregate, output_field):
+    """Correlated subquery of `aggregate` over the rows of `queryset` belonging to the outer vendor"""
+    values = (
+        queryset.filter(vendor=OuterRef('pk')).order_by()
+        .values('vendor').annotate(value=aggregate).values('value')
+    )
+    return Subquery(values, output_field=output_field)
+
+
+class VendorQuerySet(models.QuerySet):
+    """
+    Related counts and totals as subquery annotations, so a page of vendors
+    is one query instead of one count per vendor and field. Subqueries
+    rather than joins, which would multiply orders by issues.
+    """
+
+    def with_counts(self):
+        """orders_count_annotated / active_issues_annotated, as read by the vendor serializers"""
+        from orders.models import Order
+        from issues.models import Issue
+
+        return self.annotate(
+            orders_count_annotated=Coalesce(_per_vendor(Order.objects.all(), Count('pk'), models.IntegerField()), 0),
+            active_issues_annotated=Coalesce(
+                _per_vendor(Issue.objects.exclude(status='Closed'), Count('pk'), models.IntegerField()), 0
+            ),
+        )
+
+    def with_detail(self, limit=DETAIL_LIST_LIMIT):
+        """
+        with_counts() plus the product count and order total, and the first
+        `limit` products, orders, issues and payments of each vendor
+        (detail_products, ...) fetched by one windowed query per relation.
+        """
+        from orders.models import Order
+        from issues.models import Issue
+        from payments.models import Payment
+        from products.models import Product
+
+        total = models.DecimalField(max_digits=14, decimal_places=2)
+        return self.with_counts().annotate(
+            products_count_annotated=Coalesce(_per_vendor(Product.objects.all(), Count('pk'), models.IntegerField()), 0),
+            orders_total_value_annotated=Coalesce(
+                _per_vendor(Order.objects.all(), Sum('total'), total), Value(Decimal('0')), output_field=total
+            ),
+        ).prefetch_related(
+            Prefetch(
+                'products',
+                queryset=Product.objects.select_related('apartment').only(
+                    'id', 'vendor', 'product', 'unit_price', 'qty', 'availability', 'status', 'apartment__name'
+                )[:limit],
+                to_attr='detail_products',
+            ),
+            Prefetch('orders', queryset=Order.objects.select_related('apartment')[:limit], to_attr='detail_orders'),
+            Prefetch(
+                'issues', queryset=Issue.objects.select_related('apartment', 'product')[:limit], to_attr='detail_issues'
+            ),
+            Prefetch('payments', queryset=Payment.objects.select_related('apartment')[:limit], to_attr='detail_payments'),
+        )
+
 
 class Vendor(models.Model):
     # Secure UUID Primary Key
@@ -13,6 +80,8 @@ class Vendor(models.Model):
         help_text="Unique UUID identifier for security"
     )
     
+    objects = VendorQuerySet.as_manager()
+    
     name = models.CharField(max_length=255)
     company_name = models.CharField(max_length=255, blank=True)
     contact_person = models.CharField(max_length=255, blank=True)
@@ -48,10 +48,16 @@ class VendorSerializer(serializers.ModelSerializer):
     
     def get_orders_count(self, obj):
         """Get actual count of orders for this vendor"""
+        # Use annotated value if available (from list serializer optimization)
+        if hasattr(obj, 'orders_count_annotated'):
+            return obj.orders_count_annotated
         return obj.orders.count()
     
     def get_active_issues(self, obj):
         """Get count of open/active issues for this vendor"""
+        # Use annotated value if available (from list serializer optimization)
+        if hasattr(obj, 'active_issues_annotated'):
+            return obj.active_issues_annotated
         return obj.issues.exclude(status='Closed').count()
 
 
@@ -75,8 +81,14 @@ class VendorListSerializer(serializers.ModelSerializer):
     
     def get_orders_count(self, obj):
         """Get actual count of orders for this vendor"""
+        # Use annotated value if available (from list serializer optimization)
+        if hasattr(obj, 'orders_count_annotated'):
+            return obj.orders_count_annotated
         return obj.orders.count()
     
     def get_active_issues(self, obj):
         """Get count of open/active issues for this vendor"""
+        # Use annotated value if available (from list serializer optimization)
+        if hasattr(obj, 'active_issues_annotated'):
+            return obj.active_issues_annotated
         return obj.issues.exclude(status='Closed').count()
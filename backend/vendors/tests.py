@@ -0,0 +1,76 @@
+import datetime
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apartments.models import Apartment
+from clients.models import Client
+from issues.models import Issue
+from orders.models import Order
+from products.models import Product
+from .models import Vendor
+
+
+class VendorQueryCountTests(TestCase):
+    """Vendor endpoints run a fixed number of queries, however many vendors and related rows exist"""
+
+    VENDOR_COUNT = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+        today = datetime.date.today()
+        client = Client.objects.create(name='Client', email='client@example.com')
+        apartment = Apartment.objects.create(
+            name='Apartment', client=client, address='Address', start_date=today, due_date=today
+        )
+        vendors = Vendor.objects.bulk_create([
+            Vendor(name=f'Vendor {i:03d}', email=f'vendor{i}@example.com') for i in range(cls.VENDOR_COUNT)
+        ])
+        Product.objects.bulk_create([
+            Product(apartment=apartment, vendor=vendor, product=f'{vendor.name} product {j}', unit_price=Decimal('10.00'))
+            for vendor in vendors for j in range(3)
+        ])
+        Order.objects.bulk_create([
+            Order(
+                po_number=f'PO-{i}-{j}', apartment=apartment, vendor=vendor, total=Decimal('100.00'),
+                placed_on=today, status='delivered' if j else 'sent',
+                expected_delivery=today, actual_delivery=today,
+            )
+            for i, vendor in enumerate(vendors) for j in range(2)
+        ])
+        Issue.objects.bulk_create([
+            Issue(apartment=apartment, vendor=vendor, type='Damaged', description='Broken', status=status)
+            for vendor in vendors for status in ('Open', 'Closed')
+        ])
+        cls.vendor = vendors[0]
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_list(self):
+        # The count, then the annotated page
+        with self.assertNumQueries(2):
+            response = self.api.get('/api/vendors/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], self.VENDOR_COUNT)
+        vendor = response.data['results'][0]
+        self.assertEqual((vendor['orders_count'], vendor['active_issues']), (2, 1))
+
+    def test_retrieve(self):
+        # The vendor, then its products, orders, issues and payments
+        with self.assertNumQueries(5):
+            response = self.api.get(f'/api/vendors/{self.vendor.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['products']), 3)
+
+    def test_statistics(self):
+        # The vendor, then one aggregate per related model
+        with self.assertNumQueries(5):
+            response = self.api.get(f'/api/vendors/{self.vendor.id}/statistics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['orders'], {'total': 2, 'delivered': 1, 'total_value': 200.0})
+        self.assertEqual(response.data['issues'], {'total': 2, 'open': 1})
@@ -3,7 +3,14 @@ Specialized serializers for VendorView frontend page
 These serializers provide data in the exact format expected by the VendorView.tsx component
 """
 from rest_framework import serializers
-from .models import Vendor
+from .models import DETAIL_LIST_LIMIT, Vendor
+
+
+def _detail_list(vendor, attr, queryset):
+    """Rows prefetched by Vendor.objects.with_detail(), else the first DETAIL_LIST_LIMIT of `queryset()`"""
+    if hasattr(vendor, attr):
+        return getattr(vendor, attr)
+    return queryset()[:DETAIL_LIST_LIMIT]  # Limit for performance
 
 
 class VendorViewProductSerializer(serializers.Serializer):
@@ -101,7 +108,7 @@ class VendorViewDetailSerializer(serializers.ModelSerializer):
     
     def get_products(self, obj):
         """Get vendor products in frontend format"""
-        products = obj.products.select_related('apartment').all()[:50]  # Limit for performance
+        products = _detail_list(obj, 'detail_products', lambda: obj.products.select_related('apartment').all())
         return [
             {
                 'id': str(product.id),
@@ -117,7 +124,7 @@ class VendorViewDetailSerializer(serializers.ModelSerializer):
     
     def get_orders(self, obj):
         """Get vendor orders in frontend format"""
-        orders = obj.orders.select_related('apartment').all()[:50]  # Limit for performance
+        orders = _detail_list(obj, 'detail_orders', lambda: obj.orders.select_related('apartment').all())
         return [
             {
                 'id': str(order.id),
@@ -133,7 +140,7 @@ class VendorViewDetailSerializer(serializers.ModelSerializer):
     
     def get_issues(self, obj):
         """Get vendor issues in frontend format"""
-        issues = obj.issues.select_related('apartment', 'product').all()[:50]  # Limit for performance
+        issues = _detail_list(obj, 'detail_issues', lambda: obj.issues.select_related('apartment', 'product').all())
         return [
             {
                 'id': str(issue.id),
@@ -149,7 +156,7 @@ class VendorViewDetailSerializer(serializers.ModelSerializer):
     
     def get_payments(self, obj):
         """Get vendor payments in frontend format"""
-        payments = obj.payments.select_related('apartment').all()[:50]  # Limit for performance
+        payments = _detail_list(obj, 'detail_payments', lambda: obj.payments.select_related('apartment').all())
         return [
             {
                 'id': str(payment.id),
@@ -165,18 +172,28 @@ class VendorViewDetailSerializer(serializers.ModelSerializer):
     
     def get_orders_count(self, obj):
         """Get actual count of orders for this vendor"""
+        # Use annotated value if available (from Vendor.objects.with_detail())
+        if hasattr(obj, 'orders_count_annotated'):
+            return obj.orders_count_annotated
         return obj.orders.count()
     
     def get_active_issues(self, obj):
         """Get count of open/active issues for this vendor"""
+        if hasattr(obj, 'active_issues_annotated'):
+            return obj.active_issues_annotated
         return obj.issues.exclude(status='Closed').count()
     
     def get_products_count(self, obj):
         """Get total products count"""
+        if hasattr(obj, 'products_count_annotated'):
+            return obj.products_count_annotated
         return obj.products.count()
     
     def get_orders_total_value(self, obj):
         """Get total value of all orders"""
-        from django.db.models import Sum
-        total = obj.orders.aggregate(total=Sum('total'))['total']
+        if hasattr(obj, 'orders_total_value_annotated'):
+            total = obj.orders_total_value_annotated
+        else:
+            from django.db.models import Sum
+            total = obj.orders.aggregate(total=Sum('total'))['total']
         return float(total) if total else 0.0
@@ -2,7 +2,8 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Sum, Avg, F
+from django.db.models import Count, Sum, Avg, F, Q
+from config.query_stats import QueryDebugHeadersMixin
 from config.swagger_utils import add_viewset_tags
 from .models import Vendor
 from .serializers import VendorSerializer
@@ -10,7 +11,7 @@ from .vendor_view_serializers import VendorViewDetailSerializer
 
 
 @add_viewset_tags('Vendors', 'Vendor')
-class VendorViewSet(viewsets.ModelViewSet):
+class VendorViewSet(QueryDebugHeadersMixin, viewsets.ModelViewSet):
     queryset = Vendor.objects.all()
     serializer_class = VendorSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -18,6 +19,17 @@ class VendorViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name', 'created_at', 'reliability', 'orders_count']
     ordering = ['name']
     
+    def get_queryset(self):
+        """
+        Annotate related counts (and for the detail view, totals and the
+        embedded lists) so serializing vendors runs no per-vendor queries
+        """
+        if self.action == 'retrieve':
+            return Vendor.objects.with_detail()
+        if self.action in ('list', 'update', 'partial_update'):
+            return Vendor.objects.with_counts()
+        return Vendor.objects.all()
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return VendorViewDetailSerializer
@@ -73,40 +85,56 @@ class VendorViewSet(viewsets.ModelViewSet):
         Get comprehensive statistics for this vendor
         """
         vendor = self.get_object()
+        from products.models import ProductTag
+        
+        # One aggregate per related model
+        delivered_tags = ProductTag.objects.filter(kind=ProductTag.STATUS, tag='Delivered')
+        product_stats = vendor.products.aggregate(
+            count=Count('pk'),
+            delivered=Count('pk', filter=Q(pk__in=delivered_tags.values('product'))),
+            with_issues=Count('pk', filter=~Q(issue_state='No Issue')),
+        )
+        order_stats = vendor.orders.aggregate(
+            count=Count('pk'),
+            delivered=Count('pk', filter=Q(status='delivered')),
+            on_time=Count('pk', filter=Q(status='delivered', actual_delivery__lte=F('expected_delivery'))),
+            total_value=Sum('total'),
+        )
+        payment_stats = vendor.payments.aggregate(
+            count=Count('pk'),
+            paid=Count('pk', filter=Q(status='Paid')),
+            billed=Sum('total_amount'),
+            received=Sum('amount_paid'),
+        )
+        issue_stats = vendor.issues.aggregate(
+            count=Count('pk'),
+            open=Count('pk', filter=~Q(status='Closed')),
+        )
         
         # Product statistics
-        products = vendor.products.all()
-        total_products = products.count()
-        delivered_products = products.filter(status='Delivered').count()
-        products_with_issues = products.exclude(issue_state='No Issue').count()
+        total_products = product_stats['count']
+        delivered_products = product_stats['delivered']
+        products_with_issues = product_stats['with_issues']
         
         # Order statistics
-        orders = vendor.orders.all()
-        total_orders = orders.count()
-        delivered_orders = orders.filter(status='delivered').count()
-        total_order_value = orders.aggregate(total=Sum('total'))['total'] or 0
+        total_orders = order_stats['count']
+        delivered_orders = order_stats['delivered']
+        total_order_value = order_stats['total_value'] or 0
         
         # Payment statistics
-        payments = vendor.payments.all()
-        total_payments = payments.count()
-        paid_payments = payments.filter(status='Paid').count()
-        total_payment_amount = payments.aggregate(total=Sum('total_amount'))['total'] or 0
-        outstanding_amount = payments.aggregate(total=Sum('total_amount'))['total'] or 0
-        outstanding_amount -= payments.aggregate(total=Sum('amount_paid'))['total'] or 0
+        total_payments = payment_stats['count']
+        paid_payments = payment_stats['paid']
+        total_payment_amount = payment_stats['billed'] or 0
+        outstanding_amount = total_payment_amount - (payment_stats['received'] or 0)
         
         # Issue statistics
-        issues = vendor.issues.all()
-        total_issues = issues.count()
-        open_issues = issues.exclude(status='Closed').count()
+        total_issues = issue_stats['count']
+        open_issues = issue_stats['open']
         
         # Performance metrics
         on_time_delivery_rate = 0
         if delivered_orders > 0:
-            on_time_orders = orders.filter(
-                status='delivered',
-                actual_delivery__lte=F('expected_delivery')
-            ).count()
-            on_time_delivery_rate = (on_time_orders / delivered_orders) * 100
+            on_time_delivery_rate = (order_stats['on_time'] / delivered_orders) * 100
         
         return Response({
             'vendor_info': {
@@ -157,7 +185,7 @@ class VendorViewSet(viewsets.ModelViewSet):
         
         # Convert URL-friendly name back to actual name
         search_name = name.replace('-', ' ')
-        vendor = Vendor.objects.filter(name__iexact=search_name).first()
+        vendor = Vendor.objects.with_detail().filter(name__iexact=search_name).first()
         
         if not vendor:
             return Response(
@@ -17,6 +17,23 @@ module.exports = {
       max_restarts: 10,
       min_uptime: '10s'
     },
+    {
+      name: 'buy2rent-events',
+      cwd: '/root/buy2rent/backend',
+      script: '/root/buy2rent/backend/myenv/bin/gunicorn',
+      args: 'config.asgi:application --worker-class uvicorn.workers.UvicornWorker --bind 127.0.0.1:8001 --workers 1 --timeout 120',
+      interpreter: 'none',
+      env: {
+        DJANGO_SETTINGS_MODULE: 'config.settings',
+        PYTHONPATH: '/root/buy2rent/backend'
+      },
+      error_file: '/root/buy2rent/logs/events-error.log',
+      out_file: '/root/buy2rent/logs/events-out.log',
+      log_date_format: 'YYYY-MM-DD HH:mm:ss Z',
+      autorestart: true,
+      max_restarts: 10,
+      min_uptime: '10s'
+    },
     {
       name: 'buy2rent-frontend',
       cwd: '/root/buy2rent/frontend',
@@ -46,6 +63,21 @@ module.exports = {
       autorestart: true,
       max_restarts: 10,
       min_uptime: '10s'
+    },
+    {
+      name: 'email-outbox',
+      cwd: '/root/buy2rent/backend',
+      script: './email_outbox_pm2.sh',
+      interpreter: 'bash',
+      env: {
+        DJANGO_SETTINGS_MODULE: 'config.settings'
+      },
+      error_file: '/root/buy2rent/logs/email-outbox-error.log',
+      out_file: '/root/buy2rent/logs/email-outbox-out.log',
+      log_date_format: 'YYYY-MM-DD HH:mm:ss Z',
+      autorestart: true,
+      max_restarts: 10,
+      min_uptime: '10s'
     }
   ]
 };
@@ -81,11 +81,11 @@ echo "Step 5: Installing Gunicorn..."
 cd $PROJECT_DIR/backend
 if [ -d "myenv" ]; then
     source myenv/bin/activate
-    pip install gunicorn
+    pip install gunicorn uvicorn
     echo "✅ Gunicorn installed"
 else
     echo "⚠️  Virtual environment not found, installing globally"
-    pip3 install gunicorn
+    pip3 install gunicorn uvicorn
 fi
 echo ""
 
@@ -96,6 +96,10 @@ upstream backend {
     server 127.0.0.1:8000;
 }
 
+upstream events {
+    server 127.0.0.1:8001;
+}
+
 upstream frontend {
     server 127.0.0.1:5173;
 }
@@ -116,6 +120,20 @@ server {
         proxy_set_header X-Forwarded-Proto $scheme;
     }
     
+    # Live event stream, served by the ASGI app; kept open and unbuffered
+    location /api/events/ {
+        proxy_pass http://events;
+        proxy_http_version 1.1;
+        proxy_set_header Connection '';
+        proxy_set_header Host $host;
+        proxy_set_header X-Real-IP $remote_addr;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto $scheme;
+        proxy_buffering off;
+        proxy_cache off;
+        proxy_read_timeout 3700s;
+    }
+
     location /api/ {
         proxy_pass http://backend;
         proxy_http_version 1.1;
@@ -235,6 +253,23 @@ module.exports = {
       max_restarts: 10,
       min_uptime: '10s'
     },
+    {
+      name: 'buy2rent-events',
+      cwd: '/root/buy2rent/backend',
+      script: '/root/buy2rent/backend/myenv/bin/gunicorn',
+      args: 'config.asgi:application --worker-class uvicorn.workers.UvicornWorker --bind 127.0.0.1:8001 --workers 1 --timeout 120',
+      interpreter: 'none',
+      env: {
+        DJANGO_SETTINGS_MODULE: 'config.settings',
+        PYTHONPATH: '/root/buy2rent/backend'
+      },
+      error_file: '/root/buy2rent/logs/events-error.log',
+      out_file: '/root/buy2rent/logs/events-out.log',
+      log_date_format: 'YYYY-MM-DD HH:mm:ss Z',
+      autorestart: true,
+      max_restarts: 10,
+      min_uptime: '10s'
+    },
     {
       name: 'buy2rent-frontend',
       cwd: '/root/buy2rent/frontend',